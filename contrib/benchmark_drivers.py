@@ -0,0 +1,702 @@
+#!/usr/bin/env python
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Offline benchmark which measures the client side cost (request building and
+signing, response parsing and object construction) of common driver
+operations.
+
+Test fixtures are scaled up to the requested number of items (nodes, images,
+objects, records) and replayed through the real drivers using a mock HTTP
+connection, so no network access or credentials are needed.
+
+For each operation the median and the minimum duration, the number of
+requests, the number and size of the memory blocks allocated by the
+operation (which are still referenced once it returns) and the peak memory
+usage are reported. Results can be saved and compared with a previous run.
+
+Usage: python contrib/benchmark_drivers.py [--scale N] [--repeat N]
+                                           [--output FILE] [--compare FILE]
+                                           [operation ...]
+"""
+
+from __future__ import with_statement
+
+import os
+import re
+import sys
+import copy
+import json
+import time
+import platform
+import tempfile
+import argparse
+import datetime
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python < 3.4
+    tracemalloc = None
+
+try:
+    from lxml import etree as ET
+except ImportError:
+    from xml.etree import ElementTree as ET
+
+this_dir = os.path.abspath(os.path.split(__file__)[0])
+sys.path.insert(0, os.path.join(this_dir, '../'))
+
+import libcloud
+from libcloud.utils.py3 import httplib
+from libcloud.utils.py3 import urlparse
+from libcloud.utils.py3 import parse_qs
+from libcloud.test import StorageMockHttp
+from libcloud.test.file_fixtures import ComputeFileFixtures
+from libcloud.test.file_fixtures import StorageFileFixtures
+from libcloud.test.file_fixtures import DNSFileFixtures
+from libcloud.common.google import _utc_timestamp
+from libcloud.compute.drivers.ec2 import EC2NodeDriver
+from libcloud.compute.drivers.gce import API_VERSION as GCE_API_VERSION
+from libcloud.compute.drivers.gce import GCENodeDriver
+from libcloud.compute.drivers.openstack import OpenStack_1_1_NodeDriver
+from libcloud.storage.base import Container
+from libcloud.storage.drivers.s3 import S3StorageDriver
+from libcloud.dns.base import Zone
+from libcloud.dns.drivers.route53 import Route53DNSDriver
+
+# Default number of items (nodes, images, objects, records) in the scaled up
+# responses
+DEFAULT_SCALE = 2000
+
+# Default number of timed runs of each operation
+DEFAULT_REPEAT = 5
+
+# Default relative slowdown (or memory usage increase) which is reported as
+# a regression when comparing the results
+DEFAULT_THRESHOLD = 0.1
+
+JSON_HEADERS = {'content-type': 'application/json; charset=UTF-8'}
+XML_HEADERS = {'content-type': 'application/xml'}
+
+
+class ReplayMockHttp(StorageMockHttp):
+    """
+    Mock connection which replays the responses registered by the current
+    benchmark case.
+
+    Responses are looked up by the value of the ``Action`` query parameter
+    (EC2) or by the request path.
+    """
+
+    responses = {}
+    request_count = 0
+
+    def _get_method_name(self, type, use_param, qs, path):
+        return '_replay'
+
+    def putrequest(self, method, url, skip_host=0, skip_accept_encoding=0):
+        self._raw_request = (method, url)
+
+    def endheaders(self):
+        method, url = self._raw_request
+        self.request(method, url)
+
+    def _replay(self, method, url, body, headers):
+        ReplayMockHttp.request_count += 1
+
+        parsed = urlparse.urlparse(url)
+        qs = parse_qs(parsed.query)
+        keys = [parsed.path.rstrip('/')]
+
+        if 'Action' in qs:
+            keys.insert(0, qs['Action'][0])
+
+        for key in keys:
+            response = self.responses.get(key, None)
+
+            if response is not None:
+                status, body, headers = response
+                return (status, body, headers, httplib.responses[status])
+
+        raise ValueError('No response registered for %s %s' % (method, url))
+
+
+def ok(body, headers=None):
+    return (httplib.OK, body, headers or {})
+
+
+def scale_xml(body, parent_path, tag, count, update):
+    """
+    Replace the ``tag`` children of the element at ``parent_path`` (None
+    means the root element) with ``count`` copies of the first one.
+
+    :param update: Function which is called with the index, the copy of the
+                   child and the document namespace and makes the copy
+                   unique.
+    :type update: ``callable``
+    """
+    root = ET.fromstring(body.strip().encode('utf-8'))
+    namespace = re.match(r'\{(.*?)\}', root.tag)
+    namespace = namespace.group(1) if namespace else None
+
+    if namespace:
+        ET.register_namespace('', namespace)
+
+    parent = root if parent_path is None else \
+        root.find(qualify(parent_path, namespace))
+    children = parent.findall(qualify(tag, namespace))
+    position = list(parent).index(children[0])
+
+    for child in children:
+        parent.remove(child)
+
+    for index in range(count):
+        item = copy.deepcopy(children[0])
+        update(index, item, namespace)
+        parent.insert(position + index, item)
+
+    return ET.tostring(root).decode('utf-8')
+
+
+def qualify(path, namespace):
+    if not namespace:
+        return path
+
+    return '/'.join(['{%s}%s' % (namespace, tag) for tag in path.split('/')])
+
+
+def set_text(element, path, namespace, value):
+    element.find(qualify(path, namespace)).text = value
+
+
+class BenchmarkCase(object):
+    """
+    Driver operation which is benchmarked.
+
+    ``setup`` is called once and registers the scaled up responses and
+    creates the driver, ``run`` performs the benchmarked operation and
+    returns its result.
+    """
+
+    name = None
+    description = None
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    def setup(self):
+        pass
+
+    def run(self):
+        raise NotImplementedError('run not implemented for this case')
+
+    def teardown(self):
+        pass
+
+
+class EC2ListNodesCase(BenchmarkCase):
+    name = 'ec2.list_nodes'
+    description = 'DescribeInstances and DescribeAddresses'
+
+    def setup(self):
+        fixtures = ComputeFileFixtures('ec2')
+
+        def update_instance(index, item, namespace):
+            set_text(item, 'instancesSet/item/instanceId', namespace,
+                     'i-%08x' % (index))
+
+        def update_address(index, item, namespace):
+            set_text(item, 'publicIp', namespace,
+                     '10.%s.%s.%s' % (index // 65536, index // 256 % 256,
+                                      index % 256))
+            set_text(item, 'instanceId', namespace, 'i-%08x' % (index * 2))
+
+        instances = scale_xml(fixtures.load('describe_instances.xml'),
+                              'reservationSet', 'item', self.scale,
+                              update_instance)
+        addresses = scale_xml(fixtures.load('describe_addresses_multi.xml'),
+                              'addressesSet', 'item', self.scale // 2,
+                              update_address)
+
+        ReplayMockHttp.responses = {
+            'DescribeInstances': ok(instances, XML_HEADERS),
+            'DescribeAddresses': ok(addresses, XML_HEADERS)
+        }
+
+        EC2NodeDriver.connectionCls.conn_classes = (None, ReplayMockHttp)
+        self.driver = EC2NodeDriver('key', 'secret')
+
+    def run(self):
+        return self.driver.list_nodes()
+
+
+class EC2IterateNodesCase(EC2ListNodesCase):
+    name = 'ec2.iterate_nodes'
+    description = 'Streaming DescribeInstances and DescribeAddresses'
+
+    def run(self):
+        return list(self.driver.iterate_nodes())
+
+
+class EC2ListImagesCase(BenchmarkCase):
+    name = 'ec2.list_images'
+    description = 'DescribeImages'
+
+    def setup(self):
+        fixtures = ComputeFileFixtures('ec2')
+
+        def update_image(index, item, namespace):
+            set_text(item, 'imageId', namespace, 'ami-%08x' % (index))
+
+        images = scale_xml(fixtures.load('describe_images.xml'), 'imagesSet',
+                           'item', self.scale, update_image)
+
+        ReplayMockHttp.responses = {
+            'DescribeImages': ok(images, XML_HEADERS)
+        }
+
+        EC2NodeDriver.connectionCls.conn_classes = (None, ReplayMockHttp)
+        self.driver = EC2NodeDriver('key', 'secret')
+
+    def run(self):
+        return self.driver.list_images()
+
+
+class GCEListNodesCase(BenchmarkCase):
+    name = 'gce.list_nodes'
+    description = 'Aggregated instance and disk listing'
+
+    project = 'project_name'
+
+    def setup(self):
+        fixtures = ComputeFileFixtures('gce')
+        base_path = '/compute/%s/projects/%s' % (GCE_API_VERSION,
+                                                 self.project)
+
+        instances = json.loads(fixtures.load('aggregated_instances.json'))
+        disks = json.loads(fixtures.load('aggregated_disks.json'))
+        zone = 'zones/us-central1-a'
+
+        instance = instances['items'][zone]['instances'][0]
+        disk = [item['disks'][0] for item in disks['items'].values()
+                if item.get('disks')][0]
+        scaled_instances = []
+        scaled_disks = []
+
+        for index in range(self.scale):
+            name = 'node-%s' % (index)
+            disk_link = '%s/disks/%s' % (instance['zone'], name)
+
+            item = copy.deepcopy(instance)
+            item['name'] = name
+            item['id'] = str(10 ** 18 + index)
+            item['selfLink'] = '%s/instances/%s' % (instance['zone'], name)
+            item['disks'][0]['source'] = disk_link
+            scaled_instances.append(item)
+
+            item = copy.deepcopy(disk)
+            item['name'] = name
+            item['id'] = str(10 ** 18 + index)
+            item['zone'] = instance['zone']
+            item['selfLink'] = disk_link
+            scaled_disks.append(item)
+
+        instances['items'] = {zone: {'instances': scaled_instances}}
+        disks['items'] = {zone: {'disks': scaled_disks}}
+
+        ReplayMockHttp.responses = {
+            base_path + '/aggregated/instances':
+                ok(json.dumps(instances), JSON_HEADERS),
+            base_path + '/aggregated/disks':
+                ok(json.dumps(disks), JSON_HEADERS),
+            base_path + '/zones': ok(fixtures.load('zones.json'),
+                                     JSON_HEADERS),
+            base_path + '/regions': ok(fixtures.load('regions.json'),
+                                       JSON_HEADERS),
+            base_path: ok(fixtures.load('project.json'), JSON_HEADERS)
+        }
+
+        # Valid token is stored in the credential file so no authentication
+        # requests are made
+        fd, self.credential_file = tempfile.mkstemp()
+        expire_time = datetime.datetime.utcnow() + \
+            datetime.timedelta(hours=1)
+
+        with os.fdopen(fd, 'w') as fp:
+            json.dump({'access_token': 'token', 'token_type': 'Bearer',
+                       'expire_time': _utc_timestamp(expire_time)}, fp)
+
+        GCENodeDriver.connectionCls.conn_classes = (ReplayMockHttp,
+                                                    ReplayMockHttp)
+        self.driver = GCENodeDriver('client_id', 'client_secret',
+                                    project=self.project, auth_type='IA',
+                                    credential_file=self.credential_file)
+
+    def run(self):
+        return self.driver.list_nodes()
+
+    def teardown(self):
+        os.unlink(self.credential_file)
+
+
+class OpenStackListNodesCase(BenchmarkCase):
+    name = 'openstack.list_nodes'
+    description = 'Server details listing'
+
+    def setup(self):
+        fixtures = ComputeFileFixtures('openstack_v1.1')
+        servers = json.loads(fixtures.load('_servers_detail.json'))
+        server = servers['servers'][0]
+        scaled = []
+
+        for index in range(self.scale):
+            item = copy.deepcopy(server)
+            item['id'] = '%08x-0000-0000-0000-000000000000' % (index)
+            item['name'] = 'node-%s' % (index)
+            scaled.append(item)
+
+        servers['servers'] = scaled
+
+        ReplayMockHttp.responses = {
+            '/v1.1/slug/servers/detail': ok(json.dumps(servers),
+                                            JSON_HEADERS)
+        }
+
+        OpenStack_1_1_NodeDriver.connectionCls.conn_classes = \
+            (ReplayMockHttp, ReplayMockHttp)
+        self.driver = OpenStack_1_1_NodeDriver(
+            'user', 'key', ex_force_auth_token='token',
+            ex_force_auth_url='https://auth.example.com/v2.0/tokens',
+            ex_force_auth_version='2.0',
+            ex_force_base_url='https://compute.example.com/v1.1/slug')
+
+    def run(self):
+        return self.driver.list_nodes()
+
+
+class S3ListObjectsCase(BenchmarkCase):
+    name = 's3.list_container_objects'
+    description = 'Bucket listing'
+
+    def setup(self):
+        fixtures = StorageFileFixtures('s3')
+
+        def update_object(index, item, namespace):
+            set_text(item, 'Key', namespace, 'objects/%08d.bin' % (index))
+
+        objects = scale_xml(fixtures.load('list_container_objects.xml'),
+                            None, 'Contents', self.scale, update_object)
+
+        ReplayMockHttp.responses = {
+            '/test_container': ok(objects, XML_HEADERS)
+        }
+
+        S3StorageDriver.connectionCls.conn_classes = (None, ReplayMockHttp)
+        self.driver = S3StorageDriver('key', 'secret')
+        self.container = Container(name='test_container', extra={},
+                                   driver=self.driver)
+
+    def run(self):
+        return self.driver.list_container_objects(container=self.container)
+
+
+class S3GetObjectCase(BenchmarkCase):
+    name = 's3.get_object'
+    description = 'Signed HEAD requests'
+
+    def setup(self):
+        headers = {'content-length': '12345',
+                   'etag': '"e31208wqsdoj329jd"',
+                   'last-modified': 'Thu, 13 Sep 2012 07:13:22 GMT',
+                   'content-type': 'application/zip',
+                   'x-amz-meta-rabbits': 'monkeys'}
+
+        # Every object is requested separately so the number of requests is
+        # lower than for the listing cases
+        self.count = max(self.scale // 10, 1)
+        self.names = ['object-%s' % (index) for index in range(self.count)]
+
+        ReplayMockHttp.responses = dict([
+            ('/test_container/%s' % (name), ok('', headers))
+            for name in self.names])
+        ReplayMockHttp.responses['/test_container'] = ok('')
+
+        S3StorageDriver.connectionCls.conn_classes = (None, ReplayMockHttp)
+        self.driver = S3StorageDriver('key', 'secret')
+
+    def run(self):
+        return [self.driver.get_object(container_name='test_container',
+                                       object_name=name)
+                for name in self.names]
+
+
+class Route53ListRecordsCase(BenchmarkCase):
+    name = 'route53.list_records'
+    description = 'Resource record set listing'
+
+    def setup(self):
+        fixtures = DNSFileFixtures('route53')
+
+        def update_record(index, item, namespace):
+            set_text(item, 'Name', namespace, 'host-%s.t.com' % (index))
+
+        records = scale_xml(fixtures.load('list_records.xml'),
+                            'ResourceRecordSets', 'ResourceRecordSet',
+                            self.scale, update_record)
+
+        ReplayMockHttp.responses = {
+            '/2012-02-29/hostedzone/47234/rrset': ok(records, XML_HEADERS)
+        }
+
+        Route53DNSDriver.connectionCls.conn_classes = (None, ReplayMockHttp)
+        self.driver = Route53DNSDriver('key', 'secret')
+        self.zone = Zone(id='47234', domain='t.com', type='master', ttl=0,
+                         driver=self.driver)
+
+    def run(self):
+        return self.driver.list_records(zone=self.zone)
+
+
+CASES = [
+    EC2ListNodesCase,
+    EC2IterateNodesCase,
+    EC2ListImagesCase,
+    GCEListNodesCase,
+    OpenStackListNodesCase,
+    S3ListObjectsCase,
+    S3GetObjectCase,
+    Route53ListRecordsCase
+]
+
+
+def run_case(case, repeat):
+    """
+    Run a benchmark case and return its results.
+
+    Timed runs are performed without memory tracing which would slow them
+    down, memory usage is measured during an additional run.
+    """
+    case.setup()
+
+    try:
+        # Warm up run (imports, lazily initialized state, ...)
+        items = len(case.run())
+        durations = []
+
+        for _ in range(repeat):
+            ReplayMockHttp.request_count = 0
+            start = time.time()
+            result = case.run()
+            durations.append(time.time() - start)
+
+            # Result is released before the next run
+            del result
+
+        requests = ReplayMockHttp.request_count
+
+        memory = measure_memory(case)
+    finally:
+        case.teardown()
+
+    durations.sort()
+    median = durations[len(durations) // 2]
+
+    values = {
+        'description': case.description,
+        'items': items,
+        'requests': requests,
+        'median': median,
+        'min': durations[0],
+        'per_item': median / max(items, 1)
+    }
+    values.update(memory)
+    return values
+
+
+def measure_memory(case):
+    if tracemalloc is None:
+        return {'alloc_blocks': None, 'alloc_bytes': None,
+                'peak_bytes': None}
+
+    tracemalloc.start()
+
+    try:
+        before = tracemalloc.take_snapshot()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+        if hasattr(tracemalloc, 'reset_peak'):
+            # Python >= 3.9
+            tracemalloc.reset_peak()
+
+        result = case.run()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    # Result has to be referenced until the snapshot has been taken
+    del result
+    stats = after.compare_to(before, 'filename')
+
+    return {
+        'alloc_blocks': sum([stat.count_diff for stat in stats]),
+        'alloc_bytes': sum([stat.size_diff for stat in stats]),
+        'peak_bytes': max(peak, 0)
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare the results with a baseline and return a list of regressions.
+    """
+    regressions = []
+    # Minimum duration is the least affected by the noise caused by the other
+    # processes
+    metrics = [('min', 'duration'), ('peak_bytes', 'peak memory')]
+
+    for name, values in sorted(results.items()):
+        previous = baseline.get(name, None)
+
+        if previous is None:
+            continue
+
+        for key, label in metrics:
+            if not values.get(key) or not previous.get(key):
+                continue
+
+            change = float(values[key]) / previous[key] - 1
+
+            if change > threshold:
+                regressions.append('%s: %s increased by %.1f%%' %
+                                   (name, label, change * 100))
+
+    return regressions
+
+
+def format_size(value):
+    if value is None:
+        return '-'
+
+    return '%.1f' % (value / (1024.0 * 1024))
+
+
+def print_results(results, baseline=None):
+    columns = ('%-26s %7s %6s %10s %10s %10s %12s %9s %9s' %
+               ('operation', 'items', 'reqs', 'median ms', 'min ms',
+                'us / item', 'alloc blocks', 'alloc MB', 'peak MB'))
+
+    if baseline is not None:
+        columns += ' %9s' % ('vs base')
+
+    print(columns)
+
+    for name, values in sorted(results.items()):
+        line = ('%-26s %7d %6d %10.2f %10.2f %10.2f %12s %9s %9s' %
+                (name, values['items'], values['requests'],
+                 values['median'] * 1000, values['min'] * 1000,
+                 values['per_item'] * 10 ** 6,
+                 values['alloc_blocks'] if values['alloc_blocks'] is not None
+                 else '-', format_size(values['alloc_bytes']),
+                 format_size(values['peak_bytes'])))
+
+        if baseline is not None:
+            previous = baseline.get(name, {}).get('min', None)
+
+            if previous:
+                line += ' %+8.1f%%' % ((values['min'] / previous - 1) * 100)
+            else:
+                line += ' %9s' % ('-')
+
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n\n')[0],
+        epilog='Available operations: %s' % (
+            ', '.join([case.name for case in CASES])))
+    parser.add_argument('operations', nargs='*',
+                        help='Names (or prefixes) of the operations to run '
+                             '(defaults to all)')
+    parser.add_argument('--scale', type=int, default=DEFAULT_SCALE,
+                        help='Number of items in the scaled up responses')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Number of timed runs of each operation')
+    parser.add_argument('--output', help='Save the results to a JSON file')
+    parser.add_argument('--compare',
+                        help='Compare the results with a previously saved '
+                             'JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Relative increase which is reported as a '
+                             'regression')
+    args = parser.parse_args()
+
+    cases = CASES
+
+    if args.operations:
+        cases = [case for case in CASES
+                 if [op for op in args.operations
+                     if case.name.startswith(op)]]
+
+    if not cases:
+        parser.error('No matching operations')
+
+    results = {}
+
+    for case_cls in cases:
+        results[case_cls.name] = run_case(case=case_cls(scale=args.scale),
+                                          repeat=max(args.repeat, 1))
+
+    baseline = None
+
+    if args.compare:
+        with open(args.compare, 'r') as fp:
+            baseline = json.load(fp)['results']
+
+    print_results(results=results, baseline=baseline)
+
+    if args.output:
+        data = {
+            'libcloud_version': libcloud.__version__,
+            'python_version': platform.python_version(),
+            'python_implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'date': datetime.datetime.utcnow().isoformat(),
+            'scale': args.scale,
+            'repeat': args.repeat,
+            'results': results
+        }
+
+        with open(args.output, 'w') as fp:
+            json.dump(data, fp, indent=4, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare(results=results, baseline=baseline,
+                              threshold=args.threshold)
+
+        if regressions:
+            print('')
+            print('Regressions:')
+
+            for regression in regressions:
+                print('  %s' % (regression))
+
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
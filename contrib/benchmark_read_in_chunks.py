@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark which compares throughput and peak memory usage of
+libcloud.utils.files.read_in_chunks with the previous (string concatenation
+based) implementation.
+
+Every benchmark case runs in a separate process so the reported peak RSS
+values are not affected by the other cases.
+
+Usage: python contrib/benchmark_read_in_chunks.py [--size MB]
+"""
+
+from __future__ import with_statement
+
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+import argparse
+import subprocess
+
+this_dir = os.path.abspath(os.path.split(__file__)[0])
+sys.path.insert(0, os.path.join(this_dir, '../'))
+
+from libcloud.utils.py3 import b
+from libcloud.utils.py3 import next
+from libcloud.utils.files import read_in_chunks
+
+CHUNK_SIZES = [
+    ('8 KB', 8 * 1024),
+    ('1 MB', 1024 * 1024),
+    ('5 MB', 5 * 1024 * 1024)
+]
+
+# Size of the pieces returned by the iterator source (e.g. data which is
+# streamed from an another HTTP response)
+PIECE_SIZE = 64 * 1024
+
+
+def legacy_read_in_chunks(iterator, chunk_size=None, fill_size=False,
+                          yield_empty=False):
+    """
+    Previous implementation of read_in_chunks.
+    """
+    chunk_size = chunk_size or 8096
+
+    if hasattr(iterator, 'read'):
+        get_data = iterator.read
+        args = (chunk_size, )
+    else:
+        get_data = next
+        args = (iterator, )
+
+    data = b('')
+    empty = False
+
+    while not empty or len(data) > 0:
+        if not empty:
+            try:
+                chunk = b(get_data(*args))
+                if len(chunk) > 0:
+                    data += chunk
+                else:
+                    empty = True
+            except StopIteration:
+                empty = True
+
+        if len(data) == 0:
+            if empty and yield_empty:
+                yield b('')
+
+            return
+
+        if fill_size:
+            if empty or len(data) >= chunk_size:
+                yield data[:chunk_size]
+                data = data[chunk_size:]
+        else:
+            yield data
+            data = b('')
+
+
+IMPLEMENTATIONS = {
+    'legacy': legacy_read_in_chunks,
+    'current': read_in_chunks
+}
+
+
+def iterator_source(file_path):
+    with open(file_path, 'rb') as fp:
+        while True:
+            data = fp.read(PIECE_SIZE)
+
+            if not data:
+                break
+
+            yield data
+
+
+def run_case(implementation, source, chunk_size, file_path):
+    func = IMPLEMENTATIONS[implementation]
+    baseline_rss = get_peak_rss()
+
+    with open(file_path, 'rb') as fp:
+        if source == 'file':
+            iterator = fp
+        else:
+            iterator = iterator_source(file_path)
+
+        start = time.time()
+        total = 0
+
+        for chunk in func(iterator, chunk_size=chunk_size, fill_size=True):
+            total += len(chunk)
+
+        duration = time.time() - start
+
+    return {
+        'bytes': total,
+        'duration': duration,
+        'peak_rss': get_peak_rss() - baseline_rss
+    }
+
+
+def get_peak_rss():
+    """
+    Return peak RSS of this process in bytes.
+    """
+    value = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if sys.platform == 'darwin':
+        return value
+
+    return value * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--size', type=int, default=32,
+                        help='Size of the test data in MB')
+    parser.add_argument('--case', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        implementation, source, chunk_size, file_path = args.case
+        result = run_case(implementation=implementation, source=source,
+                          chunk_size=int(chunk_size), file_path=file_path)
+        print(json.dumps(result))
+        return
+
+    fd, file_path = tempfile.mkstemp()
+
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            for _ in range(args.size):
+                fp.write(os.urandom(1024 * 1024))
+
+        print('%-8s %-8s %-8s %12s %14s' % ('source', 'chunk', 'impl',
+                                            'MB/s', 'peak RSS (MB)'))
+
+        for source in ['file', 'iterator']:
+            for name, chunk_size in CHUNK_SIZES:
+                for implementation in ['legacy', 'current']:
+                    output = subprocess.check_output([
+                        sys.executable, __file__, '--case', implementation,
+                        source, str(chunk_size), file_path])
+                    result = json.loads(output.decode('utf-8'))
+
+                    throughput = (result['bytes'] / (1024.0 * 1024) /
+                                  max(result['duration'], 1e-9))
+                    print('%-8s %-8s %-8s %12.1f %14.1f' %
+                          (source, name, implementation, throughput,
+                           result['peak_rss'] / (1024.0 * 1024)))
+    finally:
+        os.unlink(file_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+import os
+
+from libcloud.common.cache import ResponseCache, FileCacheBackend
+from libcloud.compute.types import Provider
+from libcloud.compute.providers import get_driver
+
+# Zone and region catalogs are stored on disk for a day and shared by all the
+# processes of the current user which use the same directory
+directory = os.path.expanduser('~/.libcloud/cache')
+cache = ResponseCache(backend=FileCacheBackend(directory),
+                      ttl=24 * 60 * 60)
+
+ComputeEngine = get_driver(Provider.GCE)
+driver = ComputeEngine('your_service_account_email', 'path_to_pem_file',
+                       datacenter='us-central1-a',
+                       project='your_project_id',
+                       ex_catalog_cache=cache)
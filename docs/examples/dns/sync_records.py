@@ -0,0 +1,23 @@
+from libcloud.dns.providers import get_driver
+from libcloud.dns.types import Provider, RecordType
+
+CREDENTIALS_ROUTE53 = ('access key id', 'secret key')
+
+cls = get_driver(Provider.ROUTE53)
+driver = cls(*CREDENTIALS_ROUTE53)
+
+zone = [z for z in driver.list_zones() if z.domain == 'example.com'][0]
+
+records = [
+    {'name': 'www', 'type': RecordType.A, 'data': '192.0.2.10',
+     'extra': {'ttl': 300}},
+    {'name': 'www', 'type': RecordType.A, 'data': '192.0.2.11',
+     'extra': {'ttl': 300}},
+    {'name': None, 'type': RecordType.MX, 'data': 'aspmx.l.google.com.',
+     'extra': {'priority': 10}}
+]
+
+result = driver.sync_records(zone=zone, records=records)
+print('Created: %d, updated: %d, deleted: %d' %
+      (len(result['created']), len(result['updated']),
+       len(result['deleted'])))
@@ -0,0 +1,17 @@
+from libcloud.storage.types import Provider
+from libcloud.storage.providers import get_driver
+
+cls = get_driver(Provider.S3)
+driver = cls('api key', 'api secret key')
+
+obj = driver.get_object(container_name='my-backups-12345',
+                        object_name='backup.tar.gz')
+
+# Download the object using 8 parallel streams of 16 MB ranges
+driver.download_object_in_parallel(obj=obj,
+                                   destination_path='/home/user/backup.tar.gz',
+                                   range_size=16 * 1024 * 1024,
+                                   concurrency=8)
+
+# Read the first kilobyte of the object
+header = b''.join(obj.range_as_stream(start_bytes=0, end_bytes=1024))
@@ -0,0 +1,22 @@
+from libcloud.storage.types import Provider
+from libcloud.storage.providers import get_driver
+
+# Path to a very large file you want to upload
+FILE_PATH = '/home/user/myfile.tar.gz'
+
+cls = get_driver(Provider.S3)
+driver = cls('api key', 'api secret key')
+
+container = driver.get_container(container_name='my-backups-12345')
+
+# Create an upload which can be resumed if it fails
+upload_id = driver.ex_initiate_multipart_upload(container=container,
+                                                object_name='backup.tar.gz')
+
+# Upload 4 parts of 16 MB in parallel. If this call fails, calling it again
+# with the same upload id only uploads the missing parts.
+obj = driver.upload_object(file_path=FILE_PATH, container=container,
+                           object_name='backup.tar.gz',
+                           ex_part_size=16 * 1024 * 1024,
+                           ex_concurrency=4,
+                           ex_upload_id=upload_id)
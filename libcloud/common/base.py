@@ -45,16 +45,22 @@ from libcloud.utils.py3 import StringIO
 from libcloud.utils.py3 import u
 from libcloud.utils.py3 import b
 
-from libcloud.utils.misc import lowercase_keys, retry
+from libcloud.utils.misc import lowercase_keys
 from libcloud.utils.compression import decompress_data
 
 from libcloud.common.exceptions import exception_from_message
 from libcloud.common.types import LibcloudError, MalformedResponseError
+from libcloud.common.pool import get_default_pool
+from libcloud.common.cache import ResponseCache
+from libcloud.common.retry import RetryPolicy, get_token_bucket
+from libcloud.common.retry import IDEMPOTENT_METHODS
+from libcloud.common.jobs import get_job_tracker
 from libcloud.httplib_ssl import LibcloudHTTPConnection
 from libcloud.httplib_ssl import LibcloudHTTPSConnection
 
 __all__ = [
     'RETRY_FAILED_HTTP_REQUESTS',
+    'CONNECTION_POOLING_ENABLED',
 
     'BaseDriver',
 
@@ -76,6 +82,43 @@ __all__ = [
 # Module level variable indicates if the failed HTTP requests should be retried
 RETRY_FAILED_HTTP_REQUESTS = False
 
+# Module level variable indicates if the HTTP connections should be kept alive
+# and reused across requests using the process-wide connection pool
+CONNECTION_POOLING_ENABLED = False
+
+# Errors which indicate that a pooled keep-alive connection has been closed by
+# the server while it was idle
+STALE_CONNECTION_EXCEPTIONS = (httplib.BadStatusLine,
+                               httplib.ImproperConnectionState,
+                               socket.error)
+
+
+def _is_closed_without_response(error):
+    """
+    Return True if the error indicates that the server has closed the
+    connection without sending any part of the response.
+    """
+    remote_disconnected = getattr(httplib, 'RemoteDisconnected', None)
+
+    if remote_disconnected is not None and \
+            isinstance(error, remote_disconnected):
+        return True
+
+    # Note: On Python 2 the line is repr() of the received status line
+    return isinstance(error, httplib.BadStatusLine) and \
+        getattr(error, 'line', None) in ('', "''")
+
+
+class _RetryableResponse(Exception):
+    """
+    Raised when a response has a status code upon which the request should be
+    retried. The response body hasn't been read yet.
+    """
+
+    def __init__(self, http_response):
+        super(_RetryableResponse, self).__init__(http_response.status)
+        self.http_response = http_response
+
 
 class LazyObject(object):
     """An object that doesn't get initialized until accessed."""
@@ -298,10 +341,16 @@ class RawResponse(Response):
         self._reason = None
         self.connection = connection
 
+        # Remember the underlying HTTP connection since a pooled Connection
+        # object can switch to a different one before the response is read
+        self._http_connection = connection.connection
+
     @property
     def response(self):
         if not self._response:
-            response = self.connection.connection.getresponse()
+            http_connection = self._http_connection or \
+                self.connection.connection
+            response = http_connection.getresponse()
             self._response, self.body = response, response
             if not self.success():
                 self.parse_error()
@@ -325,6 +374,18 @@ class RawResponse(Response):
             self._reason = self.response.reason
         return self._reason
 
+    def isclosed(self):
+        """
+        Return True if the response has been read until the end.
+
+        :rtype: ``bool``
+        """
+        if not self._response:
+            return False
+
+        isclosed = getattr(self._response, 'isclosed', None)
+        return isclosed() if isclosed else True
+
 
 # TODO: Move this to a better location/package
 class LoggingConnection():
@@ -531,6 +592,24 @@ class Connection(object):
     backoff = None
     retry_delay = None
 
+    # RetryPolicy instance which is used to retry failed requests. If not set
+    # and retrying of failed requests is enabled globally, a default policy
+    # based on the "timeout", "retry_delay" and "backoff" arguments is used.
+    retry_policy = None
+
+    # Maximum number of requests per second sent to the API endpoint by all the
+    # connections of the same class and the maximum burst size. None means
+    # the rate isn't limited.
+    rate_limit = None
+    rate_limit_burst = None
+
+    # Optional ConnectionPool instance used by this connection. If not set and
+    # connection pooling is enabled globally, the default pool is used.
+    connection_pool = None
+    _pool_key = None
+    _pool_reused = False
+    _pool_checked_out = False
+
     allow_insecure = True
 
     def __init__(self, secure=True, host=None, port=None, url=None,
@@ -579,6 +658,31 @@ class Connection(object):
         """
         self.proxy_url = proxy_url
 
+    def set_retry_policy(self, retry_policy):
+        """
+        Set a policy which is used to retry failed requests made by this
+        connection.
+
+        :param retry_policy: Retry policy or None to use the default one.
+        :type retry_policy: :class:`libcloud.common.retry.RetryPolicy`
+        """
+        self.retry_policy = retry_policy
+
+    def set_rate_limit(self, rate_limit, burst=None):
+        """
+        Limit the rate of requests sent to the API endpoint. The limit is
+        shared by all the connections of the same class to the same endpoint.
+
+        :param rate_limit: Maximum number of requests per second.
+        :type rate_limit: ``float``
+
+        :param burst: Maximum number of requests which can be sent at once
+                      (defaults to ``rate_limit``).
+        :type burst: ``int``
+        """
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = burst
+
     def set_context(self, context):
         if not isinstance(context, dict):
             raise TypeError('context needs to be a dictionary')
@@ -615,6 +719,24 @@ class Connection(object):
 
         return (host, port, secure, request_path)
 
+    def clone(self):
+        """
+        Return a copy of this connection which shares the configuration and
+        the credentials, but not the underlying HTTP connection and the
+        request context.
+
+        Connection objects are not thread-safe so each thread which issues
+        requests concurrently should use its own copy.
+
+        :rtype: :class:`.Connection`
+        """
+        connection = copy.copy(self)
+        connection.connection = None
+        connection.context = {}
+        connection.ua = list(self.ua)
+        connection._pool_checked_out = False
+        return connection
+
     def connect(self, host=None, port=None, base_url=None, **kwargs):
         """
         Establish a connection with the API server.
@@ -668,15 +790,75 @@ class Connection(object):
         if self.proxy_url:
             kwargs.update({'proxy_url': self.proxy_url})
 
-        connection = self.conn_classes[secure](**kwargs)
+        connection_cls = self.conn_classes[secure]
         # You can uncoment this line, if you setup a reverse proxy server
         # which proxies to your endpoint, and lets you easily capture
         # connections in cleartext when you setup the proxy to do SSL
         # for you
-        # connection = self.conn_classes[False]("127.0.0.1", 8080)
+        # connection_cls, kwargs = self.conn_classes[False], \
+        #     {'host': '127.0.0.1', 'port': 8080}
+
+        pool = self._get_connection_pool()
+
+        if pool is not None:
+            # Hand back the previous connection if it's still checked out
+            self._release_connection()
+
+            key = pool.get_key(connection_cls=connection_cls, kwargs=kwargs)
+            connection, reused = pool.acquire(
+                key=key, factory=lambda: connection_cls(**kwargs))
+            self._pool_key = key
+            self._pool_reused = reused
+            self._pool_checked_out = True
+        else:
+            connection = connection_cls(**kwargs)
 
         self.connection = connection
 
+    def _get_connection_pool(self):
+        """
+        Return the connection pool which should be used by this connection or
+        None if connection pooling is disabled.
+
+        :rtype: :class:`libcloud.common.pool.ConnectionPool` or ``None``
+        """
+        if self.connection_pool is not None:
+            return self.connection_pool
+
+        pooling_enabled = os.environ.get('LIBCLOUD_CONNECTION_POOLING',
+                                         False) or CONNECTION_POOLING_ENABLED
+
+        if pooling_enabled:
+            return get_default_pool()
+
+        return None
+
+    def _release_connection(self, response=None):
+        """
+        Hand the current HTTP connection back to the connection pool once the
+        provided response has been fully consumed.
+        """
+        pool = self._get_connection_pool()
+
+        if pool is None or not self._pool_checked_out:
+            return
+
+        self._pool_checked_out = False
+        pool.release(key=self._pool_key, connection=self.connection,
+                     response=response)
+
+    def _discard_connection(self):
+        """
+        Close the current HTTP connection and make sure it's not reused.
+        """
+        pool = self._get_connection_pool()
+
+        if pool is None or not self._pool_checked_out:
+            return
+
+        self._pool_checked_out = False
+        pool.discard(connection=self.connection)
+
     def _user_agent(self):
         user_agent_suffix = ' '.join(['(%s)' % x for x in self.ua])
 
@@ -736,6 +918,92 @@ class Connection(object):
         :return: An :class:`Response` instance.
         :rtype: :class:`Response` instance
 
+        """
+        retry_policy = self._get_retry_policy()
+        rate_limiter = self._get_rate_limiter(retry_policy=retry_policy)
+
+        # Raw requests can't be retried since the body is sent by the caller
+        if retry_policy is None or raw:
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+
+            return self._request_once(action=action, params=params,
+                                      data=data, headers=headers,
+                                      method=method, raw=raw)
+
+        context = self.context
+        deadline = time.time() + retry_policy.timeout
+        attempt = 0
+        delay = None
+
+        while True:
+            attempt += 1
+            final = (time.time() >= deadline or
+                     (retry_policy.max_attempts is not None and
+                      attempt >= retry_policy.max_attempts))
+            retry_status_codes = None
+
+            if not final:
+                retry_status_codes = \
+                    retry_policy.get_retry_status_codes(method)
+
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+
+            try:
+                return self._request_once(
+                    action=action, params=params, data=data, headers=headers,
+                    method=method, raw=raw,
+                    retry_status_codes=retry_status_codes)
+            except _RetryableResponse:
+                http_response = sys.exc_info()[1].http_response
+                retry_after = retry_policy.get_retry_after(
+                    headers=dict(http_response.getheaders()))
+                error = None
+            except Exception:
+                error = sys.exc_info()[1]
+
+                if final or not retry_policy.should_retry(method, error):
+                    raise
+
+                http_response = None
+                retry_after = retry_policy.get_retry_after(exc=error)
+
+            delay = retry_policy.get_delay(previous_delay=delay)
+            remaining = deadline - time.time()
+
+            if retry_after:
+                if rate_limiter is not None:
+                    rate_limiter.pause(retry_after)
+
+                delay = max(delay, retry_after)
+            else:
+                delay = min(delay, max(remaining, 0))
+
+            if delay > remaining:
+                # Server asked us to wait longer than we are allowed to
+                if error is not None:
+                    raise error
+
+                self.set_context(context)
+                return self._get_response(http_response=http_response)
+
+            if http_response is not None:
+                # Read the body so the connection can be reused
+                http_response.read()
+                self._release_connection(response=http_response)
+
+            time.sleep(delay)
+            self.set_context(context)
+
+    def _request_once(self, action, params=None, data=None, headers=None,
+                      method='GET', raw=False, retry_status_codes=None):
+        """
+        Perform a single attempt of a request.
+
+        If the response status code is one of ``retry_status_codes``,
+        :class:`_RetryableResponse` is raised instead of processing the
+        response.
         """
         if params is None:
             params = {}
@@ -747,9 +1015,6 @@ class Connection(object):
         else:
             headers = copy.copy(headers)
 
-        retry_enabled = os.environ.get('LIBCLOUD_RETRY_FAILED_HTTP_REQUESTS',
-                                       False) or RETRY_FAILED_HTTP_REQUESTS
-
         action = self.morph_action_hook(action)
         self.action = action
         self.method = method
@@ -803,6 +1068,7 @@ class Connection(object):
         # Removed terrible hack...this a less-bad hack that doesn't execute a
         # request twice, but it's still a hack.
         self.connect()
+        http_response = None
         try:
             # @TODO: Should we just pass File object as body to request method
             # instead of dealing with splitting and sending the file ourselves?
@@ -815,18 +1081,12 @@ class Connection(object):
                     self.connection.putheader(key, str(value))
 
                 self.connection.endheaders()
+            elif self._pool_checked_out:
+                http_response = self._send_pooled_request(
+                    method=method, url=url, body=data, headers=headers)
             else:
-                if retry_enabled:
-                    retry_request = retry(timeout=self.timeout,
-                                          retry_delay=self.retry_delay,
-                                          backoff=self.backoff)
-                    retry_request(self.connection.request)(method=method,
-                                                           url=url,
-                                                           body=data,
-                                                           headers=headers)
-                else:
-                    self.connection.request(method=method, url=url, body=data,
-                                            headers=headers)
+                self.connection.request(method=method, url=url, body=data,
+                                        headers=headers)
         except socket.gaierror:
             e = sys.exc_info()[1]
             message = str(e)
@@ -847,25 +1107,135 @@ class Connection(object):
             raise e
         except ssl.SSLError:
             e = sys.exc_info()[1]
+            self._discard_connection()
             self.reset_context()
             raise ssl.SSLError(str(e))
+        except Exception:
+            self._discard_connection()
+            raise
+
+        if raw:
+            return self._get_response(http_response=None, raw=True)
+
+        if http_response is None:
+            try:
+                http_response = self.connection.getresponse()
+            except Exception:
+                self._discard_connection()
+                self.reset_context()
+                raise
+
+        if retry_status_codes and http_response.status in retry_status_codes:
+            raise _RetryableResponse(http_response=http_response)
+
+        return self._get_response(http_response=http_response)
 
+    def _get_response(self, http_response, raw=False):
+        """
+        Process the HTTP response and return a response object.
+        """
         if raw:
             responseCls = self.rawResponseCls
             kwargs = {'connection': self}
         else:
             responseCls = self.responseCls
-            kwargs = {'connection': self,
-                      'response': self.connection.getresponse()}
+            kwargs = {'connection': self, 'response': http_response}
 
+        response = None
         try:
             response = responseCls(**kwargs)
         finally:
             # Always reset the context after the request has completed
             self.reset_context()
 
+            # Connection is returned to the pool once the response body has
+            # been fully read
+            if not raw:
+                self._release_connection(response=http_response)
+            elif response is not None:
+                self._release_connection(response=response)
+            else:
+                self._discard_connection()
+
         return response
 
+    def _send_pooled_request(self, method, url, body, headers):
+        """
+        Send a request using a pooled connection and return the response.
+
+        Keep-alive connections which have been closed by the server while
+        sitting idle in the pool are discarded and the request is retried on
+        a different connection.
+
+        The request is only sent again if the server can't have processed it:
+        sending the request failed or the connection has been closed without
+        any response. Requests which fail while waiting for the response
+        (e.g. because the connection has been reset) are only sent again if
+        the method is idempotent.
+        """
+        while True:
+            try:
+                self.connection.request(method=method, url=url, body=body,
+                                        headers=headers)
+            except STALE_CONNECTION_EXCEPTIONS:
+                if not self._pool_reused:
+                    raise
+
+                self._discard_connection()
+                self.connect()
+                continue
+
+            try:
+                return self.connection.getresponse()
+            except STALE_CONNECTION_EXCEPTIONS:
+                e = sys.exc_info()[1]
+
+                if not self._pool_reused or isinstance(e, socket.timeout):
+                    raise
+
+                if not _is_closed_without_response(e) and \
+                        method.upper() not in IDEMPOTENT_METHODS:
+                    raise
+
+                self._discard_connection()
+                self.connect()
+
+    def _get_retry_policy(self):
+        """
+        Return the policy which should be used to retry failed requests or
+        None if failed requests shouldn't be retried.
+
+        :rtype: :class:`libcloud.common.retry.RetryPolicy` or ``None``
+        """
+        if self.retry_policy is not None:
+            return self.retry_policy
+
+        retry_enabled = os.environ.get('LIBCLOUD_RETRY_FAILED_HTTP_REQUESTS',
+                                       False) or RETRY_FAILED_HTTP_REQUESTS
+
+        if not retry_enabled:
+            return None
+
+        return RetryPolicy(max_attempts=None, timeout=self.timeout,
+                           base_delay=self.retry_delay,
+                           backoff_factor=self.backoff)
+
+    def _get_rate_limiter(self, retry_policy=None):
+        """
+        Return the token bucket which is shared by all the connections of the
+        same class to the same API endpoint or None if the requests aren't
+        rate limited.
+
+        :rtype: :class:`libcloud.common.retry.TokenBucket` or ``None``
+        """
+        if self.rate_limit is None and retry_policy is None:
+            return None
+
+        key = (self.__class__.__module__, self.__class__.__name__, self.host,
+               int(self.port))
+        return get_token_bucket(key=key, rate=self.rate_limit,
+                                capacity=self.rate_limit_burst)
+
     def morph_action_hook(self, action):
         return self.request_path + action
 
@@ -941,6 +1311,11 @@ class PollingConnection(Connection):
     timeout = 200
     request_method = 'request'
 
+    # Upper bound and growth factor of the interval used by the job tracker
+    # when none of the jobs complete (see submit_async_request)
+    max_poll_interval = 10
+    poll_backoff_factor = 1.5
+
     def async_request(self, action, params=None, data=None, headers=None,
                       method='GET', context=None):
         """
@@ -1008,6 +1383,58 @@ class PollingConnection(Connection):
 
         return response
 
+    def submit_async_request(self, action, params=None, data=None,
+                             headers=None, method='GET', context=None,
+                             process_response=None):
+        """
+        Perform an 'async' request to the specified path and return a future
+        instead of waiting for the job to complete.
+
+        Status of all the jobs submitted using the same connection is checked
+        by a single background thread (see
+        :class:`libcloud.common.jobs.AsyncJobTracker`). Futures can be waited
+        on using :func:`libcloud.utils.concurrency.wait`.
+
+        Arguments are the same as for :meth:`async_request`.
+
+        :type process_response: ``callable``
+        :param process_response: Optional function which is called with the
+                                 final response and returns the job result.
+
+        :return: Future which holds the final response.
+        :rtype: :class:`libcloud.utils.concurrency.Future`
+        """
+        tracker = self.get_job_tracker()
+        return tracker.submit(action=action, params=params, data=data,
+                              headers=headers, method=method, context=context,
+                              process_response=process_response,
+                              connection=self)
+
+    def get_job_tracker(self):
+        """
+        Return the tracker which polls the jobs submitted using
+        :meth:`submit_async_request`.
+
+        :rtype: :class:`libcloud.common.jobs.AsyncJobTracker`
+        """
+        return get_job_tracker(connection=self)
+
+    def get_completed_jobs(self, jobs):
+        """
+        Return the jobs which might have completed. The returned jobs are then
+        polled individually.
+
+        Connections can override this method to check the status of many
+        jobs using a single request. The default implementation returns all
+        the jobs.
+
+        :param jobs: Pending jobs.
+        :type jobs: ``list`` of :class:`libcloud.common.jobs.AsyncJob`
+
+        :rtype: ``list`` of :class:`libcloud.common.jobs.AsyncJob`
+        """
+        return jobs
+
     def get_request_kwargs(self, action, params=None, data=None, headers=None,
                            method='GET', context=None):
         """
@@ -1111,6 +1538,18 @@ class BaseDriver(object):
 
     connectionCls = ConnectionKey
 
+    # Read-only methods whose results are cached once the response cache has
+    # been enabled using enable_response_cache()
+    cacheable_methods = ['list_sizes', 'list_images', 'list_locations',
+                         'list_zones']
+
+    # Maps methods which modify the resources to the cacheable methods whose
+    # cached results they invalidate
+    cache_invalidation_map = {}
+
+    # Cache used by the cacheable methods (None if caching is disabled)
+    response_cache = None
+
     def __init__(self, key, secret=None, secure=True, host=None, port=None,
                  api_version=None, region=None, **kwargs):
         """
@@ -1188,6 +1627,126 @@ class BaseDriver(object):
         """
         return []
 
+    def enable_response_cache(self, cache=None, ttl=None, ttls=None):
+        """
+        Enable caching of the results of the read-only methods listed in the
+        ``cacheable_methods`` class attribute (``list_sizes``,
+        ``list_images``, ``list_locations``, ``list_zones``).
+
+        Results are cached per method arguments. Cached results are
+        invalidated when a method which modifies the corresponding resources
+        (e.g. ``create_image``) is called on this driver.
+
+        :param cache: Cache to use. It can be shared by multiple drivers
+                      (defaults to a new in-memory cache).
+        :type cache: :class:`libcloud.common.cache.ResponseCache`
+
+        :param ttl: Default number of seconds for which the results are
+                    cached. Only used if no ``cache`` is provided.
+        :type ttl: ``int``
+
+        :param ttls: Per-method number of seconds for which the results are
+                     cached. Only used if no ``cache`` is provided.
+        :type ttls: ``dict``
+
+        :rtype: :class:`libcloud.common.cache.ResponseCache`
+        """
+        if cache is None:
+            kwargs = {'ttls': ttls}
+
+            if ttl is not None:
+                kwargs['ttl'] = ttl
+
+            cache = ResponseCache(**kwargs)
+
+        self.disable_response_cache()
+        self.response_cache = cache
+        self._wrap_response_cache_methods()
+
+        return cache
+
+    def disable_response_cache(self):
+        """
+        Disable caching of the read-only method results.
+        """
+        self._unwrap_response_cache_methods()
+        self.response_cache = None
+
+    def invalidate_response_cache(self, method_names=None):
+        """
+        Invalidate the cached results of this driver.
+
+        :param method_names: Names of the methods whose results are
+                             invalidated (defaults to all the cached methods).
+        :type method_names: ``list`` of ``str``
+        """
+        if self.response_cache is not None:
+            self.response_cache.invalidate(driver=self,
+                                           method_names=method_names)
+
+    def _get_worker_driver(self):
+        """
+        Return a copy of this driver which uses its own connection and can be
+        used from a different thread.
+        """
+        driver = copy.copy(self)
+        driver.connection = self.connection.clone()
+
+        # Response cache wrappers are bound to this driver so they need to be
+        # re-created for the copy, otherwise they would use this driver's
+        # connection
+        driver._unwrap_response_cache_methods()
+
+        if driver.response_cache is not None:
+            driver._wrap_response_cache_methods()
+
+        return driver
+
+    def _wrap_response_cache_methods(self):
+        for method_name in self.cacheable_methods:
+            if hasattr(self, method_name):
+                self._wrap_cached_method(method_name=method_name)
+
+        for method_name, affected in self.cache_invalidation_map.items():
+            if hasattr(self, method_name):
+                self._wrap_invalidating_method(method_name=method_name,
+                                               affected=affected)
+
+    def _unwrap_response_cache_methods(self):
+        names = list(self.cacheable_methods) + \
+            list(self.cache_invalidation_map.keys())
+
+        for method_name in names:
+            self.__dict__.pop(method_name, None)
+
+    def _wrap_cached_method(self, method_name):
+        func = getattr(self, method_name)
+
+        def cached_method(*args, **kwargs):
+            return self.response_cache.call(driver=self,
+                                            method_name=method_name,
+                                            func=func, args=args,
+                                            kwargs=kwargs)
+
+        cached_method.__name__ = func.__name__
+        cached_method.__doc__ = func.__doc__
+        setattr(self, method_name, cached_method)
+
+    def _wrap_invalidating_method(self, method_name, affected):
+        func = getattr(self, method_name)
+
+        def invalidating_method(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # Note: Results are also invalidated on failure since the
+                # operation might have partially succeeded
+                self.invalidate_response_cache(method_names=affected)
+
+        invalidating_method.__name__ = func.__name__
+        invalidating_method.__doc__ = func.__doc__
+        setattr(self, method_name, invalidating_method)
+
     def _ex_connection_class_kwargs(self):
         """
         Return extra connection keyword arguments which are passed to the
@@ -0,0 +1,615 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Opt-in cache for the results of read-only driver methods (``list_sizes``,
+``list_images``, ``list_locations``, ``list_zones``, ...).
+
+Entries are grouped by a tag which identifies the driver (driver class, API
+key, region and host) and the cached method, so all the cached results of a
+method can be invalidated at once (e.g. after an image has been created).
+
+Two storage backends are available:
+
+* :class:`MemoryCacheBackend` - per-process in-memory LRU cache
+* :class:`FileCacheBackend` - on-disk cache which can be shared by multiple
+  processes
+
+Values stored by the backends which only support byte strings are encoded as
+JSON. Only the basic types and the classes defined in the ``libcloud``
+package (e.g. :class:`libcloud.compute.base.NodeImage`) are supported,
+results which contain other values are not cached. Decoding an entry never
+executes any code, but the entries are trusted to contain valid results, so
+the cache directory must only be writable by the current user.
+"""
+
+from __future__ import with_statement
+
+import os
+import sys
+import stat
+import time
+import json
+import errno
+import numbers
+import shutil
+import hashlib
+import tempfile
+import threading
+
+from libcloud.utils.py3 import b
+from libcloud.utils.py3 import _real_unicode
+
+__all__ = [
+    'DEFAULT_CACHE_TTL',
+    'DEFAULT_CACHE_MAX_SIZE',
+
+    'BaseCacheBackend',
+    'MemoryCacheBackend',
+    'FileCacheBackend',
+    'ResponseCache'
+]
+
+# Default number of seconds for which the cached results are valid
+DEFAULT_CACHE_TTL = 5 * 60
+
+# Default maximum number of entries kept by a cache backend
+DEFAULT_CACHE_MAX_SIZE = 256
+
+# Types which are stored as they are when values are encoded as JSON
+_JSON_TYPES = (str, _real_unicode, float, numbers.Integral)
+
+
+class BaseCacheBackend(object):
+    """
+    Base class for the response cache storage backends.
+
+    Entries are identified by a tag and a key. The tag groups related entries
+    so they can be deleted at once.
+    """
+
+    # True if the backend can only store byte strings. Values are encoded as
+    # JSON before they are stored in such backends.
+    serialize = False
+
+    def get(self, tag, key):
+        """
+        Return a cached value.
+
+        :raises KeyError: If the entry is not cached or has expired.
+        """
+        raise NotImplementedError('get not implemented for this backend')
+
+    def set(self, tag, key, value, ttl):
+        """
+        Store a value in the cache.
+
+        :param ttl: Number of seconds after which the entry expires.
+        :type ttl: ``int``
+        """
+        raise NotImplementedError('set not implemented for this backend')
+
+    def delete(self, tag, key=None):
+        """
+        Delete a single entry or all the entries with the provided tag if no
+        key is provided.
+        """
+        raise NotImplementedError('delete not implemented for this backend')
+
+    def clear(self):
+        """
+        Delete all the entries.
+        """
+        raise NotImplementedError('clear not implemented for this backend')
+
+
+class MemoryCacheBackend(BaseCacheBackend):
+    """
+    Thread-safe in-memory cache which evicts the least recently used entries
+    once it holds more than ``max_size`` entries.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_MAX_SIZE):
+        """
+        :param max_size: Maximum number of entries.
+        :type max_size: ``int``
+        """
+        self.max_size = max_size
+
+        # (tag, key) -> [expires, last_used, value]
+        self._entries = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def get(self, tag, key):
+        with self._lock:
+            entry = self._entries[(tag, key)]
+
+            if entry[0] <= time.time():
+                del self._entries[(tag, key)]
+                raise KeyError(key)
+
+            self._counter += 1
+            entry[1] = self._counter
+            return entry[2]
+
+    def set(self, tag, key, value, ttl):
+        with self._lock:
+            self._counter += 1
+            self._entries[(tag, key)] = [time.time() + ttl, self._counter,
+                                         value]
+
+            if len(self._entries) > self.max_size:
+                self._evict()
+
+    def delete(self, tag, key=None):
+        with self._lock:
+            if key is not None:
+                self._entries.pop((tag, key), None)
+                return
+
+            for item in list(self._entries.keys()):
+                if item[0] == tag:
+                    del self._entries[item]
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        now = time.time()
+
+        for item, entry in list(self._entries.items()):
+            if entry[0] <= now:
+                del self._entries[item]
+
+        while len(self._entries) > self.max_size:
+            item = min(self._entries, key=lambda item: self._entries[item][1])
+            del self._entries[item]
+
+
+class FileCacheBackend(BaseCacheBackend):
+    """
+    On-disk cache which stores each entry in a separate file.
+
+    Every tag is stored in a separate sub-directory and the least recently
+    used entries (by file modification time) are deleted once the cache holds
+    more than ``max_size`` entries.
+
+    The directory is created with ``0700`` permissions if it doesn't exist.
+    Existing directories which are owned by another user or which are
+    writable by the group or other users are refused since anyone who can
+    write to the directory can modify the cached results.
+    """
+
+    serialize = True
+
+    def __init__(self, directory, max_size=DEFAULT_CACHE_MAX_SIZE):
+        """
+        :param directory: Directory where the entries are stored.
+        :type directory: ``str``
+
+        :param max_size: Maximum number of entries.
+        :type max_size: ``int``
+        """
+        if not directory:
+            raise ValueError('directory must be provided')
+
+        self.directory = directory
+        self.max_size = max_size
+
+        self._prepare_directory()
+
+    def get(self, tag, key):
+        file_path = self._get_file_path(tag=tag, key=key)
+
+        try:
+            with open(file_path, 'rb') as fp:
+                expires = float(fp.readline().decode('ascii'))
+                data = fp.read()
+        except (IOError, OSError, ValueError):
+            raise KeyError(key)
+
+        if expires <= time.time():
+            self._remove(file_path)
+            raise KeyError(key)
+
+        try:
+            # Modification time is used to track the least recently used
+            # entries
+            os.utime(file_path, None)
+        except OSError:
+            pass
+
+        return data
+
+    def set(self, tag, key, value, ttl):
+        file_path = self._get_file_path(tag=tag, key=key)
+        directory = os.path.dirname(file_path)
+
+        if not os.path.isdir(directory):
+            # Directory could have been removed by clear()
+            self._prepare_directory()
+
+            try:
+                os.mkdir(directory, 0o700)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+
+        # Write to a temporary file first so the readers never see partially
+        # written entries
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(b('%r\n' % (time.time() + ttl)))
+                fp.write(value)
+
+            if os.name == 'nt' and os.path.exists(file_path):
+                os.remove(file_path)
+
+            os.rename(tmp_path, file_path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+        self._evict()
+
+    def delete(self, tag, key=None):
+        if key is not None:
+            self._remove(self._get_file_path(tag=tag, key=key))
+            return
+
+        shutil.rmtree(os.path.join(self.directory, tag), ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _get_file_path(self, tag, key):
+        return os.path.join(self.directory, tag, key)
+
+    def _prepare_directory(self):
+        try:
+            os.makedirs(self.directory, 0o700)
+        except OSError:
+            if not os.path.isdir(self.directory):
+                raise
+
+        if not hasattr(os, 'getuid'):
+            # Ownership and permissions can't be verified (e.g. on Windows)
+            return
+
+        mode = os.lstat(self.directory)
+
+        if stat.S_ISLNK(mode.st_mode):
+            raise ValueError('Cache directory %s is a symbolic link' %
+                             (self.directory))
+
+        if mode.st_uid != os.getuid():
+            raise ValueError('Cache directory %s is owned by another user' %
+                             (self.directory))
+
+        if mode.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise ValueError('Cache directory %s is writable by other users' %
+                             (self.directory))
+
+    def _remove(self, file_path):
+        try:
+            os.remove(file_path)
+        except OSError:
+            e = sys.exc_info()[1]
+
+            if e.errno != errno.ENOENT:
+                raise
+
+    def _evict(self):
+        entries = []
+
+        try:
+            tags = os.listdir(self.directory)
+        except OSError:
+            return
+
+        for tag in tags:
+            tag_directory = os.path.join(self.directory, tag)
+
+            try:
+                names = os.listdir(tag_directory)
+            except OSError:
+                continue
+
+            for name in names:
+                if name.endswith('.tmp'):
+                    continue
+
+                file_path = os.path.join(tag_directory, name)
+
+                try:
+                    entries.append((os.path.getmtime(file_path), file_path))
+                except OSError:
+                    continue
+
+        if len(entries) <= self.max_size:
+            return
+
+        entries.sort()
+
+        for _, file_path in entries[:len(entries) - self.max_size]:
+            try:
+                self._remove(file_path)
+            except OSError:
+                pass
+
+
+class ResponseCache(object):
+    """
+    Cache for the results of read-only driver methods.
+
+    A single instance can be shared by multiple drivers, results of different
+    drivers (or different accounts, regions and hosts) are never mixed.
+    """
+
+    def __init__(self, backend=None, ttl=DEFAULT_CACHE_TTL, ttls=None):
+        """
+        :param backend: Storage backend (defaults to
+                        :class:`MemoryCacheBackend`).
+        :type backend: :class:`BaseCacheBackend`
+
+        :param ttl: Default number of seconds for which the results are
+                    cached.
+        :type ttl: ``int``
+
+        :param ttls: Per-method number of seconds for which the results are
+                     cached (e.g. ``{'list_images': 3600}``).
+        :type ttls: ``dict``
+        """
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+        self.ttls = ttls or {}
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0
+        }
+        self._lock = threading.Lock()
+
+    def call(self, driver, method_name, func, args=None, kwargs=None):
+        """
+        Return the cached result of ``func(*args, **kwargs)`` or call the
+        function and cache the result.
+
+        :param driver: Driver to which the method belongs.
+        :type driver: :class:`libcloud.common.base.BaseDriver`
+
+        :param method_name: Name of the cached method.
+        :type method_name: ``str``
+
+        :param func: Function which is called on cache miss.
+        :type func: ``callable``
+        """
+        args = args or ()
+        kwargs = kwargs or {}
+
+        tag = self._get_tag(driver=driver, method_name=method_name)
+        key = self._get_key(args=args, kwargs=kwargs)
+
+        try:
+            value = self.backend.get(tag, key)
+        except KeyError:
+            pass
+        else:
+            try:
+                value = self._load(driver=driver, value=value)
+            except Exception:
+                # Corrupted or incompatible entry
+                self.backend.delete(tag, key)
+            else:
+                self._increment('hits')
+                return value
+
+        self._increment('misses')
+        result = func(*args, **kwargs)
+
+        ttl = self.ttls.get(method_name, self.ttl)
+
+        if ttl:
+            try:
+                value = self._dump(value=result)
+            except (TypeError, ValueError):
+                # Result contains values which can't be serialized
+                value = None
+
+            if value is not None:
+                self.backend.set(tag, key, value, ttl)
+
+        return self._copy(result)
+
+    def invalidate(self, driver, method_names=None):
+        """
+        Invalidate all the cached results of the provided driver methods.
+
+        :param driver: Driver whose results are invalidated.
+        :type driver: :class:`libcloud.common.base.BaseDriver`
+
+        :param method_names: Names of the methods whose results are
+                             invalidated (defaults to all the cacheable
+                             methods of the driver).
+        :type method_names: ``list`` of ``str``
+        """
+        if method_names is None:
+            method_names = driver.cacheable_methods
+
+        for method_name in method_names:
+            tag = self._get_tag(driver=driver, method_name=method_name)
+            self.backend.delete(tag)
+
+        self._increment('invalidations')
+
+    def get_stats(self):
+        """
+        Return the number of cache hits, misses and invalidations.
+
+        :rtype: ``dict``
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _increment(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _get_tag(self, driver, method_name):
+        # Drivers can override the values which identify their results
+        get_tag_parts = getattr(driver, '_get_response_cache_tag_parts', None)
+
+        if get_tag_parts is not None:
+            parts = tuple(get_tag_parts())
+        else:
+            connection = getattr(driver, 'connection', None)
+            parts = (driver.__class__.__module__, driver.__class__.__name__,
+                     getattr(driver, 'key', None),
+                     getattr(connection, 'key', None),
+                     getattr(connection, 'user_id', None),
+                     getattr(driver, 'region', None),
+                     getattr(driver, 'api_version', None),
+                     getattr(connection, 'host', None))
+
+        value = hashlib.sha1(b(repr(parts))).hexdigest()
+        return '%s-%s' % (value, method_name)
+
+    def _get_key(self, args, kwargs):
+        value = repr((args, sorted(kwargs.items())))
+        return hashlib.sha1(b(value)).hexdigest()
+
+    def _dump(self, value):
+        if not self.backend.serialize:
+            return value
+
+        return b(json.dumps(_encode(value)))
+
+    def _load(self, driver, value):
+        if not self.backend.serialize:
+            return self._copy(value)
+
+        if not isinstance(value, str):
+            value = value.decode('utf-8')
+
+        return _decode(json.loads(value), driver=driver)
+
+    def _copy(self, value):
+        # Make sure callers which modify the returned list don't modify the
+        # cached value
+        if isinstance(value, list):
+            return list(value)
+
+        return value
+
+
+def _encode(value, depth=0):
+    """
+    Convert a value to a structure which can be serialized as JSON.
+
+    References to drivers (e.g. ``NodeImage.driver``) are stored instead of
+    the drivers themselves.
+
+    :raises TypeError: If the value contains unsupported values.
+    """
+    # Imported here to avoid circular import
+    from libcloud.common.base import BaseDriver
+
+    if depth > 100:
+        raise ValueError('Value is nested too deeply')
+
+    depth += 1
+
+    if value is None or isinstance(value, _JSON_TYPES):
+        return value
+
+    if isinstance(value, list):
+        return [_encode(item, depth) for item in value]
+
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(item, depth) for item in value]}
+
+    if isinstance(value, dict):
+        return {'__dict__': [[_encode(key, depth), _encode(item, depth)]
+                             for key, item in value.items()]}
+
+    if isinstance(value, BaseDriver):
+        return {'__driver__': None}
+
+    cls = value.__class__
+
+    if not _is_supported_class(cls) or not hasattr(value, '__dict__'):
+        raise TypeError('Values of type %s are not supported' % (cls))
+
+    return {'__object__': [cls.__module__, cls.__name__],
+            '__state__': _encode(value.__dict__, depth)}
+
+
+def _decode(value, driver):
+    """
+    Convert a structure created by :func:`_encode` back to the original
+    value.
+
+    Objects are created without calling their constructor and only the
+    classes defined in the ``libcloud`` package are supported.
+    """
+    if isinstance(value, list):
+        return [_decode(item, driver) for item in value]
+
+    if not isinstance(value, dict):
+        return value
+
+    if '__tuple__' in value:
+        return tuple([_decode(item, driver) for item in value['__tuple__']])
+
+    if '__dict__' in value:
+        return dict([(_decode(key, driver), _decode(item, driver))
+                     for key, item in value['__dict__']])
+
+    if '__driver__' in value:
+        return driver
+
+    module_name, class_name = value['__object__']
+    module = sys.modules.get(module_name)
+    cls = getattr(module, class_name, None)
+
+    if module is None or not _is_supported_class(cls):
+        raise ValueError('Unsupported class: %s.%s' % (module_name,
+                                                       class_name))
+
+    obj = object.__new__(cls)
+    obj.__dict__.update(_decode(value['__state__'], driver))
+    return obj
+
+
+def _is_supported_class(cls):
+    # Imported here to avoid circular import
+    from libcloud.common.base import BaseDriver
+
+    if not isinstance(cls, type) or cls.__new__ is not object.__new__:
+        return False
+
+    module_name = getattr(cls, '__module__', None) or ''
+
+    return module_name.split('.')[0] == 'libcloud' and \
+        not issubclass(cls, BaseDriver)
+
@@ -116,6 +116,53 @@ class CloudStackConnection(ConnectionUserAndKey, PollingConnection):
             method=method, context=context)
         return result['jobresult']
 
+    def _submit_async_request(self, command, action=None, params=None,
+                              data=None, headers=None, method='GET',
+                              context=None):
+        """
+        Start an async job and return a future which holds the job result
+        instead of waiting for the job to complete.
+
+        :rtype: :class:`libcloud.utils.concurrency.Future`
+        """
+        if params:
+            context = copy.deepcopy(params)
+        else:
+            context = {}
+
+        context['command'] = command
+        return self.submit_async_request(
+            action=action, params=params, data=data, headers=headers,
+            method=method, context=context,
+            process_response=lambda result: result['jobresult'])
+
+    def get_completed_jobs(self, jobs):
+        """
+        Check the status of all the pending jobs using a single
+        ``listAsyncJobs`` request.
+
+        Jobs which are not included in the listing (e.g. because they belong
+        to another account) are returned as well so they are polled using
+        ``queryAsyncJobResult``.
+        """
+        result = self._sync_request(command='listAsyncJobs', method='GET')
+        statuses = {}
+
+        for item in result.get('asyncjobs', []):
+            statuses[str(item['jobid'])] = item.get('jobstatus',
+                                                    self.ASYNC_PENDING)
+
+        completed = []
+
+        for job in jobs:
+            job_id = str(job.poll_kwargs['params']['jobid'])
+            status = statuses.get(job_id, None)
+
+            if status != self.ASYNC_PENDING:
+                completed.append(job)
+
+        return completed
+
     def get_request_kwargs(self, action, params=None, data='', headers=None,
                            method='GET', context=None):
         command = context['command']
@@ -139,6 +186,68 @@ class CloudStackConnection(ConnectionUserAndKey, PollingConnection):
 
         return status == self.ASYNC_SUCCESS
 
+    def _sync_request_all(self, command, key, action=None, params=None,
+                          page_size=500, headers=None, method='GET'):
+        """
+        Retrieve all the pages of a list command using the ``page`` and
+        ``pagesize`` parameters.
+
+        :param key: Key of the items in the response (e.g.
+                    ``virtualmachine``).
+        :type key: ``str``
+
+        :param page_size: Number of items requested in a single request. Note:
+                          It can't exceed the "default.page.size" setting of
+                          the server (500 by default).
+        :type page_size: ``int``
+
+        :return: Response of the first page which contains the items of all
+                 the pages.
+        :rtype: ``dict``
+        """
+        if params:
+            params = copy.deepcopy(params)
+        else:
+            params = {}
+
+        params['pagesize'] = page_size
+        page = 1
+        items = []
+        previous_items = None
+        result = None
+
+        while True:
+            params['page'] = page
+            response = self._sync_request(command=command, action=action,
+                                          params=params, headers=headers,
+                                          method=method)
+            page_items = response.get(key, [])
+
+            if page_items == previous_items:
+                # Paging parameters are ignored, same page returned again
+                break
+
+            items.extend(page_items)
+            previous_items = page_items
+
+            if result is None:
+                result = response
+
+            count = response.get('count', None)
+
+            if len(page_items) < page_size:
+                break
+
+            if count is not None and len(items) >= int(count):
+                break
+
+            page += 1
+
+        if items:
+            result[key] = items
+
+        return result
+
     def _sync_request(self, command, action=None, params=None, data=None,
                       headers=None, method='GET'):
         """
@@ -191,9 +300,27 @@ class CloudStackDriverMixIn(object):
                                              params=params, data=data,
                                              headers=headers, method=method)
 
+    def _sync_request_all(self, command, key, action=None, params=None,
+                          page_size=500, headers=None, method='GET'):
+        return self.connection._sync_request_all(command=command, key=key,
+                                                 action=action, params=params,
+                                                 page_size=page_size,
+                                                 headers=headers,
+                                                 method=method)
+
     def _async_request(self, command, action=None, params=None, data=None,
                        headers=None, method='GET', context=None):
         return self.connection._async_request(command=command, action=action,
                                               params=params, data=data,
                                               headers=headers, method=method,
                                               context=context)
+
+    def _submit_async_request(self, command, action=None, params=None,
+                              data=None, headers=None, method='GET',
+                              context=None):
+        connection = self.connection
+        return connection._submit_async_request(command=command,
+                                                action=action, params=params,
+                                                data=data, headers=headers,
+                                                method=method,
+                                                context=context)
@@ -47,7 +47,11 @@ class RateLimitReachedError(BaseHTTPError):
     message = '%s Rate limit exceeded' % (code)
 
     def __init__(self, *args, **kwargs):
-        self.retry_after = int(kwargs.pop('retry_after', 0))
+        # Note: Imported here to avoid a circular import
+        from libcloud.common.retry import parse_retry_after
+
+        retry_after = parse_retry_after(kwargs.pop('retry_after', 0))
+        self.retry_after = int(retry_after or 0)
 
 
 _error_classes = [RateLimitReachedError]
@@ -68,7 +72,9 @@ def exception_from_message(code, message, headers=None):
         'headers': headers
     }
 
-    if headers and 'retry_after' in headers:
+    if headers and 'retry-after' in headers:
+        kwargs['retry_after'] = headers['retry-after']
+    elif headers and 'retry_after' in headers:
         kwargs['retry_after'] = headers['retry_after']
 
     cls = _code_map.get(code, BaseHTTPError)
@@ -77,13 +77,13 @@ import errno
 import time
 import datetime
 import os
-import socket
 import sys
 
 from libcloud.utils.connection import get_response_object
 from libcloud.utils.py3 import b, httplib, urlencode, urlparse, PY3
 from libcloud.common.base import (ConnectionUserAndKey, JsonResponse,
                                   PollingConnection)
+from libcloud.common.retry import RetryPolicy
 from libcloud.common.types import (ProviderError,
                                    LibcloudError)
 
@@ -644,9 +644,18 @@ class GoogleOAuth2Credential(object):
             raise GoogleAuthError('Invalid auth_type: %s' %
                                   str(self.auth_type))
 
-        if self.token is None:
-            self.token = self.oauth2_conn.get_new_token()
+    @property
+    def token(self):
+        # A new token is only requested once it's needed so no requests are
+        # made when a driver is instantiated
+        if self._token is None:
+            self._token = self.oauth2_conn.get_new_token()
             self._write_token_to_file()
+        return self._token
+
+    @token.setter
+    def token(self, value):
+        self._token = value
 
     @property
     def access_token(self):
@@ -701,6 +710,12 @@ class GoogleBaseConnection(ConnectionUserAndKey, PollingConnection):
     poll_interval = 2.0
     timeout = 180
 
+    # Retry transient errors and the occasional "Connection reset by peer"
+    # error (regardless of the method)
+    retry_policy = RetryPolicy(max_attempts=4, base_delay=0.5, max_delay=10,
+                               unsent_errnos=(errno.ECONNREFUSED,
+                                              errno.ECONNRESET))
+
     def __init__(self, user_id, key=None, auth_type=None,
                  credential_file=None, scopes=None, **kwargs):
         """
@@ -764,27 +779,6 @@ class GoogleBaseConnection(ConnectionUserAndKey, PollingConnection):
         """Encode data to JSON"""
         return json.dumps(data)
 
-    def request(self, *args, **kwargs):
-        """
-        @inherits: :class:`Connection.request`
-        """
-        # Adds some retry logic for the occasional
-        # "Connection Reset by peer" error.
-        retries = 4
-        tries = 0
-        while tries < (retries - 1):
-            try:
-                return super(GoogleBaseConnection, self).request(
-                    *args, **kwargs)
-            except socket.error:
-                e = sys.exc_info()[1]
-                if e.errno == errno.ECONNRESET:
-                    tries = tries + 1
-                else:
-                    raise e
-        # One more time, then give up.
-        return super(GoogleBaseConnection, self).request(*args, **kwargs)
-
     def has_completed(self, response):
         """
         Determine if operation has completed based on response.
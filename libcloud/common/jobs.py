@@ -0,0 +1,315 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Tracker which waits for many async jobs using a single background poller.
+
+Jobs are submitted using :meth:`AsyncJobTracker.submit` which performs the
+initial request and returns a :class:`libcloud.utils.concurrency.Future`.
+The status of all the pending jobs is then checked by one background thread.
+Connections can check the status of many jobs using a single request (see
+:meth:`libcloud.common.base.PollingConnection.get_completed_jobs`) so only
+the jobs which have completed need to be retrieved individually.
+"""
+
+from __future__ import with_statement
+
+import sys
+import time
+import threading
+
+from libcloud.common.types import LibcloudError
+from libcloud.utils.concurrency import Future, wait
+
+__all__ = [
+    'AsyncJob',
+    'AsyncJobTracker',
+
+    'get_job_tracker'
+]
+
+# Protects creation of the per-connection trackers
+_trackers_lock = threading.Lock()
+
+
+class AsyncJob(object):
+    """
+    Async job which is being tracked by :class:`AsyncJobTracker`.
+    """
+
+    def __init__(self, response, poll_kwargs, context=None, deadline=None,
+                 process_response=None):
+        """
+        :param response: Response to the request which has started the job.
+
+        :param poll_kwargs: Keyword arguments which are passed to the
+                            connection request method when polling for the
+                            job status.
+        :type poll_kwargs: ``dict``
+
+        :param context: Context which has been passed to the initial request.
+        :type context: ``dict``
+
+        :param deadline: Time after which the job is considered failed.
+        :type deadline: ``float``
+
+        :param process_response: Optional function which is called with the
+                                 final response and returns the job result.
+        :type process_response: ``callable``
+        """
+        self.response = response
+        self.poll_kwargs = poll_kwargs
+        self.context = context
+        self.deadline = deadline
+        self.process_response = process_response
+        self.future = Future()
+
+    def set_response(self, response):
+        """
+        Complete the job using the final poll response.
+        """
+        try:
+            if self.process_response is not None:
+                response = self.process_response(response)
+        except Exception:
+            self.set_exception(sys.exc_info())
+        else:
+            self.future.set_result(response)
+
+    def set_exception(self, exc_info):
+        self.future.set_exception(exc_info[1], exc_info=exc_info)
+
+    def __repr__(self):
+        return ('<AsyncJob poll_kwargs=%s done=%s>' %
+                (self.poll_kwargs, self.future.done()))
+
+
+class AsyncJobTracker(object):
+    """
+    Tracks async jobs of a :class:`libcloud.common.base.PollingConnection`
+    using a single background thread.
+
+    The poll interval starts at ``poll_interval`` of the connection and grows
+    by ``poll_backoff_factor`` (up to ``max_poll_interval``) after each poll
+    during which no job has completed. It drops back to ``poll_interval``
+    once a job completes or a new job is submitted.
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: Connection which is used to start the jobs. The
+                           jobs are polled using a copy of it.
+        :type connection: :class:`libcloud.common.base.PollingConnection`
+        """
+        self.connection = connection
+        self.poll_interval = connection.poll_interval
+        self.max_poll_interval = max(connection.max_poll_interval or 0,
+                                     self.poll_interval)
+        self.backoff_factor = connection.poll_backoff_factor
+        self.timeout = connection.timeout
+
+        self._worker = None
+        self._condition = threading.Condition()
+        self._jobs = []
+        self._thread = None
+        self._interval = self.poll_interval
+        self._next_poll = 0
+
+        self._stats = {
+            'polls': 0,
+            'completed': 0
+        }
+
+    def submit(self, action, params=None, data=None, headers=None,
+               method='GET', context=None, process_response=None,
+               connection=None):
+        """
+        Perform the request which starts an async job and start tracking the
+        job.
+
+        The initial request is performed in the calling thread so errors are
+        raised straight away.
+
+        :param process_response: Optional function which is called with the
+                                 final response and returns the job result.
+        :type process_response: ``callable``
+
+        :param connection: Connection which is used to perform the initial
+                           request (defaults to the tracker connection).
+        :type connection: :class:`libcloud.common.base.PollingConnection`
+
+        :return: Future which holds the final response (or the value
+                 returned by ``process_response``).
+        :rtype: :class:`libcloud.utils.concurrency.Future`
+        """
+        connection = connection or self.connection
+        request = getattr(connection, connection.request_method)
+        kwargs = connection.get_request_kwargs(action=action, params=params,
+                                               data=data, headers=headers,
+                                               method=method,
+                                               context=context)
+        response = request(**kwargs)
+        poll_kwargs = connection.get_poll_request_kwargs(
+            response=response, context=context, request_kwargs=kwargs)
+
+        job = AsyncJob(response=response, poll_kwargs=poll_kwargs,
+                       context=context,
+                       deadline=time.time() + self.timeout,
+                       process_response=process_response)
+        self.add_job(job)
+        return job.future
+
+    def add_job(self, job):
+        """
+        Start tracking an already started job.
+
+        :type job: :class:`AsyncJob`
+        """
+        with self._condition:
+            self._jobs.append(job)
+
+            # New jobs are first polled after the initial poll interval
+            self._interval = self.poll_interval
+            self._next_poll = min(self._next_poll or float('inf'),
+                                  time.time() + self.poll_interval)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+            self._condition.notify_all()
+
+    def wait(self, futures, count=None, timeout=None):
+        """
+        Wait until ``count`` (defaults to all) of the provided futures have
+        completed.
+
+        :return: Tuple of completed and not completed futures.
+        :rtype: ``tuple`` of (``list``, ``list``)
+        """
+        return wait(futures=futures, count=count, timeout=timeout)
+
+    def get_stats(self):
+        """
+        Return the number of polls performed and jobs completed so far and the
+        number of pending jobs.
+
+        :rtype: ``dict``
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._jobs)
+
+        return stats
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if not self._jobs:
+                        self._thread = None
+                        self._next_poll = 0
+                        return
+
+                    delay = self._next_poll - time.time()
+
+                    if delay <= 0:
+                        break
+
+                    self._condition.wait(delay)
+
+                jobs = list(self._jobs)
+
+            completed = self._poll(jobs=jobs)
+            now = time.time()
+
+            with self._condition:
+                for job in jobs:
+                    if not job.future.done() and now >= job.deadline:
+                        error = LibcloudError('Job did not complete in %s '
+                                              'seconds' % (self.timeout))
+                        job.set_exception((LibcloudError, error, None))
+
+                    if job.future.done():
+                        self._jobs.remove(job)
+
+                self._stats['polls'] += 1
+                self._stats['completed'] += completed
+
+                if completed:
+                    self._interval = self.poll_interval
+                else:
+                    self._interval = min(self._interval * self.backoff_factor,
+                                         self.max_poll_interval)
+
+                self._next_poll = now + self._interval
+
+    def _poll(self, jobs):
+        """
+        Check the status of the provided jobs and complete the ones which
+        have finished.
+
+        :return: Number of completed jobs.
+        :rtype: ``int``
+        """
+        if self._worker is None:
+            self._worker = self.connection.clone()
+
+        connection = self._worker
+        request = getattr(connection, connection.request_method)
+
+        try:
+            candidates = connection.get_completed_jobs(jobs=jobs)
+        except Exception:
+            # Fall back to polling each job individually
+            candidates = jobs
+
+        completed = 0
+
+        for job in candidates:
+            try:
+                response = request(**job.poll_kwargs)
+
+                if not connection.has_completed(response=response):
+                    continue
+            except Exception:
+                job.set_exception(sys.exc_info())
+            else:
+                job.set_response(response)
+
+            completed += 1
+
+        return completed
+
+
+def get_job_tracker(connection):
+    """
+    Return a tracker which is shared by all the callers which submit jobs
+    using the provided connection.
+
+    :param connection: Connection which is used to start the jobs.
+    :type connection: :class:`libcloud.common.base.PollingConnection`
+
+    :rtype: :class:`AsyncJobTracker`
+    """
+    with _trackers_lock:
+        tracker = connection.__dict__.get('_job_tracker', None)
+
+        if tracker is None:
+            tracker = AsyncJobTracker(connection=connection)
+            connection._job_tracker = tracker
+
+        return tracker
@@ -0,0 +1,361 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Thread-safe pool of reusable HTTP/1.1 keep-alive connections.
+
+Connections are grouped by a key which identifies the remote end (connection
+class, host, port and the other connection constructor arguments) so only
+connections to the same endpoint are ever shared.
+"""
+
+from __future__ import with_statement
+
+import select
+import threading
+import time
+from collections import deque
+
+__all__ = [
+    'DEFAULT_POOL_MAX_SIZE',
+    'DEFAULT_POOL_IDLE_TIMEOUT',
+
+    'ConnectionPool',
+    'get_default_pool',
+    'set_default_pool'
+]
+
+# Maximum number of idle connections which are kept around per host
+DEFAULT_POOL_MAX_SIZE = 10
+
+# Number of seconds after which an idle connection is closed and evicted
+DEFAULT_POOL_IDLE_TIMEOUT = 60
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+class ConnectionPool(object):
+    """
+    Per-host pool of idle keep-alive connections.
+
+    A connection is handed back to the pool once the response which was
+    received on it has been fully consumed. Connections for which the
+    response is still being read (e.g. "raw" streaming requests) are tracked
+    and returned to the pool lazily as soon as the response has been read
+    until the end or closed if it hasn't been read within ``idle_timeout``
+    seconds.
+    """
+
+    def __init__(self, max_size=DEFAULT_POOL_MAX_SIZE,
+                 idle_timeout=DEFAULT_POOL_IDLE_TIMEOUT):
+        """
+        :param max_size: Maximum number of idle connections per host.
+        :type max_size: ``int``
+
+        :param idle_timeout: Number of seconds after which an idle connection
+                             is closed and removed from the pool.
+        :type idle_timeout: ``int``
+        """
+        if max_size < 1:
+            raise ValueError('max_size must be greater than 0')
+
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.discards = 0
+
+        self._idle = {}
+        self._pending = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(connection_cls, kwargs):
+        """
+        Return a key which identifies connections which can be shared.
+
+        :param connection_cls: Connection class.
+        :type connection_cls: ``type``
+
+        :param kwargs: Keyword arguments used to instantiate the connection.
+        :type kwargs: ``dict``
+
+        :rtype: ``tuple``
+        """
+        return (connection_cls,) + tuple(sorted(kwargs.items()))
+
+    def acquire(self, key, factory):
+        """
+        Return an idle connection for the provided key or create a new one
+        using the provided factory if there is no idle connection available.
+
+        :param key: Pool key (see :meth:`get_key`).
+        :type key: ``tuple``
+
+        :param factory: Callable which returns a new connection.
+        :type factory: ``callable``
+
+        :return: (connection, reused) tuple.
+        :rtype: ``tuple``
+        """
+        to_close = []
+
+        with self._lock:
+            self._reap_pending(to_close=to_close)
+            connection = self._pop_idle(key=key, to_close=to_close)
+
+            if connection is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        self._close_connections(to_close)
+
+        if connection is not None:
+            return connection, True
+
+        return factory(), False
+
+    def release(self, key, connection, response=None):
+        """
+        Hand a connection back to the pool.
+
+        If the provided response hasn't been fully consumed yet, the
+        connection is returned to the pool at a later point once the response
+        has been read until the end.
+
+        :param key: Pool key (see :meth:`get_key`).
+        :type key: ``tuple``
+
+        :param connection: Connection to release.
+
+        :param response: Response which has been received on this connection.
+        """
+        to_close = []
+
+        with self._lock:
+            if response is not None and \
+                    not self._is_response_consumed(response):
+                self._pending.append((key, connection, response,
+                                      time.time()))
+            elif response is not None and getattr(response, 'will_close',
+                                                  False):
+                # Server indicated it will close the connection
+                self.discards += 1
+                to_close.append(connection)
+            else:
+                self._push_idle(key=key, connection=connection,
+                                to_close=to_close)
+
+            self._reap_pending(to_close=to_close)
+
+        self._close_connections(to_close)
+
+    def discard(self, connection):
+        """
+        Close a connection which should not be reused (e.g. because an error
+        occurred while it was used).
+        """
+        with self._lock:
+            self.discards += 1
+
+        self._close_connections([connection])
+
+    def evict_idle(self):
+        """
+        Close and remove all the connections which have been idle for longer
+        than ``idle_timeout`` seconds.
+
+        :return: Number of evicted connections.
+        :rtype: ``int``
+        """
+        to_close = []
+        cutoff = time.time() - self.idle_timeout
+
+        with self._lock:
+            for key in list(self._idle.keys()):
+                self._evict_expired(key=key, cutoff=cutoff, to_close=to_close)
+
+        self._close_connections(to_close)
+        return len(to_close)
+
+    def close(self):
+        """
+        Close all the idle connections and empty the pool.
+        """
+        to_close = []
+
+        with self._lock:
+            for entries in self._idle.values():
+                to_close.extend([connection for connection, _ in entries])
+
+            self._idle = {}
+            self._pending = []
+
+        self._close_connections(to_close)
+
+    def get_stats(self):
+        """
+        Return pool counters.
+
+        :rtype: ``dict``
+        """
+        with self._lock:
+            idle = sum([len(entries) for entries in self._idle.values()])
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'discards': self.discards,
+                'idle': idle,
+                'pending': len(self._pending)
+            }
+
+    def _pop_idle(self, key, to_close):
+        entries = self._idle.get(key, None)
+
+        if not entries:
+            return None
+
+        self._evict_expired(key=key, cutoff=time.time() - self.idle_timeout,
+                            to_close=to_close)
+
+        while entries:
+            # Most recently used connection is the least likely to have been
+            # closed by the server
+            connection, _ = entries.pop()
+
+            if self._is_connection_dropped(connection):
+                self.evictions += 1
+                to_close.append(connection)
+                continue
+
+            return connection
+
+        return None
+
+    def _push_idle(self, key, connection, to_close):
+        entries = self._idle.setdefault(key, deque())
+
+        if len(entries) >= self.max_size:
+            self.discards += 1
+            to_close.append(connection)
+            return
+
+        entries.append((connection, time.time()))
+
+    def _evict_expired(self, key, cutoff, to_close):
+        entries = self._idle.get(key, None)
+
+        while entries and entries[0][1] < cutoff:
+            connection, _ = entries.popleft()
+            self.evictions += 1
+            to_close.append(connection)
+
+        if not entries:
+            self._idle.pop(key, None)
+
+    def _reap_pending(self, to_close):
+        if not self._pending:
+            return
+
+        cutoff = time.time() - self.idle_timeout
+        pending = []
+
+        for item in self._pending:
+            key, connection, response, released_at = item
+
+            if self._is_response_consumed(response):
+                self._push_idle(key=key, connection=connection,
+                                to_close=to_close)
+            elif released_at >= cutoff:
+                pending.append(item)
+            else:
+                # Response hasn't been consumed in time (e.g. the caller has
+                # abandoned it) so the connection can't be reused
+                self.evictions += 1
+                to_close.append(connection)
+
+        self._pending = pending
+
+    def _is_response_consumed(self, response):
+        isclosed = getattr(response, 'isclosed', None)
+
+        if isclosed is None:
+            return True
+
+        return isclosed()
+
+    def _is_connection_dropped(self, connection):
+        """
+        Return True if the server has closed an idle keep-alive connection.
+
+        An idle connection should never be readable - if it is, the server
+        has either closed it or sent unexpected data.
+        """
+        sock = getattr(connection, 'sock', None)
+
+        if sock is None:
+            return False
+
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (select.error, ValueError, TypeError):
+            return True
+
+        return bool(readable)
+
+    def _close_connections(self, connections):
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+def get_default_pool():
+    """
+    Return a process-wide connection pool which is used by all the
+    :class:`libcloud.common.base.Connection` instances when connection
+    pooling is enabled.
+
+    :rtype: :class:`ConnectionPool`
+    """
+    global _default_pool
+
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+
+        return _default_pool
+
+
+def set_default_pool(pool):
+    """
+    Replace the process-wide connection pool.
+
+    :param pool: New pool or ``None`` to reset it.
+    :type pool: :class:`ConnectionPool`
+    """
+    global _default_pool
+
+    with _default_pool_lock:
+        if _default_pool is not None and _default_pool is not pool:
+            _default_pool.close()
+
+        _default_pool = pool
@@ -0,0 +1,364 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Retry policies and client-side rate limiting which are used by
+:class:`libcloud.common.base.Connection`.
+"""
+
+from __future__ import with_statement
+
+import ssl
+import time
+import errno
+import random
+import socket
+import threading
+from email.utils import parsedate_tz, mktime_tz
+
+from libcloud.utils.py3 import httplib
+from libcloud.common.exceptions import RateLimitReachedError
+from libcloud.utils.misc import RETRY_EXCEPTIONS, TRANSIENT_SSL_ERROR
+from libcloud.utils.misc import DEFAULT_TIMEOUT, DEFAULT_DELAY
+
+__all__ = [
+    'IDEMPOTENT_METHODS',
+    'RETRY_STATUS_CODES',
+
+    'RetryPolicy',
+    'TokenBucket',
+
+    'get_token_bucket',
+    'parse_retry_after'
+]
+
+# Methods which can be safely repeated - sending the same request multiple
+# times has the same effect as sending it once
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+# Response status codes which indicate a transient error
+RETRY_STATUS_CODES = (429, httplib.BAD_GATEWAY, httplib.SERVICE_UNAVAILABLE,
+                      httplib.GATEWAY_TIMEOUT)
+
+# Response status codes which indicate the request has been rejected without
+# being processed and can be retried even if it's not idempotent
+THROTTLING_STATUS_CODES = (429, )
+
+# Default maximum number of seconds between two attempts
+DEFAULT_MAX_DELAY = 30
+
+# Default number of attempts (including the first one)
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Default multiplier of the previous delay used to calculate the upper bound
+# of the next delay
+DEFAULT_BACKOFF_FACTOR = 3
+
+# Token buckets which are shared by all the connections to the same endpoint
+_token_buckets = {}
+_token_buckets_lock = threading.Lock()
+
+
+class RetryPolicy(object):
+    """
+    Policy which decides which failed requests are retried and how long to
+    wait before the next attempt.
+
+    Requests are retried on the connection errors and response status codes
+    which usually indicate a transient error. Requests which aren't idempotent
+    (e.g. ``POST``) are only retried if the request has been rejected before
+    it could have been processed (DNS lookup and connection failures,
+    throttling responses).
+
+    Delays between the attempts use "decorrelated jitter" backoff - each
+    delay is a random value between ``base_delay`` and ``backoff_factor``
+    times the previous delay, capped at ``max_delay``. Delays requested by
+    the ``Retry-After`` response header take precedence.
+    """
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 timeout=DEFAULT_TIMEOUT, base_delay=DEFAULT_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 retry_exceptions=RETRY_EXCEPTIONS,
+                 retry_status_codes=RETRY_STATUS_CODES,
+                 idempotent_methods=IDEMPOTENT_METHODS,
+                 unsent_errnos=(errno.ECONNREFUSED, ),
+                 respect_retry_after=True):
+        """
+        :param max_attempts: Maximum number of attempts (including the first
+                             one). None means attempts are only limited by
+                             ``timeout``.
+        :type max_attempts: ``int``
+
+        :param timeout: Number of seconds after which no more attempts are
+                        made.
+        :type timeout: ``float``
+
+        :param base_delay: Minimum number of seconds between two attempts.
+        :type base_delay: ``float``
+
+        :param max_delay: Maximum number of seconds between two attempts.
+        :type max_delay: ``float``
+
+        :param backoff_factor: Multiplier of the previous delay used as the
+                               upper bound of the next delay. ``1`` means a
+                               constant delay.
+        :type backoff_factor: ``float``
+
+        :param retry_exceptions: Exceptions upon which a request is retried.
+        :type retry_exceptions: ``tuple``
+
+        :param retry_status_codes: Response status codes upon which a request
+                                   is retried.
+        :type retry_status_codes: ``tuple`` of ``int``
+
+        :param idempotent_methods: HTTP methods which can be safely retried
+                                   on any of the errors above.
+        :type idempotent_methods: ``tuple`` of ``str``
+
+        :param unsent_errnos: Socket error numbers which indicate the request
+                              hasn't been processed by the server and can be
+                              retried regardless of the method.
+        :type unsent_errnos: ``tuple`` of ``int``
+
+        :param respect_retry_after: True to wait for the number of seconds
+                                    specified by the ``Retry-After`` response
+                                    header.
+        :type respect_retry_after: ``bool``
+        """
+        self.max_attempts = max_attempts
+        self.timeout = max(timeout if timeout is not None else
+                           DEFAULT_TIMEOUT, 0)
+        self.base_delay = (base_delay if base_delay is not None else
+                           DEFAULT_DELAY)
+        self.max_delay = max(max_delay, self.base_delay)
+        self.backoff_factor = (backoff_factor if backoff_factor is not None
+                               else DEFAULT_BACKOFF_FACTOR)
+        self.retry_exceptions = retry_exceptions
+        self.retry_status_codes = tuple(retry_status_codes)
+        self.idempotent_methods = tuple(idempotent_methods)
+        self.unsent_errnos = tuple(unsent_errnos)
+        self.respect_retry_after = respect_retry_after
+
+    def is_idempotent(self, method):
+        return method.upper() in self.idempotent_methods
+
+    def get_retry_status_codes(self, method):
+        """
+        Return response status codes upon which a request with the provided
+        method is retried.
+
+        :rtype: ``tuple`` of ``int``
+        """
+        if self.is_idempotent(method):
+            return self.retry_status_codes
+
+        return tuple([code for code in self.retry_status_codes
+                      if code in THROTTLING_STATUS_CODES])
+
+    def should_retry(self, method, exc):
+        """
+        Return True if a request which has failed with the provided exception
+        should be retried.
+
+        :rtype: ``bool``
+        """
+        if isinstance(exc, ssl.SSLError) and \
+                TRANSIENT_SSL_ERROR not in str(exc):
+            # Certificate and protocol errors won't go away
+            return False
+
+        if not isinstance(exc, self.retry_exceptions):
+            return False
+
+        if self.is_idempotent(method):
+            return True
+
+        if isinstance(exc, (socket.gaierror, httplib.NotConnected,
+                            RateLimitReachedError)):
+            return True
+
+        return getattr(exc, 'errno', None) in self.unsent_errnos
+
+    def get_delay(self, previous_delay=None):
+        """
+        Return the number of seconds to wait before the next attempt.
+
+        :param previous_delay: Delay before the previous attempt (None if
+                               there was no previous retry).
+        :type previous_delay: ``float``
+
+        :rtype: ``float``
+        """
+        previous_delay = max(previous_delay or 0, self.base_delay)
+        delay = random.uniform(self.base_delay,
+                               previous_delay * self.backoff_factor)
+        return min(delay, self.max_delay)
+
+    def get_retry_after(self, headers=None, exc=None):
+        """
+        Return the number of seconds the server asked us to wait before
+        the next attempt or None if it didn't specify it.
+
+        :rtype: ``float``
+        """
+        if not self.respect_retry_after:
+            return None
+
+        if exc is not None:
+            return getattr(exc, 'retry_after', None) or None
+
+        for key, value in (headers or {}).items():
+            if key.lower() == 'retry-after':
+                return parse_retry_after(value)
+
+        return None
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket which limits the rate of requests sent to an API
+    endpoint.
+
+    The bucket can also be paused for a number of seconds (e.g. when the
+    server responds with ``Retry-After``) which makes all the callers wait.
+    """
+
+    def __init__(self, rate=None, capacity=None):
+        """
+        :param rate: Number of tokens (requests) added per second. None means
+                     the rate isn't limited.
+        :type rate: ``float``
+
+        :param capacity: Maximum number of tokens which can be accumulated
+                         (maximum burst size). Defaults to ``rate``.
+        :type capacity: ``int``
+        """
+        self.rate = rate
+        self.capacity = max(capacity or rate or 1, 1)
+
+        self._tokens = float(self.capacity)
+        self._updated = time.time()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available and take it.
+
+        :return: Number of seconds the caller has waited.
+        :rtype: ``float``
+        """
+        waited = 0
+
+        while True:
+            with self._lock:
+                now = time.time()
+                delay = self._paused_until - now
+
+                if delay <= 0:
+                    if self.rate is None:
+                        return waited
+
+                    self._tokens = min(self.capacity, self._tokens +
+                                       (now - self._updated) * self.rate)
+                    self._updated = now
+
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+
+                    delay = (1 - self._tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+    def set_rate(self, rate, capacity=None):
+        """
+        Change the rate and the capacity of the bucket.
+        """
+        with self._lock:
+            self.rate = rate
+            self.capacity = max(capacity or rate or 1, 1)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def pause(self, seconds):
+        """
+        Make all the callers wait for at least the provided number of seconds.
+
+        :param seconds: Number of seconds to wait.
+        :type seconds: ``float``
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until,
+                                     time.time() + seconds)
+
+
+def get_token_bucket(key, rate=None, capacity=None):
+    """
+    Return a token bucket which is shared by all the callers using the same
+    key. If the bucket already exists and a rate is provided, the rate and
+    capacity of the bucket are updated.
+
+    :param key: Key which identifies the API endpoint.
+    :type key: ``tuple``
+
+    :param rate: Number of requests per second.
+    :type rate: ``float``
+
+    :param capacity: Maximum burst size.
+    :type capacity: ``int``
+
+    :rtype: :class:`TokenBucket`
+    """
+    with _token_buckets_lock:
+        bucket = _token_buckets.get(key, None)
+
+        if bucket is None:
+            bucket = TokenBucket(rate=rate, capacity=capacity)
+            _token_buckets[key] = bucket
+        elif rate is not None and (rate, capacity) != (bucket.rate,
+                                                       bucket.capacity):
+            bucket.set_rate(rate=rate, capacity=capacity)
+
+        return bucket
+
+
+def parse_retry_after(value, now=None):
+    """
+    Parse a ``Retry-After`` header value which is either a number of seconds
+    or a HTTP date.
+
+    :return: Number of seconds to wait or None if the value is not valid.
+    :rtype: ``float``
+    """
+    if value is None:
+        return None
+
+    value = str(value).strip()
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    parsed = parsedate_tz(value)
+
+    if parsed is None:
+        return None
+
+    now = now if now is not None else time.time()
+    return max(mktime_tz(parsed) - now, 0)
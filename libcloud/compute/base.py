@@ -20,6 +20,7 @@ Provides base classes for working with drivers
 from __future__ import with_statement
 
 import sys
+import copy
 import time
 import hashlib
 import os
@@ -38,6 +39,12 @@ from libcloud.common.base import ConnectionKey
 from libcloud.common.base import BaseDriver
 from libcloud.common.types import LibcloudError
 from libcloud.compute.ssh import have_paramiko
+from libcloud.compute.waiter import get_node_poller
+from libcloud.compute.deployment import MultiStepDeployment
+from libcloud.compute.deployment import ScriptDeployment
+from libcloud.compute.deployment import DeploymentResult
+from libcloud.compute.deployment import DeploymentStepResult
+from libcloud.utils.concurrency import ThreadPool
 
 from libcloud.utils.networking import is_private_subnet
 from libcloud.utils.networking import is_valid_ip_address
@@ -672,6 +679,19 @@ class NodeDriver(BaseDriver):
 
     NODE_STATE_MAP = {}
 
+    cache_invalidation_map = {
+        'create_image': ['list_images'],
+        'delete_image': ['list_images'],
+        'copy_image': ['list_images']
+    }
+
+    # Default settings of the poll loop used by wait_until_running. The wait
+    # period is multiplied by wait_backoff_factor after each lookup (up to
+    # wait_max_period seconds) and randomized by +/- wait_jitter.
+    wait_max_period = 30
+    wait_backoff_factor = 1.5
+    wait_jitter = 0.1
+
     def list_nodes(self):
         """
         List all nodes.
@@ -953,6 +973,114 @@ class NodeDriver(BaseDriver):
 
         return node
 
+    def deploy_nodes(self, nodes, deploy, max_workers=10, auth=None,
+                     ssh_username='root', ssh_alternate_usernames=None,
+                     ssh_port=22, ssh_timeout=10, ssh_key=None,
+                     timeout=NODE_ONLINE_WAIT_TIMEOUT, max_tries=3,
+                     ssh_interface='public_ips', wait_until_running=True):
+        """
+        Run a deployment on many existing nodes concurrently.
+
+        Nodes are processed by a pool of at most ``max_workers`` threads. For
+        each node, the method waits for the node to become running, opens a
+        single SSH connection which is reused by all the deployment steps and
+        runs the steps one by one.
+
+        A step which fails with an exception (e.g. a dropped connection) is
+        retried up to ``max_tries`` times, re-connecting if needed. A script
+        step which exits with a non-zero status is not retried and no further
+        steps are run on that node.
+
+        Unlike :meth:`deploy_node`, this method doesn't raise if deployment
+        fails on some of the nodes. Instead, it returns a
+        :class:`libcloud.compute.deployment.DeploymentResult` for every node
+        (in the same order as the provided nodes) with the error (if any),
+        per-step results (including script output) and timings.
+
+        :param nodes: Nodes to run the deployment on.
+        :type nodes: ``list`` of :class:`.Node`
+
+        :param deploy: Deployment to run on each node. A separate copy of the
+                       deployment is used for each node.
+        :type deploy: :class:`Deployment`
+
+        :param max_workers: Maximum number of nodes which are processed at
+                            the same time. (default is 10)
+        :type max_workers: ``int``
+
+        :param auth: Authentication information for the nodes (optional). If
+                     not provided, password from ``node.extra['password']``
+                     is used if available.
+        :type auth: :class:`.NodeAuthSSHKey` or :class:`NodeAuthPassword`
+
+        :param ssh_username: Name of the account which is used when
+                             connecting to SSH server (default is root)
+        :type ssh_username: ``str``
+
+        :param ssh_alternate_usernames: Optional list of ssh usernames to try
+                                        to connect with if using the default
+                                        one fails
+        :type ssh_alternate_usernames: ``list``
+
+        :param ssh_port: SSH server port (default is 22)
+        :type ssh_port: ``int``
+
+        :param ssh_timeout: SSH connection timeout in seconds (default is 10)
+        :type ssh_timeout: ``float``
+
+        :param ssh_key: A path (or paths) to an SSH private key with which to
+                        attempt to authenticate. (optional)
+        :type ssh_key: ``str`` or ``list`` of ``str``
+
+        :param timeout: How many seconds to spend on a single node (waiting,
+                        connecting and running the steps) before giving up.
+                        (default is 600)
+        :type timeout: ``int``
+
+        :param max_tries: How many times to try a step which fails with an
+                          exception. (default is 3)
+        :type max_tries: ``int``
+
+        :param ssh_interface: The interface to connect to. Default is
+                              'public_ips', other option is 'private_ips'.
+        :type ssh_interface: ``str``
+
+        :param wait_until_running: True to wait for the nodes to become
+                                   running before connecting to them.
+        :type wait_until_running: ``bool``
+
+        :rtype: ``list`` of :class:`DeploymentResult`
+        """
+        if not libcloud.compute.ssh.have_paramiko:
+            raise RuntimeError('paramiko is not installed. You can install ' +
+                               'it using pip: pip install paramiko')
+
+        if ssh_interface not in ['public_ips', 'private_ips']:
+            raise ValueError('ssh_interface argument must either be' +
+                             'public_ips or private_ips')
+
+        kwargs = {
+            'deploy': deploy,
+            'auth': auth,
+            'usernames': [ssh_username] + list(ssh_alternate_usernames or []),
+            'ssh_port': ssh_port,
+            'ssh_timeout': ssh_timeout,
+            'ssh_key_file': ssh_key,
+            'timeout': timeout,
+            'max_tries': max_tries,
+            'ssh_interface': ssh_interface,
+            'wait': wait_until_running
+        }
+
+        pool = ThreadPool(max_workers=min(max_workers, len(nodes) or 1))
+
+        try:
+            futures = [pool.submit(self._deploy_single_node, node=node,
+                                   **kwargs) for node in nodes]
+            return [future.result() for future in futures]
+        finally:
+            pool.shutdown(wait=True)
+
     def reboot_node(self, node):
         """
         Reboot a node.
@@ -1266,18 +1394,26 @@ class NodeDriver(BaseDriver):
 
     def wait_until_running(self, nodes, wait_period=3,
                            timeout=600, ssh_interface='public_ips',
-                           force_ipv4=True, ex_list_nodes_kwargs=None):
+                           force_ipv4=True, ex_list_nodes_kwargs=None,
+                           ex_max_wait_period=None, ex_backoff_factor=None,
+                           ex_jitter=None):
         """
         Block until the provided nodes are considered running.
 
         Node is considered running when it's state is "running" and when it has
         at least one IP address assigned.
 
+        Nodes are looked up using a poll loop which is shared with all the
+        other callers (possibly in other threads) which are waiting for nodes
+        of this driver, so concurrent callers are served by a single lookup
+        per poll interval. Drivers which support it only look up the nodes
+        which are being waited on instead of listing all the nodes.
+
         :param nodes: List of nodes to wait for.
         :type nodes: ``list`` of :class:`.Node`
 
-        :param wait_period: How many seconds to wait between each loop
-                            iteration. (default is 3)
+        :param wait_period: How many seconds to wait between the first and
+                            the second lookup. (default is 3)
         :type wait_period: ``int``
 
         :param timeout: How many seconds to wait before giving up.
@@ -1297,6 +1433,21 @@ class NodeDriver(BaseDriver):
                                      method.
         :type ex_list_nodes_kwargs: ``dict``
 
+        :param ex_max_wait_period: Maximum number of seconds to wait between
+                                   two lookups. (defaults to
+                                   ``wait_max_period`` driver attribute)
+        :type ex_max_wait_period: ``int``
+
+        :param ex_backoff_factor: Factor by which the wait period is
+                                  multiplied after each lookup. (defaults to
+                                  ``wait_backoff_factor`` driver attribute)
+        :type ex_backoff_factor: ``float``
+
+        :param ex_jitter: Maximum random deviation of the wait period as a
+                          fraction of the wait period. (defaults to
+                          ``wait_jitter`` driver attribute)
+        :type ex_jitter: ``float``
+
         :return: ``[(Node, ip_addresses)]`` list of tuple of Node instance and
                  list of ip_address on success.
         :rtype: ``list`` of ``tuple``
@@ -1322,13 +1473,9 @@ class NodeDriver(BaseDriver):
             raise ValueError('ssh_interface argument must either be' +
                              'public_ips or private_ips')
 
-        start = time.time()
-        end = start + timeout
-
         uuids = set([node.uuid for node in nodes])
 
-        while time.time() < end:
-            all_nodes = self.list_nodes(**ex_list_nodes_kwargs)
+        def check(all_nodes):
             matching_nodes = list([node for node in all_nodes
                                    if node.uuid in uuids])
 
@@ -1346,12 +1493,42 @@ class NodeDriver(BaseDriver):
 
             if len(running_nodes) == len(uuids) == len(addresses):
                 return list(zip(running_nodes, addresses))
-            else:
-                time.sleep(wait_period)
-                continue
 
-        raise LibcloudError(value='Timed out after %s seconds' % (timeout),
-                            driver=self)
+            return None
+
+        if ex_max_wait_period is None:
+            ex_max_wait_period = self.wait_max_period
+
+        if ex_backoff_factor is None:
+            ex_backoff_factor = self.wait_backoff_factor
+
+        if ex_jitter is None:
+            ex_jitter = self.wait_jitter
+
+        poller = get_node_poller(driver=self,
+                                 list_nodes_kwargs=ex_list_nodes_kwargs)
+        return poller.wait(nodes=nodes, check=check, wait_period=wait_period,
+                           timeout=timeout, max_wait_period=ex_max_wait_period,
+                           backoff_factor=ex_backoff_factor, jitter=ex_jitter)
+
+    def _list_nodes_for_waiter(self, nodes, **kwargs):
+        """
+        Return a list of nodes which is used by :meth:`wait_until_running` to
+        check the state of the provided nodes.
+
+        The returned list can also contain other nodes. By default, all the
+        nodes are listed. Drivers which support filtering nodes by id should
+        override this method and only retrieve the provided nodes.
+
+        :param nodes: Nodes which are being waited on.
+        :type nodes: ``list`` of :class:`.Node`
+
+        :param kwargs: Optional driver-specific keyword arguments which are
+                       passed to the ``list_nodes`` method.
+
+        :rtype: ``list`` of :class:`.Node`
+        """
+        return self.list_nodes(**kwargs)
 
     def _get_and_check_auth(self, auth):
         """
@@ -1479,6 +1656,156 @@ class NodeDriver(BaseDriver):
                                            max_tries=max_tries)
         return node
 
+    def _deploy_single_node(self, node, deploy, auth, usernames, ssh_port,
+                            ssh_timeout, ssh_key_file, timeout, max_tries,
+                            ssh_interface, wait):
+        """
+        Run the deployment on a single node and return the result.
+
+        :rtype: :class:`libcloud.compute.deployment.DeploymentResult`
+        """
+        start = time.time()
+        end = start + timeout
+        result = DeploymentResult(node=node)
+        ssh_client = None
+
+        # Steps store their output, so each node needs its own copy
+        deploy = copy.deepcopy(deploy)
+
+        if isinstance(deploy, MultiStepDeployment):
+            steps = deploy.steps
+        else:
+            steps = [deploy]
+
+        password = None
+
+        if isinstance(auth, NodeAuthPassword):
+            password = auth.password
+        elif 'password' in (node.extra or {}):
+            password = node.extra['password']
+
+        try:
+            if wait:
+                node, ip_addresses = self.wait_until_running(
+                    nodes=[node], timeout=timeout,
+                    ssh_interface=ssh_interface)[0]
+                result.node = node
+            else:
+                ip_addresses = getattr(node, ssh_interface)
+
+            result.timings['wait'] = time.time() - start
+
+            if not ip_addresses:
+                raise LibcloudError(value='Node has no %s' % (ssh_interface),
+                                    driver=self)
+
+            connect_start = time.time()
+            connect_error = None
+
+            for username in usernames:
+                ssh_client = SSHClient(hostname=ip_addresses[0],
+                                       port=ssh_port, username=username,
+                                       password=password,
+                                       key_files=ssh_key_file,
+                                       timeout=ssh_timeout)
+
+                try:
+                    self._ssh_client_connect(
+                        ssh_client=ssh_client,
+                        timeout=max(end - time.time(), 0))
+                except Exception:
+                    connect_error = sys.exc_info()[1]
+                    ssh_client = None
+                else:
+                    result.username = username
+                    break
+
+            result.timings['connect'] = time.time() - connect_start
+
+            if ssh_client is None:
+                raise connect_error
+
+            deploy_start = time.time()
+
+            for step in steps:
+                step_result = self._run_deployment_step(
+                    step=step, node=node, ssh_client=ssh_client,
+                    max_tries=max_tries, end=end)
+                result.steps.append(step_result)
+                node = result.node = step_result.node or node
+
+                if not step_result.success:
+                    break
+
+            result.timings['deploy'] = time.time() - deploy_start
+        except Exception:
+            result.error = sys.exc_info()[1]
+        finally:
+            if ssh_client is not None:
+                ssh_client.close()
+
+        result.timings['total'] = time.time() - start
+        return result
+
+    def _run_deployment_step(self, step, node, ssh_client, max_tries, end):
+        """
+        Run a single deployment step over an already established SSH
+        connection, retrying it (and re-connecting if the connection has been
+        dropped) if it fails with an exception.
+
+        :rtype: :class:`libcloud.compute.deployment.DeploymentStepResult`
+        """
+        start = time.time()
+        attempts = 0
+        error = None
+        result_node = None
+
+        while attempts < max_tries:
+            remaining = end - time.time()
+
+            if remaining <= 0:
+                error = LibcloudError(value='Timed out before running step %s'
+                                      % (step.__class__.__name__),
+                                      driver=self)
+                break
+
+            if isinstance(step, ScriptDeployment) and \
+                    (step.timeout is None or step.timeout > remaining):
+                # Make sure the script doesn't exceed the per-node timeout
+                step.timeout = remaining
+
+            attempts += 1
+
+            try:
+                if attempts > 1 and not self._is_ssh_client_active(ssh_client):
+                    ssh_client.close()
+                    self._ssh_client_connect(ssh_client=ssh_client,
+                                             timeout=remaining)
+
+                result_node = step.run(node, ssh_client)
+            except Exception:
+                error = sys.exc_info()[1]
+            else:
+                error = None
+                break
+
+        return DeploymentStepResult(step=step, node=result_node,
+                                    duration=time.time() - start,
+                                    attempts=attempts, error=error)
+
+    def _is_ssh_client_active(self, ssh_client):
+        """
+        Return False if the underlying SSH transport is known to be closed.
+        """
+        client = getattr(ssh_client, 'client', None)
+        get_transport = getattr(client, 'get_transport', None)
+
+        if get_transport is None:
+            return True
+
+        transport = get_transport()
+        return transport is not None and transport.is_active()
+
     def _run_deployment_script(self, task, node, ssh_client, max_tries=3):
         """
         Run the deployment script on the provided node. At this point it is
@@ -20,9 +20,20 @@ Provides generic deployment steps for machines post boot.
 from __future__ import with_statement
 
 import os
+import stat
+import hashlib
+import tarfile
 import binascii
+import tempfile
+
+try:
+    from pipes import quote
+except ImportError:
+    from shlex import quote
 
 from libcloud.utils.py3 import basestring, PY3
+from libcloud.utils.py3 import relpath
+from libcloud.common.types import LibcloudError
 
 
 class Deployment(object):
@@ -83,35 +94,203 @@ class SSHKeyDeployment(Deployment):
 
 class FileDeployment(Deployment):
     """
-    Installs a file on the server.
+    Installs a file or a directory tree on the server.
+
+    Files are streamed to the server in chunks over a single SFTP session.
     """
 
-    def __init__(self, source, target):
+    # Maximum number of files whose checksum is retrieved using a single
+    # command
+    CHECKSUM_BATCH_SIZE = 100
+
+    def __init__(self, source, target, skip_unchanged=False, tarball=False):
         """
         :type source: ``str``
-        :keyword source: Local path of file to be installed
+        :keyword source: Local path of file or directory to be installed
 
         :type target: ``str``
-        :keyword target: Path to install file on node
+        :keyword target: Path to install file (or directory) on node
+
+        :type skip_unchanged: ``bool``
+        :keyword skip_unchanged: Don't upload files which already exist on
+                                 the node and have the same size and MD5
+                                 checksum (requires ``md5sum`` on the node).
+
+        :type tarball: ``bool``
+        :keyword tarball: Upload the directory tree as a single compressed
+                          tarball which is extracted on the node (requires
+                          ``tar`` on the node). This is a lot faster for
+                          directories with many small files.
         """
         self.source = source
         self.target = target
+        self.skip_unchanged = skip_unchanged
+        self.tarball = tarball
+
+        # Remote paths of the files which have been uploaded and skipped
+        self.uploaded = []
+        self.skipped = []
 
     def run(self, node, client):
         """
-        Upload the file, retaining permissions.
+        Upload the file (or the files in the directory), retaining
+        permissions.
 
         See also :class:`Deployment.run`
         """
-        perms = int(oct(os.stat(self.source).st_mode)[4:], 8)
+        files = self._get_files()
 
-        with open(self.source, 'rb') as fp:
-            content = fp.read()
+        if self.skip_unchanged:
+            files = self._filter_unchanged_files(client=client, files=files)
 
-        client.put(path=self.target, chmod=perms,
-                   contents=content)
+        if not files:
+            return node
+
+        if self.tarball and os.path.isdir(self.source):
+            self._upload_tarball(client=client, files=files)
+        else:
+            for local_path, remote_path in files:
+                with open(local_path, 'rb') as fp:
+                    client.putfo(path=remote_path, fo=fp,
+                                 chmod=self._get_file_mode(local_path))
+
+        self.uploaded.extend([remote_path for _, remote_path in files])
         return node
 
+    def _get_files(self):
+        """
+        Return a list of (local path, remote path) tuples of the files which
+        should be uploaded.
+        """
+        if not os.path.isdir(self.source):
+            return [(self.source, self.target)]
+
+        files = []
+        target = self.target.rstrip('/') or '/'
+
+        for dir_path, dir_names, file_names in os.walk(self.source):
+            dir_names.sort()
+            relative_dir = relpath(dir_path, self.source)
+
+            for file_name in sorted(file_names):
+                local_path = os.path.join(dir_path, file_name)
+
+                if relative_dir == '.':
+                    parts = [file_name]
+                else:
+                    parts = relative_dir.split(os.sep) + [file_name]
+
+                remote_path = '/'.join([target.rstrip('/')] + parts)
+                files.append((local_path, remote_path))
+
+        return files
+
+    def _filter_unchanged_files(self, client, files):
+        """
+        Remove files which already exist on the node and have the same size
+        and MD5 checksum from the provided list.
+        """
+        result = []
+
+        for index in range(0, len(files), self.CHECKSUM_BATCH_SIZE):
+            batch = files[index:index + self.CHECKSUM_BATCH_SIZE]
+            remote_checksums = self._get_remote_checksums(client=client,
+                                                          files=batch)
+
+            for local_path, remote_path in batch:
+                remote_checksum = remote_checksums.get(remote_path, None)
+
+                if remote_checksum and \
+                        remote_checksum == self._get_file_md5(local_path):
+                    self.skipped.append(remote_path)
+                else:
+                    result.append((local_path, remote_path))
+
+        return result
+
+    def _get_remote_checksums(self, client, files):
+        """
+        Retrieve MD5 checksums of the remote files which have the same size
+        as the corresponding local files using a single command.
+
+        :return: Dictionary which maps remote path to the checksum.
+        :rtype: ``dict``
+        """
+        commands = []
+
+        for local_path, remote_path in files:
+            size = os.path.getsize(local_path)
+            commands.append('if [ "$(wc -c < %(path)s)" -eq %(size)d ]; '
+                            'then md5sum %(path)s; fi' %
+                            {'path': quote(remote_path), 'size': size})
+
+        cmd = '(%s) 2>/dev/null; exit 0' % ('; '.join(commands))
+        stdout, _, status = client.run(cmd)
+
+        result = {}
+
+        if status != 0 or not stdout:
+            return result
+
+        for line in stdout.splitlines():
+            # md5sum output format is "<checksum>  <path>"
+            parts = line.strip().split('  ', 1)
+
+            if len(parts) == 2 and not parts[0].startswith('\\'):
+                result[parts[1]] = parts[0]
+
+        return result
+
+    def _upload_tarball(self, client, files):
+        """
+        Upload the files as a single compressed tarball and extract it on the
+        node.
+        """
+        target = self.target.rstrip('/') or '/'
+        random_string = binascii.hexlify(os.urandom(4)).decode('ascii')
+        tarball_path = '%s/.libcloud_deployment_%s.tar.gz' % (
+            target.rstrip('/'), random_string)
+
+        with tempfile.TemporaryFile() as fp:
+            tar = tarfile.open(fileobj=fp, mode='w:gz')
+
+            try:
+                for local_path, remote_path in files:
+                    arcname = remote_path[len(target.rstrip('/')) + 1:]
+                    tar.add(local_path, arcname=arcname, recursive=False)
+            finally:
+                tar.close()
+
+            fp.seek(0)
+            tarball_path = client.putfo(path=tarball_path, fo=fp)
+
+        cmd = ('tar -xzf %(tarball)s -C %(target)s; status=$?; '
+               'rm -f %(tarball)s; exit $status' %
+               {'tarball': quote(tarball_path),
+                'target': quote(os.path.dirname(tarball_path))})
+        _, stderr, status = client.run(cmd)
+
+        if status != 0:
+            raise LibcloudError('Failed to extract tarball %s: %s' %
+                                (tarball_path, stderr))
+
+    def _get_file_mode(self, path):
+        return stat.S_IMODE(os.stat(path).st_mode)
+
+    def _get_file_md5(self, path):
+        file_hash = hashlib.md5()
+
+        with open(path, 'rb') as fp:
+            while True:
+                data = fp.read(64 * 1024)
+
+                if not data:
+                    break
+
+                file_hash.update(data)
+
+        return file_hash.hexdigest()
+
 
 class ScriptDeployment(Deployment):
     """
@@ -125,7 +304,8 @@ class ScriptDeployment(Deployment):
     you are running a plan shell script.
     """
 
-    def __init__(self, script, args=None, name=None, delete=False):
+    def __init__(self, script, args=None, name=None, delete=False,
+                 timeout=None):
         """
         :type script: ``str``
         :keyword script: Contents of the script to run.
@@ -140,6 +320,10 @@ class ScriptDeployment(Deployment):
 
         :type delete: ``bool``
         :keyword delete: Whether to delete the script on completion.
+
+        :type timeout: ``float``
+        :keyword timeout: Optional number of seconds after which the script
+                          is aborted.
         """
         script = self._get_string_value(argument_name='script',
                                         argument_value=script)
@@ -151,6 +335,7 @@ class ScriptDeployment(Deployment):
         self.exit_status = None
         self.delete = delete
         self.name = name
+        self.timeout = timeout
 
         if self.name is None:
             # File is put under user's home directory
@@ -183,7 +368,12 @@ class ScriptDeployment(Deployment):
         else:
             cmd = name
 
-        self.stdout, self.stderr, self.exit_status = client.run(cmd)
+        if self.timeout:
+            result = client.run(cmd, timeout=self.timeout)
+        else:
+            result = client.run(cmd)
+
+        self.stdout, self.stderr, self.exit_status = result
 
         if self.delete:
             client.delete(self.name)
@@ -198,7 +388,8 @@ class ScriptFileDeployment(ScriptDeployment):
     the script content.
     """
 
-    def __init__(self, script_file, args=None, name=None, delete=False):
+    def __init__(self, script_file, args=None, name=None, delete=False,
+                 timeout=None):
         """
         :type script_file: ``str``
         :keyword script_file: Path to a file containing the script to run.
@@ -214,6 +405,10 @@ class ScriptFileDeployment(ScriptDeployment):
 
         :type delete: ``bool``
         :keyword delete: Whether to delete the script on completion.
+
+        :type timeout: ``float``
+        :keyword timeout: Optional number of seconds after which the script
+                          is aborted.
         """
         with open(script_file, 'rb') as fp:
             content = fp.read()
@@ -224,7 +419,8 @@ class ScriptFileDeployment(ScriptDeployment):
         super(ScriptFileDeployment, self).__init__(script=content,
                                                    args=args,
                                                    name=name,
-                                                   delete=delete)
+                                                   delete=delete,
+                                                   timeout=timeout)
 
 
 class MultiStepDeployment(Deployment):
@@ -261,3 +457,83 @@ class MultiStepDeployment(Deployment):
         for s in self.steps:
             node = s.run(node, client)
         return node
+
+
+class DeploymentStepResult(object):
+    """
+    Result of a single deployment step which has been run on a node.
+    """
+
+    def __init__(self, step, node=None, duration=None, attempts=0,
+                 error=None):
+        """
+        :type step: :class:`Deployment`
+        :keyword step: Deployment step (copy used for this node).
+
+        :type node: :class:`Node`
+        :keyword node: Node returned by the step.
+
+        :type duration: ``float``
+        :keyword duration: How many seconds the step took (including retries).
+
+        :type attempts: ``int``
+        :keyword attempts: Number of attempts.
+
+        :type error: ``Exception``
+        :keyword error: Exception which caused the step to fail (if any).
+        """
+        self.step = step
+        self.node = node
+        self.duration = duration
+        self.attempts = attempts
+        self.error = error
+
+        # Script output (only available for ScriptDeployment steps)
+        self.stdout = getattr(step, 'stdout', None)
+        self.stderr = getattr(step, 'stderr', None)
+        self.exit_status = getattr(step, 'exit_status', None)
+
+    @property
+    def success(self):
+        return self.error is None and self.exit_status in [None, 0]
+
+    def __repr__(self):
+        return (('<DeploymentStepResult: step=%s, success=%s, duration=%s, '
+                 'attempts=%s, exit_status=%s>') %
+                (self.step.__class__.__name__, self.success, self.duration,
+                 self.attempts, self.exit_status))
+
+
+class DeploymentResult(object):
+    """
+    Result of a deployment which has been run on a single node.
+    """
+
+    def __init__(self, node):
+        """
+        :type node: :class:`Node`
+        :keyword node: Node on which the deployment has been run.
+        """
+        self.node = node
+        self.error = None
+        self.username = None
+        self.steps = []
+
+        # Number of seconds spent waiting for the node to become running,
+        # connecting to the SSH server, running the steps and in total
+        self.timings = {
+            'wait': None,
+            'connect': None,
+            'deploy': None,
+            'total': None
+        }
+
+    @property
+    def success(self):
+        return self.error is None and \
+            all([step.success for step in self.steps])
+
+    def __repr__(self):
+        return (('<DeploymentResult: node=%s, success=%s, total_time=%s, '
+                 'error=%s>') % (self.node.id, self.success,
+                                 self.timings['total'], self.error))
@@ -30,6 +30,7 @@ from libcloud.compute.base import KeyPair
 from libcloud.compute.types import NodeState, LibcloudError
 from libcloud.compute.types import KeyPairDoesNotExistError, StorageVolumeState
 from libcloud.utils.networking import is_private_subnet
+from libcloud.utils.concurrency import map_with_workers
 
 
 # Utility functions
@@ -1232,6 +1233,13 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
 
     features = {'create_node': ['generates_password']}
 
+    # Number of items requested in a single list request
+    list_page_size = 500
+
+    # Maximum number of list requests list_nodes performs concurrently (each
+    # one uses its own connection)
+    list_nodes_max_workers = 4
+
     NODE_STATE_MAP = {
         'Running': NodeState.RUNNING,
         'Starting': NodeState.REBOOTING,
@@ -1371,13 +1379,22 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
         if location is not None:
             args['zoneid'] = location.id
 
-        vms = self._sync_request('listVirtualMachines', params=args)
-        addrs = self._sync_request('listPublicIpAddresses', params=args)
-        port_forwarding_rules = self._sync_request('listPortForwardingRules')
-        ip_forwarding_rules = self._sync_request('listIpForwardingRules')
+        queries = [
+            ('listVirtualMachines', 'virtualmachine', args),
+            ('listPublicIpAddresses', 'publicipaddress', args),
+            ('listPortForwardingRules', 'portforwardingrule', {}),
+            ('listIpForwardingRules', 'ipforwardingrule', {})
+        ]
+        vms, addrs, port_forwarding_rules, ip_forwarding_rules = \
+            self._list_all(queries=queries,
+                           max_workers=self.list_nodes_max_workers)
 
         public_ips_map = {}
+        addresses_map = {}
         for addr in addrs.get('publicipaddress', []):
+            # Port forwarding rules reference the first address with the IP
+            addresses_map.setdefault(addr['ipaddress'], addr)
+
             if 'virtualmachineid' not in addr:
                 continue
             vm_id = str(addr['virtualmachineid'])
@@ -1385,6 +1402,16 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
                 public_ips_map[vm_id] = {}
             public_ips_map[vm_id][addr['ipaddress']] = addr['id']
 
+        ip_forwarding_rules_map = {}
+        for r in ip_forwarding_rules.get('ipforwardingrule', []):
+            vm_id = str(r['virtualmachineid'])
+            ip_forwarding_rules_map.setdefault(vm_id, []).append(r)
+
+        port_forwarding_rules_map = {}
+        for r in port_forwarding_rules.get('portforwardingrule', []):
+            vm_id = str(r['virtualmachineid'])
+            port_forwarding_rules_map.setdefault(vm_id, []).append(r)
+
         nodes = []
 
         for vm in vms.get('virtualmachine', []):
@@ -1400,41 +1427,68 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
 
             rules = []
             for addr in addresses:
-                for r in ip_forwarding_rules.get('ipforwardingrule', []):
-                    if str(r['virtualmachineid']) == node.id:
-                        rule = CloudStackIPForwardingRule(node, r['id'],
-                                                          addr,
-                                                          r['protocol']
-                                                          .upper(),
-                                                          r['startport'],
-                                                          r['endport'])
-                        rules.append(rule)
+                for r in ip_forwarding_rules_map.get(node.id, []):
+                    rule = CloudStackIPForwardingRule(node, r['id'],
+                                                      addr,
+                                                      r['protocol']
+                                                      .upper(),
+                                                      r['startport'],
+                                                      r['endport'])
+                    rules.append(rule)
             node.extra['ip_forwarding_rules'] = rules
 
             rules = []
-            for r in port_forwarding_rules.get('portforwardingrule', []):
-                if str(r['virtualmachineid']) == node.id:
-                    addr = [CloudStackAddress(id=a['id'],
-                                              address=a['ipaddress'],
-                                              driver=node.driver)
-                            for a in addrs.get('publicipaddress', [])
-                            if a['ipaddress'] == r['ipaddress']]
-                    rule = CloudStackPortForwardingRule(node, r['id'],
-                                                        addr[0],
-                                                        r['protocol'].upper(),
-                                                        r['publicport'],
-                                                        r['privateport'],
-                                                        r['publicendport'],
-                                                        r['privateendport'])
-                    if not addr[0].address in node.public_ips:
-                        node.public_ips.append(addr[0].address)
-                    rules.append(rule)
+            for r in port_forwarding_rules_map.get(node.id, []):
+                a = addresses_map[r['ipaddress']]
+                addr = CloudStackAddress(id=a['id'], address=a['ipaddress'],
+                                         driver=node.driver)
+                rule = CloudStackPortForwardingRule(node, r['id'],
+                                                    addr,
+                                                    r['protocol'].upper(),
+                                                    r['publicport'],
+                                                    r['privateport'],
+                                                    r['publicendport'],
+                                                    r['privateendport'])
+                if addr.address not in node.public_ips:
+                    node.public_ips.append(addr.address)
+                rules.append(rule)
             node.extra['port_forwarding_rules'] = rules
 
             nodes.append(node)
 
         return nodes
 
+    def _list_all(self, queries, max_workers=1):
+        """
+        Perform list requests and retrieve all the pages of each of them.
+
+        If ``max_workers`` is greater than 1, the requests are performed
+        concurrently and each one uses its own connection.
+
+        :param queries: List of (command, key, params) tuples.
+        :type queries: ``list`` of ``tuple``
+
+        :param max_workers: Maximum number of concurrent requests.
+        :type max_workers: ``int``
+
+        :return: Responses in the same order as the queries.
+        :rtype: ``list`` of ``dict``
+        """
+        def list_all(connection, query):
+            command, key, params = query
+            return connection._sync_request_all(command=command, key=key,
+                                                params=params,
+                                                page_size=self.list_page_size)
+
+        count = min(max_workers or 1, len(queries))
+
+        if count <= 1:
+            workers = [self.connection]
+        else:
+            workers = [self.connection.clone() for _ in range(count)]
+
+        return map_with_workers(list_all, queries, workers=workers)
+
     def ex_get_node(self, node_id, project=None):
         """
         Return a Node object based on its ID.
@@ -1725,6 +1779,29 @@ class CloudStackNodeDriver(CloudStackDriverMixIn, NodeDriver):
                                   method='GET')
         return res['virtualmachine']['state']
 
+    def ex_submit_async_request(self, command, params=None, method='GET'):
+        """
+        Start an asynchronous job and return a future which holds the job
+        result instead of waiting for the job to complete.
+
+        The status of all the jobs submitted using this driver is checked by
+        a single background thread using one ``listAsyncJobs`` request.
+
+        :param command: Name of the asynchronous API command (e.g.
+                        ``deployVirtualMachine``).
+        :type  command: ``str``
+
+        :param params: Parameters of the command.
+        :type  params: ``dict``
+
+        :param method: HTTP method.
+        :type  method: ``str``
+
+        :rtype: :class:`libcloud.utils.concurrency.Future`
+        """
+        return self._submit_async_request(command=command, params=params,
+                                          method=method)
+
     def ex_list_disk_offerings(self):
         """
         Fetch a list of all available disk offerings.
@@ -17,11 +17,15 @@
 Amazon EC2, Eucalyptus, Nimbus and Outscale drivers.
 """
 
+from __future__ import with_statement
+
 import re
 import sys
+import time
 import base64
 import copy
 import warnings
+import threading
 
 try:
     from lxml import etree as ET
@@ -31,6 +35,8 @@ except ImportError:
 from libcloud.utils.py3 import b, basestring, ensure_string
 
 from libcloud.utils.xml import fixxpath, findtext, findattr, findall
+from libcloud.utils.xml import iterparse_items
+from libcloud.utils.compression import DecompressingReader
 from libcloud.utils.publickey import get_pubkey_ssh2_fingerprint
 from libcloud.utils.publickey import get_pubkey_comment
 from libcloud.utils.iso8601 import parse_date
@@ -86,6 +92,13 @@ NAMESPACE = 'http://ec2.amazonaws.com/doc/%s/' % (API_VERSION)
 DEFAULT_EUCA_API_VERSION = '3.3.0'
 EUCA_NAMESPACE = 'http://msgs.eucalyptus.com/%s' % (DEFAULT_EUCA_API_VERSION)
 
+# Maximum number of instance ids which are passed to a single
+# DescribeInstances call when waiting for nodes
+WAITER_NODE_IDS_BATCH_SIZE = 200
+
+# Protects creation of the per-driver Elastic IP caches
+_elastic_ips_cache_lock = threading.Lock()
+
 """
 Sizes must be hardcoded, because Amazon doesn't provide an API to fetch them.
 From http://aws.amazon.com/ec2/instance-types/
@@ -2538,6 +2551,70 @@ class ElasticIP(object):
                 % (self.ip, self.domain, self.instance_id))
 
 
+class _ElasticIPCache(object):
+    """
+    Short-lived cache of the Elastic IP addresses associated with the nodes
+    which is shared by all the ``list_nodes`` callers of a driver.
+
+    When the cached value has expired, only one of the concurrent callers
+    retrieves the addresses, the other callers wait for its result.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._value = None
+        self._expires = 0
+        self._fetching = False
+
+        # Incremented when the cache is cleared so the results of lookups
+        # which were in progress at that time are not stored
+        self._generation = 0
+
+    def get(self, fetch, ttl):
+        """
+        Return the cached value or call ``fetch`` to retrieve it.
+
+        :param fetch: Function which returns the current value.
+        :type fetch: ``callable``
+
+        :param ttl: Number of seconds for which the value is cached.
+        :type ttl: ``float``
+        """
+        with self._condition:
+            while True:
+                if self._value is not None and time.time() < self._expires:
+                    return self._value
+
+                if not self._fetching:
+                    break
+
+                self._condition.wait()
+
+            self._fetching = True
+            generation = self._generation
+
+        value = None
+
+        try:
+            value = fetch()
+        finally:
+            with self._condition:
+                self._fetching = False
+
+                if value is not None and generation == self._generation:
+                    self._value = value
+                    self._expires = time.time() + ttl
+
+                self._condition.notify_all()
+
+        return value
+
+    def clear(self):
+        with self._condition:
+            self._value = None
+            self._generation += 1
+
+
 class VPCInternetGateway(object):
     """
     Class which stores information about VPC Internet Gateways.
@@ -2690,6 +2767,17 @@ class BaseEC2NodeDriver(NodeDriver):
     path = '/'
     signature_version = DEFAULT_SIGNATURE_VERSION
 
+    cache_invalidation_map = dict(NodeDriver.cache_invalidation_map, **{
+        'ex_register_image': ['list_images'],
+        'ex_copy_image': ['list_images'],
+        'ex_modify_image_attribute': ['list_images']
+    })
+
+    # Number of seconds for which the Elastic IP addresses retrieved by
+    # list_nodes are cached and shared by all the callers. 0 means the
+    # addresses are retrieved on every call.
+    elastic_ips_cache_ttl = 0
+
     NODE_STATE_MAP = {
         'pending': NodeState.PENDING,
         'running': NodeState.RUNNING,
@@ -2714,7 +2802,8 @@ class BaseEC2NodeDriver(NodeDriver):
         'error': VolumeSnapshotState.ERROR,
     }
 
-    def list_nodes(self, ex_node_ids=None, ex_filters=None):
+    def list_nodes(self, ex_node_ids=None, ex_filters=None,
+                   ex_elastic_ips=True):
         """
         List all nodes
 
@@ -2729,6 +2818,14 @@ class BaseEC2NodeDriver(NodeDriver):
                              information for only certain nodes.
         :type       ex_filters: ``dict``
 
+        :param      ex_elastic_ips: True to add the Elastic IP addresses
+                                    associated with the nodes to their
+                                    ``public_ips``. This requires an
+                                    additional request unless the addresses
+                                    are cached (see
+                                    ``elastic_ips_cache_ttl``).
+        :type       ex_elastic_ips: ``bool``
+
         :rtype: ``list`` of :class:`Node`
         """
 
@@ -2747,13 +2844,125 @@ class BaseEC2NodeDriver(NodeDriver):
                           namespace=NAMESPACE):
             nodes += self._to_nodes(rs, 'instancesSet/item')
 
-        nodes_elastic_ips_mappings = self.ex_describe_addresses(nodes)
+        if ex_elastic_ips:
+            self._add_elastic_ips(nodes)
+
+        return nodes
+
+    def iterate_nodes(self, ex_node_ids=None, ex_filters=None,
+                      ex_page_size=None, ex_elastic_ips=True):
+        """
+        Return a generator of nodes.
+
+        Instances are retrieved page by page (using ``MaxResults`` and
+        ``NextToken``) and the response is parsed incrementally, so nodes
+        are returned as soon as they are parsed and the memory usage doesn't
+        depend on the number of instances.
+
+        :param      ex_node_ids: List of ``node.id``
+        :type       ex_node_ids: ``list`` of ``str``
+
+        :param      ex_filters: The filters so that the response includes
+                                information for only certain nodes.
+        :type       ex_filters: ``dict``
+
+        :param      ex_page_size: Number of instances requested in a single
+                                  request (5 - 1000). Note: It can't be used
+                                  together with ``ex_node_ids``.
+        :type       ex_page_size: ``int``
+
+        :param      ex_elastic_ips: True to add the Elastic IP addresses
+                                    associated with the nodes to their
+                                    ``public_ips``. If ``ex_node_ids`` is
+                                    provided, only the addresses of those
+                                    nodes are requested, otherwise the
+                                    (possibly cached) addresses of all the
+                                    nodes are used.
+        :type       ex_elastic_ips: ``bool``
+
+        :rtype: ``generator`` of :class:`Node`
+        """
+        params = {'Action': 'DescribeInstances'}
+
+        if ex_node_ids:
+            params.update(self._pathlist('InstanceId', ex_node_ids))
+
+        if ex_filters:
+            params.update(self._build_filters(ex_filters))
+
+        elements = self._iterate_response_items(
+            params=params, xpath='reservationSet/item/instancesSet/item',
+            page_size=ex_page_size)
+        elastic_ips = None
+
+        for element in elements:
+            node = self._to_node(element)
+
+            if ex_elastic_ips:
+                if elastic_ips is None and ex_node_ids:
+                    # Only the addresses of the requested nodes are needed
+                    elastic_ips = self._get_elastic_ips_map(
+                        node_ids=ex_node_ids)
+                elif elastic_ips is None:
+                    # Elastic IP addresses are only retrieved once
+                    elastic_ips = self._get_all_elastic_ips_map()
+
+                node.public_ips.extend(elastic_ips.get(node.id, []))
+
+            yield node
+
+    def _list_nodes_for_waiter(self, nodes, **kwargs):
+        """
+        Only describe the instances which are being waited on.
+
+        If any of the instances is not visible yet (EC2 API is eventually
+        consistent), all the nodes are listed instead.
+
+        Unless ``ex_elastic_ips`` is provided, Elastic IP addresses are only
+        retrieved once the nodes which are being waited on are running, so
+        the lookups performed while the nodes are starting only need a
+        single request.
+        """
+        if 'ex_elastic_ips' in kwargs:
+            return self._describe_nodes_for_waiter(nodes=nodes, **kwargs)
+
+        result = self._describe_nodes_for_waiter(nodes=nodes,
+                                                 ex_elastic_ips=False,
+                                                 **kwargs)
+        node_ids = set([node.id for node in nodes])
+        waited_nodes = [node for node in result if node.id in node_ids]
+
+        if waited_nodes and all([node.state == NodeState.RUNNING
+                                 for node in waited_nodes]):
+            self._add_elastic_ips(waited_nodes)
+
+        return result
+
+    def _describe_nodes_for_waiter(self, nodes, **kwargs):
+        if kwargs.get('ex_node_ids') or not nodes:
+            return self.list_nodes(**kwargs)
+
+        node_ids = []
 
         for node in nodes:
-            ips = nodes_elastic_ips_mappings[node.id]
-            node.public_ips.extend(ips)
+            if node.id not in node_ids:
+                node_ids.append(node.id)
 
-        return nodes
+        result = []
+
+        try:
+            for index in range(0, len(node_ids), WAITER_NODE_IDS_BATCH_SIZE):
+                batch = node_ids[index:index + WAITER_NODE_IDS_BATCH_SIZE]
+                result.extend(self.list_nodes(ex_node_ids=batch, **kwargs))
+        except Exception:
+            e = sys.exc_info()[1]
+
+            if 'InvalidInstanceID.NotFound' not in str(e):
+                raise
+
+            return self.list_nodes(**kwargs)
+
+        return result
 
     def list_sizes(self, location=None):
         available_types = REGION_DETAILS[self.region_name]['instance_types']
@@ -2808,6 +3017,45 @@ class BaseEC2NodeDriver(NodeDriver):
 
         :rtype: ``list`` of :class:`NodeImage`
         """
+        params = self._get_list_images_params(
+            ex_image_ids=ex_image_ids, ex_owner=ex_owner,
+            ex_executableby=ex_executableby, ex_filters=ex_filters)
+
+        images = self._to_images(
+            self.connection.request(self.path, params=params).object
+        )
+        return images
+
+    def iterate_images(self, location=None, ex_image_ids=None, ex_owner=None,
+                       ex_executableby=None, ex_filters=None,
+                       ex_page_size=None):
+        """
+        Return a generator of images.
+
+        The response is parsed incrementally so images are returned as soon
+        as they are parsed and the memory usage doesn't depend on the number
+        of images. This is useful when listing public images.
+
+        Arguments are the same as for :meth:`list_images`.
+
+        :param      ex_page_size: Number of images requested in a single
+                                  request (5 - 1000). Note: It can't be used
+                                  together with ``ex_image_ids``.
+        :type       ex_page_size: ``int``
+
+        :rtype: ``generator`` of :class:`NodeImage`
+        """
+        params = self._get_list_images_params(
+            ex_image_ids=ex_image_ids, ex_owner=ex_owner,
+            ex_executableby=ex_executableby, ex_filters=ex_filters)
+        elements = self._iterate_response_items(
+            params=params, xpath='imagesSet/item', page_size=ex_page_size)
+
+        for element in elements:
+            yield self._to_image(element)
+
+    def _get_list_images_params(self, ex_image_ids=None, ex_owner=None,
+                                ex_executableby=None, ex_filters=None):
         params = {'Action': 'DescribeImages'}
 
         if ex_owner:
@@ -2824,10 +3072,7 @@ class BaseEC2NodeDriver(NodeDriver):
         if ex_filters:
             params.update(self._build_filters(ex_filters))
 
-        images = self._to_images(
-            self.connection.request(self.path, params=params).object
-        )
-        return images
+        return params
 
     def get_image(self, image_id):
         """
@@ -4338,6 +4583,7 @@ class BaseEC2NodeDriver(NodeDriver):
             params['AllocationId'] = elastic_ip.extra['allocation_id']
 
         response = self.connection.request(self.path, params=params).object
+        self._invalidate_elastic_ips_cache()
         return self._get_boolean(response)
 
     def ex_describe_all_addresses(self, only_associated=False):
@@ -4389,6 +4635,7 @@ class BaseEC2NodeDriver(NodeDriver):
             params.update({'AllocationId': elastic_ip.extra['allocation_id']})
 
         response = self.connection.request(self.path, params=params).object
+        self._invalidate_elastic_ips_cache()
         association_id = findtext(element=response,
                                   xpath='associationId',
                                   namespace=NAMESPACE)
@@ -4430,6 +4677,7 @@ class BaseEC2NodeDriver(NodeDriver):
             params['AssociationId'] = elastic_ip.extra['association_id']
 
         res = self.connection.request(self.path, params=params).object
+        self._invalidate_elastic_ips_cache()
         return self._get_boolean(res)
 
     def ex_describe_addresses(self, nodes):
@@ -4447,30 +4695,12 @@ class BaseEC2NodeDriver(NodeDriver):
         if not nodes:
             return {}
 
-        params = {'Action': 'DescribeAddresses'}
-
-        if len(nodes) == 1:
-            self._add_instance_filter(params, nodes[0])
-
-        result = self.connection.request(self.path, params=params).object
-
-        node_instance_ids = [node.id for node in nodes]
+        elastic_ips = self._get_elastic_ips_map(nodes=nodes)
         nodes_elastic_ip_mappings = {}
 
-        # We will set only_associated to True so that we only get back
-        # IPs which are associated with instances
-        only_associated = True
-
-        for node_id in node_instance_ids:
-            nodes_elastic_ip_mappings.setdefault(node_id, [])
-            for addr in self._to_addresses(result,
-                                           only_associated):
-
-                instance_id = addr.instance_id
-
-                if node_id == instance_id:
-                    nodes_elastic_ip_mappings[instance_id].append(
-                        addr.ip)
+        for node in nodes:
+            nodes_elastic_ip_mappings[node.id] = list(
+                elastic_ips.get(node.id, []))
 
         return nodes_elastic_ip_mappings
 
@@ -5401,6 +5631,129 @@ class BaseEC2NodeDriver(NodeDriver):
         kwargs['signature_version'] = self.signature_version
         return kwargs
 
+    def _iterate_response_items(self, params, xpath, page_size=None):
+        """
+        Perform a "Describe" request and return a generator of the response
+        elements which match the provided path. ``NextToken`` is followed
+        until all the pages have been retrieved.
+
+        Responses are read and parsed incrementally and each element is
+        discarded once the next one has been requested. A separate
+        connection is used so other requests can be performed while the
+        elements are being consumed.
+        """
+        params = dict(params)
+
+        if page_size:
+            params['MaxResults'] = page_size
+
+        connection = self.connection.clone()
+
+        while True:
+            response = connection.request(self.path, params=params, raw=True)
+
+            if not response.success():
+                # Error responses are small, process them as usual so the same
+                # exceptions are raised
+                connection.responseCls(response=response.response,
+                                       connection=connection)
+
+            stream = response.response
+            encoding = response.headers.get('content-encoding', None)
+
+            if encoding in ['zlib', 'deflate']:
+                stream = DecompressingReader(stream, 'zlib')
+            elif encoding in ['gzip', 'x-gzip']:
+                stream = DecompressingReader(stream, 'gzip')
+
+            values = {}
+
+            for element in iterparse_items(stream, xpath=xpath,
+                                           values=values):
+                yield element
+
+            next_token = values.get('nextToken', None)
+
+            if not next_token:
+                break
+
+            params['NextToken'] = next_token
+
+    def _add_elastic_ips(self, nodes):
+        """
+        Add the Elastic IP addresses associated with the provided nodes to
+        their ``public_ips``.
+        """
+        if not nodes:
+            return
+
+        if self.elastic_ips_cache_ttl:
+            elastic_ips = self._get_all_elastic_ips_map()
+        else:
+            elastic_ips = self.ex_describe_addresses(nodes)
+
+        for node in nodes:
+            node.public_ips.extend(elastic_ips.get(node.id, []))
+
+    def _get_all_elastic_ips_map(self):
+        """
+        Return Elastic IP addresses of all the nodes. The result is cached
+        for ``elastic_ips_cache_ttl`` seconds if caching is enabled.
+
+        :rtype: ``dict``
+        """
+        if not self.elastic_ips_cache_ttl:
+            return self._get_elastic_ips_map()
+
+        with _elastic_ips_cache_lock:
+            cache = self.__dict__.get('_elastic_ips_cache', None)
+
+            if cache is None:
+                cache = _ElasticIPCache()
+                self._elastic_ips_cache = cache
+
+        return cache.get(fetch=self._get_elastic_ips_map,
+                         ttl=self.elastic_ips_cache_ttl)
+
+    def _invalidate_elastic_ips_cache(self):
+        cache = self.__dict__.get('_elastic_ips_cache', None)
+
+        if cache is not None:
+            cache.clear()
+
+    def _get_elastic_ips_map(self, nodes=None, node_ids=None):
+        """
+        Return a dictionary which maps node ids to the Elastic IP addresses
+        associated with them.
+
+        :param      nodes: Nodes whose addresses are needed. Only the
+                           addresses of a single node are requested if the
+                           list contains one node, otherwise all the
+                           addresses are retrieved.
+        :type       nodes: ``list`` of :class:`Node`
+
+        :param      node_ids: Only retrieve addresses associated with those
+                              nodes (defaults to all the addresses).
+        :type       node_ids: ``list`` of ``str``
+
+        :rtype: ``dict``
+        """
+        params = {'Action': 'DescribeAddresses'}
+
+        if nodes and len(nodes) == 1:
+            self._add_instance_filter(params, nodes[0])
+        elif node_ids:
+            params.update(self._build_filters({'instance-id':
+                                               list(node_ids)}))
+
+        result = self.connection.request(self.path, params=params).object
+        elastic_ips = {}
+
+        for addr in self._to_addresses(result, only_associated=True):
+            elastic_ips.setdefault(addr.instance_id, []).append(addr.ip)
+
+        return elastic_ips
+
     def _to_nodes(self, object, xpath):
         return [self._to_node(el)
                 for el in object.findall(fixxpath(xpath=xpath,
@@ -6499,6 +6852,10 @@ class NimbusNodeDriver(BaseEC2NodeDriver):
             nodes_elastic_ip_mappings[node.id] = []
         return nodes_elastic_ip_mappings
 
+    def _get_elastic_ips_map(self, nodes=None, node_ids=None):
+        # Nimbus doesn't support elastic IPs
+        return {}
+
     def ex_create_tags(self, resource, tags):
         """
         Nimbus doesn't support creating tags, so this is a pass-through.
@@ -131,6 +131,41 @@ class GCEConnection(GoogleBaseConnection):
 
         return response
 
+    def get_completed_jobs(self, jobs):
+        """
+        Check the status of all the pending operations using a single
+        aggregated ``operations`` list request.
+
+        Operations which are not included in the listing are returned as well
+        so they are polled individually.
+
+        @inherits: :class:`GoogleBaseConnection.get_completed_jobs`
+        """
+        names = [job.response.object['name'] for job in jobs
+                 if 'name' in job.response.object]
+
+        if not names:
+            return jobs
+
+        params = {'filter': 'name eq (%s)' % ('|'.join(names))}
+        response = self.request('/aggregated/operations', method='GET',
+                                params=params)
+        statuses = {}
+
+        for scope in response.object.get('items', {}).values():
+            for operation in scope.get('operations', []):
+                statuses[operation['selfLink']] = operation['status']
+
+        completed = []
+
+        for job in jobs:
+            status = statuses.get(job.response.object.get('selfLink'), None)
+
+            if status in [None, 'DONE']:
+                completed.append(job)
+
+        return completed
+
 
 class GCEList(object):
     """
@@ -1024,6 +1059,12 @@ class GCENodeDriver(NodeDriver):
         "UNKNOWN": NodeState.UNKNOWN
     }
 
+    cache_invalidation_map = dict(NodeDriver.cache_invalidation_map, **{
+        'ex_create_image': ['list_images'],
+        'ex_delete_image': ['list_images'],
+        'ex_deprecate_image': ['list_images']
+    })
+
     AUTH_URL = "https://www.googleapis.com/auth/"
     SA_SCOPES_MAP = {
         # list derived from 'gcloud compute instances create --help'
@@ -1062,7 +1103,8 @@ class GCENodeDriver(NodeDriver):
     }
 
     def __init__(self, user_id, key=None, datacenter=None, project=None,
-                 auth_type=None, scopes=None, credential_file=None, **kwargs):
+                 auth_type=None, scopes=None, credential_file=None,
+                 ex_catalog_cache=None, **kwargs):
         """
         :param  user_id: The email address (for service accounts) or Client ID
                          (for installed apps) to be used for authentication.
@@ -1096,6 +1138,13 @@ class GCENodeDriver(NodeDriver):
         :keyword  credential_file: Path to file for caching authentication
                                    information used by GCEConnection.
         :type     credential_file: ``str``
+
+        :keyword  ex_catalog_cache: Optional cache for the zone and region
+                                    catalogs (see
+                                    :mod:`libcloud.common.cache`). Use a
+                                    cache with a ``FileCacheBackend`` to
+                                    share the catalogs between processes.
+        :type     ex_catalog_cache: :class:`ResponseCache`
         """
         if not project:
             raise ValueError('Project name must be specified using '
@@ -1107,30 +1156,91 @@ class GCENodeDriver(NodeDriver):
         self.credential_file = credential_file or \
             GoogleOAuth2Credential.default_credential_file + '.' + self.project
 
+        self.ex_catalog_cache = ex_catalog_cache
+
+        # Zone and Region information is cached to reduce API calls and
+        # increase speed. It's only retrieved once it's used so no API calls
+        # are made when the driver is instantiated.
+        self._zone_list = None
+        self._zone_dict = {}
+        self._region_list = None
+        self._region_dict = {}
+        self._datacenter = datacenter
+        self._zone = None
+        self._region = None
+
         super(GCENodeDriver, self).__init__(user_id, key, **kwargs)
 
-        # Cache Zone and Region information to reduce API calls and
-        # increase speed
         self.base_path = '/compute/%s/projects/%s' % (API_VERSION,
                                                       self.project)
-        self.zone_list = self.ex_list_zones()
-        self.zone_dict = {}
-        for zone in self.zone_list:
-            self.zone_dict[zone.name] = zone
-        if datacenter:
-            self.zone = self.ex_get_zone(datacenter)
-        else:
-            self.zone = None
 
-        self.region_list = self.ex_list_regions()
-        self.region_dict = {}
-        for region in self.region_list:
-            self.region_dict[region.name] = region
+    @property
+    def zone_list(self):
+        if self._zone_list is None:
+            self._ex_load_zones()
+        return self._zone_list
 
-        if self.zone:
-            self.region = self._get_region_from_zone(self.zone)
-        else:
-            self.region = None
+    @zone_list.setter
+    def zone_list(self, value):
+        self._zone_list = value
+
+    @property
+    def zone_dict(self):
+        if self._zone_list is None:
+            self._ex_load_zones()
+        return self._zone_dict
+
+    @zone_dict.setter
+    def zone_dict(self, value):
+        self._zone_dict = value
+
+    @property
+    def region_list(self):
+        if self._region_list is None:
+            self._ex_load_regions()
+        return self._region_list
+
+    @region_list.setter
+    def region_list(self, value):
+        self._region_list = value
+
+    @property
+    def region_dict(self):
+        if self._region_list is None:
+            self._ex_load_regions()
+        return self._region_dict
+
+    @region_dict.setter
+    def region_dict(self, value):
+        self._region_dict = value
+
+    @property
+    def zone(self):
+        """
+        The default zone (based on the datacenter the driver was
+        instantiated with) or None.
+        """
+        if self._zone is None and self._datacenter:
+            self._zone = self.ex_get_zone(self._datacenter)
+        return self._zone
+
+    @zone.setter
+    def zone(self, value):
+        self._zone = value
+        self._datacenter = None
+
+    @property
+    def region(self):
+        """
+        The region of the default zone or None.
+        """
+        if self._region is None and self.zone:
+            self._region = self._get_region_from_zone(self.zone)
+        return self._region
+
+    @region.setter
+    def region(self, value):
+        self._region = value
 
     def ex_add_access_config(self, node, name, nic, nat_ip=None,
                              config_type=None):
@@ -1673,7 +1783,7 @@ class GCENodeDriver(NodeDriver):
                          response.get('items', [])]
         return list_networks
 
-    def list_nodes(self, ex_zone=None):
+    def list_nodes(self, ex_zone=None, ex_use_disk_cache=True):
         """
         Return a list of nodes in the current zone or all zones.
 
@@ -1681,6 +1791,13 @@ class GCENodeDriver(NodeDriver):
         :type     ex_zone:  ``str`` or :class:`GCEZone` or
                             :class:`NodeLocation` or ``None``
 
+        :keyword  ex_use_disk_cache:  If true, the boot disks of all the
+                                      nodes are retrieved using a single
+                                      (aggregated) disk listing instead of
+                                      making a distinct API call for each
+                                      node.
+        :type     ex_use_disk_cache:  ``bool``
+
         :return:  List of Node objects
         :rtype:   ``list`` of :class:`Node`
         """
@@ -1693,35 +1810,33 @@ class GCENodeDriver(NodeDriver):
 
         response = self.connection.request(request, method='GET').object
 
+        instances = []
         if 'items' in response:
             # The aggregated response returns a dict for each zone
             if zone is None:
                 for v in response['items'].values():
-                    for i in v.get('instances', []):
-                        try:
-                            list_nodes.append(self._to_node(i))
-                        # If a GCE node has been deleted between
-                        #   - is was listed by `request('.../instances', 'GET')
-                        #   - it is converted by `self._to_node(i)`
-                        # `_to_node()` will raise a ResourceNotFoundError.
-                        #
-                        # Just ignore that node and return the list of the
-                        # other nodes.
-                        except ResourceNotFoundError:
-                            pass
+                    instances.extend(v.get('instances', []))
             else:
-                for i in response['items']:
-                    try:
-                        list_nodes.append(self._to_node(i))
-                    # If a GCE node has been deleted between
-                    #   - is was listed by `request('.../instances', 'GET')
-                    #   - it is converted by `self._to_node(i)`
-                    # `_to_node()` will raise a ResourceNotFoundError.
-                    #
-                    # Just ignore that node and return the list of the
-                    # other nodes.
-                    except ResourceNotFoundError:
-                        pass
+                instances = response['items']
+
+        volume_dict = None
+        if ex_use_disk_cache and instances:
+            self._ex_populate_zone_dict(
+                [i['zone'] for i in instances if 'zone' in i])
+            volume_dict = self._ex_get_volume_dict(zone)
+
+        for i in instances:
+            try:
+                list_nodes.append(self._to_node(i, volume_dict=volume_dict))
+            # If a GCE node has been deleted between
+            #   - is was listed by `request('.../instances', 'GET')
+            #   - it is converted by `self._to_node(i)`
+            # `_to_node()` will raise a ResourceNotFoundError.
+            #
+            # Just ignore that node and return the list of the
+            # other nodes.
+            except ResourceNotFoundError:
+                pass
         return list_nodes
 
     def ex_list_regions(self):
@@ -4889,6 +5004,152 @@ class GCENodeDriver(NodeDriver):
             getrz = getattr(self, 'ex_get_%s' % (rz))
             return getrz(rz_name)
 
+    def _ex_get_volume_dict(self, zone=None):
+        """
+        Return a dictionary of disks in the provided zone (or in all the
+        zones) which is used to look up the disks by their zone and name
+        without making an API call for each of them.
+
+        Disks are only converted to :class:`StorageVolume` objects once they
+        are looked up using :meth:`_ex_lookup_volume`.
+
+        :keyword  zone: The zone to list the disks in or None for all zones.
+        :type     zone: :class:`GCEZone` or ``None``
+
+        :return:  A dictionary or None if the disks couldn't be listed.
+        :rtype:   ``dict`` or ``None``
+        """
+        if zone is None:
+            request = '/aggregated/disks'
+        else:
+            request = '/zones/%s/disks' % (zone.name)
+
+        try:
+            response = self.connection.request(request, method='GET').object
+        except GoogleBaseError:
+            # Fall back to looking up the disks one by one
+            return None
+
+        disks = []
+        if 'items' in response:
+            if zone is None:
+                for v in response['items'].values():
+                    disks.extend(v.get('disks', []))
+            else:
+                disks = response['items']
+
+        self._ex_populate_zone_dict([d['zone'] for d in disks if 'zone' in d])
+
+        volume_dict = {'disks': {}, 'volumes': {}, 'licenses': {}}
+        for disk in disks:
+            key = self._ex_get_volume_key(disk['selfLink'])
+            volume_dict['disks'][key] = disk
+        return volume_dict
+
+    def _ex_get_volume_key(self, url):
+        components = self._get_components_from_path(url)
+        return (components['zone'], components['name'])
+
+    def _ex_lookup_volume(self, url, volume_dict=None):
+        """
+        Return a StorageVolume object for the disk URL.
+
+        The disk is looked up in the provided dictionary returned by
+        :meth:`_ex_get_volume_dict` and retrieved using the API if it's not
+        found there (e.g. because it has been created in the mean time).
+
+        :param  url: The selfLink URL of the disk.
+        :type   url: ``str``
+
+        :keyword  volume_dict: Optional dictionary of disks.
+        :type     volume_dict: ``dict``
+
+        :rtype:   :class:`StorageVolume`
+        """
+        key = self._ex_get_volume_key(url)
+
+        if volume_dict is None or key not in volume_dict['disks']:
+            return self.ex_get_volume(key[1], key[0])
+
+        volumes = volume_dict['volumes']
+        if key not in volumes:
+            volumes[key] = self._to_storage_volume(
+                volume_dict['disks'][key],
+                license_dict=volume_dict['licenses'])
+        return volumes[key]
+
+    def _ex_get_catalog(self, method_name, refresh=False):
+        """
+        Call a method which returns a catalog (e.g. ``ex_list_zones``) and
+        use the catalog cache if one has been provided.
+
+        :param  method_name: Name of the driver method.
+        :type   method_name: ``str``
+
+        :keyword  refresh: If true, cached results are ignored.
+        :type     refresh: ``bool``
+
+        :rtype: ``list``
+        """
+        func = getattr(self, method_name)
+        cache = self.ex_catalog_cache
+
+        if cache is None:
+            return func()
+
+        if refresh:
+            cache.invalidate(driver=self, method_names=[method_name])
+
+        return cache.call(driver=self, method_name=method_name, func=func)
+
+    def _ex_load_zones(self, refresh=False):
+        self._zone_list = self._ex_get_catalog('ex_list_zones',
+                                               refresh=refresh)
+        self._zone_dict = dict([(zone.name, zone)
+                                for zone in self._zone_list])
+
+    def _ex_load_regions(self, refresh=False):
+        self._region_list = self._ex_get_catalog('ex_list_regions',
+                                                 refresh=refresh)
+        self._region_dict = dict([(region.name, region)
+                                  for region in self._region_list])
+
+    def _get_response_cache_tag_parts(self):
+        """
+        Return the values which identify the cached results of this driver.
+
+        Unlike the default ones, they don't include the (lazily resolved)
+        region so computing them never results in an API call.
+        """
+        if self._zone is not None:
+            zone = self._zone.name
+        else:
+            zone = self._datacenter
+
+        return (self.__class__.__module__, self.__class__.__name__,
+                self.connection.user_id, self.project, zone, API_VERSION,
+                self.connection.host)
+
+    def _ex_populate_zone_dict(self, zones):
+        """
+        Make sure all the provided zones are in the zone cache.
+
+        If any of them is missing, the zone cache is refreshed using a single
+        API call instead of looking up each zone separately.
+
+        :param  zones: A list of zone names or URLs.
+        :type   zones: ``list`` of ``str``
+        """
+        for zone in zones:
+            if zone.startswith('https://'):
+                zone = self._get_components_from_path(zone)['name']
+            if zone not in self.zone_dict:
+                break
+        else:
+            return
+
+        self._ex_load_zones(refresh=True)
+
     def _match_images(self, project, partial_name):
         """
         Find the latest image, given a partial name.
@@ -5738,13 +5999,19 @@ class GCENodeDriver(NodeDriver):
                             country=location['name'].split('-')[0],
                             driver=self)
 
-    def _to_node(self, node):
+    def _to_node(self, node, volume_dict=None):
         """
         Return a Node object from the JSON-response dictionary.
 
         :param  node: The dictionary describing the node.
         :type   node: ``dict``
 
+        :keyword  volume_dict: Optional dictionary returned by
+                               :meth:`_ex_get_volume_dict` which is used to
+                               look up the boot disk instead of making an
+                               API call.
+        :type     volume_dict: ``dict``
+
         :return: Node object
         :rtype: :class:`Node`
         """
@@ -5776,8 +6043,8 @@ class GCENodeDriver(NodeDriver):
 
         for disk in extra['disks']:
             if disk.get('boot') and disk.get('type') == 'PERSISTENT':
-                bd = self._get_components_from_path(disk['source'])
-                extra['boot_disk'] = self.ex_get_volume(bd['name'], bd['zone'])
+                extra['boot_disk'] = self._ex_lookup_volume(
+                    disk['source'], volume_dict=volume_dict)
 
         if 'items' in node['tags']:
             tags = node['tags']['items']
@@ -5928,13 +6195,17 @@ class GCENodeDriver(NodeDriver):
                            status=snapshot.get('status'), driver=self,
                            extra=extra, created=created)
 
-    def _to_storage_volume(self, volume):
+    def _to_storage_volume(self, volume, license_dict=None):
         """
         Return a Volume object from the JSON-response dictionary.
 
         :param  volume: The dictionary describing the volume.
         :type   volume: ``dict``
 
+        :keyword  license_dict: Optional dictionary which is used to cache
+                                the licenses by their URLs.
+        :type     license_dict: ``dict``
+
         :return: Volume object
         :rtype: :class:`StorageVolume`
         """
@@ -5950,7 +6221,8 @@ class GCENodeDriver(NodeDriver):
         extra['sourceSnapshotId'] = volume.get('sourceSnapshotId')
         extra['options'] = volume.get('options')
         if 'licenses' in volume:
-            lic_objs = self._licenses_from_urls(licenses=volume['licenses'])
+            lic_objs = self._licenses_from_urls(licenses=volume['licenses'],
+                                                license_dict=license_dict)
             extra['licenses'] = lic_objs
 
         extra['type'] = volume.get('type', 'pd-standard').split('/')[-1]
@@ -6220,7 +6492,7 @@ class GCENodeDriver(NodeDriver):
                 new_md.append({'key': 'sshKeys', 'value': current_keys})
         return new_md
 
-    def _licenses_from_urls(self, licenses):
+    def _licenses_from_urls(self, licenses, license_dict=None):
         """
         Convert a list of license selfLinks into a list of :class:`GCELicense`
         objects.
@@ -6228,16 +6500,25 @@ class GCENodeDriver(NodeDriver):
         :param  licenses: A list of GCE license selfLink URLs.
         :type   licenses: ``list`` of ``str``
 
+        :keyword  license_dict: Optional dictionary which is used to cache
+                                the licenses by their URLs.
+        :type     license_dict: ``dict``
+
         :return: List of :class:`GCELicense` objects.
         :rtype:  ``list``
         """
         return_list = []
         for license in licenses:
+            if license_dict is not None and license in license_dict:
+                return_list.append(license_dict[license])
+                continue
             selfLink_parts = license.split('/')
             lic_proj = selfLink_parts[6]
             lic_name = selfLink_parts[-1]
-            return_list.append(self.ex_get_license(project=lic_proj,
-                                                   name=lic_name))
+            lic_obj = self.ex_get_license(project=lic_proj, name=lic_name)
+            if license_dict is not None:
+                license_dict[license] = lic_obj
+            return_list.append(lic_obj)
         return return_list
 
     KIND_METHOD_MAP = {
@@ -49,6 +49,7 @@ from libcloud.compute.types import NodeState, StorageVolumeState, Provider, \
     VolumeSnapshotState
 from libcloud.pricing import get_size_price
 from libcloud.utils.xml import findall
+from libcloud.utils.concurrency import ThreadPool
 
 __all__ = [
     'OpenStack_1_0_Response',
@@ -1266,6 +1267,243 @@ class OpenStack_1_1_NodeDriver(OpenStackNodeDriver):
 
         return self._to_node(server_object)
 
+    def list_nodes(self, ex_all_tenants=False):
+        """
+        List the nodes in a tenant
+
+        All the pages are retrieved if the number of nodes exceeds the maximum
+        number of items returned by the API in a single response.
+
+        :param ex_all_tenants: List nodes for all the tenants. Note: Your user
+                               must have admin privileges for this
+                               functionality to work.
+        :type ex_all_tenants: ``bool``
+        """
+        return list(self.iterate_nodes(ex_all_tenants=ex_all_tenants))
+
+    def iterate_nodes(self, ex_all_tenants=False, ex_changes_since=None,
+                      ex_page_size=None, ex_prefetch=False):
+        """
+        Return a generator of nodes in a tenant.
+
+        Nodes are retrieved page by page using the ``limit`` and ``marker``
+        parameters so only a single page is held in memory.
+
+        :param ex_all_tenants: List nodes for all the tenants. Note: Your user
+                               must have admin privileges for this
+                               functionality to work.
+        :type ex_all_tenants: ``bool``
+
+        :param ex_changes_since: Only return nodes which have changed since
+                                 the provided time (naive ``datetime`` objects
+                                 are treated as UTC). Note: Deleted nodes are
+                                 also returned.
+        :type ex_changes_since: ``datetime.datetime`` or ``str``
+
+        :param ex_page_size: Number of nodes requested in a single request
+                             (defaults to the maximum allowed by the server).
+        :type ex_page_size: ``int``
+
+        :param ex_prefetch: True to retrieve the next page in the background
+                            while the current one is being consumed.
+        :type ex_prefetch: ``bool``
+
+        :rtype: ``generator`` of :class:`Node`
+        """
+        params = {}
+
+        if ex_all_tenants:
+            params['all_tenants'] = 1
+
+        if ex_changes_since:
+            params['changes-since'] = self._to_changes_since(ex_changes_since)
+
+        pages = self._iterate_pages('/servers/detail', key='servers',
+                                    params=params, page_size=ex_page_size,
+                                    prefetch=ex_prefetch)
+
+        for page in pages:
+            for node in self._to_nodes(page):
+                yield node
+
+    def list_images(self, location=None, ex_only_active=True):
+        """
+        Lists all active images
+
+        @inherits: :class:`NodeDriver.list_images`
+
+        :param ex_only_active: True if list only active
+        :type ex_only_active: ``bool``
+        """
+        return list(self.iterate_images(location=location,
+                                        ex_only_active=ex_only_active))
+
+    def iterate_images(self, location=None, ex_only_active=True,
+                       ex_changes_since=None, ex_page_size=None,
+                       ex_prefetch=False):
+        """
+        Return a generator of images.
+
+        :param ex_only_active: True if list only active
+        :type ex_only_active: ``bool``
+
+        :param ex_changes_since: Only return images which have changed since
+                                 the provided time.
+        :type ex_changes_since: ``datetime.datetime`` or ``str``
+
+        :param ex_page_size: Number of images requested in a single request.
+        :type ex_page_size: ``int``
+
+        :param ex_prefetch: True to retrieve the next page in the background.
+        :type ex_prefetch: ``bool``
+
+        :rtype: ``generator`` of :class:`NodeImage`
+        """
+        params = {}
+
+        if ex_changes_since:
+            params['changes-since'] = self._to_changes_since(ex_changes_since)
+
+        pages = self._iterate_pages('/images/detail', key='images',
+                                    params=params, page_size=ex_page_size,
+                                    prefetch=ex_prefetch)
+
+        for page in pages:
+            for image in self._to_images(page, ex_only_active):
+                yield image
+
+    def list_volumes(self):
+        return list(self.iterate_volumes())
+
+    def iterate_volumes(self, ex_page_size=None, ex_prefetch=False):
+        """
+        Return a generator of volumes.
+
+        :param ex_page_size: Number of volumes requested in a single request.
+        :type ex_page_size: ``int``
+
+        :param ex_prefetch: True to retrieve the next page in the background.
+        :type ex_prefetch: ``bool``
+
+        :rtype: ``generator`` of :class:`StorageVolume`
+        """
+        pages = self._iterate_pages('/os-volumes', key='volumes',
+                                    page_size=ex_page_size,
+                                    prefetch=ex_prefetch)
+
+        for page in pages:
+            for volume in self._to_volumes(page):
+                yield volume
+
+    def _iterate_pages(self, action, key, params=None, page_size=None,
+                       prefetch=False):
+        """
+        Return a generator of response objects of all the pages of a
+        collection.
+
+        If ``prefetch`` is True, the next page is retrieved using a separate
+        connection in a background thread while the current page is being
+        consumed.
+        """
+        params = dict(params or {})
+
+        if page_size:
+            params['limit'] = page_size
+
+        connection = self.connection
+        pool = None
+
+        if prefetch:
+            connection = self.connection.clone()
+            pool = ThreadPool(max_workers=1)
+
+        def get_page(params):
+            return connection.request(action, params=params).object
+
+        try:
+            future = None
+            has_links = False
+
+            if pool is not None:
+                future = pool.submit(get_page, params)
+
+            while params is not None:
+                if future is not None:
+                    obj = future.result()
+                else:
+                    obj = get_page(params)
+
+                # Once the server has returned a "next" link, a missing link
+                # means the page is the last one
+                has_links = has_links or bool(obj.get('%s_links' % (key)))
+                params = self._get_next_page_params(
+                    obj=obj, key=key, params=params,
+                    use_marker=not has_links)
+
+                if pool is not None and params is not None:
+                    future = pool.submit(get_page, params)
+
+                yield obj
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    def _get_next_page_params(self, obj, key, params, use_marker=True):
+        """
+        Return request parameters for the next page of a collection or None if
+        the provided page is the last one.
+
+        The next page is found using the "next" link of the collection (e.g.
+        ``servers_links``). If the server doesn't return one and
+        ``use_marker`` is True, the id of the last item is used as a marker if
+        the page is full.
+        """
+        items = obj.get(key) or []
+
+        if not items:
+            return None
+
+        next_params = None
+
+        for link in obj.get('%s_links' % (key)) or []:
+            if link.get('rel') == 'next':
+                query = urlparse.urlparse(link['href']).query
+                next_params = dict(params)
+
+                for name, values in urlparse.parse_qs(query).items():
+                    next_params[name] = values[-1]
+
+                break
+
+        if next_params is None:
+            if not use_marker:
+                return None
+
+            limit = params.get('limit', None)
+
+            if not limit or len(items) < int(limit):
+                return None
+
+            next_params = dict(params)
+            next_params['marker'] = items[-1]['id']
+
+        marker = next_params.get('marker', None)
+
+        if marker is None or str(marker) == str(params.get('marker', None)):
+            # Server returned the same page again
+            return None
+
+        return next_params
+
+    def _to_changes_since(self, value):
+        if not hasattr(value, 'strftime'):
+            return value
+
+        if value.tzinfo is None:
+            return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        return value.isoformat()
+
     def _to_images(self, obj, ex_only_active):
         images = []
         for image in obj['images']:
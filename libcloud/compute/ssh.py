@@ -31,6 +31,7 @@ except ImportError:
 
 import os
 import time
+import select
 import subprocess
 import logging
 import warnings
@@ -144,6 +145,27 @@ class BaseSSHClient(object):
         raise NotImplementedError(
             'put not implemented for this ssh client')
 
+    def putfo(self, path, fo, chmod=None):
+        """
+        Upload a file-like object to the remote node.
+
+        Clients which support it stream the data in chunks, the default
+        implementation reads the whole object into memory.
+
+        :type path: ``str``
+        :keyword path: File path on the remote node.
+
+        :type fo: ``file``
+        :keyword fo: File-like object to read the data from.
+
+        :type chmod: ``int``
+        :keyword chmod: chmod file to this after creation.
+
+        :return: Full path to the location where a file has been saved.
+        :rtype: ``str``
+        """
+        return self.put(path=path, contents=fo.read(), chmod=chmod)
+
     def delete(self, path):
         """
         Delete/Unlink a file on the remote node.
@@ -202,9 +224,20 @@ class ParamikoSSHClient(BaseSSHClient):
     # Maximum number of bytes to read at once from a socket
     CHUNK_SIZE = 4096
 
-    # How long to sleep while waiting for command to finish
+    # Number of bytes which are read from a file-like object and written to
+    # the remote file at once when uploading a file
+    SFTP_CHUNK_SIZE = 64 * 1024
+
+    # How long to sleep while waiting for command to finish (only used if
+    # waiting for the channel to become readable is not possible)
     SLEEP_DELAY = 1.5
 
+    # Maximum number of seconds to wait for the channel to become readable.
+    # Channel becomes readable when stdout data or EOF is received, but not
+    # when only stderr data is received so this also bounds the stderr
+    # latency.
+    SELECT_TIMEOUT = 0.5
+
     def __init__(self, hostname, port=22, username='root', password=None,
                  key=None, key_files=None, key_material=None, timeout=None):
         """
@@ -235,6 +268,11 @@ class ParamikoSSHClient(BaseSSHClient):
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.logger = self._get_and_setup_logger()
 
+        # SFTP session which is shared by all the file operations and the
+        # remote directories which are known to exist
+        self._sftp = None
+        self._sftp_dirs = set()
+
     def connect(self):
         conninfo = {'hostname': self.hostname,
                     'port': self.port,
@@ -263,55 +301,93 @@ class ParamikoSSHClient(BaseSSHClient):
         self.logger.debug('Connecting to server', extra=extra)
 
         self.client.connect(**conninfo)
+        self._close_sftp_client()
         return True
 
     def put(self, path, contents=None, chmod=None, mode='w'):
+        """
+        Upload a file to the remote node.
+
+        ``contents`` can also be a file-like object in which case the data
+        is streamed in chunks.
+
+        See also :meth:`BaseSSHClient.put`
+        """
         extra = {'_path': path, '_mode': mode, '_chmod': chmod}
         self.logger.debug('Uploading file', extra=extra)
 
-        sftp = self.client.open_sftp()
-        # less than ideal, but we need to mkdir stuff otherwise file() fails
+        sftp = self._get_sftp_client()
         head, tail = psplit(path)
 
-        if path[0] == "/":
-            sftp.chdir("/")
+        # Relative paths are resolved against the home directory (~)
+        sftp.chdir(None)
+
+        if head in self._sftp_dirs:
+            # Directories have already been created during this session
+            ak = sftp.file(path, mode=mode)
+
+            if path[0] == '/':
+                cwd = head
+            else:
+                cwd = pjoin(self._sftp_home, head)
         else:
-            # Relative path - start from a home directory (~)
-            sftp.chdir('.')
-
-        for part in head.split("/"):
-            if part != "":
-                try:
-                    sftp.mkdir(part)
-                except IOError:
-                    # so, there doesn't seem to be a way to
-                    # catch EEXIST consistently *sigh*
-                    pass
-                sftp.chdir(part)
-
-        cwd = sftp.getcwd()
-
-        ak = sftp.file(tail, mode=mode)
-        ak.write(contents)
-        if chmod is not None:
-            ak.chmod(chmod)
-        ak.close()
-        sftp.close()
+            # less than ideal, but we need to mkdir stuff otherwise file()
+            # fails
+            if path[0] == "/":
+                sftp.chdir("/")
+            else:
+                sftp.chdir('.')
+
+            for part in head.split("/"):
+                if part != "":
+                    try:
+                        sftp.mkdir(part)
+                    except IOError:
+                        # so, there doesn't seem to be a way to
+                        # catch EEXIST consistently *sigh*
+                        pass
+                    sftp.chdir(part)
+
+            cwd = sftp.getcwd()
+            ak = sftp.file(tail, mode=mode)
+            self._sftp_dirs.add(head)
+
+        try:
+            if hasattr(contents, 'read'):
+                ak.set_pipelined(True)
+
+                while True:
+                    data = contents.read(self.SFTP_CHUNK_SIZE)
+
+                    if not data:
+                        break
+
+                    ak.write(data)
+            else:
+                ak.write(contents)
+
+            if chmod is not None:
+                ak.chmod(chmod)
+        finally:
+            ak.close()
 
         if path[0] == '/':
             file_path = path
         else:
-            file_path = pjoin(cwd, path)
+            file_path = pjoin(cwd, tail)
 
         return file_path
 
+    def putfo(self, path, fo, chmod=None):
+        return self.put(path=path, contents=fo, chmod=chmod)
+
     def delete(self, path):
         extra = {'_path': path}
         self.logger.debug('Deleting file', extra=extra)
 
-        sftp = self.client.open_sftp()
+        sftp = self._get_sftp_client()
+        sftp.chdir(None)
         sftp.unlink(path)
-        sftp.close()
         return True
 
     def run(self, cmd, timeout=None):
@@ -373,14 +449,20 @@ class ParamikoSSHClient(BaseSSHClient):
             stderr.write(self._consume_stderr(chan).getvalue())
 
             # We need to check the exist status here, because the command could
-            # print some output and exit during this sleep below.
+            # print some output and exit while we are waiting below.
             exit_status_ready = chan.exit_status_ready()
 
             if exit_status_ready:
                 break
 
-            # Short sleep to prevent busy waiting
-            time.sleep(self.SLEEP_DELAY)
+            # Wait for more data instead of busy waiting
+            wait_timeout = self.SELECT_TIMEOUT
+
+            if timeout:
+                wait_timeout = min(wait_timeout,
+                                   max(timeout - elapsed_time, 0))
+
+            self._wait_for_channel(chan=chan, timeout=wait_timeout)
 
         # Receive the exit status code of the command we ran.
         status = chan.recv_exit_status()
@@ -396,9 +478,58 @@ class ParamikoSSHClient(BaseSSHClient):
     def close(self):
         self.logger.debug('Closing server connection')
 
+        self._close_sftp_client()
         self.client.close()
         return True
 
+    def _get_sftp_client(self):
+        """
+        Return SFTP session which is shared by all the file operations,
+        opening a new one if needed.
+        """
+        if self._sftp is not None:
+            channel = self._sftp.get_channel()
+
+            if getattr(channel, 'closed', False) is True:
+                self._close_sftp_client()
+
+        if self._sftp is None:
+            self._sftp = self.client.open_sftp()
+            self._sftp_home = self._sftp.normalize('.')
+            self._sftp_dirs = set()
+
+        return self._sftp
+
+    def _close_sftp_client(self):
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            except Exception:
+                pass
+
+        self._sftp = None
+        self._sftp_dirs = set()
+
+    def _wait_for_channel(self, chan, timeout):
+        """
+        Block until data is available on the channel, the channel is closed
+        or the timeout expires.
+        """
+        if chan.recv_ready() or chan.recv_stderr_ready():
+            return
+
+        if getattr(chan, 'eof_received', False) is True:
+            # All the output has been received and the channel stays readable
+            # from now on, wait for the exit status instead
+            chan.status_event.wait(timeout)
+            return
+
+        try:
+            select.select([chan], [], [], timeout)
+        except (TypeError, ValueError, select.error):
+            # Channel doesn't support fileno() (e.g. a mock channel)
+            time.sleep(min(timeout, self.SLEEP_DELAY))
+
     def _consume_stdout(self, chan):
         """
         Try to consume stdout data from chan if it's receive ready.
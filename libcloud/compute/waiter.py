@@ -0,0 +1,340 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Shared poll loop which is used to wait for nodes to reach a desired state.
+
+All the waiters which are registered with the same :class:`NodePoller` are
+served by a single (batched) node lookup per poll interval, no matter how many
+threads are waiting. The lookup is performed by one of the waiting threads and
+its result is handed to all the other waiters.
+"""
+
+from __future__ import with_statement
+
+import sys
+import time
+import random
+import threading
+
+from libcloud.common.types import LibcloudError
+
+__all__ = [
+    'NodePoller',
+    'get_node_poller'
+]
+
+# Protects creation of the per-driver poller registry
+_pollers_lock = threading.Lock()
+
+
+class _Waiter(object):
+    """
+    State of a single caller which waits for a set of nodes.
+    """
+
+    def __init__(self, nodes, check, wait_period, max_wait_period,
+                 backoff_factor, jitter):
+        self.nodes = nodes
+        self.check = check
+        self.interval = wait_period
+        self.max_wait_period = max(max_wait_period, wait_period)
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+
+        # First lookup is performed straight away
+        self.next_poll = 0
+        self.polls = 0
+
+        self.done = False
+        self.result = None
+        self.error = None
+
+    def set_result(self, result):
+        self.result = result
+        self.done = True
+
+    def set_error(self, error):
+        self.error = error
+        self.done = True
+
+    def schedule(self, now):
+        """
+        Schedule the next lookup using exponential backoff with jitter.
+        """
+        delay = self.interval
+
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+
+        self.next_poll = now + delay
+        self.interval = min(self.interval * self.backoff_factor,
+                            self.max_wait_period)
+
+
+class NodePoller(object):
+    """
+    Poll loop which is shared by all the callers waiting for nodes of a single
+    driver.
+
+    Node lookups are performed using the driver ``_list_nodes_for_waiter``
+    method which drivers can override to only retrieve the nodes which are
+    being waited on (e.g. EC2 passes ``ex_node_ids`` to ``list_nodes``).
+    """
+
+    def __init__(self, driver, list_nodes_kwargs=None):
+        """
+        :param driver: Driver which is used to look up the nodes.
+        :type driver: :class:`libcloud.compute.base.NodeDriver`
+
+        :param list_nodes_kwargs: Optional driver-specific keyword arguments
+                                  which are passed to the ``list_nodes``
+                                  method.
+        :type list_nodes_kwargs: ``dict``
+        """
+        self.driver = driver
+        self.list_nodes_kwargs = list_nodes_kwargs or {}
+
+        self._condition = threading.Condition()
+        self._waiters = []
+        self._polling = False
+
+        self._stats = {
+            'polls': 0,
+            'errors': 0
+        }
+
+    def wait(self, nodes, check, wait_period=3, timeout=600,
+             max_wait_period=30, backoff_factor=1.5, jitter=0.1):
+        """
+        Block until ``check`` returns a value other than None for the provided
+        nodes.
+
+        ``check`` is called with a list of nodes returned by the lookup (which
+        can include nodes other than the ones being waited on) after each poll
+        and can raise an exception to abort the wait.
+
+        :param nodes: List of nodes to wait for.
+        :type nodes: ``list`` of :class:`libcloud.compute.base.Node`
+
+        :param check: Function which returns the result once the nodes have
+                      reached the desired state and None otherwise.
+        :type check: ``callable``
+
+        :param wait_period: How many seconds to wait before the second lookup.
+        :type wait_period: ``float``
+
+        :param timeout: How many seconds to wait before giving up.
+        :type timeout: ``float``
+
+        :param max_wait_period: Maximum number of seconds between two lookups.
+        :type max_wait_period: ``float``
+
+        :param backoff_factor: Factor by which the wait period is multiplied
+                               after each lookup.
+        :type backoff_factor: ``float``
+
+        :param jitter: Maximum random deviation of the wait period as a
+                       fraction of the wait period (0.1 means +/- 10%).
+        :type jitter: ``float``
+
+        :return: Value returned by ``check``.
+        """
+        waiter = _Waiter(nodes=nodes, check=check, wait_period=wait_period,
+                         max_wait_period=max_wait_period,
+                         backoff_factor=backoff_factor, jitter=jitter)
+        end = time.time() + timeout
+
+        with self._condition:
+            self._waiters.append(waiter)
+
+        try:
+            while True:
+                waiters = self._wait_for_turn(waiter=waiter, end=end)
+
+                if waiters is None:
+                    break
+
+                self._poll(waiters=waiters)
+        finally:
+            with self._condition:
+                self._waiters.remove(waiter)
+
+        if waiter.error is not None:
+            raise waiter.error
+
+        if not waiter.done:
+            raise LibcloudError(value='Timed out after %s seconds' % (timeout),
+                                driver=self.driver)
+
+        return waiter.result
+
+    def get_stats(self):
+        """
+        Return the number of lookups performed so far and the number of
+        currently registered waiters.
+
+        :rtype: ``dict``
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats['waiters'] = len(self._waiters)
+
+        return stats
+
+    def _wait_for_turn(self, waiter, end):
+        """
+        Block until the waiter is done, timed out or until the calling thread
+        should perform the next lookup.
+
+        :return: List of waiters which should be served by the lookup or None
+                 if the waiter doesn't need to wait any longer.
+        """
+        with self._condition:
+            while True:
+                if waiter.done:
+                    return None
+
+                now = time.time()
+
+                # Note: At least one lookup is always performed
+                if waiter.polls and now >= end:
+                    return None
+
+                if not self._polling:
+                    next_poll = min([item.next_poll
+                                     for item in self._waiters])
+
+                    if now >= next_poll:
+                        self._polling = True
+                        return list(self._waiters)
+
+                    delay = next_poll - now
+                elif not waiter.polls:
+                    # Lookup is already in progress, the waiter will be served
+                    # by this or the next one
+                    delay = None
+                else:
+                    delay = end - now
+
+                if delay is not None and waiter.polls:
+                    delay = min(delay, end - now)
+
+                self._condition.wait(delay)
+
+    def _poll(self, waiters):
+        """
+        Perform a single lookup for all the provided waiters and hand the
+        result to each of them.
+
+        If the lookup fails, the nodes of each waiter are looked up separately
+        so an error only fails the waiters whose nodes it affects.
+        """
+        waiters = [waiter for waiter in waiters if not waiter.done]
+
+        try:
+            lookups = [(waiters, ) + self._list_nodes(waiters=waiters)]
+
+            if lookups[0][2] is not None and len(waiters) > 1:
+                lookups = [([waiter], ) + self._list_nodes(waiters=[waiter])
+                           for waiter in waiters]
+
+            with self._condition:
+                for items, nodes, error in lookups:
+                    self._dispatch(waiters=items, nodes=nodes, error=error)
+        finally:
+            with self._condition:
+                self._polling = False
+                self._condition.notify_all()
+
+    def _list_nodes(self, waiters):
+        """
+        Look up the nodes of the provided waiters.
+
+        :return: (nodes, error) tuple.
+        :rtype: ``tuple``
+        """
+        pending = []
+
+        for waiter in waiters:
+            pending.extend(waiter.nodes)
+
+        error = None
+        nodes = []
+
+        try:
+            nodes = self.driver._list_nodes_for_waiter(
+                nodes=pending, **self.list_nodes_kwargs)
+        except Exception:
+            error = sys.exc_info()[1]
+
+        with self._condition:
+            self._stats['polls'] += 1
+
+            if error is not None:
+                self._stats['errors'] += 1
+
+        return nodes, error
+
+    def _dispatch(self, waiters, nodes, error=None):
+        now = time.time()
+
+        for waiter in waiters:
+            if waiter.done:
+                continue
+
+            waiter.polls += 1
+
+            if error is not None:
+                waiter.set_error(error)
+                continue
+
+            try:
+                result = waiter.check(nodes)
+            except Exception:
+                waiter.set_error(sys.exc_info()[1])
+                continue
+
+            if result is not None:
+                waiter.set_result(result)
+            else:
+                waiter.schedule(now)
+
+
+def get_node_poller(driver, list_nodes_kwargs=None):
+    """
+    Return a poller which is shared by all the callers waiting for nodes of
+    the provided driver with the same ``list_nodes`` arguments.
+
+    :param driver: Driver which is used to look up the nodes.
+    :type driver: :class:`libcloud.compute.base.NodeDriver`
+
+    :param list_nodes_kwargs: Optional driver-specific keyword arguments which
+                              are passed to the ``list_nodes`` method.
+    :type list_nodes_kwargs: ``dict``
+
+    :rtype: :class:`NodePoller`
+    """
+    list_nodes_kwargs = list_nodes_kwargs or {}
+    key = repr(sorted(list_nodes_kwargs.items()))
+
+    with _pollers_lock:
+        pollers = driver.__dict__.setdefault('_node_pollers', {})
+
+        if key not in pollers:
+            pollers[key] = NodePoller(driver=driver,
+                                      list_nodes_kwargs=list_nodes_kwargs)
+
+        return pollers[key]
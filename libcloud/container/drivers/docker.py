@@ -14,8 +14,10 @@
 # limitations under the License.
 
 import base64
+import codecs
 import datetime
 import shlex
+import struct
 import re
 
 try:
@@ -39,6 +41,15 @@ from libcloud.container.types import ContainerState
 VALID_RESPONSE_CODES = [httplib.OK, httplib.ACCEPTED, httplib.CREATED,
                         httplib.NO_CONTENT]
 
+# Output of containers without a TTY is multiplexed into a single stream of
+# frames. Each frame starts with an 8 byte header which holds the stream type
+# and the size of the frame payload.
+STREAM_HEADER_SIZE = 8
+STREAM_TYPES = {0: 'stdin', 1: 'stdout', 2: 'stderr'}
+
+# Maximum number of bytes which are read from a non-multiplexed stream at once
+STREAM_CHUNK_SIZE = 8192
+
 
 class DockerResponse(JsonResponse):
 
@@ -200,22 +211,13 @@ class DockerContainerDriver(ContainerDriver):
 
         :rtype: :class:`libcloud.container.base.ContainerImage`
         """
-        payload = {
-        }
-        data = json.dumps(payload)
+        image_id = None
 
-        result = self.connection.request('/images/create?fromImage=%s' %
-                                         (path), data=data, method='POST')
-        if "errorDetail" in result.body:
-            raise DockerException(None, result.body)
-        try:
-            # get image id
-            image_id = re.findall(
-                r'{"status":"Download complete"'
-                r',"progressDetail":{},"id":"\w+"}',
-                result.body)[-1]
-            image_id = json.loads(image_id).get('id')
-        except:
+        for event in self.ex_pull_image(path):
+            if event.get('status') == 'Download complete':
+                image_id = event.get('id')
+
+        if not image_id:
             raise DockerException(None, 'failed to install image')
 
         image = ContainerImage(
@@ -499,11 +501,73 @@ class DockerContainerDriver(ContainerDriver):
         if result.status in VALID_RESPONSE_CODES:
             return self.get_container(container.id)
 
+    def ex_pull_image(self, path):
+        """
+        Pull a container image and return a generator which yields the
+        progress events reported by Docker as they arrive.
+
+        The progress stream is parsed incrementally, so only the event which
+        is currently being received is held in memory.
+
+        :param path: Path to the container image
+        :type  path: ``str``
+
+        :raises: :class:`DockerException` if Docker reports an error.
+
+        :rtype: ``generator`` of ``dict``
+        """
+        response = self._request_stream('/images/create',
+                                        params={'fromImage': path},
+                                        method='POST')
+        return self._iterate_json_stream(response)
+
+    def ex_stream_logs(self, container, follow=True, stdout=True,
+                       stderr=True):
+        """
+        Return a generator which yields the container output as it's
+        produced.
+
+        The output is read from the connection frame by frame as the
+        generator is consumed, so the memory use stays constant and a slow
+        consumer makes Docker hold back the output. Output of containers with
+        a TTY isn't multiplexed by Docker and is yielded as ``stdout``.
+
+        :param container: The container to stream logs for
+        :type  container: :class:`libcloud.container.base.Container`
+
+        :param follow: Keep yielding new output until the container stops.
+        :type  follow: ``bool``
+
+        :param stdout: Include the standard output.
+        :type  stdout: ``bool``
+
+        :param stderr: Include the standard error output.
+        :type  stderr: ``bool``
+
+        :return: A generator of (stream name, data) tuples. Stream name is
+                 ``stdout`` or ``stderr``.
+        :rtype: ``generator`` of ``tuple``
+        """
+        params = {'stdout': int(stdout), 'stderr': int(stderr)}
+
+        if float(self._get_api_version()) > 1.10:
+            params['follow'] = int(follow)
+            response = self._request_stream(
+                '/containers/%s/logs' % (container.id), params=params)
+        else:
+            params.update({'logs': 1, 'stream': int(follow)})
+            response = self._request_stream(
+                '/containers/%s/attach' % (container.id), params=params,
+                method='POST')
+
+        return self._iterate_multiplexed_stream(response)
+
     def ex_get_logs(self, container, stream=False):
         """
         Get container logs
 
-        If stream == True, logs will be yielded as a stream
+        If stream == True, logs will be yielded as a stream (see
+        :meth:`ex_stream_logs`)
         From Api Version 1.11 and above we need a GET request to get the logs
         Logs are in different format of those of Version 1.10 and below
 
@@ -513,8 +577,12 @@ class DockerContainerDriver(ContainerDriver):
         :param stream: Stream the output
         :type  stream: ``bool``
 
-        :rtype: ``bool``
+        :rtype: ``str`` or ``generator`` of ``bytes``
         """
+        if stream:
+            return (data for _, data in
+                    self.ex_stream_logs(container=container, follow=True))
+
         payload = {}
         data = json.dumps(payload)
 
@@ -649,6 +717,142 @@ class DockerContainerDriver(ContainerDriver):
 
         return api_version
 
+    def _request_stream(self, action, params=None, method='GET'):
+        """
+        Send a request and return the raw response whose body hasn't been
+        read yet.
+
+        :rtype: :class:`libcloud.common.base.RawResponse`
+        """
+        headers = {}
+
+        if method == 'POST':
+            headers['Content-Length'] = '0'
+
+        response = self.connection.request(action, params=params,
+                                           headers=headers, method=method,
+                                           raw=True)
+
+        if response.status not in VALID_RESPONSE_CODES:
+            raise DockerException(response.status, response.response.read())
+
+        return response
+
+    def _iterate_multiplexed_stream(self, response):
+        """
+        Demultiplex a stream of stdout and stderr frames.
+        """
+        http_response = response.response
+        finished = False
+
+        try:
+            header = self._read_stream(http_response, STREAM_HEADER_SIZE)
+
+            if header and not self._is_stream_header(header):
+                # Output of containers with a TTY isn't multiplexed
+                yield ('stdout', header)
+
+                for data in self._iterate_raw_stream(http_response):
+                    yield ('stdout', data)
+
+                header = b('')
+
+            while len(header) == STREAM_HEADER_SIZE:
+                stream_type, size = struct.unpack('>BxxxL', header)
+                data = self._read_stream(http_response, size)
+                yield (STREAM_TYPES.get(stream_type, 'stdout'), data)
+
+                header = self._read_stream(http_response, STREAM_HEADER_SIZE)
+
+            finished = True
+        finally:
+            if not finished:
+                self._close_stream(response)
+
+    def _iterate_json_stream(self, response):
+        """
+        Parse a stream of concatenated JSON objects as they arrive.
+        """
+        decoder = json.JSONDecoder()
+        text_decoder = codecs.getincrementaldecoder('utf-8')()
+        buffer = ''
+        finished = False
+
+        try:
+            for data in self._iterate_raw_stream(response.response):
+                buffer += text_decoder.decode(data)
+
+                while True:
+                    buffer = buffer.lstrip()
+
+                    try:
+                        event, end = decoder.raw_decode(buffer)
+                    except ValueError:
+                        # Object hasn't been fully received yet
+                        break
+
+                    buffer = buffer[end:]
+
+                    if 'errorDetail' in event or 'error' in event:
+                        raise DockerException(None, event.get('error') or
+                                              json.dumps(event))
+
+                    yield event
+
+            if buffer.strip():
+                raise DockerException(None, 'Failed to parse the response: '
+                                      '%s' % (buffer))
+
+            finished = True
+        finally:
+            if not finished:
+                self._close_stream(response)
+
+    def _iterate_raw_stream(self, http_response):
+        # read1 returns the data which is already available instead of
+        # blocking until the whole chunk has been received
+        read = getattr(http_response, 'read1', None) or http_response.read
+
+        while True:
+            data = read(STREAM_CHUNK_SIZE)
+
+            if not data:
+                break
+
+            yield b(data)
+
+    def _read_stream(self, http_response, size):
+        """
+        Read exactly ``size`` bytes unless the end of the stream is reached.
+        """
+        chunks = []
+        remaining = size
+
+        while remaining > 0:
+            data = http_response.read(remaining)
+
+            if not data:
+                break
+
+            data = b(data)
+            chunks.append(data)
+            remaining -= len(data)
+
+        return b('').join(chunks)
+
+    def _is_stream_header(self, header):
+        header = bytearray(header)
+        return len(header) == STREAM_HEADER_SIZE and \
+            header[0] in STREAM_TYPES and header[1:4] == bytearray(3)
+
+    def _close_stream(self, response):
+        """
+        Close a stream which hasn't been read until the end. The underlying
+        HTTP connection can't be reused for other requests.
+        """
+        response.response.close()
+        response.connection.connection.close()
+
 
 def ts_to_str(timestamp):
     """
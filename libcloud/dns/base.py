@@ -20,6 +20,7 @@ import datetime
 from libcloud import __version__
 from libcloud.common.base import ConnectionUserAndKey, BaseDriver
 from libcloud.dns.types import RecordType
+from libcloud.utils.concurrency import map_with_workers
 
 __all__ = [
     'Zone',
@@ -163,6 +164,12 @@ class DNSDriver(BaseDriver):
     # Map libcloud record type enum to provider record type name
     RECORD_TYPE_MAP = {}
 
+    cache_invalidation_map = {
+        'create_zone': ['list_zones'],
+        'update_zone': ['list_zones'],
+        'delete_zone': ['list_zones']
+    }
+
     def __init__(self, key, secret=None, secure=True, host=None, port=None,
                  **kwargs):
         """
@@ -387,6 +394,168 @@ class DNSDriver(BaseDriver):
         raise NotImplementedError(
             'delete_record not implemented for this driver')
 
+    def sync_records(self, zone, records, delete=True, max_workers=4):
+        """
+        Make the records in the zone match the provided list of records.
+
+        The current records are compared with the provided ones and only the
+        differences are applied: missing records are created, records which
+        only differ in the extra attributes (e.g. TTL) are updated and
+        records which are not in the provided list are deleted.
+
+        Drivers which support it apply multiple changes with a single API
+        request. Other drivers apply the changes one by one, using up to
+        ``max_workers`` concurrent requests.
+
+        :param zone: Zone to synchronize.
+        :type  zone: :class:`Zone`
+
+        :param records: Desired records. Each record is a dictionary with
+                        ``name``, ``type``, ``data`` and optional ``extra``
+                        keys (e.g. ``{'name': 'www', 'type': RecordType.A,
+                        'data': '127.0.0.1', 'extra': {'ttl': 300}}``).
+        :type  records: ``list`` of ``dict``
+
+        :param delete: True to delete the records which are not in the
+                       provided list. NS and SOA records of the zone apex
+                       are never deleted.
+        :type  delete: ``bool``
+
+        :param max_workers: Maximum number of concurrent API requests.
+        :type  max_workers: ``int``
+
+        :return: Dictionary with lists of ``created``, ``updated`` and
+                 ``deleted`` records.
+        :rtype: ``dict``
+        """
+        current = self.list_records(zone=zone)
+        changes = self._get_record_changes(current=current, records=records,
+                                           delete=delete)
+        return self._apply_record_changes(zone=zone, current=current,
+                                          changes=changes,
+                                          max_workers=max_workers)
+
+    def _get_record_changes(self, current, records, delete=True):
+        """
+        Compare the current and the desired records.
+
+        Records are matched by name, type and data.
+
+        :return: Dictionary with a list of desired records which need to be
+                 created (``create``), a list of (current record, desired
+                 record) tuples which need to be updated (``update``) and
+                 a list of current records which need to be deleted
+                 (``delete``).
+        :rtype: ``dict``
+        """
+        existing = {}
+        for record in current:
+            key = (record.name or '', record.type, record.data)
+            existing.setdefault(key, []).append(record)
+
+        changes = {'create': [], 'update': [], 'delete': []}
+
+        for item in records:
+            item = {'name': item.get('name') or '', 'type': item['type'],
+                    'data': item['data'], 'extra': item.get('extra') or {}}
+            key = (item['name'], item['type'], item['data'])
+            matching = existing.get(key)
+
+            if not matching:
+                changes['create'].append(item)
+                continue
+
+            record = matching.pop(0)
+            if self._record_differs(record=record, extra=item['extra']):
+                changes['update'].append((record, item))
+
+        if delete:
+            for matching in existing.values():
+                for record in matching:
+                    if record.type in [RecordType.NS, RecordType.SOA] and \
+                            not record.name:
+                        continue
+                    changes['delete'].append(record)
+
+        return changes
+
+    def _record_differs(self, record, extra):
+        """
+        Return True if any of the provided extra attributes differs from the
+        attributes of the record.
+        """
+        for name, value in extra.items():
+            if name.startswith('_'):
+                continue
+
+            current = record.extra.get(name)
+            if current is None and name == 'ttl':
+                current = record.ttl
+
+            if str(current) != str(value):
+                return True
+
+        return False
+
+    def _apply_record_changes(self, zone, current, changes, max_workers=4):
+        """
+        Apply changes returned by :meth:`_get_record_changes`.
+
+        Drivers which support changing multiple records with a single API
+        request should override this method. This implementation applies the
+        changes one by one - deletions first, then updates and creations.
+        """
+        result = {'created': [], 'updated': [], 'deleted': []}
+        phases = [('delete', 'deleted'), ('update', 'updated'),
+                  ('create', 'created')]
+
+        total = sum([len(items) for items in changes.values()])
+        if not total:
+            return result
+
+        workers = [self._get_worker_driver()
+                   for _ in range(min(max_workers, total))]
+
+        # Each phase is completed before the next one is started so e.g. a
+        # CNAME record can be replaced with an A record
+        for action, name in phases:
+            def apply_change(driver, item):
+                return self._apply_record_change(driver=driver, zone=zone,
+                                                 action=action, item=item)
+
+            records = map_with_workers(apply_change, changes[action],
+                                       workers=workers)
+
+            for record in records:
+                record.driver = self
+                result[name].append(record)
+
+        return result
+
+    def _apply_record_change(self, driver, zone, action, item):
+        """
+        Apply a single change using the provided (worker) driver.
+
+        :return: Deleted, updated or created record.
+        :rtype: :class:`Record`
+        """
+        if action == 'delete':
+            driver.delete_record(record=item)
+            return item
+
+        if action == 'update':
+            record, desired = item
+            extra = dict([(key, value) for key, value in record.extra.items()
+                          if not key.startswith('_')])
+            extra.update(desired['extra'])
+            return driver.update_record(record=record, name=record.name,
+                                        type=record.type,
+                                        data=desired['data'], extra=extra)
+
+        return driver.create_record(name=item['name'], zone=zone,
+                                    type=item['type'], data=item['data'],
+                                    extra=item['extra'] or None)
+
     def export_zone_to_bind_format(self, zone):
         """
         Export Zone object to the BIND compatible format.
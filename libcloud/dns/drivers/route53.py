@@ -48,6 +48,11 @@ API_ROOT = '/%s/' % (API_VERSION)
 
 NAMESPACE = 'https://%s/doc%s' % (API_HOST, API_ROOT)
 
+# Limits of a single ChangeResourceRecordSets request
+MAX_BATCH_CHANGES = 100
+MAX_BATCH_RESOURCE_RECORDS = 1000
+MAX_BATCH_VALUE_CHARACTERS = 32000
+
 
 class InvalidChangeBatch(LibcloudError):
     pass
@@ -115,6 +120,13 @@ class Route53DNSDriver(DNSDriver):
         RecordType.TXT: 'TXT',
     }
 
+    def __init__(self, *args, **kwargs):
+        super(Route53DNSDriver, self).__init__(*args, **kwargs)
+
+        # Hosted zone domain names can't change so zones are cached to avoid
+        # retrieving the zone each time a record is retrieved
+        self._zone_cache = {}
+
     def iterate_zones(self):
         return self._get_more('zones')
 
@@ -130,7 +142,9 @@ class Route53DNSDriver(DNSDriver):
         return self._to_zone(elem)
 
     def get_record(self, zone_id, record_id):
-        zone = self.get_zone(zone_id=zone_id)
+        zone = self._zone_cache.get(zone_id)
+        if zone is None:
+            zone = self.get_zone(zone_id=zone_id)
         record_type, name = record_id.split(':', 1)
         if name:
             full_name = ".".join((name, zone.domain))
@@ -181,6 +195,7 @@ class Route53DNSDriver(DNSDriver):
 
         uri = API_ROOT + 'hostedzone/%s' % (zone.id)
         response = self.connection.request(uri, method='DELETE')
+        self._zone_cache.pop(zone.id, None)
         return response.status in [httplib.OK]
 
     def create_record(self, name, zone, type, data, extra=None):
@@ -366,12 +381,26 @@ class Route53DNSDriver(DNSDriver):
         return response.status == httplib.OK
 
     def _post_changeset(self, zone, changes_list):
+        rrset_changes = []
+
+        for action, name, type_, data, extra in changes_list:
+            value = self._get_record_value(type_, data, extra)
+            rrset_changes.append((action, name, type_, [value],
+                                  extra.get('ttl', '0')))
+
+        return self._post_rrset_changeset(zone, rrset_changes)
+
+    def _post_rrset_changeset(self, zone, rrset_changes):
+        """
+        Post a change batch where each change is a (action, name, type,
+        values, ttl) tuple for a whole resource record set.
+        """
         attrs = {'xmlns': NAMESPACE}
         changeset = ET.Element('ChangeResourceRecordSetsRequest', attrs)
         batch = ET.SubElement(changeset, 'ChangeBatch')
         changes = ET.SubElement(batch, 'Changes')
 
-        for action, name, type_, data, extra in changes_list:
+        for action, name, type_, values, ttl in rrset_changes:
             change = ET.SubElement(changes, 'Change')
             ET.SubElement(change, 'Action').text = action
 
@@ -384,13 +413,12 @@ class Route53DNSDriver(DNSDriver):
 
             ET.SubElement(rrs, 'Name').text = record_name
             ET.SubElement(rrs, 'Type').text = self.RECORD_TYPE_MAP[type_]
-            ET.SubElement(rrs, 'TTL').text = str(extra.get('ttl', '0'))
+            ET.SubElement(rrs, 'TTL').text = str(ttl)
 
             rrecs = ET.SubElement(rrs, 'ResourceRecords')
-            rrec = ET.SubElement(rrecs, 'ResourceRecord')
-            if 'priority' in extra:
-                data = '%s %s' % (extra['priority'], data)
-            ET.SubElement(rrec, 'Value').text = data
+            for value in values:
+                rrec = ET.SubElement(rrecs, 'ResourceRecord')
+                ET.SubElement(rrec, 'Value').text = value
 
         uri = API_ROOT + 'hostedzone/' + zone.id + '/rrset'
         data = ET.tostring(changeset)
@@ -399,6 +427,177 @@ class Route53DNSDriver(DNSDriver):
 
         return response.status == httplib.OK
 
+    def _get_record_value(self, type_, data, extra):
+        """
+        Return the resource record value for the record data and the extra
+        attributes.
+        """
+        if type_ == RecordType.SRV and 'weight' in extra and \
+                'port' in extra:
+            return '%s %s %s %s' % (extra.get('priority', 0), extra['weight'],
+                                    extra['port'], data)
+        if 'priority' in extra:
+            return '%s %s' % (extra['priority'], data)
+        return data
+
+    def _apply_record_changes(self, zone, current, changes, max_workers=4):
+        """
+        Apply the changes using as few ChangeResourceRecordSets requests as
+        possible.
+
+        Route53 manages the records with the same name and type as a single
+        resource record set so each changed set is replaced (deleted and
+        re-created in the same batch) with the new list of values.
+
+        Changes of all the record sets with the same name are submitted in
+        the same batch with the deletions first, so e.g. a CNAME record can
+        be replaced with an A record.
+
+        Batches are always posted one by one, ``max_workers`` is ignored.
+        """
+        result = {'created': [], 'updated': [], 'deleted': []}
+
+        record_sets = {}
+        for record in current:
+            key = (record.name or '', record.type)
+            record_sets.setdefault(key, []).append(record)
+
+        # Desired values of each changed record set
+        removed = {}
+        added = {}
+
+        for record in changes['delete']:
+            key = (record.name or '', record.type)
+            removed.setdefault(key, []).append(record)
+            result['deleted'].append(record)
+
+        for record, item in changes['update']:
+            key = (record.name or '', record.type)
+            removed.setdefault(key, []).append(record)
+            added.setdefault(key, []).append(item)
+
+        for item in changes['create']:
+            key = (item['name'], item['type'])
+            added.setdefault(key, []).append(item)
+
+        # Changes of all the record sets with the same name
+        units = {}
+        keys = sorted(set(removed.keys()) | set(added.keys()))
+
+        for key in keys:
+            name, type_ = key
+            old_records = record_sets.get(key, [])
+            removed_ids = set([id(record) for record in removed.get(key, [])])
+            new_records = [record for record in old_records
+                           if id(record) not in removed_ids]
+
+            deletions, creations = units.setdefault(name, ([], []))
+
+            if old_records:
+                values = [self._get_record_value(type_, r.data, r.extra)
+                          for r in old_records]
+                deletions.append(('DELETE', name, type_, values,
+                                  self._get_record_set_ttl(old_records)))
+
+            old_data = set([record.data for record in old_records])
+
+            for item in added.get(key, []):
+                record = self._to_synced_record(zone=zone, item=item)
+                new_records.append(record)
+
+                if record.data in old_data:
+                    result['updated'].append(record)
+                else:
+                    result['created'].append(record)
+
+            if new_records:
+                values = [self._get_record_value(type_, r.data, r.extra)
+                          for r in new_records]
+                creations.append(('CREATE', name, type_, values,
+                                  self._get_record_set_ttl(new_records,
+                                                           added.get(key))))
+
+        units = [units[name][0] + units[name][1] for name in sorted(units)]
+        batches = self._get_change_batches(units)
+        self._post_change_batches(zone=zone, batches=batches)
+
+        return result
+
+    def _to_synced_record(self, zone, item):
+        extra = dict(item['extra'])
+        id = ':'.join((self.RECORD_TYPE_MAP[item['type']], item['name']))
+        return Record(id=id, name=item['name'], type=item['type'],
+                      data=item['data'], zone=zone, driver=self,
+                      ttl=extra.get('ttl', None), extra=extra)
+
+    def _get_record_set_ttl(self, records, items=None):
+        """
+        Return the TTL of a record set. TTL of the changed records has
+        precedence over the TTL of the existing ones.
+        """
+        for item in items or []:
+            if item['extra'].get('ttl') is not None:
+                return item['extra']['ttl']
+
+        for record in records:
+            ttl = record.extra.get('ttl', record.ttl)
+            if ttl is not None:
+                return ttl
+
+        return '0'
+
+    def _get_change_batches(self, units):
+        """
+        Pack the changes into as few batches as possible without exceeding
+        the Route53 limits.
+
+        Changes of a single unit (all the record sets with the same name)
+        are never split between batches so the record sets are replaced
+        atomically.
+        """
+        batches = []
+        batch = []
+        counts = [0, 0, 0]
+
+        for unit in units:
+            unit_counts = [len(unit),
+                           sum([len(change[3]) for change in unit]),
+                           sum([len(value) for change in unit
+                                for value in change[3]])]
+
+            limits = [MAX_BATCH_CHANGES, MAX_BATCH_RESOURCE_RECORDS,
+                      MAX_BATCH_VALUE_CHARACTERS]
+            fits = all([count + unit_count <= limit for
+                        count, unit_count, limit in
+                        zip(counts, unit_counts, limits)])
+
+            if batch and not fits:
+                batches.append(batch)
+                batch = []
+                counts = [0, 0, 0]
+
+            batch.extend(unit)
+            counts = [count + unit_count for count, unit_count in
+                      zip(counts, unit_counts)]
+
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+    def _post_change_batches(self, zone, batches):
+        """
+        Post the change batches one by one.
+
+        Route53 processes the changes of a hosted zone serially and throttles
+        the requests of each account so concurrent requests for the same zone
+        would fail with PriorRequestNotComplete or Throttling errors.
+        """
+        for batch in batches:
+            if not self._post_rrset_changeset(zone, batch):
+                raise LibcloudError('Failed to apply the change batch',
+                                    driver=self)
+
     def _to_zones(self, data):
         zones = []
         for element in data.findall(fixxpath(xpath='HostedZones/HostedZone',
@@ -422,6 +621,7 @@ class Route53DNSDriver(DNSDriver):
 
         zone = Zone(id=id, domain=name, type='master', ttl=0, driver=self,
                     extra=extra)
+        self._zone_cache[id] = zone
         return zone
 
     def _to_records(self, data, zone):
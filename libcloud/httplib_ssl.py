@@ -16,12 +16,16 @@
 Subclass for httplib.HTTPSConnection with optional certificate name
 verification, depending on libcloud.security settings.
 """
+from __future__ import with_statement
+
 import os
 import sys
+import time
 import socket
 import ssl
 import base64
 import warnings
+import threading
 
 import libcloud.security
 from libcloud.utils.py3 import b
@@ -35,7 +39,11 @@ from libcloud.utils.py3 import CertificateError
 __all__ = [
     'LibcloudBaseConnection',
     'LibcloudHTTPConnection',
-    'LibcloudHTTPSConnection'
+    'LibcloudHTTPSConnection',
+
+    'get_ssl_context',
+    'get_ssl_stats',
+    'reset_ssl_stats'
 ]
 
 HTTP_PROXY_ENV_VARIABLE_NAME = 'http_proxy'
@@ -58,6 +66,28 @@ SSL_CONSTANT_TO_TLS_VERSION_MAP = {
     5: 'TLS v1.2'
 }
 
+# Maximum number of TLS sessions which are kept for resumption
+MAX_SSL_SESSIONS = 1000
+
+# SSL contexts (with the loaded trust roots) which are shared by all the
+# connections using the same CA bundle, client certificate and SSL version
+_ssl_contexts = {}
+
+# TLS sessions of the last connection to each host which are used for
+# abbreviated handshakes
+_ssl_sessions = {}
+
+# CA bundles which have been found for a particular CA_CERTS_PATH value
+_ca_certs = {}
+
+_ssl_stats = {
+    'handshakes': 0,
+    'resumed_handshakes': 0,
+    'handshake_time': 0.0
+}
+
+_ssl_lock = threading.Lock()
+
 
 class LibcloudBaseConnection(object):
     """
@@ -217,6 +247,9 @@ class LibcloudHTTPSConnection(httplib.HTTPSConnection, LibcloudBaseConnection):
     verify = True         # verify by default
     ca_cert = None        # no default CA Certificate
 
+    # Key of the TLS session which is resumed by the next connection
+    _ssl_session_key = None
+
     def __init__(self, *args, **kwargs):
         """
         Constructor
@@ -257,15 +290,24 @@ class LibcloudHTTPSConnection(httplib.HTTPSConnection, LibcloudBaseConnection):
         if not self.verify:
             return
 
-        ca_certs_available = [cert
-                              for cert in libcloud.security.CA_CERTS_PATH
-                              if os.path.exists(cert) and os.path.isfile(cert)]
-        if ca_certs_available:
+        # Note: The file system is only searched once for each list of paths
+        ca_certs_path = tuple(libcloud.security.CA_CERTS_PATH)
+        ca_cert = _ca_certs.get(ca_certs_path, None)
+
+        if ca_cert is None:
+            ca_certs_available = [cert for cert in ca_certs_path
+                                  if os.path.exists(cert) and
+                                  os.path.isfile(cert)]
+
+            if not ca_certs_available:
+                raise RuntimeError(
+                    libcloud.security.CA_CERTS_UNAVAILABLE_ERROR_MSG)
+
             # use first available certificate
-            self.ca_cert = ca_certs_available[0]
-        else:
-            raise RuntimeError(
-                libcloud.security.CA_CERTS_UNAVAILABLE_ERROR_MSG)
+            ca_cert = ca_certs_available[0]
+            _ca_certs[ca_certs_path] = ca_cert
+
+        self.ca_cert = ca_cert
 
     def connect(self):
         """
@@ -291,21 +333,20 @@ class LibcloudHTTPSConnection(httplib.HTTPSConnection, LibcloudBaseConnection):
             self._activate_http_proxy(sock=sock)
 
         ssl_version = libcloud.security.SSL_VERSION
+        start = time.time()
 
         try:
-            self.sock = ssl.wrap_socket(
-                sock,
-                self.key_file,
-                self.cert_file,
-                cert_reqs=ssl.CERT_REQUIRED,
-                ca_certs=self.ca_cert,
-                ssl_version=ssl_version)
+            self.sock = self._wrap_socket(sock=sock, ssl_version=ssl_version)
         except socket.error:
             exc = sys.exc_info()[1]
             # Re-throw an exception with a more friendly error message
             exc = get_socket_error_exception(ssl_version=ssl_version, exc=exc)
             raise exc
 
+        _record_handshake(duration=time.time() - start,
+                          resumed=getattr(self.sock, 'session_reused', False))
+        self._save_ssl_session()
+
         cert = self.sock.getpeercert()
         try:
             match_hostname(cert, self.host)
@@ -313,6 +354,142 @@ class LibcloudHTTPSConnection(httplib.HTTPSConnection, LibcloudBaseConnection):
             e = sys.exc_info()[1]
             raise ssl.SSLError('Failed to verify hostname: %s' % (str(e)))
 
+    def close(self):
+        # Session tickets sent by TLS 1.3 servers are only received after the
+        # handshake so the session is saved again before closing the socket
+        self._save_ssl_session()
+        httplib.HTTPSConnection.close(self)
+
+    def _wrap_socket(self, sock, ssl_version):
+        """
+        Wrap the socket using a shared SSL context and resume the previous TLS
+        session with the same host if possible.
+        """
+        if not hasattr(ssl, 'SSLContext'):
+            # Python < 2.7.9
+            return ssl.wrap_socket(sock, self.key_file, self.cert_file,
+                                   cert_reqs=ssl.CERT_REQUIRED,
+                                   ca_certs=self.ca_cert,
+                                   ssl_version=ssl_version)
+
+        context = get_ssl_context(ca_cert=self.ca_cert,
+                                  cert_file=self.cert_file,
+                                  key_file=self.key_file,
+                                  ssl_version=ssl_version)
+        hostname = self._get_ssl_hostname()
+        port = getattr(self, '_tunnel_port', None) or self.port
+
+        # Note: Sessions can only be resumed using the same context
+        self._ssl_session_key = (self.ca_cert, self.cert_file, self.key_file,
+                                 ssl_version, hostname, port)
+
+        kwargs = {'server_hostname': hostname}
+        session = _ssl_sessions.get(self._ssl_session_key, None)
+
+        if session is not None:
+            kwargs['session'] = session
+
+        return context.wrap_socket(sock, **kwargs)
+
+    def _save_ssl_session(self):
+        key = self._ssl_session_key
+        session = getattr(self.sock, 'session', None)
+
+        if key is None or session is None:
+            return
+
+        with _ssl_lock:
+            if key not in _ssl_sessions and \
+                    len(_ssl_sessions) >= MAX_SSL_SESSIONS:
+                _ssl_sessions.pop(next(iter(_ssl_sessions)))
+
+            _ssl_sessions[key] = session
+
+    def _get_ssl_hostname(self):
+        # Note: When a HTTP proxy is used, "host" is the proxy host
+        return getattr(self, '_tunnel_host', None) or self.host
+
+
+def get_ssl_context(ca_cert, cert_file=None, key_file=None, ssl_version=None):
+    """
+    Return a SSL context which verifies server certificates using the
+    provided CA bundle.
+
+    Contexts are cached for the lifetime of the process so the CA bundle is
+    only parsed once and TLS sessions can be resumed.
+
+    :param ca_cert: Path to the CA bundle.
+    :type ca_cert: ``str``
+
+    :param cert_file: Path to the client certificate.
+    :type cert_file: ``str``
+
+    :param key_file: Path to the client certificate private key.
+    :type key_file: ``str``
+
+    :param ssl_version: SSL / TLS version (one of ``ssl.PROTOCOL_*``
+                        constants). Defaults to
+                        ``libcloud.security.SSL_VERSION``.
+    :type ssl_version: ``int``
+
+    :rtype: ``ssl.SSLContext``
+    """
+    if ssl_version is None:
+        ssl_version = libcloud.security.SSL_VERSION
+
+    key = (ca_cert, cert_file, key_file, ssl_version)
+
+    with _ssl_lock:
+        context = _ssl_contexts.get(key, None)
+
+        if context is None:
+            context = ssl.SSLContext(ssl_version)
+            context.verify_mode = ssl.CERT_REQUIRED
+            context.load_verify_locations(ca_cert)
+
+            if cert_file:
+                context.load_cert_chain(cert_file, key_file)
+
+            _ssl_contexts[key] = context
+
+    return context
+
+
+def get_ssl_stats():
+    """
+    Return the number of performed TLS handshakes, the number of handshakes
+    which resumed a previous session and the time spent in the handshakes.
+
+    :rtype: ``dict``
+    """
+    with _ssl_lock:
+        stats = dict(_ssl_stats)
+        stats['contexts'] = len(_ssl_contexts)
+        stats['sessions'] = len(_ssl_sessions)
+
+    handshakes = stats['handshakes']
+    stats['average_handshake_time'] = \
+        stats['handshake_time'] / handshakes if handshakes else 0.0
+    return stats
+
+
+def reset_ssl_stats():
+    """
+    Reset the TLS handshake statistics.
+    """
+    with _ssl_lock:
+        _ssl_stats.update({'handshakes': 0, 'resumed_handshakes': 0,
+                           'handshake_time': 0.0})
+
+
+def _record_handshake(duration, resumed=False):
+    with _ssl_lock:
+        _ssl_stats['handshakes'] += 1
+        _ssl_stats['handshake_time'] += duration
+
+        if resumed:
+            _ssl_stats['resumed_handshakes'] += 1
+
 
 def get_socket_error_exception(ssl_version, exc):
     """
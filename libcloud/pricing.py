@@ -18,7 +18,17 @@ from __future__ import with_statement
 A class which handles loading the pricing files.
 """
 
+import os
+import sys
+import mmap
+import time
+import heapq
+import bisect
+import struct
 import os.path
+import tempfile
+import threading
+from array import array
 from os.path import join as pjoin
 
 try:
@@ -39,7 +49,11 @@ __all__ = [
     'get_size_price',
     'set_pricing',
     'clear_pricing_data',
-    'download_pricing_file'
+    'download_pricing_file',
+
+    'PricedSize',
+    'PricingIndex',
+    'get_pricing_index'
 ]
 
 # Default URL to the pricing file
@@ -57,6 +71,30 @@ PRICING_DATA = {
 
 VALID_PRICING_DRIVER_TYPES = ['compute', 'storage']
 
+# Minimum number of seconds between two checks whether the pricing file has
+# changed. The cached pricing data (and the pricing index) is reloaded once
+# the file has changed.
+PRICING_FILE_CHECK_INTERVAL = 10
+
+# Parsed pricing files: file path -> (file stamp, pricing data)
+_PRICING_FILES = {}
+
+# Stamp of the pricing file which the cached pricing data has been loaded
+# from (None if the data hasn't been loaded from the default pricing file)
+_pricing_file_stamp = None
+_pricing_file_checked = 0
+
+# Pricing indexes returned by get_pricing_index:
+# (driver type, index file path) -> PricingIndex
+_pricing_indexes = {}
+_pricing_indexes_lock = threading.Lock()
+
+# Magic bytes which pricing index files start with
+PRICING_INDEX_MAGIC = b'LCPRICE1'
+PRICING_INDEX_COLUMNS = ['prices', 'ram', 'disk', 'vcpus']
+
+NAN = float('nan')
+
 
 def get_pricing_file_path(file_path=None):
     if os.path.exists(CUSTOM_PRICING_FILE_PATH) and \
@@ -67,6 +105,60 @@ def get_pricing_file_path(file_path=None):
     return DEFAULT_PRICING_FILE_PATH
 
 
+def _get_file_stamp(file_path):
+    """
+    Return a value which changes when the provided file is modified.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    return [file_path, stat.st_mtime, stat.st_size]
+
+
+def _load_pricing_file(file_path):
+    """
+    Return the parsed content of the provided pricing file. The file is only
+    parsed again once it has changed.
+    """
+    stamp = _get_file_stamp(file_path)
+    cached = _PRICING_FILES.get(file_path, None)
+
+    if cached is not None and stamp is not None and cached[0] == stamp:
+        return cached[1]
+
+    with open(file_path) as fp:
+        content = fp.read()
+
+    pricing_data = json.loads(content)
+    _PRICING_FILES[file_path] = (stamp, pricing_data)
+    return pricing_data
+
+
+def _check_pricing_file():
+    """
+    Invalidate the cached pricing data if the pricing file which it has been
+    loaded from has changed (or a custom pricing file has been added or
+    removed).
+    """
+    global _pricing_file_checked
+
+    if _pricing_file_stamp is None:
+        return
+
+    now = time.time()
+
+    if now - _pricing_file_checked < PRICING_FILE_CHECK_INTERVAL:
+        return
+
+    _pricing_file_checked = now
+    stamp = _get_file_stamp(get_pricing_file_path())
+
+    if stamp != _pricing_file_stamp:
+        invalidate_pricing_cache()
+
+
 def get_pricing(driver_type, driver_name, pricing_file_path=None):
     """
     Return pricing for the provided driver.
@@ -85,26 +177,34 @@ def get_pricing(driver_type, driver_name, pricing_file_path=None):
     :return: Dictionary with pricing where a key name is size ID and
              the value is a price.
     """
+    global _pricing_file_stamp
+
     if driver_type not in VALID_PRICING_DRIVER_TYPES:
         raise AttributeError('Invalid driver type: %s', driver_type)
 
+    if not pricing_file_path:
+        _check_pricing_file()
+
     if driver_name in PRICING_DATA[driver_type]:
         return PRICING_DATA[driver_type][driver_name]
 
-    if not pricing_file_path:
-        pricing_file_path = get_pricing_file_path(file_path=pricing_file_path)
+    default_file = not pricing_file_path
 
-    with open(pricing_file_path) as fp:
-        content = fp.read()
+    if default_file:
+        pricing_file_path = get_pricing_file_path(file_path=pricing_file_path)
 
-    pricing_data = json.loads(content)
+    pricing_data = _load_pricing_file(pricing_file_path)
     size_pricing = pricing_data[driver_type][driver_name]
 
     for driver_type in VALID_PRICING_DRIVER_TYPES:
         # pylint: disable=maybe-no-member
         pricing = pricing_data.get(driver_type, None)
         if pricing:
-            PRICING_DATA[driver_type] = pricing
+            # Note: Parsed file content is cached so it's not modified
+            PRICING_DATA[driver_type] = dict(pricing)
+
+    if default_file:
+        _pricing_file_stamp = _PRICING_FILES[pricing_file_path][0]
 
     return size_pricing
 
@@ -158,8 +258,12 @@ def invalidate_pricing_cache():
     """
     Invalidate pricing cache for all the drivers.
     """
+    global _pricing_file_stamp
+
     PRICING_DATA['compute'] = {}
     PRICING_DATA['storage'] = {}
+    _pricing_file_stamp = None
+    _pricing_indexes.clear()
 
 
 def clear_pricing_data():
@@ -228,3 +332,514 @@ def download_pricing_file(file_url=DEFAULT_FILE_URL,
     # No need to stream it since file is small
     with open(file_path, 'w') as file_handle:
         file_handle.write(body)
+
+
+class PricedSize(object):
+    """
+    Size returned by :meth:`PricingIndex.query`.
+    """
+
+    def __init__(self, driver_name, size_id, price, ram=None, disk=None,
+                 vcpus=None):
+        """
+        :param driver_name: Name of the driver in the pricing file (e.g.
+                            ``ec2_us_east``).
+        :type driver_name: ``str``
+
+        :param size_id: Size ID.
+        :type size_id: ``str``
+
+        :param price: Hourly price.
+        :type price: ``float``
+
+        :param ram: Amount of memory (in MB), None if unknown.
+        :type ram: ``float``
+
+        :param disk: Amount of disk storage (in GB), None if unknown.
+        :type disk: ``float``
+
+        :param vcpus: Number of virtual CPUs, None if unknown.
+        :type vcpus: ``float``
+        """
+        self.driver_name = driver_name
+        self.size_id = size_id
+        self.price = price
+        self.ram = ram
+        self.disk = disk
+        self.vcpus = vcpus
+
+    def __repr__(self):
+        return (('<PricedSize: driver_name=%s, size_id=%s, price=%s, ram=%s, '
+                 'disk=%s, vcpus=%s>') %
+                (self.driver_name, self.size_id, self.price, self.ram,
+                 self.disk, self.vcpus))
+
+
+class PricingIndex(object):
+    """
+    Compiled, columnar index of the pricing data of a single driver type.
+
+    Prices and size attributes are stored in flat arrays of doubles (unknown
+    values are stored as NaN) and the rows of each driver occupy a contiguous
+    range so the queries only need to scan the columns they filter on.
+
+    The index can be saved to a file and loaded back using mmap so the
+    processes which use the same index file share the memory.
+    """
+
+    def __init__(self, drivers, offsets, size_ids, columns,
+                 driver_type='compute', stamp=None):
+        """
+        :param drivers: Driver names.
+        :type drivers: ``list`` of ``str``
+
+        :param offsets: Index of the first row of each driver (the last item
+                        is the number of rows).
+        :type offsets: ``list`` of ``int``
+
+        :param size_ids: Size ID of each row.
+        :type size_ids: ``list`` of ``str``
+
+        :param columns: Column name -> sequence of floats.
+        :type columns: ``dict``
+
+        :param driver_type: Driver type of the pricing data.
+        :type driver_type: ``str``
+
+        :param stamp: Stamp of the pricing file which the index has been
+                      built from.
+        :type stamp: ``list``
+        """
+        self.drivers = drivers
+        self.offsets = offsets
+        self.size_ids = size_ids
+        self.columns = columns
+        self.driver_type = driver_type
+        self.stamp = stamp
+
+        self.prices = columns['prices']
+        self.ram = columns['ram']
+        self.disk = columns['disk']
+        self.vcpus = columns['vcpus']
+
+        self._ranges = {}
+        self._rows = None
+        self._mmap = None
+        self._checked = time.time()
+
+        for index, driver_name in enumerate(drivers):
+            self._ranges[driver_name] = (offsets[index], offsets[index + 1])
+
+    @classmethod
+    def build(cls, pricing_data=None, sizes=None, driver_type='compute',
+              stamp=None):
+        """
+        Build an index from the pricing data.
+
+        :param pricing_data: Content of a pricing file (defaults to the
+                             current pricing file).
+        :type pricing_data: ``dict``
+
+        :param sizes: Driver name -> list of sizes. Attributes of the provided
+                      sizes are included in the index (the size price is used
+                      for the sizes which are not in the pricing data).
+        :type sizes: ``dict``
+
+        :param driver_type: Driver type (compute or storage).
+        :type driver_type: ``str``
+
+        :param stamp: Stamp of the pricing file which is stored in the index.
+        :type stamp: ``list``
+
+        :rtype: :class:`PricingIndex`
+        """
+        if pricing_data is None:
+            file_path = get_pricing_file_path()
+            pricing_data = _load_pricing_file(file_path)
+            stamp = _PRICING_FILES[file_path][0]
+
+        pricing = pricing_data.get(driver_type, {})
+        sizes = sizes or {}
+
+        drivers = []
+        offsets = [0]
+        size_ids = []
+        columns = dict([(name, array('d')) for name in
+                        PRICING_INDEX_COLUMNS])
+
+        for driver_name in sorted(set(pricing) | set(sizes)):
+            size_prices = pricing.get(driver_name, {})
+            attributes = _get_static_size_attributes(driver_name)
+
+            for size in sizes.get(driver_name, []):
+                attributes[size.id] = (size.ram, size.disk,
+                                       (size.extra or {}).get('cpu', None))
+
+                if size.id not in size_prices and size.price is not None:
+                    size_prices = dict(size_prices)
+                    size_prices[size.id] = size.price
+
+            for size_id in sorted(size_prices):
+                price = _to_float(size_prices[size_id])
+
+                if price != price:
+                    # Size without a valid price
+                    continue
+
+                ram, disk, vcpus = attributes.get(size_id, (None, None, None))
+                size_ids.append(size_id)
+                columns['prices'].append(price)
+                columns['ram'].append(_to_float(ram))
+                columns['disk'].append(_to_float(disk))
+                columns['vcpus'].append(_to_float(vcpus))
+
+            if len(size_ids) > offsets[-1]:
+                drivers.append(driver_name)
+                offsets.append(len(size_ids))
+
+        return cls(drivers=drivers, offsets=offsets, size_ids=size_ids,
+                   columns=columns, driver_type=driver_type, stamp=stamp)
+
+    @classmethod
+    def load(cls, file_path):
+        """
+        Load an index which has been saved using :meth:`save`.
+
+        The columns are memory-mapped if the file has been written on a
+        machine with the same byte order.
+
+        :rtype: :class:`PricingIndex`
+        """
+        with open(file_path, 'rb') as fp:
+            mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if mapped[:len(PRICING_INDEX_MAGIC)] != PRICING_INDEX_MAGIC:
+                raise ValueError('%s is not a pricing index file' %
+                                 (file_path))
+
+            start = len(PRICING_INDEX_MAGIC)
+            length = struct.unpack('<I', mapped[start:start + 4])[0]
+            header = mapped[start + 4:start + 4 + length]
+            header = json.loads(header.decode('utf-8'))
+
+            count = header['count']
+            use_mmap = (header['byteorder'] == sys.byteorder and
+                        hasattr(memoryview, 'cast'))
+            columns = {}
+
+            for name in PRICING_INDEX_COLUMNS:
+                offset = header['columns'][name]
+                end = offset + count * 8
+
+                if end > len(mapped):
+                    raise ValueError('%s is truncated' % (file_path))
+
+                if use_mmap:
+                    columns[name] = memoryview(mapped)[offset:end].cast('d')
+                else:
+                    column = array('d')
+
+                    if hasattr(column, 'frombytes'):
+                        column.frombytes(mapped[offset:end])
+                    else:
+                        column.fromstring(mapped[offset:end])
+
+                    if header['byteorder'] != sys.byteorder:
+                        column.byteswap()
+
+                    columns[name] = column
+        except Exception:
+            mapped.close()
+            raise
+
+        index = cls(drivers=header['drivers'], offsets=header['offsets'],
+                    size_ids=header['size_ids'], columns=columns,
+                    driver_type=header['driver_type'], stamp=header['stamp'])
+
+        if use_mmap:
+            index._mmap = mapped
+        else:
+            mapped.close()
+
+        return index
+
+    def save(self, file_path):
+        """
+        Save the index to a file which can be loaded using :meth:`load`.
+
+        The file is replaced atomically so it's safe to save the index while
+        other processes are loading it.
+        """
+        count = len(self.size_ids)
+        header = {
+            'byteorder': sys.byteorder,
+            'count': count,
+            'drivers': self.drivers,
+            'offsets': self.offsets,
+            'size_ids': self.size_ids,
+            'driver_type': self.driver_type,
+            'stamp': self.stamp,
+            'columns': {}
+        }
+
+        # Column offsets depend on the header length so the offsets are
+        # reserved first and filled in once the length is known
+        for name in PRICING_INDEX_COLUMNS:
+            header['columns'][name] = 0
+
+        size = len(json.dumps(header)) + 20 * len(PRICING_INDEX_COLUMNS)
+        offset = _align(len(PRICING_INDEX_MAGIC) + 4 + size)
+
+        for name in PRICING_INDEX_COLUMNS:
+            header['columns'][name] = offset
+            offset += count * 8
+
+        data = json.dumps(header).encode('utf-8')
+        data = data + b' ' * (size - len(data))
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(PRICING_INDEX_MAGIC)
+                fp.write(struct.pack('<I', len(data)))
+                fp.write(data)
+
+                for name in PRICING_INDEX_COLUMNS:
+                    fp.write(b'\0' * (header['columns'][name] - fp.tell()))
+                    column = self.columns[name]
+
+                    if not isinstance(column, array):
+                        column = array('d', column)
+
+                    fp.write(column.tobytes() if hasattr(column, 'tobytes')
+                             else column.tostring())
+
+            if os.name == 'nt' and os.path.exists(file_path):
+                os.remove(file_path)
+
+            os.rename(tmp_path, file_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def close(self):
+        """
+        Unmap the index file (if the index has been loaded from a file).
+        """
+        if self._mmap is None:
+            return
+
+        for name in PRICING_INDEX_COLUMNS:
+            column = self.columns[name]
+
+            if isinstance(column, memoryview):
+                column.release()
+
+        self._mmap.close()
+        self._mmap = None
+
+    def get_price(self, driver_name, size_id):
+        """
+        Return the hourly price of the provided size (None if the size isn't
+        in the index).
+
+        :rtype: ``float``
+        """
+        if self._rows is None:
+            rows = {}
+
+            for name in self.drivers:
+                start, end = self._ranges[name]
+
+                for row in range(start, end):
+                    rows[(name, self.size_ids[row])] = row
+
+            self._rows = rows
+
+        row = self._rows.get((driver_name, size_id), None)
+
+        if row is None:
+            return None
+
+        return self.prices[row]
+
+    def query(self, min_ram=None, min_disk=None, min_vcpus=None,
+              max_price=None, drivers=None, limit=None):
+        """
+        Return the sizes which match all the provided criteria ordered by
+        price (cheapest first).
+
+        Sizes with an unknown value of an attribute which is filtered on are
+        not returned.
+
+        :param min_ram: Minimum amount of memory (in MB).
+        :type min_ram: ``int``
+
+        :param min_disk: Minimum amount of disk storage (in GB).
+        :type min_disk: ``int``
+
+        :param min_vcpus: Minimum number of virtual CPUs.
+        :type min_vcpus: ``int``
+
+        :param max_price: Maximum hourly price.
+        :type max_price: ``float``
+
+        :param drivers: Only return sizes of these drivers (e.g.
+                        ``['ec2_us_east', 'ec2_eu_west']``).
+        :type drivers: ``list`` of ``str``
+
+        :param limit: Maximum number of sizes to return.
+        :type limit: ``int``
+
+        :rtype: ``list`` of :class:`PricedSize`
+        """
+        if drivers is None:
+            rows = list(range(len(self.size_ids)))
+        else:
+            rows = []
+
+            for driver_name in drivers:
+                start, end = self._ranges.get(driver_name, (0, 0))
+                rows.extend(range(start, end))
+
+        # Note: Comparisons with NaN (unknown value) are always false
+        for column, minimum in [(self.ram, min_ram), (self.disk, min_disk),
+                                (self.vcpus, min_vcpus)]:
+            if minimum is not None:
+                rows = [row for row in rows if column[row] >= minimum]
+
+        if max_price is not None:
+            prices = self.prices
+            rows = [row for row in rows if prices[row] <= max_price]
+
+        if limit is not None:
+            rows = heapq.nsmallest(limit, rows, key=self.prices.__getitem__)
+        else:
+            rows.sort(key=self.prices.__getitem__)
+
+        return [self._to_priced_size(row) for row in rows]
+
+    def _to_priced_size(self, row):
+        driver_name = self.drivers[bisect.bisect_right(self.offsets, row) - 1]
+        values = [self.ram[row], self.disk[row], self.vcpus[row]]
+        values = [None if value != value else value for value in values]
+
+        return PricedSize(driver_name=driver_name,
+                          size_id=self.size_ids[row],
+                          price=self.prices[row], ram=values[0],
+                          disk=values[1], vcpus=values[2])
+
+    def __len__(self):
+        return len(self.size_ids)
+
+    def __repr__(self):
+        return ('<PricingIndex: driver_type=%s, drivers=%s, sizes=%s>' %
+                (self.driver_type, len(self.drivers), len(self.size_ids)))
+
+
+def get_pricing_index(driver_type='compute', index_path=None):
+    """
+    Return a pricing index of the current pricing file.
+
+    The index is shared by all the callers and it's rebuilt once the pricing
+    file changes (the file is checked at most every
+    ``PRICING_FILE_CHECK_INTERVAL`` seconds).
+
+    :param driver_type: Driver type (compute or storage).
+    :type driver_type: ``str``
+
+    :param index_path: Optional path to the index file. The file is reused
+                       if it has been built from the current pricing file,
+                       otherwise it's rebuilt. The returned index is
+                       memory-mapped from this file.
+    :type index_path: ``str``
+
+    :rtype: :class:`PricingIndex`
+    """
+    if driver_type not in VALID_PRICING_DRIVER_TYPES:
+        raise AttributeError('Invalid driver type: %s', driver_type)
+
+    key = (driver_type, index_path)
+
+    with _pricing_indexes_lock:
+        index = _pricing_indexes.get(key, None)
+        now = time.time()
+
+        if index is not None:
+            if now - index._checked < PRICING_FILE_CHECK_INTERVAL:
+                return index
+
+            index._checked = now
+            file_path = get_pricing_file_path()
+
+            if _get_file_stamp(file_path) == index.stamp:
+                return index
+
+        index = _build_pricing_index(driver_type=driver_type,
+                                     index_path=index_path)
+        _pricing_indexes[key] = index
+        return index
+
+
+def _build_pricing_index(driver_type, index_path=None):
+    file_path = get_pricing_file_path()
+    pricing_data = _load_pricing_file(file_path)
+    stamp = _PRICING_FILES[file_path][0]
+
+    if not index_path:
+        return PricingIndex.build(pricing_data=pricing_data,
+                                  driver_type=driver_type, stamp=stamp)
+
+    try:
+        index = PricingIndex.load(index_path)
+    except (IOError, OSError, ValueError):
+        index = None
+
+    if index is not None:
+        if index.stamp == stamp and index.driver_type == driver_type:
+            return index
+
+        index.close()
+
+    index = PricingIndex.build(pricing_data=pricing_data,
+                               driver_type=driver_type, stamp=stamp)
+    index.save(index_path)
+    return PricingIndex.load(index_path)
+
+
+def _get_static_size_attributes(driver_name):
+    """
+    Return size ID -> (ram, disk, vcpus) for the drivers which sizes are
+    defined statically.
+    """
+    # Note: Imported here to avoid a circular import
+    from libcloud.compute.drivers import ec2
+
+    if driver_name.startswith('ec2_') or driver_name == 'nimbus':
+        instance_types = ec2.INSTANCE_TYPES
+    elif driver_name.startswith('osc_'):
+        instance_types = ec2.OUTSCALE_INSTANCE_TYPES
+    else:
+        return {}
+
+    result = {}
+
+    for size_id, values in instance_types.items():
+        vcpus = values.get('extra', {}).get('cpu', None)
+        result[size_id] = (values.get('ram', None), values.get('disk', None),
+                           vcpus)
+
+    return result
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
@@ -22,6 +22,8 @@ from __future__ import with_statement
 
 import os.path                          # pylint: disable-msg=W0404
 import hashlib
+import tempfile
+import time
 from os.path import join as pjoin
 
 from libcloud.utils.py3 import httplib
@@ -29,7 +31,8 @@ from libcloud.utils.py3 import next
 from libcloud.utils.py3 import b
 
 import libcloud.utils.files
-from libcloud.common.types import LibcloudError
+from libcloud.utils.concurrency import map_with_workers
+from libcloud.common.types import LibcloudError, InvalidCredsError
 from libcloud.common.base import ConnectionUserAndKey, BaseDriver
 from libcloud.storage.types import ObjectDoesNotExistError
 
@@ -102,6 +105,16 @@ class Object(object):
     def as_stream(self, chunk_size=None):
         return self.driver.download_object_as_stream(self, chunk_size)
 
+    def download_range(self, destination_path, start_bytes, end_bytes=None,
+                       overwrite_existing=False, delete_on_failure=True):
+        return self.driver.download_object_range(
+            self, destination_path, start_bytes, end_bytes,
+            overwrite_existing, delete_on_failure)
+
+    def range_as_stream(self, start_bytes, end_bytes=None, chunk_size=None):
+        return self.driver.download_object_range_as_stream(
+            self, start_bytes, end_bytes, chunk_size)
+
     def delete(self):
         return self.driver.delete_object(self)
 
@@ -190,6 +203,21 @@ class StorageDriver(BaseDriver):
     # provided and none can be detected when uploading an object
     strict_mode = False
 
+    # Default size of a single range and the number of ranges which are
+    # downloaded in parallel by download_object_in_parallel
+    range_download_size = 8 * 1024 * 1024
+    range_download_concurrency = 4
+
+    # How many times a failed range download is retried and how long to wait
+    # (in seconds, multiplied by the attempt number) before retrying
+    range_download_retries = 3
+    range_download_retry_delay = 1
+
+    # Maximum number of bytes of a stream which are buffered in memory when
+    # uploading it using a driver which doesn't support chunked transfer
+    # encoding. The rest of the stream is spooled to a temporary file.
+    upload_spool_max_memory_size = 8 * 1024 * 1024
+
     def iterate_containers(self):
         """
         Return a generator of containers for the given account
@@ -354,6 +382,151 @@ class StorageDriver(BaseDriver):
         raise NotImplementedError(
             'download_object_as_stream not implemented for this driver')
 
+    def download_object_range(self, obj, destination_path, start_bytes,
+                              end_bytes=None, overwrite_existing=False,
+                              delete_on_failure=True):
+        """
+        Download part of an object to the specified destination path.
+
+        :param obj: Object instance.
+        :type obj: :class:`Object`
+
+        :param destination_path: Full path to a file or a directory where the
+                                 incoming file will be saved.
+        :type destination_path: ``str``
+
+        :param start_bytes: Start byte offset (inclusive, 0 based) of the
+                            range.
+        :type start_bytes: ``int``
+
+        :param end_bytes: End byte offset (non-inclusive) of the range. If not
+                          provided, the range ends at the end of the object.
+        :type end_bytes: ``int``
+
+        :param overwrite_existing: True to overwrite an existing file,
+                                   defaults to False.
+        :type overwrite_existing: ``bool``
+
+        :param delete_on_failure: True to delete a partially downloaded file if
+                                  the download was not successful (file size).
+        :type delete_on_failure: ``bool``
+
+        :return: True if the range has been successfully downloaded, False
+                 otherwise.
+        :rtype: ``bool``
+        """
+        raise NotImplementedError(
+            'download_object_range not implemented for this driver')
+
+    def download_object_range_as_stream(self, obj, start_bytes,
+                                        end_bytes=None, chunk_size=None):
+        """
+        Return a generator which yields part of the object data.
+
+        :param obj: Object instance
+        :type obj: :class:`Object`
+
+        :param start_bytes: Start byte offset (inclusive, 0 based) of the
+                            range.
+        :type start_bytes: ``int``
+
+        :param end_bytes: End byte offset (non-inclusive) of the range. If not
+                          provided, the range ends at the end of the object.
+        :type end_bytes: ``int``
+
+        :param chunk_size: Optional chunk size (in bytes).
+        :type chunk_size: ``int``
+        """
+        raise NotImplementedError(
+            'download_object_range_as_stream not implemented for this '
+            'driver')
+
+    def download_object_in_parallel(self, obj, destination_path,
+                                    overwrite_existing=False,
+                                    delete_on_failure=True, range_size=None,
+                                    concurrency=None):
+        """
+        Download an object to the specified destination path by splitting it
+        in byte ranges which are downloaded in parallel.
+
+        Ranges are written directly at the right offset into a preallocated
+        file. A failed range is retried (continuing from the last byte which
+        has been received) up to ``range_download_retries`` times.
+
+        This method works with all the drivers which implement
+        :meth:`download_object_range_as_stream`.
+
+        :param obj: Object instance.
+        :type obj: :class:`Object`
+
+        :param destination_path: Full path to a file or a directory where the
+                                 incoming file will be saved.
+        :type destination_path: ``str``
+
+        :param overwrite_existing: True to overwrite an existing file,
+                                   defaults to False.
+        :type overwrite_existing: ``bool``
+
+        :param delete_on_failure: True to delete a partially downloaded file if
+                                  the download was not successful.
+        :type delete_on_failure: ``bool``
+
+        :param range_size: Size of a single range in bytes (defaults to
+                           ``range_download_size``).
+        :type range_size: ``int``
+
+        :param concurrency: Number of ranges which are downloaded in parallel
+                            (defaults to ``range_download_concurrency``).
+        :type concurrency: ``int``
+
+        :return: True if an object has been successfully downloaded.
+        :rtype: ``bool``
+        """
+        range_size = range_size or self.range_download_size
+        concurrency = concurrency or self.range_download_concurrency
+
+        # Objects of an unknown size can't be split in ranges
+        size = int(obj.size) if obj.size is not None else None
+
+        if size is None or size <= range_size:
+            return self.download_object(obj=obj,
+                                        destination_path=destination_path,
+                                        overwrite_existing=overwrite_existing,
+                                        delete_on_failure=delete_on_failure)
+
+        file_path = self._get_download_file_path(
+            obj=obj, destination_path=destination_path,
+            overwrite_existing=overwrite_existing)
+
+        ranges = [(start, min(start + range_size, size))
+                  for start in range(0, size, range_size)]
+        concurrency = min(concurrency, len(ranges))
+
+        # Preallocate the file so the ranges can be written at their offsets
+        with open(file_path, 'wb') as file_handle:
+            file_handle.truncate(size)
+
+        def download_range(driver, item):
+            self._download_range_to_file(driver=driver, obj=obj,
+                                         file_path=file_path,
+                                         start_bytes=item[0],
+                                         end_bytes=item[1])
+
+        workers = [self._get_worker_driver() for _ in range(concurrency)]
+
+        try:
+            map_with_workers(download_range, ranges, workers=workers)
+        except Exception:
+            if delete_on_failure:
+                try:
+                    os.unlink(file_path)
+                except Exception:
+                    pass
+
+            raise
+
+        return True
+
     def upload_object(self, file_path, container, object_name, extra=None,
                       verify_hash=True, headers=None):
         """
@@ -506,9 +679,97 @@ class StorageDriver(BaseDriver):
                                   (response.status),
                             driver=self)
 
+    def _get_download_file_path(self, obj, destination_path,
+                                overwrite_existing=False):
+        """
+        Return path of the local file an object is downloaded to.
+
+        :param destination_path: Full path to a file or a directory.
+        :type destination_path: ``str``
+
+        :rtype: ``str``
+        """
+        base_name = os.path.basename(destination_path)
+
+        if not base_name and not os.path.exists(destination_path):
+            raise LibcloudError(
+                value='Path %s does not exist' % (destination_path),
+                driver=self)
+
+        if not base_name:
+            file_path = pjoin(destination_path, obj.name)
+        else:
+            file_path = destination_path
+
+        if os.path.exists(file_path) and not overwrite_existing:
+            raise LibcloudError(
+                value='File %s already exists, but ' % (file_path) +
+                'overwrite_existing=False',
+                driver=self)
+
+        return file_path
+
+    def _download_range_to_file(self, driver, obj, file_path, start_bytes,
+                                end_bytes):
+        """
+        Download a single range using the provided (worker) driver and write
+        it at the right offset into the provided (preallocated) file.
+        """
+        offset = start_bytes
+        attempt = 0
+
+        while offset < end_bytes:
+            try:
+                stream = driver.download_object_range_as_stream(
+                    obj=obj, start_bytes=offset, end_bytes=end_bytes)
+
+                with open(file_path, 'r+b') as file_handle:
+                    file_handle.seek(offset)
+
+                    for data in stream:
+                        file_handle.write(b(data))
+                        offset += len(data)
+
+                if offset != end_bytes:
+                    raise LibcloudError(
+                        value='Incomplete range %s-%s' %
+                              (start_bytes, end_bytes),
+                        driver=self)
+            except (InvalidCredsError, ObjectDoesNotExistError):
+                raise
+            except Exception:
+                attempt += 1
+
+                if attempt > self.range_download_retries:
+                    raise
+
+                time.sleep(self.range_download_retry_delay * attempt)
+
+    def _validate_start_and_end_bytes(self, start_bytes, end_bytes=None):
+        """
+        Validate the provided range offsets.
+        """
+        if start_bytes < 0:
+            raise ValueError('start_bytes must be greater than or equal to 0')
+
+        if end_bytes is not None and start_bytes >= end_bytes:
+            raise ValueError('start_bytes must be smaller than end_bytes')
+
+    def _get_standard_range_str(self, start_bytes, end_bytes=None):
+        """
+        Return value of the standard HTTP Range header for the provided
+        offsets (end offset is non-inclusive).
+
+        :rtype: ``str``
+        """
+        if end_bytes is None:
+            return 'bytes=%s-' % (start_bytes)
+
+        return 'bytes=%s-%s' % (start_bytes, end_bytes - 1)
+
     def _save_object(self, response, obj, destination_path,
                      overwrite_existing=False, delete_on_failure=True,
-                     chunk_size=None):
+                     chunk_size=None, partial_download=False):
         """
         Save object to the provided path.
 
@@ -533,29 +794,19 @@ class StorageDriver(BaseDriver):
             (defaults to ``libcloud.storage.base.CHUNK_SIZE``, 8kb)
         :type chunk_size: ``int``
 
+        :param partial_download: True if this is a range download in which
+                                 case the object size is not verified.
+        :type partial_download: ``bool``
+
         :return: ``True`` on success, ``False`` otherwise.
         :rtype: ``bool``
         """
 
         chunk_size = chunk_size or CHUNK_SIZE
 
-        base_name = os.path.basename(destination_path)
-
-        if not base_name and not os.path.exists(destination_path):
-            raise LibcloudError(
-                value='Path %s does not exist' % (destination_path),
-                driver=self)
-
-        if not base_name:
-            file_path = pjoin(destination_path, obj.name)
-        else:
-            file_path = destination_path
-
-        if os.path.exists(file_path) and not overwrite_existing:
-            raise LibcloudError(
-                value='File %s already exists, but ' % (file_path) +
-                'overwrite_existing=False',
-                driver=self)
+        file_path = self._get_download_file_path(
+            obj=obj, destination_path=destination_path,
+            overwrite_existing=overwrite_existing)
 
         stream = libcloud.utils.files.read_in_chunks(response, chunk_size)
 
@@ -577,7 +828,7 @@ class StorageDriver(BaseDriver):
                 except StopIteration:
                     data_read = ''
 
-        if int(obj.size) != int(bytes_transferred):
+        if not partial_download and int(obj.size) != int(bytes_transferred):
             # Transfer failed, support retry?
             if delete_on_failure:
                 try:
@@ -623,6 +874,7 @@ class StorageDriver(BaseDriver):
                     content_type = DEFAULT_CONTENT_TYPE
 
         file_size = None
+        spool = None
 
         if iterator:
             if self.supports_chunked_encoding:
@@ -630,13 +882,17 @@ class StorageDriver(BaseDriver):
                 upload_func_kwargs['chunked'] = True
             else:
                 # Chunked transfer encoding is not supported. Need to buffer
-                # all the data in memory so we can determine file size.
-                iterator = libcloud.utils.files.read_in_chunks(
-                    iterator=iterator)
-                data = libcloud.utils.files.exhaust_iterator(iterator=iterator)
-
-                file_size = len(data)
-                upload_func_kwargs['data'] = data
+                # all the data so we can determine file size.
+                # The hash is calculated while spooling so the data doesn't
+                # need to be hashed again while it's being sent.
+                calculate_hash = upload_func == self._upload_data and \
+                    upload_func_kwargs.get('calculate_hash', True)
+                spool, file_size, data_hash = self._spool_iterator(
+                    iterator=iterator, calculate_hash=calculate_hash)
+                upload_func_kwargs['data'] = spool
+
+                if calculate_hash:
+                    upload_func_kwargs['data_hash'] = data_hash
         else:
             file_size = os.path.getsize(file_path)
             upload_func_kwargs['chunked'] = False
@@ -645,13 +901,19 @@ class StorageDriver(BaseDriver):
             headers['Content-Length'] = file_size
 
         headers['Content-Type'] = content_type
-        response = self.connection.request(request_path,
-                                           method=request_method, data=None,
-                                           headers=headers, raw=True)
 
-        upload_func_kwargs['response'] = response
-        success, data_hash, bytes_transferred = upload_func(
-            **upload_func_kwargs)
+        try:
+            response = self.connection.request(request_path,
+                                               method=request_method,
+                                               data=None, headers=headers,
+                                               raw=True)
+
+            upload_func_kwargs['response'] = response
+            success, data_hash, bytes_transferred = upload_func(
+                **upload_func_kwargs)
+        finally:
+            if spool is not None:
+                spool.close()
 
         if not success:
             raise LibcloudError(
@@ -661,27 +923,93 @@ class StorageDriver(BaseDriver):
                        'bytes_transferred': bytes_transferred}
         return result_dict
 
-    def _upload_data(self, response, data, calculate_hash=True):
+    def _spool_iterator(self, iterator, calculate_hash=False):
         """
-        Upload data stored in a string.
+        Read all the data from the provided iterator into a temporary spool.
+
+        Up to ``upload_spool_max_memory_size`` bytes are kept in memory, the
+        rest is written to a temporary file on disk so memory usage doesn't
+        depend on the size of the stream.
+
+        :param calculate_hash: True to calculate hash of the spooled data
+                               (defaults to False).
+        :type calculate_hash: ``bool``
+
+        :return: (spool, size, data_hash) tuple. Spool is a file like object
+                 positioned at the beginning of the data, data_hash is None
+                 if ``calculate_hash`` is False.
+        :rtype: ``tuple``
+        """
+        spool = tempfile.SpooledTemporaryFile(
+            max_size=self.upload_spool_max_memory_size)
+        data_hash = None
+
+        if calculate_hash:
+            data_hash = self._get_hash_function()
+
+        try:
+            for chunk in libcloud.utils.files.read_in_chunks(
+                    iterator=iterator, chunk_size=CHUNK_SIZE):
+                spool.write(chunk)
+
+                if calculate_hash:
+                    data_hash.update(chunk)
+
+            size = spool.tell()
+            spool.seek(0)
+        except Exception:
+            spool.close()
+            raise
+
+        if calculate_hash:
+            data_hash = data_hash.hexdigest()
+
+        return spool, size, data_hash
+
+    def _upload_data(self, response, data, calculate_hash=True,
+                     data_hash=None):
+        """
+        Upload data stored in a string or in a file like object (e.g. a spool
+        returned by ``_spool_iterator``).
 
         :param response: RawResponse object.
         :type response: :class:`RawResponse`
 
         :param data: Data to upload.
-        :type data: ``str``
+        :type data: ``str`` or ``file``
 
         :param calculate_hash: True to calculate hash of the transferred data.
                                (defaults to True).
         :type calculate_hash: ``bool``
 
+        :param data_hash: Hash of the data if it has already been calculated
+                          (e.g. while spooling). The data is not hashed again
+                          in this case.
+        :type data_hash: ``str``
+
         :return: First item is a boolean indicator of success, second
                  one is the uploaded data MD5 hash and the third one
                  is the number of transferred bytes.
         :rtype: ``tuple``
         """
+        if data_hash is not None:
+            calculate_hash = False
+
+        if hasattr(data, 'read'):
+            # Note: The object is read explicitly since not all the file like
+            # objects (e.g. SpooledTemporaryFile before Python 3.11) support
+            # the iterator protocol
+            iterator = iter(lambda: data.read(CHUNK_SIZE), b(''))
+            result = self._stream_data(response=response, iterator=iterator,
+                                       chunked=False,
+                                       calculate_hash=calculate_hash)
+
+            if data_hash is not None and result[0]:
+                result = (result[0], data_hash, result[2])
+
+            return result
+
         bytes_transferred = 0
-        data_hash = None
 
         if calculate_hash:
             data_hash = self._get_hash_function()
@@ -754,7 +1082,11 @@ class StorageDriver(BaseDriver):
                 response.connection.connection.send(b('0\r\n\r\n'))
             else:
                 response.connection.connection.send(chunk)
-            return True, data_hash.hexdigest(), bytes_transferred
+
+            if calculate_hash:
+                data_hash = data_hash.hexdigest()
+
+            return True, data_hash, bytes_transferred
 
         while len(chunk) > 0:
             try:
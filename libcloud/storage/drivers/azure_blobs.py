@@ -17,7 +17,9 @@ from __future__ import with_statement
 
 import base64
 import os
+import sys
 import binascii
+import threading
 
 try:
     from lxml import etree as ET
@@ -31,11 +33,13 @@ from libcloud.utils.py3 import tostring
 from libcloud.utils.py3 import b
 
 from libcloud.utils.xml import fixxpath
-from libcloud.utils.files import read_in_chunks
+from libcloud.utils.files import read_in_chunks, guess_file_mime_type
+from libcloud.utils.concurrency import map_with_workers
 from libcloud.common.types import LibcloudError
 from libcloud.common.azure import AzureConnection
 
 from libcloud.storage.base import Object, Container, StorageDriver
+from libcloud.storage.base import DEFAULT_CONTENT_TYPE
 from libcloud.storage.types import ContainerIsNotEmptyError
 from libcloud.storage.types import ContainerAlreadyExistsError
 from libcloud.storage.types import InvalidContainerNameError
@@ -67,6 +71,9 @@ AZURE_CHUNK_SIZE = 4 * 1024 * 1024
 # Azure page blob must be aligned in 512 byte boundaries
 AZURE_PAGE_CHUNK_SIZE = 512
 
+# Maximum number of blocks a single block blob can consist of
+AZURE_MAX_BLOCKS = 50000
+
 # The time period (in seconds) for which a lease must be obtained.
 # If set as -1, we get an infinite lease, but that is a bad idea. If
 # after getting an infinite lease, there was an issue in releasing the
@@ -74,14 +81,22 @@ AZURE_PAGE_CHUNK_SIZE = 512
 # released using the lease_id (which is not exposed to the user)
 AZURE_LEASE_PERIOD = 60
 
+# How often (in seconds) an acquired lease is renewed in the background while
+# the operations which hold it are in progress
+AZURE_LEASE_RENEWAL_PERIOD = 30
+
 AZURE_STORAGE_HOST_SUFFIX = 'blob.core.windows.net'
 
 
 class AzureBlobLease(object):
     """
     A class to help in leasing an azure blob and renewing the lease
+
+    Once acquired, the lease is renewed by a background thread every
+    ``renewal_period`` seconds until it is released.
     """
-    def __init__(self, driver, object_path, use_lease):
+    def __init__(self, driver, object_path, use_lease,
+                 renewal_period=AZURE_LEASE_RENEWAL_PERIOD):
         """
         :param driver: The Azure storage driver that is being used
         :type driver: :class:`AzureStorageDriver`
@@ -91,28 +106,40 @@ class AzureBlobLease(object):
 
         :param use_lease: Indicates if we must take a lease or not
         :type use_lease: ``bool``
+
+        :param renewal_period: How often (in seconds) the lease is renewed.
+                               0 disables the automatic renewal.
+        :type renewal_period: ``float``
         """
         self.object_path = object_path
         self.driver = driver
         self.use_lease = use_lease
+        self.renewal_period = renewal_period
         self.lease_id = None
         self.params = {'comp': 'lease'}
 
-    def renew(self):
+        self._renewal_thread = None
+        self._renewal_stopped = None
+        self._renewal_error = None
+
+    def renew(self, connection=None):
         """
-        Renew the lease if it is older than a predefined time period
+        Renew the lease
+
+        :param connection: Connection which is used to send the request
+                           (defaults to the driver connection).
+        :type connection: :class:`AzureConnection`
         """
         if self.lease_id is None:
             return
 
+        connection = connection or self.driver.connection
         headers = {'x-ms-lease-action': 'renew',
                    'x-ms-lease-id': self.lease_id,
-                   'x-ms-lease-duration': '60'}
+                   'x-ms-lease-duration': str(AZURE_LEASE_PERIOD)}
 
-        response = self.driver.connection.request(self.object_path,
-                                                  headers=headers,
-                                                  params=self.params,
-                                                  method='PUT')
+        response = connection.request(self.object_path, headers=headers,
+                                      params=self.params, method='PUT')
 
         if response.status != httplib.OK:
             raise LibcloudError('Unable to obtain lease', driver=self)
@@ -129,7 +156,7 @@ class AzureBlobLease(object):
             return self
 
         headers = {'x-ms-lease-action': 'acquire',
-                   'x-ms-lease-duration': '60'}
+                   'x-ms-lease-duration': str(AZURE_LEASE_PERIOD)}
 
         response = self.driver.connection.request(self.object_path,
                                                   headers=headers,
@@ -142,12 +169,15 @@ class AzureBlobLease(object):
             raise LibcloudError('Unable to obtain lease', driver=self)
 
         self.lease_id = response.headers['x-ms-lease-id']
+        self._start_renewal()
         return self
 
     def __exit__(self, type, value, traceback):
         if self.lease_id is None:
             return
 
+        self._stop_renewal()
+
         headers = {'x-ms-lease-action': 'release',
                    'x-ms-lease-id': self.lease_id}
         response = self.driver.connection.request(self.object_path,
@@ -158,6 +188,46 @@ class AzureBlobLease(object):
         if response.status != httplib.OK:
             raise LibcloudError('Unable to release lease', driver=self)
 
+        # Don't hide the original exception (if any) which is likely to be
+        # caused by the failed renewal
+        if self._renewal_error is not None and type is None:
+            raise self._renewal_error
+
+    def _start_renewal(self):
+        if not self.renewal_period:
+            return
+
+        # Connection objects are not thread-safe so the renewal thread uses
+        # its own copy
+        connection = self.driver.connection.clone()
+
+        self._renewal_stopped = threading.Event()
+        self._renewal_thread = threading.Thread(target=self._renew_lease,
+                                                args=(connection, ))
+        self._renewal_thread.daemon = True
+        self._renewal_thread.start()
+
+    def _stop_renewal(self):
+        if self._renewal_thread is None:
+            return
+
+        self._renewal_stopped.set()
+        self._renewal_thread.join()
+        self._renewal_thread = None
+
+    def _renew_lease(self, connection):
+        while True:
+            self._renewal_stopped.wait(self.renewal_period)
+
+            if self._renewal_stopped.is_set():
+                break
+
+            try:
+                self.renew(connection=connection)
+            except Exception:
+                self._renewal_error = sys.exc_info()[1]
+                break
+
 
 class AzureBlobsConnection(AzureConnection):
     """
@@ -173,6 +243,11 @@ class AzureBlobsStorageDriver(StorageDriver):
     supports_chunked_encoding = False
     ex_blob_type = 'BlockBlob'
 
+    # Default block blob upload settings. Block size and concurrency can also
+    # be specified per upload using ex_block_size and ex_concurrency arguments.
+    block_size = AZURE_CHUNK_SIZE
+    block_upload_concurrency = 1
+
     def __init__(self, key, secret=None, secure=True, host=None, port=None,
                  **kwargs):
         self._host_argument_set = bool(host)
@@ -576,10 +651,56 @@ class AzureBlobsStorageDriver(StorageDriver):
                                                  'chunk_size': chunk_size},
                                 success_status_code=httplib.OK)
 
+    def download_object_range(self, obj, destination_path, start_bytes,
+                              end_bytes=None, overwrite_existing=False,
+                              delete_on_failure=True):
+        """
+        @inherits: :class:`StorageDriver.download_object_range`
+        """
+        self._validate_start_and_end_bytes(start_bytes=start_bytes,
+                                           end_bytes=end_bytes)
+
+        obj_path = self._get_object_path(obj.container, obj.name)
+        headers = {'Range': self._get_standard_range_str(start_bytes,
+                                                         end_bytes)}
+        response = self.connection.request(obj_path, headers=headers,
+                                           raw=True, data=None)
+
+        return self._get_object(obj=obj, callback=self._save_object,
+                                response=response,
+                                callback_kwargs={
+                                    'obj': obj,
+                                    'response': response.response,
+                                    'destination_path': destination_path,
+                                    'overwrite_existing': overwrite_existing,
+                                    'delete_on_failure': delete_on_failure,
+                                    'partial_download': True},
+                                success_status_code=httplib.PARTIAL_CONTENT)
+
+    def download_object_range_as_stream(self, obj, start_bytes,
+                                        end_bytes=None, chunk_size=None):
+        """
+        @inherits: :class:`StorageDriver.download_object_range_as_stream`
+        """
+        self._validate_start_and_end_bytes(start_bytes=start_bytes,
+                                           end_bytes=end_bytes)
+
+        obj_path = self._get_object_path(obj.container, obj.name)
+        headers = {'Range': self._get_standard_range_str(start_bytes,
+                                                         end_bytes)}
+        response = self.connection.request(obj_path, headers=headers,
+                                           raw=True, data=None)
+
+        return self._get_object(obj=obj, callback=read_in_chunks,
+                                response=response,
+                                callback_kwargs={'iterator': response.response,
+                                                 'chunk_size': chunk_size},
+                                success_status_code=httplib.PARTIAL_CONTENT)
+
     def _upload_in_chunks(self, response, data, iterator, object_path,
-                          blob_type, lease, calculate_hash=True):
+                          lease, calculate_hash=True):
         """
-        Uploads data from an interator in fixed sized chunks to S3
+        Uploads data from an interator in fixed sized pages to a page blob
 
         :param response: Response object from the initial POST request
         :type response: :class:`RawResponse`
@@ -593,10 +714,7 @@ class AzureBlobsStorageDriver(StorageDriver):
         :param object_path: The path of the object to which we are uploading
         :type object_name: ``str``
 
-        :param blob_type: The blob type being uploaded
-        :type blob_type: ``str``
-
-        :param lease: The lease object to be used for renewal
+        :param lease: The lease object whose id is sent with the requests
         :type lease: :class:`AzureBlobLease`
 
         :keyword calculate_hash: Indicates if we must calculate the data hash
@@ -617,17 +735,12 @@ class AzureBlobsStorageDriver(StorageDriver):
 
         bytes_transferred = 0
         count = 1
-        chunks = []
         headers = {}
+        params = {'comp': 'page'}
 
         lease.update_headers(headers)
 
-        if blob_type == 'BlockBlob':
-            params = {'comp': 'block'}
-        else:
-            params = {'comp': 'page'}
-
-        # Read the input data in chunk sizes suitable for AWS
+        # Read the input data in chunk sizes suitable for Azure
         for data in read_in_chunks(iterator, AZURE_CHUNK_SIZE):
             data = b(data)
             content_length = len(data)
@@ -643,24 +756,9 @@ class AzureBlobsStorageDriver(StorageDriver):
 
             headers['Content-MD5'] = chunk_hash.decode('utf-8')
             headers['Content-Length'] = content_length
-
-            if blob_type == 'BlockBlob':
-                # Block id can be any unique string that is base64 encoded
-                # A 10 digit number can hold the max value of 50000 blocks
-                # that are allowed for azure
-                block_id = base64.b64encode(b('%10d' % (count)))
-                block_id = block_id.decode('utf-8')
-                params['blockid'] = block_id
-
-                # Keep this data for a later commit
-                chunks.append(block_id)
-            else:
-                headers['x-ms-page-write'] = 'update'
-                headers['x-ms-range'] = 'bytes=%d-%d' % \
-                    (offset, (bytes_transferred - 1))
-
-            # Renew lease before updating
-            lease.renew()
+            headers['x-ms-page-write'] = 'update'
+            headers['x-ms-range'] = 'bytes=%d-%d' % \
+                (offset, (bytes_transferred - 1))
 
             resp = self.connection.request(object_path, method='PUT',
                                            data=data, headers=headers,
@@ -676,24 +774,155 @@ class AzureBlobsStorageDriver(StorageDriver):
         if calculate_hash:
             data_hash = data_hash.hexdigest()
 
-        if blob_type == 'BlockBlob':
-            self._commit_blocks(object_path, chunks, lease)
-
         # The Azure service does not return a hash immediately for
         # chunked uploads. It takes some time for the data to get synced
         response.headers['content-md5'] = None
 
         return (True, data_hash, bytes_transferred)
 
-    def _commit_blocks(self, object_path, chunks, lease):
+    def _put_block_blob(self, container, object_name, extra=None,
+                        file_path=None, iterator=None, block_size=None,
+                        concurrency=None, use_lease=False):
+        """
+        Upload a block blob as a list of blocks which are committed together
+        with the blob properties and metadata by a single Put Block List
+        request once all the blocks have been uploaded.
+
+        Each block is sent with its MD5 hash which is verified by the server.
+        """
+        extra = extra or {}
+        meta_data = extra.get('meta_data', {})
+        block_size = block_size or self.block_size
+        concurrency = concurrency or self.block_upload_concurrency
+
+        if block_size < 1 or block_size > AZURE_BLOCK_MAX_SIZE:
+            raise ValueError('Block size must be between 1 and %s bytes' %
+                             (AZURE_BLOCK_MAX_SIZE))
+
+        content_type = extra.get('content_type', None)
+
+        if not content_type:
+            content_type, _ = guess_file_mime_type(file_path or object_name)
+
+        headers = {'x-ms-blob-content-type':
+                   content_type or DEFAULT_CONTENT_TYPE}
+        self._update_metadata(headers, meta_data)
+
+        object_path = self._get_object_path(container, object_name)
+
+        with AzureBlobLease(self, object_path, use_lease) as lease:
+            block_ids, bytes_transferred = self._upload_blocks(
+                object_path=object_path, lease=lease, block_size=block_size,
+                concurrency=concurrency, file_path=file_path,
+                iterator=iterator)
+            response = self._commit_blocks(object_path, block_ids, lease,
+                                           headers=headers)
+
+        return Object(name=object_name, size=bytes_transferred,
+                      hash=response.headers['etag'], extra=None,
+                      meta_data=meta_data, container=container,
+                      driver=self)
+
+    def _upload_blocks(self, object_path, lease, block_size, concurrency,
+                       file_path=None, iterator=None):
+        """
+        Upload the data of a file or an iterator as uncommitted blocks.
+
+        Blocks of a file are read by the workers directly at their offsets so
+        multiple blocks can be read and uploaded in parallel. Data of an
+        iterator is read sequentially and at most ``concurrency`` blocks are
+        held in memory at any time.
+
+        :return: A tuple of (block ids, bytes transferred)
+        :rtype: ``tuple``
+        """
+        if file_path:
+            file_size = os.path.getsize(file_path)
+
+            if file_size > block_size * AZURE_MAX_BLOCKS:
+                raise ValueError('File is too large to be uploaded using '
+                                 '%s byte blocks' % (block_size))
+
+            blocks = ({'file_path': file_path, 'offset': offset,
+                       'size': min(block_size, file_size - offset)}
+                      for offset in range(0, file_size, block_size))
+        else:
+            blocks = ({'data': b(data), 'size': len(data)}
+                      for data in read_in_chunks(iterator, block_size,
+                                                 fill_size=True))
+
+        block_ids = []
+        bytes_transferred = [0]
+
+        def get_blocks():
+            for kwargs in blocks:
+                # Block id can be any unique string that is base64 encoded
+                # A 10 digit number can hold the max value of 50000 blocks
+                # that are allowed for azure
+                block_id = base64.b64encode(b('%10d' % (len(block_ids) + 1)))
+                block_id = block_id.decode('utf-8')
+                block_ids.append(block_id)
+                bytes_transferred[0] += kwargs['size']
+
+                kwargs.update({'object_path': object_path,
+                               'block_id': block_id, 'lease': lease})
+                yield kwargs
+
+        def upload_block(connection, kwargs):
+            self._upload_block(connection=connection, **kwargs)
+
+        if concurrency > 1:
+            workers = [self.connection.clone() for _ in range(concurrency)]
+        else:
+            workers = [self.connection]
+
+        map_with_workers(upload_block, get_blocks(), workers=workers)
+
+        return (block_ids, bytes_transferred[0])
+
+    def _upload_block(self, connection, object_path, block_id, lease, size,
+                      data=None, file_path=None, offset=None):
+        """
+        Upload a single block using the provided connection. If no data is
+        provided, the block is read from the provided offset of the file.
+        """
+        if data is None:
+            with open(file_path, 'rb') as file_handle:
+                file_handle.seek(offset)
+                data = file_handle.read(size)
+
+        block_hash = self._get_hash_function()
+        block_hash.update(data)
+        block_hash = base64.b64encode(b(block_hash.digest()))
+
+        headers = {'Content-MD5': block_hash.decode('utf-8'),
+                   'Content-Length': len(data)}
+        params = {'comp': 'block', 'blockid': block_id}
+
+        lease.update_headers(headers)
+
+        resp = connection.request(object_path, method='PUT', data=data,
+                                  headers=headers, params=params)
+
+        if resp.status != httplib.CREATED:
+            resp.parse_error()
+            raise LibcloudError('Error uploading block %s. Code: %d' %
+                                (block_id, resp.status), driver=self)
+
+    def _commit_blocks(self, object_path, chunks, lease, headers=None):
         """
         Makes a final commit of the data.
 
         :param object_path: Server side object path.
         :type object_path: ``str``
 
-        :param upload_id: A list of (chunk_number, chunk_hash) tuples.
-        :type upload_id: ``list``
+        :param chunks: A list of uploaded block ids.
+        :type chunks: ``list``
+
+        :param headers: Blob properties and metadata headers.
+        :type headers: ``dict``
+
+        :rtype: :class:`AzureResponse`
         """
 
         root = ET.Element('BlockList')
@@ -704,10 +933,9 @@ class AzureBlobsStorageDriver(StorageDriver):
 
         data = tostring(root)
         params = {'comp': 'blocklist'}
-        headers = {}
+        headers = headers or {}
 
         lease.update_headers(headers)
-        lease.renew()
 
         response = self.connection.request(object_path, data=data,
                                            params=params, headers=headers,
@@ -716,6 +944,8 @@ class AzureBlobsStorageDriver(StorageDriver):
         if response.status != httplib.CREATED:
             raise LibcloudError('Error in blocklist commit', driver=self)
 
+        return response
+
     def _check_values(self, blob_type, object_size):
         """
         Checks if extension arguments are valid
@@ -740,10 +970,16 @@ class AzureBlobsStorageDriver(StorageDriver):
                                     'page boundary', driver=self)
 
     def upload_object(self, file_path, container, object_name, extra=None,
-                      verify_hash=True, ex_blob_type=None, ex_use_lease=False):
+                      verify_hash=True, ex_blob_type=None, ex_use_lease=False,
+                      ex_block_size=None, ex_concurrency=None):
         """
         Upload an object currently located on a disk.
 
+        Block blobs which are larger than 4 MB (or if any of
+        ``ex_block_size`` and ``ex_concurrency`` is provided) are uploaded in
+        blocks. Blocks are read directly from the file so they can be read
+        and uploaded in parallel.
+
         @inherits: :class:`StorageDriver.upload_object`
 
         :param ex_blob_type: Storage class
@@ -751,6 +987,14 @@ class AzureBlobsStorageDriver(StorageDriver):
 
         :param ex_use_lease: Indicates if we must take a lease before upload
         :type ex_use_lease: ``bool``
+
+        :param ex_block_size: Size of a single block in bytes (defaults to
+                              ``block_size``, maximum is 4 MB).
+        :type ex_block_size: ``int``
+
+        :param ex_concurrency: Number of blocks which are uploaded in parallel
+                               (defaults to ``block_upload_concurrency``).
+        :type ex_concurrency: ``int``
         """
 
         if ex_blob_type is None:
@@ -764,22 +1008,26 @@ class AzureBlobsStorageDriver(StorageDriver):
 
         self._check_values(ex_blob_type, file_size)
 
+        if ex_blob_type == 'BlockBlob' and \
+                (ex_block_size or ex_concurrency or
+                 file_size > AZURE_BLOCK_MAX_SIZE):
+            return self._put_block_blob(container=container,
+                                        object_name=object_name,
+                                        extra=extra, file_path=file_path,
+                                        block_size=ex_block_size,
+                                        concurrency=ex_concurrency,
+                                        use_lease=ex_use_lease)
+
         with file(file_path, 'rb') as file_handle:
             iterator = iter(file_handle)
 
-            # If size is greater than 64MB or type is Page, upload in chunks
-            if ex_blob_type == 'PageBlob' or file_size > AZURE_BLOCK_MAX_SIZE:
-                # For chunked upload of block blobs, the initial size must
-                # be 0.
-                if ex_blob_type == 'BlockBlob':
-                    object_size = None
-
+            # Page blobs are always uploaded in chunks
+            if ex_blob_type == 'PageBlob':
                 object_path = self._get_object_path(container, object_name)
 
                 upload_func = self._upload_in_chunks
                 upload_func_kwargs = {'iterator': iterator,
                                       'object_path': object_path,
-                                      'blob_type': ex_blob_type,
                                       'lease': None}
             else:
                 upload_func = self._stream_data
@@ -800,7 +1048,8 @@ class AzureBlobsStorageDriver(StorageDriver):
     def upload_object_via_stream(self, iterator, container, object_name,
                                  verify_hash=False, extra=None,
                                  ex_use_lease=False, ex_blob_type=None,
-                                 ex_page_blob_size=None):
+                                 ex_page_blob_size=None, ex_block_size=None,
+                                 ex_concurrency=None):
         """
         @inherits: :class:`StorageDriver.upload_object_via_stream`
 
@@ -813,6 +1062,14 @@ class AzureBlobsStorageDriver(StorageDriver):
 
         :param ex_use_lease: Indicates if we must take a lease before upload
         :type ex_use_lease: ``bool``
+
+        :param ex_block_size: Size of a single block of a block blob in bytes
+                              (defaults to ``block_size``, maximum is 4 MB).
+        :type ex_block_size: ``int``
+
+        :param ex_concurrency: Number of blocks which are uploaded in parallel
+                               (defaults to ``block_upload_concurrency``).
+        :type ex_concurrency: ``int``
         """
 
         if ex_blob_type is None:
@@ -820,12 +1077,19 @@ class AzureBlobsStorageDriver(StorageDriver):
 
         self._check_values(ex_blob_type, ex_page_blob_size)
 
+        if ex_blob_type == 'BlockBlob':
+            return self._put_block_blob(container=container,
+                                        object_name=object_name,
+                                        extra=extra, iterator=iterator,
+                                        block_size=ex_block_size,
+                                        concurrency=ex_concurrency,
+                                        use_lease=ex_use_lease)
+
         object_path = self._get_object_path(container, object_name)
 
         upload_func = self._upload_in_chunks
         upload_func_kwargs = {'iterator': iterator,
                               'object_path': object_path,
-                              'blob_type': ex_blob_type,
                               'lease': None}
 
         return self._put_object(container=container,
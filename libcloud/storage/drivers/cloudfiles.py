@@ -16,6 +16,7 @@
 from hashlib import sha1
 import hmac
 import os
+import itertools
 from time import time
 
 from libcloud.utils.py3 import httplib
@@ -33,7 +34,8 @@ from libcloud.utils.py3 import urlquote
 if PY3:
     from io import FileIO as file
 
-from libcloud.utils.files import read_in_chunks
+from libcloud.utils.files import read_in_chunks, guess_file_mime_type
+from libcloud.utils.concurrency import map_with_workers
 from libcloud.common.types import MalformedResponseError, LibcloudError
 from libcloud.common.base import Response, RawResponse
 
@@ -57,6 +59,13 @@ API_VERSION = 'v1.0'
 INTERNAL_ENDPOINT_KEY = 'internalURL'
 PUBLIC_ENDPOINT_KEY = 'publicURL'
 
+# Default size of a single segment of a segmented (large) object
+SEGMENT_SIZE = 32 * 1024 * 1024
+
+# Default maximum number of segments a static large object manifest can refer
+# to
+SLO_MAX_SEGMENTS = 1000
+
 
 class CloudFilesResponse(Response):
     valid_response_codes = [httplib.NOT_FOUND, httplib.CONFLICT]
@@ -246,6 +255,10 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
     hash_type = 'md5'
     supports_chunked_encoding = True
 
+    # Default number of segments of a large object which are uploaded in
+    # parallel. Can also be specified per upload.
+    segment_upload_concurrency = 1
+
     def __init__(self, key, secret=None, secure=True, host=None, port=None,
                  region='ord', use_internal_url=False, **kwargs):
         """
@@ -417,6 +430,51 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
                                                  'chunk_size': chunk_size},
                                 success_status_code=httplib.OK)
 
+    def download_object_range(self, obj, destination_path, start_bytes,
+                              end_bytes=None, overwrite_existing=False,
+                              delete_on_failure=True):
+        self._validate_start_and_end_bytes(start_bytes=start_bytes,
+                                           end_bytes=end_bytes)
+
+        container_name = obj.container.name
+        object_name = obj.name
+        headers = {'Range': self._get_standard_range_str(start_bytes,
+                                                         end_bytes)}
+        response = self.connection.request('/%s/%s' % (container_name,
+                                                       object_name),
+                                           method='GET', headers=headers,
+                                           raw=True)
+
+        return self._get_object(
+            obj=obj, callback=self._save_object, response=response,
+            callback_kwargs={'obj': obj,
+                             'response': response.response,
+                             'destination_path': destination_path,
+                             'overwrite_existing': overwrite_existing,
+                             'delete_on_failure': delete_on_failure,
+                             'partial_download': True},
+            success_status_code=httplib.PARTIAL_CONTENT)
+
+    def download_object_range_as_stream(self, obj, start_bytes,
+                                        end_bytes=None, chunk_size=None):
+        self._validate_start_and_end_bytes(start_bytes=start_bytes,
+                                           end_bytes=end_bytes)
+
+        container_name = obj.container.name
+        object_name = obj.name
+        headers = {'Range': self._get_standard_range_str(start_bytes,
+                                                         end_bytes)}
+        response = self.connection.request('/%s/%s' % (container_name,
+                                                       object_name),
+                                           method='GET', headers=headers,
+                                           raw=True)
+
+        return self._get_object(obj=obj, callback=read_in_chunks,
+                                response=response,
+                                callback_kwargs={'iterator': response.response,
+                                                 'chunk_size': chunk_size},
+                                success_status_code=httplib.PARTIAL_CONTENT)
+
     def upload_object(self, file_path, container, object_name, extra=None,
                       verify_hash=True, headers=None):
         """
@@ -435,10 +493,54 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
 
     def upload_object_via_stream(self, iterator,
                                  container, object_name, extra=None,
-                                 headers=None):
+                                 headers=None, ex_segment_size=None,
+                                 ex_concurrency=None, ex_use_slo=False,
+                                 ex_resume=False):
+        """
+        Upload an object using an iterator.
+
+        If ``ex_segment_size`` is provided, data which is larger than a
+        single segment is uploaded as a segmented (large) object. At most
+        ``ex_concurrency`` segments are held in memory at any time.
+
+        @inherits: :class:`StorageDriver.upload_object_via_stream`
+
+        :param ex_segment_size: Size of a single segment in bytes.
+        :type ex_segment_size: ``int``
+
+        :param ex_concurrency: Number of segments which are uploaded in
+                               parallel (defaults to
+                               ``segment_upload_concurrency``).
+        :type ex_concurrency: ``int``
+
+        :param ex_use_slo: True to create a static large object manifest
+                           instead of a dynamic one.
+        :type ex_use_slo: ``bool``
+
+        :param ex_resume: True to skip segments which have already been
+                          uploaded and whose etag matches.
+        :type ex_resume: ``bool``
+        """
         if isinstance(iterator, file):
             iterator = iter(iterator)
 
+        if ex_segment_size:
+            chunks = read_in_chunks(iterator, ex_segment_size, fill_size=True,
+                                    yield_empty=True)
+            data = next(chunks)
+
+            if len(data) == ex_segment_size:
+                segments = ({'data': data, 'size': len(data)}
+                            for data in itertools.chain([data], chunks))
+                return self._put_segmented_object(
+                    container=container, object_name=object_name,
+                    segments=segments, extra=extra, headers=headers,
+                    concurrency=ex_concurrency, use_slo=ex_use_slo,
+                    resume=ex_resume)
+
+            # All the data fits in a single segment
+            iterator = iter([data])
+
         upload_func = self._stream_data
         upload_func_kwargs = {'iterator': iterator}
 
@@ -510,26 +612,49 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
         raise LibcloudError('Unexpected status code: %s' % (response.status))
 
     def ex_multipart_upload_object(self, file_path, container, object_name,
-                                   chunk_size=33554432, extra=None,
-                                   verify_hash=True):
+                                   chunk_size=SEGMENT_SIZE, extra=None,
+                                   verify_hash=True, concurrency=None,
+                                   use_slo=False, resume=False):
+        """
+        Upload a file as a segmented (large) object.
+
+        Segments are read directly from the file by the workers which upload
+        them so multiple segments can be read and uploaded in parallel.
+
+        :param chunk_size: Size of a single segment in bytes.
+        :type chunk_size: ``int``
+
+        :param concurrency: Number of segments which are uploaded in parallel
+                            (defaults to ``segment_upload_concurrency``).
+        :type concurrency: ``int``
+
+        :param use_slo: True to create a static large object manifest which
+                        lists the segments with their etags instead of a
+                        dynamic one.
+        :type use_slo: ``bool``
+
+        :param resume: True to skip segments which have already been uploaded
+                       (e.g. by a previous, failed upload) and whose etag
+                       matches.
+        :type resume: ``bool``
+
+        :rtype: :class:`Object`
+        """
         object_size = os.path.getsize(file_path)
         if object_size < chunk_size:
             return self.upload_object(file_path, container, object_name,
                                       extra=extra, verify_hash=verify_hash)
 
-        iter_chunk_reader = FileChunkReader(file_path, chunk_size)
+        segments = ({'file_path': file_path, 'offset': offset,
+                     'size': min(chunk_size, object_size - offset)}
+                    for offset in range(0, object_size, chunk_size))
 
-        for index, iterator in enumerate(iter_chunk_reader):
-            self._upload_object_part(container=container,
-                                     object_name=object_name,
-                                     part_number=index,
-                                     iterator=iterator,
-                                     verify_hash=verify_hash)
-
-        return self._upload_object_manifest(container=container,
-                                            object_name=object_name,
-                                            extra=extra,
-                                            verify_hash=verify_hash)
+        return self._put_segmented_object(container=container,
+                                          object_name=object_name,
+                                          segments=segments, extra=extra,
+                                          verify_hash=verify_hash,
+                                          concurrency=concurrency,
+                                          use_slo=use_slo, resume=resume)
 
     def ex_enable_static_website(self, container, index_file='index.html'):
         """
@@ -644,6 +769,105 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
 
         return temp_url
 
+    def _put_segmented_object(self, container, object_name, segments,
+                              extra=None, verify_hash=True, headers=None,
+                              concurrency=None, use_slo=False, resume=False):
+        """
+        Upload the provided segments and create a manifest which ties them
+        together.
+
+        Each segment is a dictionary with either ``data`` or ``file_path``
+        and ``offset`` keys and a ``size`` key. Segments are consumed lazily
+        and at most ``concurrency`` of them are being uploaded at any time.
+        """
+        concurrency = concurrency or self.segment_upload_concurrency
+        uploaded_segments = {}
+
+        if resume:
+            prefix = object_name + '/'
+            uploaded_segments = dict(
+                [(obj.name, (obj.hash, obj.size)) for obj in
+                 self.iterate_container_objects(container, ex_prefix=prefix)])
+
+        def get_segments():
+            for part_number, segment in enumerate(segments):
+                if use_slo and part_number >= SLO_MAX_SEGMENTS:
+                    raise LibcloudError('Static large objects can consist of '
+                                        'at most %s segments' %
+                                        (SLO_MAX_SEGMENTS), driver=self)
+
+                segment_name = object_name + '/%08d' % part_number
+                segment.update({'container': container,
+                                'object_name': object_name,
+                                'part_number': part_number,
+                                'verify_hash': verify_hash,
+                                'uploaded': uploaded_segments.get(
+                                    segment_name)})
+                yield segment
+
+        def upload_segment(driver, segment):
+            return self._upload_segment(driver=driver, **segment)
+
+        if concurrency > 1:
+            workers = [self._get_worker_driver() for _ in range(concurrency)]
+        else:
+            workers = [self]
+
+        results = map_with_workers(upload_segment, get_segments(),
+                                   workers=workers)
+
+        if use_slo:
+            return self._upload_object_slo_manifest(container=container,
+                                                    object_name=object_name,
+                                                    segments=results,
+                                                    extra=extra,
+                                                    verify_hash=verify_hash,
+                                                    headers=headers)
+
+        return self._upload_object_manifest(container=container,
+                                            object_name=object_name,
+                                            extra=extra,
+                                            verify_hash=verify_hash,
+                                            headers=headers)
+
+    def _upload_segment(self, driver, container, object_name, part_number,
+                        size, data=None, file_path=None, offset=None,
+                        verify_hash=True, uploaded=None):
+        """
+        Upload a single segment using the provided (worker) driver unless a
+        segment with the same etag has already been uploaded.
+
+        :return: A tuple of (segment name, etag, size)
+        :rtype: ``tuple``
+        """
+        segment_name = object_name + '/%08d' % part_number
+
+        def get_iterator():
+            if data is None:
+                return ChunkStreamReader(file_path=file_path,
+                                         start_block=offset,
+                                         end_block=offset + size,
+                                         chunk_size=8192)
+
+            return iter([data])
+
+        if uploaded and uploaded[1] == size:
+            segment_hash = self._get_hash_function()
+
+            for chunk in read_in_chunks(get_iterator()):
+                segment_hash.update(b(chunk))
+
+            if segment_hash.hexdigest() == uploaded[0]:
+                return (segment_name, uploaded[0], size)
+
+        obj = driver._upload_object_part(container=container,
+                                         object_name=object_name,
+                                         part_number=part_number,
+                                         iterator=get_iterator(),
+                                         verify_hash=verify_hash)
+
+        return (segment_name, obj.hash, size)
+
     def _upload_object_part(self, container, object_name, part_number,
                             iterator, verify_hash=True):
         upload_func = self._stream_data
@@ -651,15 +875,88 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
         part_name = object_name + '/%08d' % part_number
         extra = {'content_type': 'application/octet-stream'}
 
-        self._put_object(container=container,
-                         object_name=part_name,
-                         upload_func=upload_func,
-                         upload_func_kwargs=upload_func_kwargs,
-                         extra=extra, iterator=iterator,
-                         verify_hash=verify_hash)
+        return self._put_object(container=container,
+                                object_name=part_name,
+                                upload_func=upload_func,
+                                upload_func_kwargs=upload_func_kwargs,
+                                extra=extra, iterator=iterator,
+                                verify_hash=verify_hash)
+
+    def _get_manifest_headers(self, object_name, extra, headers=None):
+        """
+        Return headers which set the properties and metadata of an object
+        created using a manifest.
+        """
+        headers = headers or {}
+        content_type = extra.get('content_type', None)
+        meta_data = extra.get('meta_data', None) or {}
+
+        if not content_type:
+            content_type, _ = guess_file_mime_type(object_name)
+
+        headers['Content-Type'] = content_type or 'application/octet-stream'
+
+        for key, value in list(meta_data.items()):
+            headers['X-Object-Meta-%s' % (key)] = value
+
+        return headers
+
+    def _upload_object_slo_manifest(self, container, object_name, segments,
+                                    extra=None, verify_hash=True,
+                                    headers=None):
+        """
+        Create a static large object manifest which lists the provided
+        segments.
+
+        :param segments: A list of (segment name, etag, size) tuples.
+        :type segments: ``list`` of ``tuple``
+        """
+        extra = extra or {}
+        meta_data = extra.get('meta_data')
+
+        container_name_encoded = self._encode_container_name(container.name)
+        object_name_encoded = self._encode_object_name(object_name)
+        request_path = '/%s/%s' % (container_name_encoded, object_name_encoded)
+
+        manifest = [{'path': '/%s/%s' % (container.name, segment_name),
+                     'etag': etag, 'size_bytes': size}
+                    for (segment_name, etag, size) in segments]
+        headers = self._get_manifest_headers(object_name=object_name,
+                                             extra=extra, headers=headers)
+
+        response = self.connection.request(
+            request_path, method='PUT', data=json.dumps(manifest),
+            headers=headers, params={'multipart-manifest': 'put'})
+
+        if response.status != httplib.CREATED:
+            raise LibcloudError('Unexpected status code: %s' %
+                                (response.status), driver=self)
+
+        # Etag of a static large object is a MD5 hash of the concatenated
+        # segment etags
+        object_hash = response.headers.get('etag', '').strip('"')
+
+        if verify_hash:
+            hash_function = self._get_hash_function()
+
+            for _, etag, _ in segments:
+                hash_function.update(b(etag))
+
+            data_hash = hash_function.hexdigest()
+
+            if object_hash != data_hash:
+                raise ObjectHashMismatchError(
+                    value=('MD5 hash checksum does not match (expected=%s, ' +
+                           'actual=%s)') % (data_hash, object_hash),
+                    object_name=object_name, driver=self)
+
+        size = sum([segment[2] for segment in segments])
+        return Object(name=object_name, size=size, hash=object_hash,
+                      extra=None, meta_data=meta_data, container=container,
+                      driver=self)
 
     def _upload_object_manifest(self, container, object_name, extra=None,
-                                verify_hash=True):
+                                verify_hash=True, headers=None):
         extra = extra or {}
         meta_data = extra.get('meta_data')
 
@@ -667,11 +964,14 @@ class CloudFilesStorageDriver(StorageDriver, OpenStackDriverMixin):
         object_name_encoded = self._encode_object_name(object_name)
         request_path = '/%s/%s' % (container_name_encoded, object_name_encoded)
 
+        headers = self._get_manifest_headers(object_name=object_name,
+                                             extra=extra, headers=headers)
+
         # pylint: disable=no-member
-        headers = {'X-Auth-Token': self.connection.auth_token,
-                   'X-Object-Manifest': '%s/%s/' %
-                                        (container_name_encoded,
-                                         object_name_encoded)}
+        headers.update({'X-Auth-Token': self.connection.auth_token,
+                        'X-Object-Manifest': '%s/%s/' %
+                                             (container_name_encoded,
+                                              object_name_encoded)})
 
         data = ''
         response = self.connection.request(request_path,
@@ -21,8 +21,12 @@ from __future__ import with_statement
 
 import errno
 import os
+import json
+import time
 import shutil
 import sys
+import hashlib
+import tempfile
 
 try:
     import lockfile
@@ -31,11 +35,19 @@ except ImportError:
     raise ImportError('Missing lockfile dependency, you can install it '
                       'using pip: pip install lockfile')
 
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
 from libcloud.utils.files import read_in_chunks
-from libcloud.utils.py3 import relpath
 from libcloud.utils.py3 import u
 from libcloud.common.base import Connection
 from libcloud.storage.base import Object, Container, StorageDriver
+from libcloud.storage.base import CHUNK_SIZE
 from libcloud.common.types import LibcloudError
 from libcloud.storage.types import ContainerAlreadyExistsError
 from libcloud.storage.types import ContainerDoesNotExistError
@@ -46,6 +58,67 @@ from libcloud.storage.types import InvalidContainerNameError
 
 IGNORE_FOLDERS = ['.lock', '.hash']
 
+# Name of the folder (in the root of a container) and the file in which the
+# object index is stored
+INDEX_FOLDER = '.libcloud-index'
+INDEX_FILE = 'objects.json'
+INDEX_VERSION = 1
+
+# Directories which have been modified less than this number of seconds
+# before they were indexed are always re-scanned on the next listing. Some
+# file-systems only have a second granularity for mtime so a change which
+# happens right after the scan might not change the directory mtime.
+INDEX_MTIME_GRACE_PERIOD = 2
+
+
+class _DirEntry(object):
+    """
+    Minimal replacement for ``os.DirEntry`` which is used when neither
+    ``os.scandir`` nor the ``scandir`` package is available.
+    """
+
+    def __init__(self, directory, name):
+        self.name = name
+        self.path = os.path.join(directory, name)
+        self._stat = None
+
+    def is_dir(self):
+        return os.path.isdir(self.path)
+
+    def is_symlink(self):
+        return os.path.islink(self.path)
+
+    def stat(self):
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+
+        return self._stat
+
+
+def _scandir(path):
+    """
+    Return a list of directory entries for the provided path.
+
+    When available, ``scandir`` is used which means file types (and on some
+    platforms stat results) are retrieved together with the directory
+    listing instead of using a separate system call for each entry.
+    """
+    if scandir is not None:
+        return list(scandir(path))
+
+    return [_DirEntry(path, name) for name in os.listdir(path)]
+
+
+def _matches_prefix(name, prefix, is_dir=False):
+    """
+    Return True if the object name matches the prefix. For directories,
+    return True if the directory can contain objects matching the prefix.
+    """
+    if not prefix or name.startswith(prefix):
+        return True
+
+    return is_dir and prefix.startswith(name)
+
 
 class LockLocalStorage(object):
     """
@@ -82,10 +155,18 @@ class LocalStorageDriver(StorageDriver):
     hash_type = 'md5'
 
     def __init__(self, key, secret=None, secure=True, host=None, port=None,
-                 **kwargs):
+                 ex_use_index=False, **kwargs):
+        """
+        :param ex_use_index: Keep a persistent index of object names and
+                             sizes in each container which is refreshed
+                             incrementally (only the directories which mtime
+                             has changed are scanned) when listing objects.
+        :type ex_use_index: ``bool``
+        """
 
         # Use the key as the path to the storage
         self.base_path = key
+        self.ex_use_index = ex_use_index
 
         if not os.path.isdir(self.base_path):
             raise LibcloudError('The base path is not a directory')
@@ -173,22 +254,42 @@ class LocalStorageDriver(StorageDriver):
             raise ObjectDoesNotExistError(value=None, driver=self,
                                           object_name=object_name)
 
+        return self._to_object(container=container, object_name=object_name,
+                               size=stat.st_size, ctime=stat.st_ctime,
+                               atime=stat.st_atime, mtime=stat.st_mtime)
+
+    def _to_object(self, container, object_name, size, ctime, atime, mtime,
+                   hash_func=None):
+        """
+        Create an object instance from the file metadata.
+
+        :param hash_func: Optional hash constructor. It can be passed in when
+                          creating many objects so it's only looked up once.
+        """
+        if hash_func is None:
+            hash_func = self._get_hash_constructor()
+
         # Make a hash for the file based on the metadata. We can safely
         # use only the mtime attribute here. If the file contents change,
         # the underlying file-system will change mtime
-        data_hash = self._get_hash_function()
-        data_hash.update(u(stat.st_mtime).encode('ascii'))
-        data_hash = data_hash.hexdigest()
+        data_hash = hash_func(u(mtime).encode('ascii')).hexdigest()
 
         extra = {}
-        extra['creation_time'] = stat.st_ctime
-        extra['access_time'] = stat.st_atime
-        extra['modify_time'] = stat.st_mtime
+        extra['creation_time'] = ctime
+        extra['access_time'] = atime
+        extra['modify_time'] = mtime
 
-        return Object(name=object_name, size=stat.st_size, extra=extra,
+        return Object(name=object_name, size=size, extra=extra,
                       driver=self, container=container, hash=data_hash,
                       meta_data=None)
 
+    def _get_hash_constructor(self):
+        try:
+            return getattr(hashlib, self.hash_type)
+        except AttributeError:
+            raise RuntimeError('Invalid or unsupported hash type: %s' %
+                               (self.hash_type))
+
     def iterate_containers(self):
         """
         Return a generator of containers.
@@ -203,36 +304,278 @@ class LocalStorageDriver(StorageDriver):
                 continue
             yield self._make_container(container_name)
 
-    def _get_objects(self, container):
+    def _get_objects(self, container, prefix=None, use_index=None):
         """
-        Recursively iterate through the file-system and return the object names
+        Recursively iterate through the file-system and return the objects
         """
 
         cpath = self.get_container_cdn_url(container, check=True)
+        hash_func = self._get_hash_constructor()
 
-        for folder, subfolders, files in os.walk(cpath, topdown=True):
-            # Remove unwanted subfolders
-            for subf in IGNORE_FOLDERS:
-                if subf in subfolders:
-                    subfolders.remove(subf)
+        if use_index is None:
+            use_index = self.ex_use_index
 
-            for name in files:
-                full_path = os.path.join(folder, name)
-                object_name = relpath(full_path, start=cpath)
-                yield self._make_object(container, object_name)
+        if use_index:
+            files = self._iterate_indexed_files(cpath, prefix=prefix)
+        else:
+            files = self._iterate_files(cpath, prefix=prefix)
+
+        for object_name, size, ctime, atime, mtime in files:
+            yield self._to_object(container=container,
+                                  object_name=object_name, size=size,
+                                  ctime=ctime, atime=atime, mtime=mtime,
+                                  hash_func=hash_func)
+
+    def _iterate_files(self, cpath, prefix=None):
+        """
+        Walk the container directory tree and yield a
+        (name, size, ctime, atime, mtime) tuple for each file.
+
+        Stat results of the directory entries are reused and subtrees which
+        can't contain objects matching the prefix are not walked.
+        """
+        directories = ['']
+
+        while directories:
+            relative_dir = directories.pop()
+            entries, subdirs = self._scan_directory(
+                os.path.join(cpath, relative_dir), is_root=not relative_dir)
+
+            for name, values in entries:
+                object_name = relative_dir + name
+
+                if _matches_prefix(object_name, prefix):
+                    yield (object_name, ) + values
+
+            self._push_subdirs(directories, relative_dir, subdirs, prefix)
 
-    def iterate_container_objects(self, container):
+    def _iterate_indexed_files(self, cpath, prefix=None):
+        """
+        Same as :meth:`_iterate_files`, but only the directories which mtime
+        has changed since the last listing are scanned. File metadata of the
+        other directories is retrieved from the container index and checked
+        against the size and mtime of each file.
+        """
+        index = self._load_index(cpath)
+        updated = {}
+        changed = False
+        now = time.time()
+
+        directories = ['']
+
+        while directories:
+            relative_dir = directories.pop()
+            path = os.path.join(cpath, relative_dir)
+
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                # Directory has been removed in the mean time
+                changed = True
+                continue
+
+            item = index.get(relative_dir)
+
+            if item is not None and item['mtime'] == mtime:
+                # Overwriting a file in place doesn't change the directory
+                # mtime
+                files, modified = self._check_indexed_files(path,
+                                                            item['files'])
+
+                if files is None:
+                    item = None
+                else:
+                    item = {'mtime': mtime, 'files': files,
+                            'subdirs': item['subdirs']}
+                    changed = changed or modified
+
+            if item is None or item['mtime'] != mtime:
+                entries, subdirs = self._scan_directory(
+                    path, is_root=not relative_dir)
+
+                if now - mtime < INDEX_MTIME_GRACE_PERIOD:
+                    mtime = None
+
+                item = {'mtime': mtime, 'files': entries, 'subdirs': subdirs}
+                changed = True
+
+            updated[relative_dir] = item
+
+            for name, values in item['files']:
+                object_name = relative_dir + name
+
+                if _matches_prefix(object_name, prefix):
+                    yield tuple([object_name] + list(values))
+
+            self._push_subdirs(directories, relative_dir, item['subdirs'],
+                               prefix)
+
+        if prefix:
+            # Only part of the tree has been visited
+            index.update(updated)
+            updated = index
+
+        if changed or len(updated) != len(index):
+            self._save_index(cpath, updated)
+
+    def _scan_directory(self, path, is_root=False):
+        """
+        Return a list of (name, (size, ctime, atime, mtime)) tuples for the
+        files and a list of names of the sub-directories in the provided
+        directory.
+
+        The index folder is skipped in the root directory of a container.
+        """
+        files = []
+        subdirs = []
+
+        try:
+            entries = _scandir(path)
+        except OSError:
+            # Directory has been removed in the mean time
+            return files, subdirs
+
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    # Symbolic links to directories are not followed which
+                    # matches the os.walk behavior
+                    if (entry.name not in IGNORE_FOLDERS and
+                            not entry.is_symlink() and
+                            not (is_root and entry.name == INDEX_FOLDER)):
+                        subdirs.append(entry.name)
+                    continue
+
+                stat = entry.stat()
+            except OSError:
+                # File has been removed in the mean time
+                continue
+
+            files.append((entry.name, (stat.st_size, stat.st_ctime,
+                                       stat.st_atime, stat.st_mtime)))
+
+        return files, subdirs
+
+    def _check_indexed_files(self, path, files):
+        """
+        Return the indexed (name, (size, ctime, atime, mtime)) tuples of the
+        files in the provided directory with up to date stat results.
+
+        :return: (files, modified) tuple. ``files`` is None if any of the
+                 files doesn't exist anymore, ``modified`` is True if size
+                 or mtime of any of the files has changed.
+        :rtype: ``tuple``
+        """
+        result = []
+        modified = False
+
+        for name, values in files:
+            try:
+                stat = os.stat(os.path.join(path, name))
+            except OSError:
+                return None, True
+
+            if stat.st_size != values[0] or stat.st_mtime != values[3]:
+                modified = True
+
+            result.append((name, (stat.st_size, stat.st_ctime,
+                                  stat.st_atime, stat.st_mtime)))
+
+        return result, modified
+
+    def _push_subdirs(self, directories, relative_dir, subdirs, prefix):
+        # Sub-directories are pushed in the reverse order so they are walked
+        # in the same (top-down) order as listed
+        for name in reversed(subdirs):
+            subdir = relative_dir + name + os.sep
+
+            if _matches_prefix(subdir, prefix, is_dir=True):
+                directories.append(subdir)
+
+    def _get_index_path(self, cpath):
+        return os.path.join(cpath, INDEX_FOLDER, INDEX_FILE)
+
+    def _load_index(self, cpath):
+        """
+        Load the container index. An empty index is returned if the index
+        doesn't exist or if it can't be read.
+        """
+        try:
+            with open(self._get_index_path(cpath), 'r') as fp:
+                index = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return {}
+
+        if not isinstance(index, dict) or \
+                index.get('version') != INDEX_VERSION:
+            return {}
+
+        return index.get('directories', {})
+
+    def _save_index(self, cpath, directories):
+        """
+        Atomically replace the container index. Failures are ignored since
+        the index is only used to speed up the listing.
+        """
+        path = self._get_index_path(cpath)
+        index_dir = os.path.dirname(path)
+        data = {'version': INDEX_VERSION, 'directories': directories}
+
+        try:
+            self._make_path(index_dir)
+            fd, tmp_path = tempfile.mkstemp(dir=index_dir, suffix='.tmp')
+
+            try:
+                with os.fdopen(fd, 'w') as fp:
+                    json.dump(data, fp)
+
+                if hasattr(os, 'replace'):
+                    os.replace(tmp_path, path)
+                else:
+                    if os.name == 'nt' and os.path.exists(path):
+                        os.unlink(path)
+
+                    os.rename(tmp_path, path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except (IOError, OSError):
+            pass
+
+    def iterate_container_objects(self, container, ex_prefix=None):
         """
         Returns a generator of objects for the given container.
 
         :param container: Container instance
         :type container: :class:`Container`
 
+        :param ex_prefix: Only return objects which names start with
+                          ex_prefix. Directories which can't contain such
+                          objects are not walked.
+        :type ex_prefix: ``str``
+
         :return: A generator of Object instances.
         :rtype: ``generator`` of :class:`Object`
         """
 
-        return self._get_objects(container)
+        return self._get_objects(container, prefix=ex_prefix)
+
+    def list_container_objects(self, container, ex_prefix=None):
+        """
+        Return a list of objects for the given container.
+
+        :param container: Container instance.
+        :type container: :class:`Container`
+
+        :param ex_prefix: Only return objects which names start with
+                          ex_prefix.
+        :type ex_prefix: ``str``
+
+        :return: A list of Object instances.
+        :rtype: ``list`` of :class:`Object`
+        """
+        return list(self.iterate_container_objects(container,
+                                                   ex_prefix=ex_prefix))
 
     def get_container(self, container_name):
         """
@@ -409,6 +752,68 @@ class LocalStorageDriver(StorageDriver):
             for data in read_in_chunks(obj_file, chunk_size=chunk_size):
                 yield data
 
+    def download_object_range(self, obj, destination_path, start_bytes,
+                              end_bytes=None, overwrite_existing=False,
+                              delete_on_failure=True):
+        """
+        @inherits: :class:`StorageDriver.download_object_range`
+        """
+        self._validate_start_and_end_bytes(start_bytes=start_bytes,
+                                           end_bytes=end_bytes)
+
+        file_path = self._get_download_file_path(
+            obj=obj, destination_path=destination_path,
+            overwrite_existing=overwrite_existing)
+
+        try:
+            with open(file_path, 'wb') as file_handle:
+                for data in self.download_object_range_as_stream(
+                        obj=obj, start_bytes=start_bytes,
+                        end_bytes=end_bytes):
+                    file_handle.write(data)
+        except IOError:
+            if delete_on_failure:
+                try:
+                    os.unlink(file_path)
+                except Exception:
+                    pass
+            return False
+
+        return True
+
+    def download_object_range_as_stream(self, obj, start_bytes,
+                                        end_bytes=None, chunk_size=None):
+        """
+        @inherits: :class:`StorageDriver.download_object_range_as_stream`
+        """
+        self._validate_start_and_end_bytes(start_bytes=start_bytes,
+                                           end_bytes=end_bytes)
+
+        path = self.get_object_cdn_url(obj)
+        chunk_size = chunk_size or CHUNK_SIZE
+
+        return self._read_file_range(path=path, start_bytes=start_bytes,
+                                     end_bytes=end_bytes,
+                                     chunk_size=chunk_size)
+
+    def _read_file_range(self, path, start_bytes, end_bytes, chunk_size):
+        with open(path, 'rb') as obj_file:
+            obj_file.seek(start_bytes)
+
+            while end_bytes is None or start_bytes < end_bytes:
+                size = chunk_size
+
+                if end_bytes is not None:
+                    size = min(size, end_bytes - start_bytes)
+
+                data = obj_file.read(size)
+
+                if not data:
+                    break
+
+                start_bytes += len(data)
+                yield data
+
     def upload_object(self, file_path, container, object_name, extra=None,
                       verify_hash=True):
         """
@@ -577,7 +982,7 @@ class LocalStorageDriver(StorageDriver):
         """
 
         # Check if there are any objects inside this
-        for obj in self._get_objects(container):
+        for obj in self._get_objects(container, use_index=False):
             raise ContainerIsNotEmptyError(value='Container is not empty',
                                            container_name=container.name,
                                            driver=self)
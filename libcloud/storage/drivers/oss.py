@@ -40,8 +40,7 @@ from libcloud.utils.py3 import b
 from libcloud.utils.py3 import tostring
 from libcloud.utils.py3 import PY3
 from libcloud.utils.xml import fixxpath, findtext
-from libcloud.utils.files import guess_file_mime_type, read_in_chunks, \
-    exhaust_iterator
+from libcloud.utils.files import guess_file_mime_type, read_in_chunks
 from libcloud.common.types import InvalidCredsError, LibcloudError
 from libcloud.common.base import ConnectionUserAndKey, RawResponse, \
     XmlResponse
@@ -910,6 +909,7 @@ class OSSStorageDriver(StorageDriver):
                     content_type = DEFAULT_CONTENT_TYPE
 
         file_size = None
+        spool = None
 
         if iterator:
             if self.supports_chunked_encoding:
@@ -917,13 +917,15 @@ class OSSStorageDriver(StorageDriver):
                 upload_func_kwargs['chunked'] = True
             else:
                 # Chunked transfer encoding is not supported. Need to buffer
-                # all the data in memory so we can determine file size.
-                iterator = read_in_chunks(
-                    iterator=iterator)
-                data = exhaust_iterator(iterator=iterator)
-
-                file_size = len(data)
-                upload_func_kwargs['data'] = data
+                # all the data so we can determine file size.
+                calculate_hash = upload_func == self._upload_data and \
+                    upload_func_kwargs.get('calculate_hash', True)
+                spool, file_size, data_hash = self._spool_iterator(
+                    iterator=iterator, calculate_hash=calculate_hash)
+                upload_func_kwargs['data'] = spool
+
+                if calculate_hash:
+                    upload_func_kwargs['data_hash'] = data_hash
         else:
             file_size = os.path.getsize(file_path)
             upload_func_kwargs['chunked'] = False
@@ -932,14 +934,19 @@ class OSSStorageDriver(StorageDriver):
             headers['Content-Length'] = file_size
 
         headers['Content-Type'] = content_type
-        response = self.connection.request(request_path,
-                                           method=request_method, data=None,
-                                           headers=headers, raw=True,
-                                           container=container)
 
-        upload_func_kwargs['response'] = response
-        success, data_hash, bytes_transferred = upload_func(
-            **upload_func_kwargs)
+        try:
+            response = self.connection.request(request_path,
+                                               method=request_method,
+                                               data=None, headers=headers,
+                                               raw=True, container=container)
+
+            upload_func_kwargs['response'] = response
+            success, data_hash, bytes_transferred = upload_func(
+                **upload_func_kwargs)
+        finally:
+            if spool is not None:
+                spool.close()
 
         if not success:
             raise LibcloudError(
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from __future__ import with_statement
+
+import os
 import base64
 import hmac
 import time
@@ -32,13 +35,15 @@ from libcloud.utils.py3 import b
 from libcloud.utils.py3 import tostring
 
 from libcloud.utils.xml import fixxpath, findtext
-from libcloud.utils.files import read_in_chunks
+from libcloud.utils.files import read_in_chunks, guess_file_mime_type
+from libcloud.utils.concurrency import map_with_workers
 from libcloud.common.types import InvalidCredsError, LibcloudError
 from libcloud.common.base import ConnectionUserAndKey, RawResponse
 from libcloud.common.aws import AWSBaseResponse, AWSDriver, \
     AWSTokenConnection, SignedAWSConnection
 
 from libcloud.storage.base import Object, Container, StorageDriver
+from libcloud.storage.base import DEFAULT_CONTENT_TYPE
 from libcloud.storage.types import ContainerError
 from libcloud.storage.types import ContainerIsNotEmptyError
 from libcloud.storage.types import InvalidContainerNameError
@@ -70,6 +75,9 @@ CHUNK_SIZE = 5 * 1024 * 1024
 # ex_iterate_multipart_uploads.
 RESPONSES_PER_REQUEST = 100
 
+# Maximum number of parts returned in a single ListParts response
+PARTS_PER_REQUEST = 1000
+
 
 class S3Response(AWSBaseResponse):
     namespace = None
@@ -215,6 +223,16 @@ class BaseS3StorageDriver(StorageDriver):
     hash_type = 'md5'
     supports_chunked_encoding = False
     supports_s3_multipart_upload = True
+
+    # Default multipart upload settings. Part size and concurrency can also be
+    # specified per upload using ex_part_size and ex_concurrency arguments.
+    multipart_part_size = CHUNK_SIZE
+    multipart_concurrency = 1
+
+    # How many times an upload of a single part is retried before the whole
+    # multipart upload fails and how long to wait between the retries.
+    multipart_part_retries = 3
+    multipart_retry_delay = 1
     ex_location_name = ''
     namespace = NAMESPACE
     http_vendor_prefix = 'x-amz'
@@ -419,14 +437,84 @@ class BaseS3StorageDriver(StorageDriver):
                                                  'chunk_size': chunk_size},
                                 success_status_code=httplib.OK)
 
+    def download_object_range(self, obj, destination_path, start_bytes,
+                              end_bytes=None, overwrite_existing=False,
+                              delete_on_failure=True):
+        self._validate_start_and_end_bytes(start_bytes=start_bytes,
+                                           end_bytes=end_bytes)
+
+        obj_path = self._get_object_path(obj.container, obj.name)
+        headers = {'Range': self._get_standard_range_str(start_bytes,
+                                                         end_bytes)}
+        response = self.connection.request(obj_path, method='GET',
+                                           headers=headers, raw=True)
+
+        return self._get_object(obj=obj, callback=self._save_object,
+                                response=response,
+                                callback_kwargs={
+                                    'obj': obj,
+                                    'response': response.response,
+                                    'destination_path': destination_path,
+                                    'overwrite_existing': overwrite_existing,
+                                    'delete_on_failure': delete_on_failure,
+                                    'partial_download': True},
+                                success_status_code=httplib.PARTIAL_CONTENT)
+
+    def download_object_range_as_stream(self, obj, start_bytes,
+                                        end_bytes=None, chunk_size=None):
+        self._validate_start_and_end_bytes(start_bytes=start_bytes,
+                                           end_bytes=end_bytes)
+
+        obj_path = self._get_object_path(obj.container, obj.name)
+        headers = {'Range': self._get_standard_range_str(start_bytes,
+                                                         end_bytes)}
+        response = self.connection.request(obj_path, method='GET',
+                                           headers=headers, raw=True)
+
+        return self._get_object(obj=obj, callback=read_in_chunks,
+                                response=response,
+                                callback_kwargs={'iterator': response.response,
+                                                 'chunk_size': chunk_size},
+                                success_status_code=httplib.PARTIAL_CONTENT)
+
     def upload_object(self, file_path, container, object_name, extra=None,
-                      verify_hash=True, ex_storage_class=None):
+                      verify_hash=True, ex_storage_class=None,
+                      ex_part_size=None, ex_concurrency=None,
+                      ex_upload_id=None):
         """
         @inherits: :class:`StorageDriver.upload_object`
 
+        If any of ``ex_part_size``, ``ex_concurrency`` or ``ex_upload_id`` is
+        provided, the file is uploaded using the multipart upload mechanism.
+
         :param ex_storage_class: Storage class
         :type ex_storage_class: ``str``
+
+        :param ex_part_size: Size of a single part in bytes (defaults to
+                             ``multipart_part_size``, minimum is 5 MB).
+        :type ex_part_size: ``int``
+
+        :param ex_concurrency: Number of parts which are uploaded in parallel
+                               (defaults to ``multipart_concurrency``).
+        :type ex_concurrency: ``int``
+
+        :param ex_upload_id: ID of an existing multipart upload to resume.
+                             Parts which have already been uploaded are
+                             skipped.
+        :type ex_upload_id: ``str``
         """
+        if self.supports_s3_multipart_upload and \
+                (ex_part_size or ex_concurrency or ex_upload_id):
+            if not os.path.exists(file_path):
+                raise OSError('File %s does not exist' % (file_path))
+
+            with open(file_path, 'rb') as file_handle:
+                return self._put_object_multipart(
+                    container=container, object_name=object_name,
+                    iterator=file_handle, extra=extra,
+                    storage_class=ex_storage_class, part_size=ex_part_size,
+                    concurrency=ex_concurrency, upload_id=ex_upload_id)
+
         upload_func = self._upload_file
         upload_func_kwargs = {'file_path': file_path}
 
@@ -437,68 +525,147 @@ class BaseS3StorageDriver(StorageDriver):
                                 verify_hash=verify_hash,
                                 storage_class=ex_storage_class)
 
-    def _upload_multipart(self, response, data, iterator, container,
-                          object_name, calculate_hash=True):
+    def ex_initiate_multipart_upload(self, container, object_name, extra=None,
+                                     ex_storage_class=None):
         """
-        Callback invoked for uploading data to S3 using Amazon's
-        multipart upload mechanism
+        Initiate a multipart upload and return its ID.
 
-        :param response: Response object from the initial POST request
-        :type response: :class:`S3RawResponse`
+        The returned ID can be passed to :meth:`upload_object` and
+        :meth:`upload_object_via_stream` as ``ex_upload_id``. Uploads which
+        are initiated using this method are not aborted on failure so they
+        can be resumed by calling the upload method again with the same ID.
 
-        :param data: Any data from the initial POST request
-        :type data: ``str``
+        :param container: Destination container.
+        :type container: :class:`Container`
 
-        :param iterator: The generator for fetching the upload data
-        :type iterator: ``generator``
+        :param object_name: Object name.
+        :type object_name: ``str``
 
-        :param container: The container owning the object to which data is
-            being uploaded
+        :param extra: Extra attributes (content_type, meta_data, acl).
+        :type extra: ``dict``
+
+        :param ex_storage_class: Storage class
+        :type ex_storage_class: ``str``
+
+        :return: Upload ID.
+        :rtype: ``str``
+        """
+        if not self.supports_s3_multipart_upload:
+            raise LibcloudError('Feature not supported', driver=self)
+
+        extra = extra or {}
+        headers = self._get_put_object_headers(extra=extra,
+                                               storage_class=ex_storage_class)
+
+        content_type = extra.get('content_type', None)
+
+        if not content_type:
+            content_type, _ = guess_file_mime_type(object_name)
+
+        headers['Content-Type'] = content_type or DEFAULT_CONTENT_TYPE
+        object_path = self._get_object_path(container, object_name)
+        request_path = '?'.join((object_path, 'uploads'))
+        response = self.connection.request(request_path, method='POST',
+                                           headers=headers)
+
+        if response.status != httplib.OK:
+            raise LibcloudError('Error initiating multipart upload. '
+                                'status_code=%d' % (response.status),
+                                driver=self)
+
+        body = response.parse_body()
+        return body.findtext(fixxpath(xpath='UploadId',
+                                      namespace=self.namespace))
+
+    def ex_list_multipart_upload_parts(self, container, object_name,
+                                       upload_id):
+        """
+        Return parts which have already been uploaded as part of the provided
+        multipart upload.
+
+        :param container: Container holding the upload.
         :type container: :class:`Container`
 
-        :param object_name: The name of the object to which we are uploading
+        :param object_name: Object name.
         :type object_name: ``str``
 
-        :keyword calculate_hash: Indicates if we must calculate the data hash
-        :type calculate_hash: ``bool``
+        :param upload_id: ID of the multipart upload.
+        :type upload_id: ``str``
 
-        :return: A tuple of (status, checksum, bytes transferred)
-        :rtype: ``tuple``
+        :return: Dictionary mapping part number to a (etag, size) tuple.
+        :rtype: ``dict``
+        """
+        object_path = self._get_object_path(container, object_name)
+        return self._list_multipart_parts(object_path=object_path,
+                                          upload_id=upload_id)
+
+    def _put_object_multipart(self, container, object_name, iterator,
+                              extra=None, storage_class=None, part_size=None,
+                              concurrency=None, upload_id=None):
         """
+        Upload data from an iterator or a file like object using the
+        multipart upload mechanism.
+
+        If ``upload_id`` is not provided, a new multipart upload is initiated
+        and aborted if the upload fails. Otherwise the provided upload is
+        resumed.
+        """
+        extra = extra or {}
+        part_size = part_size or self.multipart_part_size
+        concurrency = concurrency or self.multipart_concurrency
+
+        if part_size < CHUNK_SIZE:
+            raise ValueError('Part size must be at least %s bytes' %
+                             (CHUNK_SIZE))
 
         object_path = self._get_object_path(container, object_name)
 
-        # Get the upload id from the response xml
-        response.body = response.response.read()
-        body = response.parse_body()
-        upload_id = body.find(fixxpath(xpath='UploadId',
-                                       namespace=self.namespace)).text
+        if upload_id:
+            abort_on_failure = False
+            uploaded_parts = self._list_multipart_parts(
+                object_path=object_path, upload_id=upload_id)
+        else:
+            abort_on_failure = True
+            uploaded_parts = {}
+            upload_id = self.ex_initiate_multipart_upload(
+                container=container, object_name=object_name, extra=extra,
+                ex_storage_class=storage_class)
 
         try:
-            # Upload the data through the iterator
-            result = self._upload_from_iterator(iterator, object_path,
-                                                upload_id, calculate_hash)
+            result = self._upload_from_iterator(
+                iterator, object_path, upload_id, calculate_hash=True,
+                part_size=part_size, concurrency=concurrency,
+                uploaded_parts=uploaded_parts)
             (chunks, data_hash, bytes_transferred) = result
 
             # Commit the chunk info and complete the upload
             etag = self._commit_multipart(object_path, upload_id, chunks)
         except Exception:
             exc = sys.exc_info()[1]
-            # Amazon provides a mechanism for aborting an upload.
-            self._abort_multipart(object_path, upload_id)
-            raise exc
 
-        # Modify the response header of the first request. This is used
-        # by other functions once the callback is done
-        response.headers['etag'] = etag
+            if abort_on_failure:
+                # Amazon provides a mechanism for aborting an upload.
+                self._abort_multipart(object_path, upload_id)
+
+            raise exc
 
-        return (True, data_hash, bytes_transferred)
+        return Object(name=object_name, size=bytes_transferred,
+                      hash=etag.replace('"', ''),
+                      extra={'acl': extra.get('acl', None)},
+                      meta_data=extra.get('meta_data', None),
+                      container=container, driver=self)
 
     def _upload_from_iterator(self, iterator, object_path, upload_id,
-                              calculate_hash=True):
+                              calculate_hash=True, part_size=None,
+                              concurrency=1, uploaded_parts=None):
         """
         Uploads data from an iterator in fixed sized chunks to S3
 
+        Parts are read sequentially from the iterator and, if concurrency is
+        greater than 1, uploaded in parallel. At most ``concurrency`` parts
+        are being uploaded or waiting to be uploaded at any time which bounds
+        the memory usage.
+
         :param iterator: The generator for fetching the upload data
         :type iterator: ``generator``
 
@@ -511,6 +678,17 @@ class BaseS3StorageDriver(StorageDriver):
         :keyword calculate_hash: Indicates if we must calculate the data hash
         :type calculate_hash: ``bool``
 
+        :keyword part_size: Size of a single part (defaults to CHUNK_SIZE)
+        :type part_size: ``int``
+
+        :keyword concurrency: Number of parts uploaded in parallel
+        :type concurrency: ``int``
+
+        :keyword uploaded_parts: Parts which have already been uploaded as
+                                 returned by ``_list_multipart_parts``. Those
+                                 are skipped if their hash and size match.
+        :type uploaded_parts: ``dict``
+
         :return: A tuple of (chunk info, checksum, bytes transferred)
         :rtype: ``tuple``
         """
@@ -519,46 +697,152 @@ class BaseS3StorageDriver(StorageDriver):
         if calculate_hash:
             data_hash = self._get_hash_function()
 
-        bytes_transferred = 0
-        count = 1
-        chunks = []
-        params = {'uploadId': upload_id}
-
-        # Read the input data in chunk sizes suitable for AWS
-        for data in read_in_chunks(iterator, chunk_size=CHUNK_SIZE,
-                                   fill_size=True, yield_empty=True):
-            bytes_transferred += len(data)
+        part_size = part_size or CHUNK_SIZE
+        uploaded_parts = uploaded_parts or {}
 
-            if calculate_hash:
-                data_hash.update(data)
+        bytes_transferred = [0]
 
-            chunk_hash = self._get_hash_function()
-            chunk_hash.update(data)
-            chunk_hash = base64.b64encode(chunk_hash.digest()).decode('utf-8')
+        def get_parts():
+            # Read the input data in chunk sizes suitable for AWS
+            chunks = read_in_chunks(iterator, chunk_size=part_size,
+                                    fill_size=True, yield_empty=True)
 
-            # This provides an extra level of data check and is recommended
-            # by amazon
-            headers = {'Content-MD5': chunk_hash}
-            params['partNumber'] = count
+            for index, data in enumerate(chunks):
+                bytes_transferred[0] += len(data)
 
-            request_path = '?'.join((object_path, urlencode(params)))
+                if calculate_hash:
+                    data_hash.update(data)
 
-            resp = self.connection.request(request_path, method='PUT',
-                                           data=data, headers=headers)
+                yield index + 1, data
 
-            if resp.status != httplib.OK:
-                raise LibcloudError('Error uploading chunk', driver=self)
+        def upload_part(connection, part):
+            part_number, data = part
 
-            server_hash = resp.headers['etag']
+            if self._is_part_uploaded(data=data,
+                                      part=uploaded_parts.get(part_number)):
+                etag = uploaded_parts[part_number][0]
+            else:
+                etag = self._upload_part(connection=connection,
+                                         object_path=object_path,
+                                         upload_id=upload_id,
+                                         part_number=part_number, data=data)
 
             # Keep this data for a later commit
-            chunks.append((count, server_hash))
-            count += 1
+            return (part_number, etag)
+
+        if concurrency > 1:
+            workers = [self.connection.clone() for _ in range(concurrency)]
+        else:
+            workers = [self.connection]
+
+        chunks = map_with_workers(upload_part, get_parts(), workers=workers)
 
         if calculate_hash:
             data_hash = data_hash.hexdigest()
 
-        return (chunks, data_hash, bytes_transferred)
+        return (chunks, data_hash, bytes_transferred[0])
+
+    def _is_part_uploaded(self, data, part):
+        """
+        Return True if the provided part has already been uploaded and
+        matches the provided data.
+        """
+        if not part:
+            return False
+
+        etag, size = part
+
+        if size != len(data):
+            return False
+
+        part_hash = self._get_hash_function()
+        part_hash.update(data)
+        return part_hash.hexdigest() == etag.replace('"', '')
+
+    def _upload_part(self, connection, object_path, upload_id, part_number,
+                     data):
+        """
+        Upload a single part of a multipart upload. Failed uploads are retried
+        up to ``multipart_part_retries`` times.
+
+        :return: Part ETag returned by the server.
+        :rtype: ``str``
+        """
+        chunk_hash = self._get_hash_function()
+        chunk_hash.update(data)
+        chunk_hash = base64.b64encode(chunk_hash.digest()).decode('utf-8')
+
+        # This provides an extra level of data check and is recommended
+        # by amazon
+        headers = {'Content-MD5': chunk_hash}
+        params = {'uploadId': upload_id, 'partNumber': part_number}
+        request_path = '?'.join((object_path, urlencode(params)))
+
+        attempt = 0
+
+        while True:
+            try:
+                resp = connection.request(request_path, method='PUT',
+                                          data=data, headers=headers)
+
+                if resp.status != httplib.OK:
+                    raise LibcloudError('Error uploading chunk', driver=self)
+
+                return resp.headers['etag']
+            except InvalidCredsError:
+                raise
+            except Exception:
+                attempt += 1
+
+                if attempt > self.multipart_part_retries:
+                    raise
+
+                time.sleep(self.multipart_retry_delay * attempt)
+
+    def _list_multipart_parts(self, object_path, upload_id):
+        """
+        Return parts which have already been uploaded as part of the provided
+        multipart upload.
+
+        :return: Dictionary mapping part number to a (etag, size) tuple.
+        :rtype: ``dict``
+        """
+        params = {'uploadId': upload_id, 'max-parts': PARTS_PER_REQUEST}
+        parts = {}
+
+        while True:
+            response = self.connection.request(object_path, params=params)
+
+            if response.status != httplib.OK:
+                raise LibcloudError('Error listing multipart upload parts. '
+                                    'status_code=%d' % (response.status),
+                                    driver=self)
+
+            body = response.parse_body()
+
+            # pylint: disable=maybe-no-member
+            for node in body.findall(fixxpath(xpath='Part',
+                                              namespace=self.namespace)):
+                part_number = int(findtext(element=node, xpath='PartNumber',
+                                           namespace=self.namespace))
+                etag = findtext(element=node, xpath='ETag',
+                                namespace=self.namespace)
+                size = int(findtext(element=node, xpath='Size',
+                                    namespace=self.namespace))
+                parts[part_number] = (etag, size)
+
+            # pylint: disable=maybe-no-member
+            is_truncated = body.findtext(fixxpath(xpath='IsTruncated',
+                                                  namespace=self.namespace))
+
+            if not is_truncated or is_truncated.lower() == 'false':
+                break
+
+            params['part-number-marker'] = body.findtext(
+                fixxpath(xpath='NextPartNumberMarker',
+                         namespace=self.namespace))
+
+        return parts
 
     def _commit_multipart(self, object_path, upload_id, chunks):
         """
@@ -624,31 +908,42 @@ class BaseS3StorageDriver(StorageDriver):
                                 (resp.status), driver=self)
 
     def upload_object_via_stream(self, iterator, container, object_name,
-                                 extra=None, ex_storage_class=None):
+                                 extra=None, ex_storage_class=None,
+                                 ex_part_size=None, ex_concurrency=None,
+                                 ex_upload_id=None):
         """
         @inherits: :class:`StorageDriver.upload_object_via_stream`
 
         :param ex_storage_class: Storage class
         :type ex_storage_class: ``str``
-        """
 
-        method = 'PUT'
-        params = None
+        :param ex_part_size: Size of a single part in bytes (defaults to
+                             ``multipart_part_size``, minimum is 5 MB). Only
+                             used by drivers which support multipart uploads.
+        :type ex_part_size: ``int``
+
+        :param ex_concurrency: Number of parts which are uploaded in parallel
+                               (defaults to ``multipart_concurrency``).
+        :type ex_concurrency: ``int``
+
+        :param ex_upload_id: ID of an existing multipart upload to resume.
+        :type ex_upload_id: ``str``
+        """
 
         # This driver is used by other S3 API compatible drivers also.
         # Amazon provides a different (complex?) mechanism to do multipart
         # uploads
         if self.supports_s3_multipart_upload:
-            # Initiate the multipart request and get an upload id
-            upload_func = self._upload_multipart
-            upload_func_kwargs = {'iterator': iterator,
-                                  'container': container,
-                                  'object_name': object_name}
-            method = 'POST'
-            iterator = iter('')
-            params = 'uploads'
-
-        elif self.supports_chunked_encoding:
+            return self._put_object_multipart(
+                container=container, object_name=object_name,
+                iterator=iterator, extra=extra,
+                storage_class=ex_storage_class, part_size=ex_part_size,
+                concurrency=ex_concurrency, upload_id=ex_upload_id)
+
+        method = 'PUT'
+        params = None
+
+        if self.supports_chunked_encoding:
             upload_func = self._stream_data
             upload_func_kwargs = {'iterator': iterator}
         else:
@@ -780,10 +1075,10 @@ class BaseS3StorageDriver(StorageDriver):
         name = urlquote(name)
         return name
 
-    def _put_object(self, container, object_name, upload_func,
-                    upload_func_kwargs, method='PUT', query_args=None,
-                    extra=None, file_path=None, iterator=None,
-                    verify_hash=True, storage_class=None):
+    def _get_put_object_headers(self, extra=None, storage_class=None):
+        """
+        Return storage class, meta data and ACL headers for an object upload.
+        """
         headers = {}
         extra = extra or {}
         storage_class = storage_class or 'standard'
@@ -794,7 +1089,6 @@ class BaseS3StorageDriver(StorageDriver):
         key = self.http_vendor_prefix + '-storage-class'
         headers[key] = storage_class.upper()
 
-        content_type = extra.get('content_type', None)
         meta_data = extra.get('meta_data', None)
         acl = extra.get('acl', None)
 
@@ -806,6 +1100,20 @@ class BaseS3StorageDriver(StorageDriver):
         if acl:
             headers[self.http_vendor_prefix + '-acl'] = acl
 
+        return headers
+
+    def _put_object(self, container, object_name, upload_func,
+                    upload_func_kwargs, method='PUT', query_args=None,
+                    extra=None, file_path=None, iterator=None,
+                    verify_hash=True, storage_class=None):
+        extra = extra or {}
+        headers = self._get_put_object_headers(extra=extra,
+                                               storage_class=storage_class)
+
+        content_type = extra.get('content_type', None)
+        meta_data = extra.get('meta_data', None)
+        acl = extra.get('acl', None)
+
         request_path = self._get_object_path(container, object_name)
 
         if query_args:
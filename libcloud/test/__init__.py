@@ -107,6 +107,9 @@ class MockResponse(object):
     def getheaders(self):
         return list(self.headers.items())
 
+    def close(self):
+        self.body.close()
+
     def msg(self):
         raise NotImplemented
 
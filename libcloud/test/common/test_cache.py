@@ -0,0 +1,363 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import stat
+import pickle
+import shutil
+import tempfile
+
+from mock import Mock, patch
+
+from libcloud.test import unittest
+from libcloud.utils.py3 import b
+from libcloud.common.cache import MemoryCacheBackend
+from libcloud.common.cache import FileCacheBackend
+from libcloud.common.cache import ResponseCache
+from libcloud.compute.drivers.dummy import DummyNodeDriver
+
+
+class CountingDummyNodeDriver(DummyNodeDriver):
+    def __init__(self, creds):
+        super(CountingDummyNodeDriver, self).__init__(creds)
+        self.calls = []
+
+    def list_images(self, location=None):
+        self.calls.append(('list_images', location))
+        return super(CountingDummyNodeDriver, self).list_images(
+            location=location)
+
+    def list_sizes(self, location=None):
+        self.calls.append(('list_sizes', location))
+        return super(CountingDummyNodeDriver, self).list_sizes(
+            location=location)
+
+
+class MemoryCacheBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.backend = MemoryCacheBackend(max_size=2)
+
+    def test_get_and_set(self):
+        self.assertRaises(KeyError, self.backend.get, 'tag', 'key')
+
+        self.backend.set('tag', 'key', 'value', 10)
+        self.assertEqual(self.backend.get('tag', 'key'), 'value')
+
+    def test_expired_entry(self):
+        with patch('libcloud.common.cache.time.time') as mock_time:
+            mock_time.return_value = 100
+            self.backend.set('tag', 'key', 'value', 10)
+
+            mock_time.return_value = 110
+            self.assertRaises(KeyError, self.backend.get, 'tag', 'key')
+
+        self.assertEqual(len(self.backend), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.backend.set('tag', 'key1', 'value1', 10)
+        self.backend.set('tag', 'key2', 'value2', 10)
+        self.backend.get('tag', 'key1')
+        self.backend.set('tag', 'key3', 'value3', 10)
+
+        self.assertEqual(len(self.backend), 2)
+        self.assertEqual(self.backend.get('tag', 'key1'), 'value1')
+        self.assertEqual(self.backend.get('tag', 'key3'), 'value3')
+        self.assertRaises(KeyError, self.backend.get, 'tag', 'key2')
+
+    def test_delete(self):
+        self.backend.set('tag1', 'key1', 'value1', 10)
+        self.backend.set('tag2', 'key2', 'value2', 10)
+
+        self.backend.delete('tag1')
+        self.assertRaises(KeyError, self.backend.get, 'tag1', 'key1')
+        self.assertEqual(self.backend.get('tag2', 'key2'), 'value2')
+
+        self.backend.delete('tag2', 'key2')
+        self.assertEqual(len(self.backend), 0)
+
+
+class FileCacheBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.backend = FileCacheBackend(directory=self.directory, max_size=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_get_and_set(self):
+        self.assertRaises(KeyError, self.backend.get, 'tag', 'key')
+
+        self.backend.set('tag', 'key', b('value'), 10)
+        self.assertEqual(self.backend.get('tag', 'key'), b('value'))
+
+        # Entries are shared by all the backends using the same directory
+        backend = FileCacheBackend(directory=self.directory)
+        self.assertEqual(backend.get('tag', 'key'), b('value'))
+
+    def test_expired_entry(self):
+        with patch('libcloud.common.cache.time.time') as mock_time:
+            mock_time.return_value = 100
+            self.backend.set('tag', 'key', b('value'), 10)
+
+            mock_time.return_value = 110
+            self.assertRaises(KeyError, self.backend.get, 'tag', 'key')
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.backend.set('tag', 'key1', b('value1'), 10)
+        self.backend.set('tag', 'key2', b('value2'), 10)
+
+        with patch('libcloud.common.cache.os.path.getmtime') as getmtime:
+            getmtime.side_effect = lambda path: {'key1': 2, 'key2': 1,
+                                                 'key3': 3}[path[-4:]]
+            self.backend.set('tag', 'key3', b('value3'), 10)
+
+        self.assertEqual(self.backend.get('tag', 'key1'), b('value1'))
+        self.assertEqual(self.backend.get('tag', 'key3'), b('value3'))
+        self.assertRaises(KeyError, self.backend.get, 'tag', 'key2')
+
+    def test_directory_is_created_with_private_permissions(self):
+        directory = os.path.join(self.directory, 'cache')
+        backend = FileCacheBackend(directory=directory)
+        backend.set('tag', 'key', b('value'), 10)
+
+        for path in [directory, os.path.join(directory, 'tag')]:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+            self.assertEqual(mode & (stat.S_IRWXG | stat.S_IRWXO), 0)
+
+        # Directory is recreated after it has been cleared
+        backend.clear()
+        backend.set('tag', 'key', b('value'), 10)
+        self.assertEqual(backend.get('tag', 'key'), b('value'))
+
+    @unittest.skipIf(not hasattr(os, 'getuid'), 'Requires POSIX permissions')
+    def test_insecure_directory_is_refused(self):
+        os.chmod(self.directory, 0o777)
+        self.assertRaises(ValueError, FileCacheBackend, self.directory)
+
+        os.chmod(self.directory, 0o700)
+        link = self.directory + '-link'
+        os.symlink(self.directory, link)
+
+        try:
+            self.assertRaises(ValueError, FileCacheBackend, link)
+        finally:
+            os.remove(link)
+
+        with patch('libcloud.common.cache.os.getuid') as getuid:
+            getuid.return_value = os.getuid() + 1
+            self.assertRaises(ValueError, FileCacheBackend, self.directory)
+
+    def test_delete(self):
+        self.backend.set('tag1', 'key1', b('value1'), 10)
+        self.backend.set('tag2', 'key2', b('value2'), 10)
+
+        self.backend.delete('tag1')
+        self.assertRaises(KeyError, self.backend.get, 'tag1', 'key1')
+        self.assertEqual(self.backend.get('tag2', 'key2'), b('value2'))
+
+        self.backend.clear()
+        self.assertRaises(KeyError, self.backend.get, 'tag2', 'key2')
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.driver = CountingDummyNodeDriver(0)
+
+    def test_results_are_cached(self):
+        cache = self.driver.enable_response_cache()
+
+        images1 = self.driver.list_images()
+        images2 = self.driver.list_images()
+        self.assertEqual([image.id for image in images1],
+                         [image.id for image in images2])
+        self.assertEqual(self.driver.calls, [('list_images', None)])
+
+        # Different arguments are cached separately
+        self.driver.list_images(location='loc')
+        self.driver.list_images(location='loc')
+        self.driver.list_sizes()
+        self.assertEqual(self.driver.calls, [('list_images', None),
+                                             ('list_images', 'loc'),
+                                             ('list_sizes', None)])
+        self.assertEqual(cache.get_stats(),
+                         {'hits': 2, 'misses': 3, 'invalidations': 0})
+
+        # Modifying the returned list doesn't affect the cached value
+        images1.pop()
+        self.assertEqual(len(self.driver.list_images()), len(images2))
+
+    def test_per_method_ttl(self):
+        self.driver.enable_response_cache(ttl=60, ttls={'list_sizes': 0})
+
+        self.driver.list_sizes()
+        self.driver.list_sizes()
+        self.driver.list_images()
+        self.driver.list_images()
+        self.assertEqual(self.driver.calls, [('list_sizes', None),
+                                             ('list_sizes', None),
+                                             ('list_images', None)])
+
+    def test_mutating_call_invalidates_results(self):
+        self.driver.enable_response_cache()
+
+        self.driver.list_images()
+        self.driver.list_sizes()
+
+        # Results are invalidated even if the call fails
+        self.assertRaises(NotImplementedError, self.driver.create_image,
+                          node=None, name='image')
+
+        self.driver.list_images()
+        self.driver.list_sizes()
+        self.assertEqual(self.driver.calls, [('list_images', None),
+                                             ('list_sizes', None),
+                                             ('list_images', None)])
+
+    def test_explicit_invalidation(self):
+        self.driver.enable_response_cache()
+
+        self.driver.list_images()
+        self.driver.invalidate_response_cache()
+        self.driver.list_images()
+        self.assertEqual(len(self.driver.calls), 2)
+
+    def test_disable_response_cache(self):
+        self.driver.enable_response_cache()
+        self.driver.disable_response_cache()
+
+        self.driver.list_images()
+        self.driver.list_images()
+        self.assertEqual(len(self.driver.calls), 2)
+        self.assertTrue(self.driver.response_cache is None)
+
+    def test_worker_driver_uses_own_connection(self):
+        connection = Mock(key='key', user_id=None, host='localhost')
+        connection.clone.return_value = Mock(key='key', user_id=None,
+                                             host='localhost')
+        self.driver.connection = connection
+        cache = self.driver.enable_response_cache()
+
+        worker = self.driver._get_worker_driver()
+        worker.calls = []
+
+        # Cached methods of the worker call the worker, not the original
+        # driver, and the results are shared
+        worker.list_images()
+        self.driver.list_images()
+        self.assertEqual(worker.calls, [('list_images', None)])
+        self.assertEqual(self.driver.calls, [])
+        self.assertTrue(worker.connection is connection.clone.return_value)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+
+        self.driver.disable_response_cache()
+        worker = self.driver._get_worker_driver()
+        self.assertFalse('list_images' in worker.__dict__)
+
+    def test_cache_is_not_shared_between_accounts(self):
+        cache = ResponseCache()
+        driver2 = CountingDummyNodeDriver(1)
+
+        self.driver.enable_response_cache(cache=cache)
+        driver2.enable_response_cache(cache=cache)
+
+        self.driver.list_images()
+        driver2.list_images()
+        self.assertEqual(len(self.driver.calls), 1)
+        self.assertEqual(len(driver2.calls), 1)
+
+    def test_file_backend(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            backend = FileCacheBackend(directory=directory)
+            self.driver.enable_response_cache(
+                cache=ResponseCache(backend=backend))
+            images = self.driver.list_images()
+
+            # Results are shared with other driver instances which use the
+            # same directory and refer to the driver which loaded them
+            driver2 = CountingDummyNodeDriver(0)
+            driver2.enable_response_cache(
+                cache=ResponseCache(backend=FileCacheBackend(directory)))
+            cached_images = driver2.list_images()
+
+            self.assertEqual(driver2.calls, [])
+            self.assertEqual([image.id for image in cached_images],
+                             [image.id for image in images])
+            self.assertTrue(cached_images[0].driver is driver2)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def test_file_backend_entries_are_not_unpickled(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            cache = ResponseCache(backend=FileCacheBackend(directory))
+            self.driver.enable_response_cache(cache=cache)
+            self.driver.list_images()
+
+            # Replace the cached entries with a pickle which would execute
+            # code and with an object of a class which isn't a libcloud one
+            tag = cache._get_tag(driver=self.driver,
+                                 method_name='list_images')
+            key = cache._get_key(args=(None, ), kwargs={})
+            values = [pickle.dumps(Exploit()),
+                      b('{"__object__": ["os", "_wrap_close"], '
+                        '"__state__": {"__dict__": []}}')]
+
+            for value in values:
+                cache.backend.set(tag, key, value, 60)
+                images = self.driver.list_images(None)
+                self.assertTrue(images)
+                self.assertEqual(Exploit.calls, [])
+
+            self.assertEqual(len(self.driver.calls), 3)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def test_unsupported_results_are_not_cached(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            cache = ResponseCache(backend=FileCacheBackend(directory))
+            results = []
+
+            def func():
+                results.append(set([1]))
+                return results[-1]
+
+            cache.call(driver=self.driver, method_name='list_sizes',
+                       func=func)
+            cache.call(driver=self.driver, method_name='list_sizes',
+                       func=func)
+            self.assertEqual(len(results), 2)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def record_exploit_call(value):
+    Exploit.calls.append(value)
+
+
+class Exploit(object):
+    calls = []
+
+    def __reduce__(self):
+        return (record_exploit_call, ('called', ))
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -28,6 +28,7 @@ from libcloud.utils.py3 import parse_qsl
 
 from libcloud.common.cloudstack import CloudStackConnection
 from libcloud.common.types import MalformedResponseError
+from libcloud.utils.concurrency import wait
 
 from libcloud.test import MockHttpTestCase
 
@@ -89,6 +90,23 @@ class CloudStackCommonTest(unittest.TestCase):
         self.connection._async_request('fake')
         self.assertEqual(async_delay, 0)
 
+    def test_submit_async_request_batches_status_checks(self):
+        self.driver.path = '/async/batch'
+        CloudStackMockHttp.batch_requests = []
+
+        futures = [self.connection._submit_async_request('fake')
+                   for _ in range(3)]
+        done, not_done = wait(futures, timeout=5)
+
+        self.assertEqual(not_done, [])
+        self.assertEqual([future.result() for future in futures],
+                         [{'fake': 'result'}] * 3)
+
+        # Only the jobs which have completed are queried individually
+        commands = CloudStackMockHttp.batch_requests
+        self.assertEqual(commands.count('queryasyncjobresult'), 3)
+        self.assertTrue(commands.count('listasyncjobs') >= 2)
+
     def test_signature_algorithm(self):
         cases = [
             (
@@ -127,6 +145,7 @@ class CloudStackCommonTest(unittest.TestCase):
 class CloudStackMockHttp(MockHttpTestCase):
 
     ERROR_TEXT = 'ERROR TEXT'
+    batch_requests = []
 
     def _response(self, status, result, response):
         return (status, json.dumps(result), result, response)
@@ -206,5 +225,30 @@ class CloudStackMockHttp(MockHttpTestCase):
             result = {query['command'].lower() + 'response': {'jobid': '42'}}
         return self._response(httplib.OK, result, httplib.responses[httplib.OK])
 
+    def _async_batch(self, method, url, body, headers):
+        query = self._check_request(url)
+        command = query['command'].lower()
+        CloudStackMockHttp.batch_requests.append(command)
+
+        if command == 'listasyncjobs':
+            # Job "0" is still running during the first status check
+            pending = CloudStackMockHttp.batch_requests.count(command) == 1
+            jobs = [{'jobid': str(job_id),
+                     'jobstatus': 0 if pending and job_id == 0 else 1}
+                    for job_id in range(3)]
+            result = {'listasyncjobsresponse': {'count': 3,
+                                                'asyncjobs': jobs}}
+        elif command == 'queryasyncjobresult':
+            result = {
+                'queryasyncjobresultresponse': {
+                    'jobstatus': 1,
+                    'jobresult': {'fake': 'result'}
+                }
+            }
+        else:
+            job_id = CloudStackMockHttp.batch_requests.count('fake') - 1
+            result = {'fakeresponse': {'jobid': str(job_id)}}
+        return self._response(httplib.OK, result, httplib.responses[httplib.OK])
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
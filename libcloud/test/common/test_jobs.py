@@ -0,0 +1,154 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import time
+
+from libcloud.test import unittest
+from libcloud.common.base import PollingConnection
+from libcloud.common.types import LibcloudError
+from libcloud.utils.concurrency import wait
+
+
+class JobConnection(PollingConnection):
+    """
+    Connection which starts fake jobs which complete after the provided
+    number of status checks.
+    """
+    poll_interval = 0.01
+    max_poll_interval = 0.02
+    timeout = 5
+
+    def __init__(self):
+        super(JobConnection, self).__init__(host='jobs.example.com')
+        self.jobs = {}
+        self.polls = []
+
+    def request(self, action, params=None, data=None, headers=None,
+                method='GET'):
+        if action == '/start':
+            job_id = len(self.jobs)
+            self.jobs[job_id] = params['checks']
+            return {'job_id': job_id}
+
+        job_id = params['job_id']
+        self.polls.append(job_id)
+
+        if self.jobs[job_id] == 'fail':
+            raise ValueError('job %s has failed' % (job_id))
+
+        self.jobs[job_id] -= 1
+        return {'job_id': job_id, 'done': self.jobs[job_id] <= 0}
+
+    def get_poll_request_kwargs(self, response, context, request_kwargs):
+        return {'action': '/status', 'params': {'job_id': response['job_id']}}
+
+    def has_completed(self, response):
+        return response['done']
+
+
+class BatchJobConnection(JobConnection):
+    def __init__(self):
+        super(BatchJobConnection, self).__init__()
+        # Note: Jobs are polled using a copy of the connection
+        self.batch_polls = []
+
+    def get_completed_jobs(self, jobs):
+        self.batch_polls.append(len(jobs))
+        completed = []
+
+        for job in jobs:
+            job_id = job.response['job_id']
+
+            if self.jobs[job_id] <= 1:
+                completed.append(job)
+            else:
+                self.jobs[job_id] -= 1
+
+        return completed
+
+
+class AsyncJobTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.connection = JobConnection()
+
+    def _submit(self, checks):
+        return self.connection.submit_async_request(
+            '/start', params={'checks': checks})
+
+    def _wait_for_tracker(self, tracker):
+        end = time.time() + 5
+
+        while tracker._thread is not None and time.time() < end:
+            time.sleep(0.01)
+
+    def test_submit_and_wait_for_all(self):
+        futures = [self._submit(checks) for checks in [1, 3, 2]]
+        done, not_done = wait(futures, timeout=5)
+
+        self.assertEqual(not_done, [])
+        self.assertEqual([future.result()['job_id'] for future in futures],
+                         [0, 1, 2])
+        self.assertEqual(sorted(self.connection.polls),
+                         [0, 1, 1, 1, 2, 2])
+
+        # Poller thread exits once there are no pending jobs
+        tracker = self.connection.get_job_tracker()
+        self._wait_for_tracker(tracker)
+        self.assertEqual(tracker._thread, None)
+        self.assertEqual(tracker.get_stats()['completed'], 3)
+        self.assertTrue(tracker is self.connection.clone().get_job_tracker())
+
+    def test_wait_for_first_and_timeout(self):
+        self.connection.timeout = 0.1
+        fast = self._submit(1)
+        slow = self._submit(1000)
+
+        done, not_done = wait([slow, fast], count=1, timeout=5)
+        self.assertEqual((done, not_done), ([fast], [slow]))
+
+        self.assertRaises(LibcloudError, slow.result, timeout=5)
+
+    def test_failed_job(self):
+        future = self._submit('fail')
+
+        try:
+            future.result(timeout=5)
+        except ValueError:
+            e = sys.exc_info()[1]
+            self.assertEqual(str(e), 'job 0 has failed')
+        else:
+            self.fail('Exception was not thrown')
+
+    def test_process_response(self):
+        future = self.connection.submit_async_request(
+            '/start', params={'checks': 1},
+            process_response=lambda response: response['job_id'] * 10)
+        self.assertEqual(future.result(timeout=5), 0)
+
+    def test_batched_status_check(self):
+        self.connection = BatchJobConnection()
+        futures = [self._submit(checks) for checks in [1, 2, 4]]
+        done, not_done = wait(futures, timeout=5)
+
+        self.assertEqual(len(done), 3)
+
+        # Only the completed jobs are retrieved individually
+        self.assertEqual(sorted(self.connection.polls), [0, 1, 2])
+        self.assertEqual(self.connection.batch_polls, [3, 2, 1, 1])
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -0,0 +1,284 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import errno
+import socket
+
+from mock import Mock, patch
+
+from libcloud.test import unittest
+from libcloud.test import MockHttp
+from libcloud.utils.py3 import httplib
+from libcloud.common.base import Connection
+from libcloud.common.pool import ConnectionPool
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(max_size=2, idle_timeout=60)
+        self.key = self.pool.get_key(connection_cls=Mock,
+                                     kwargs={'host': 'a', 'port': 443})
+
+    def _connection(self):
+        return Mock(sock=None)
+
+    def test_get_key(self):
+        key1 = self.pool.get_key(connection_cls=Mock,
+                                 kwargs={'host': 'a', 'port': 443})
+        key2 = self.pool.get_key(connection_cls=Mock,
+                                 kwargs={'port': 443, 'host': 'a'})
+        key3 = self.pool.get_key(connection_cls=Mock,
+                                 kwargs={'host': 'b', 'port': 443})
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+    def test_acquire_and_release(self):
+        connection, reused = self.pool.acquire(key=self.key, factory=self._connection)
+        self.assertFalse(reused)
+
+        self.pool.release(key=self.key, connection=connection)
+
+        connection2, reused = self.pool.acquire(key=self.key, factory=self._connection)
+        self.assertTrue(reused)
+        self.assertTrue(connection2 is connection)
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['idle'], 0)
+
+    def test_release_max_size(self):
+        connections = [self._connection(), self._connection(),
+                       self._connection()]
+
+        for connection in connections:
+            self.pool.release(key=self.key, connection=connection)
+
+        self.assertEqual(self.pool.get_stats()['idle'], 2)
+        self.assertEqual(self.pool.get_stats()['discards'], 1)
+        self.assertTrue(connections[2].close.called)
+
+    def test_release_response_will_close(self):
+        connection = self._connection()
+        response = Mock(will_close=True)
+        response.isclosed.return_value = True
+
+        self.pool.release(key=self.key, connection=connection,
+                          response=response)
+        self.assertEqual(self.pool.get_stats()['idle'], 0)
+        self.assertTrue(connection.close.called)
+
+    def test_release_response_not_consumed(self):
+        connection = self._connection()
+        response = Mock(will_close=False)
+        response.isclosed.return_value = False
+
+        self.pool.release(key=self.key, connection=connection,
+                          response=response)
+        self.assertEqual(self.pool.get_stats()['pending'], 1)
+
+        _, reused = self.pool.acquire(key=self.key, factory=self._connection)
+        self.assertFalse(reused)
+
+        # Response has been read until the end, connection is reused
+        response.isclosed.return_value = True
+        connection2, reused = self.pool.acquire(key=self.key, factory=self._connection)
+        self.assertTrue(reused)
+        self.assertTrue(connection2 is connection)
+        self.assertEqual(self.pool.get_stats()['pending'], 0)
+
+    def test_abandoned_pending_connections_are_closed(self):
+        connection = self._connection()
+        response = Mock(will_close=False)
+        response.isclosed.return_value = False
+
+        with patch('libcloud.common.pool.time.time') as mock_time:
+            mock_time.return_value = 100
+            self.pool.release(key=self.key, connection=connection,
+                              response=response)
+
+            mock_time.return_value = 161
+            _, reused = self.pool.acquire(key=self.key,
+                                          factory=self._connection)
+
+        self.assertFalse(reused)
+        self.assertTrue(connection.close.called)
+        self.assertEqual(self.pool.get_stats()['pending'], 0)
+        self.assertEqual(self.pool.get_stats()['evictions'], 1)
+
+    def test_idle_connections_are_evicted(self):
+        connection = self._connection()
+
+        with patch('libcloud.common.pool.time.time') as mock_time:
+            mock_time.return_value = 100
+            self.pool.release(key=self.key, connection=connection)
+
+            mock_time.return_value = 161
+            connection2, reused = self.pool.acquire(key=self.key,
+                                                    factory=self._connection)
+
+        self.assertFalse(reused)
+        self.assertFalse(connection2 is connection)
+        self.assertTrue(connection.close.called)
+        self.assertEqual(self.pool.get_stats()['evictions'], 1)
+
+    def test_evict_idle(self):
+        with patch('libcloud.common.pool.time.time') as mock_time:
+            mock_time.return_value = 100
+            self.pool.release(key=self.key, connection=self._connection())
+            mock_time.return_value = 150
+            self.pool.release(key=self.key, connection=self._connection())
+
+            mock_time.return_value = 170
+            self.assertEqual(self.pool.evict_idle(), 1)
+
+        self.assertEqual(self.pool.get_stats()['idle'], 1)
+
+    def test_dropped_connections_are_evicted(self):
+        sock1, sock2 = socket.socketpair()
+        connection = Mock(sock=sock1)
+
+        try:
+            self.pool.release(key=self.key, connection=connection)
+
+            # Server closed the idle connection
+            sock2.close()
+
+            _, reused = self.pool.acquire(key=self.key, factory=self._connection)
+            self.assertFalse(reused)
+            self.assertTrue(connection.close.called)
+            self.assertEqual(self.pool.get_stats()['evictions'], 1)
+        finally:
+            sock1.close()
+
+    def test_close(self):
+        connection = self._connection()
+        self.pool.release(key=self.key, connection=connection)
+        self.pool.close()
+
+        self.assertTrue(connection.close.called)
+        self.assertEqual(self.pool.get_stats()['idle'], 0)
+
+
+class PooledConnectionTestCase(unittest.TestCase):
+    def setUp(self):
+        PooledMockHttp.instances = 0
+        self.pool = ConnectionPool()
+        self.connection = Connection(host='api.example.com')
+        self.connection.conn_classes = (None, PooledMockHttp)
+        self.connection.connection_pool = self.pool
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            response = self.connection.request('/test')
+            self.assertEqual(response.body, 'ok')
+
+        self.assertEqual(PooledMockHttp.instances, 1)
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['idle'], 1)
+
+    def test_connection_returned_to_pool_on_error_response(self):
+        self.assertRaises(Exception, self.connection.request, '/error')
+        self.assertEqual(self.pool.get_stats()['idle'], 1)
+
+    def test_stale_connection_is_replaced(self):
+        self.connection.request('/test')
+        stale_connection = self.connection.connection
+        stale_connection.request = Mock(side_effect=httplib.BadStatusLine(''))
+
+        response = self.connection.request('/test')
+        self.assertEqual(response.body, 'ok')
+        self.assertFalse(self.connection.connection is stale_connection)
+        self.assertEqual(PooledMockHttp.instances, 2)
+        self.assertEqual(self.pool.get_stats()['discards'], 1)
+
+    def test_closed_without_response_is_replayed(self):
+        self.connection.request('/test')
+        stale_connection = self.connection.connection
+        stale_connection.getresponse = Mock(
+            side_effect=httplib.BadStatusLine(''))
+
+        response = self.connection.request('/test', method='POST')
+        self.assertEqual(response.body, 'ok')
+        self.assertEqual(PooledMockHttp.instances, 2)
+
+    def test_reset_while_waiting_for_response(self):
+        # Request could have been processed so only idempotent requests are
+        # sent again
+        for method, replayed in [('GET', True), ('POST', False)]:
+            self.connection.request('/test')
+            PooledMockHttp.instances = 0
+            stale_connection = self.connection.connection
+            stale_connection.getresponse = Mock(
+                side_effect=socket.error(errno.ECONNRESET, 'reset'))
+
+            if replayed:
+                response = self.connection.request('/test', method=method)
+                self.assertEqual(response.body, 'ok')
+                self.assertEqual(PooledMockHttp.instances, 1)
+            else:
+                self.assertRaises(socket.error, self.connection.request,
+                                  '/test', method=method)
+                self.assertEqual(PooledMockHttp.instances, 0)
+
+            self.assertEqual(stale_connection.getresponse.call_count, 1)
+
+    def test_timeout_is_not_replayed(self):
+        self.connection.request('/test')
+        stale_connection = self.connection.connection
+        stale_connection.getresponse = Mock(side_effect=socket.timeout())
+
+        self.assertRaises(socket.timeout, self.connection.request, '/test')
+        self.assertEqual(PooledMockHttp.instances, 1)
+
+    def test_error_on_new_connection_is_propagated(self):
+        PooledMockHttp.fail = True
+
+        try:
+            self.assertRaises(socket.error, self.connection.request, '/test')
+        finally:
+            PooledMockHttp.fail = False
+
+        self.assertEqual(self.pool.get_stats()['idle'], 0)
+
+
+class PooledMockHttp(MockHttp):
+    instances = 0
+    fail = False
+
+    def __init__(self, *args, **kwargs):
+        super(PooledMockHttp, self).__init__(*args, **kwargs)
+        PooledMockHttp.instances += 1
+
+    def request(self, *args, **kwargs):
+        if self.fail:
+            raise socket.error('Connection refused')
+
+        return super(PooledMockHttp, self).request(*args, **kwargs)
+
+    def _test(self, method, url, body, headers):
+        return (httplib.OK, 'ok', {}, httplib.responses[httplib.OK])
+
+    def _error(self, method, url, body, headers):
+        return (httplib.INTERNAL_SERVER_ERROR, 'error', {},
+                httplib.responses[httplib.INTERNAL_SERVER_ERROR])
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
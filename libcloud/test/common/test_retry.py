@@ -0,0 +1,272 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import with_statement
+
+import sys
+import ssl
+import errno
+import socket
+
+from mock import Mock, patch
+
+from libcloud.test import unittest, MockResponse
+from libcloud.utils.py3 import httplib
+from libcloud.utils.misc import TRANSIENT_SSL_ERROR
+from libcloud.common.base import Connection
+from libcloud.common.exceptions import BaseHTTPError, RateLimitReachedError
+from libcloud.common.retry import RetryPolicy, TokenBucket
+from libcloud.common.retry import get_token_bucket, parse_retry_after
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy()
+
+    def test_should_retry_idempotent_methods(self):
+        for method in ['GET', 'PUT', 'DELETE', 'head']:
+            self.assertTrue(self.policy.should_retry(method, socket.error()))
+
+        self.assertTrue(self.policy.should_retry(
+            'GET', ssl.SSLError(TRANSIENT_SSL_ERROR)))
+        self.assertFalse(self.policy.should_retry(
+            'GET', ssl.SSLError('certificate verify failed')))
+        self.assertFalse(self.policy.should_retry('GET', ValueError()))
+
+    def test_should_retry_non_idempotent_methods(self):
+        reset = socket.error(errno.ECONNRESET, 'Connection reset by peer')
+        refused = socket.error(errno.ECONNREFUSED, 'Connection refused')
+
+        self.assertFalse(self.policy.should_retry('POST', reset))
+        self.assertFalse(self.policy.should_retry('POST', socket.timeout()))
+        self.assertTrue(self.policy.should_retry('POST', refused))
+        self.assertTrue(self.policy.should_retry('POST', socket.gaierror()))
+        self.assertTrue(self.policy.should_retry(
+            'POST', RateLimitReachedError()))
+
+        policy = RetryPolicy(unsent_errnos=(errno.ECONNRESET, ))
+        self.assertTrue(policy.should_retry('POST', reset))
+
+    def test_get_retry_status_codes(self):
+        self.assertEqual(self.policy.get_retry_status_codes('GET'),
+                         (429, 502, 503, 504))
+        self.assertEqual(self.policy.get_retry_status_codes('POST'), (429, ))
+
+    def test_get_delay(self):
+        policy = RetryPolicy(base_delay=1, max_delay=10, backoff_factor=3)
+        delay = None
+
+        for _ in range(20):
+            previous_delay = delay
+            delay = policy.get_delay(previous_delay=delay)
+            upper = min(max(previous_delay or 0, 1) * 3, 10)
+            self.assertTrue(1 <= delay <= upper)
+
+        # Backoff factor of 1 means a constant delay
+        policy = RetryPolicy(base_delay=2, backoff_factor=1)
+        self.assertEqual(policy.get_delay(previous_delay=2), 2)
+
+    def test_get_retry_after(self):
+        self.assertEqual(self.policy.get_retry_after(
+            headers={'Retry-After': '5'}), 5)
+        self.assertEqual(self.policy.get_retry_after(headers={}), None)
+
+        policy = RetryPolicy(respect_retry_after=False)
+        self.assertEqual(policy.get_retry_after(
+            headers={'retry-after': '5'}), None)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertEqual(parse_retry_after(' 1.5 '), 1.5)
+        self.assertEqual(parse_retry_after('-1'), 0)
+        self.assertEqual(parse_retry_after(None), None)
+        self.assertEqual(parse_retry_after('invalid'), None)
+
+        # Sun, 06 Nov 1994 08:49:37 GMT
+        self.assertEqual(parse_retry_after('Sun, 06 Nov 1994 08:49:37 GMT',
+                                           now=784111767), 10)
+        self.assertEqual(parse_retry_after('Sun, 06 Nov 1994 08:49:37 GMT',
+                                           now=784111787), 0)
+
+    def test_rate_limit_error_retry_after(self):
+        error = RateLimitReachedError(retry_after='3')
+        self.assertEqual(error.retry_after, 3)
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    def test_acquire(self):
+        bucket = TokenBucket(rate=4, capacity=2)
+
+        with patch('libcloud.common.retry.time') as mock_time:
+            mock_time.time.return_value = 100
+            bucket._updated = 100
+
+            # Burst is served straight away
+            self.assertEqual(bucket.acquire(), 0)
+            self.assertEqual(bucket.acquire(), 0)
+
+            def sleep(seconds):
+                mock_time.time.return_value += seconds
+
+            mock_time.sleep.side_effect = sleep
+            self.assertEqual(bucket.acquire(), 0.25)
+
+    def test_pause(self):
+        bucket = TokenBucket()
+
+        with patch('libcloud.common.retry.time') as mock_time:
+            mock_time.time.return_value = 100
+            self.assertEqual(bucket.acquire(), 0)
+
+            bucket.pause(5)
+            mock_time.sleep.side_effect = \
+                lambda seconds: setattr(mock_time.time, 'return_value',
+                                        mock_time.time.return_value + seconds)
+            self.assertEqual(bucket.acquire(), 5)
+
+    def test_get_token_bucket(self):
+        bucket = get_token_bucket(key=('test', 'shared'))
+        self.assertTrue(get_token_bucket(key=('test', 'shared')) is bucket)
+        self.assertEqual(bucket.rate, None)
+
+        get_token_bucket(key=('test', 'shared'), rate=5, capacity=10)
+        self.assertEqual((bucket.rate, bucket.capacity), (5, 10))
+
+
+class ConnectionRetryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.connection = Connection(host='retry.example.com')
+        self.connection.connect = Mock()
+        self.connection.connection = Mock()
+        self.responses = []
+        self.connection.connection.getresponse.side_effect = \
+            lambda: self.responses.pop(0)
+
+        patcher = patch('libcloud.common.base.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Each test uses its own rate limiters which aren't paused since
+        # sleep is mocked
+        patcher = patch.dict('libcloud.common.retry._token_buckets', {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch('libcloud.common.retry.TokenBucket.pause')
+        self.pause = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _response(self, status, headers=None):
+        return MockResponse(status, 'body', headers or {},
+                            httplib.responses.get(status, 'Unknown'))
+
+    def test_retry_disabled_by_default(self):
+        self.responses = [self._response(httplib.SERVICE_UNAVAILABLE)]
+
+        self.assertRaises(BaseHTTPError, self.connection.request, '/')
+        self.assertEqual(self.connection.connection.request.call_count, 1)
+
+    def test_retry_status_code(self):
+        self.connection.set_retry_policy(RetryPolicy(base_delay=1))
+        self.responses = [self._response(httplib.SERVICE_UNAVAILABLE),
+                          self._response(httplib.BAD_GATEWAY),
+                          self._response(httplib.OK)]
+
+        response = self.connection.request('/')
+        self.assertEqual(response.status, httplib.OK)
+        self.assertEqual(self.connection.connection.request.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_retry_gives_up_after_max_attempts(self):
+        self.connection.set_retry_policy(RetryPolicy(max_attempts=2))
+        self.responses = [self._response(httplib.SERVICE_UNAVAILABLE),
+                          self._response(httplib.SERVICE_UNAVAILABLE)]
+
+        try:
+            self.connection.request('/')
+        except BaseHTTPError:
+            e = sys.exc_info()[1]
+            self.assertEqual(e.code, httplib.SERVICE_UNAVAILABLE)
+        else:
+            self.fail('Exception was not thrown')
+
+        self.assertEqual(self.connection.connection.request.call_count, 2)
+
+    def test_non_idempotent_request_is_only_retried_when_throttled(self):
+        self.connection.set_retry_policy(RetryPolicy())
+        self.responses = [self._response(httplib.SERVICE_UNAVAILABLE)]
+
+        self.assertRaises(BaseHTTPError, self.connection.request, '/',
+                          method='POST')
+        self.assertEqual(self.connection.connection.request.call_count, 1)
+
+        self.responses = [self._response(429, {'retry-after': '7'}),
+                          self._response(httplib.OK)]
+        response = self.connection.request('/', method='POST')
+        self.assertEqual(response.status, httplib.OK)
+        self.assertEqual(self.connection.connection.request.call_count, 3)
+
+    def test_retry_after_is_respected_and_shared(self):
+        self.connection.set_retry_policy(RetryPolicy(base_delay=1))
+        self.responses = [self._response(429, {'retry-after': '7'}),
+                          self._response(httplib.OK)]
+
+        self.connection.request('/')
+        self.sleep.assert_called_once_with(7)
+        self.pause.assert_called_once_with(7)
+
+    def test_retry_after_longer_than_timeout(self):
+        self.connection.set_retry_policy(RetryPolicy(timeout=5))
+        self.responses = [self._response(429, {'retry-after': '60'})]
+
+        self.assertRaises(RateLimitReachedError, self.connection.request, '/')
+        self.assertEqual(self.sleep.call_count, 0)
+
+    def test_retry_exception(self):
+        self.connection.set_retry_policy(RetryPolicy())
+        self.connection.connection.request.side_effect = [
+            socket.error(errno.ECONNRESET, 'Connection reset by peer'), None]
+        self.responses = [self._response(httplib.OK)]
+
+        response = self.connection.request('/')
+        self.assertEqual(response.status, httplib.OK)
+
+        # Request which might have been processed isn't retried
+        self.connection.connection.request.side_effect = \
+            socket.error(errno.ECONNRESET, 'Connection reset by peer')
+        self.assertRaises(socket.error, self.connection.request, '/',
+                          method='POST')
+        self.assertEqual(self.connection.connection.request.call_count, 3)
+
+    def test_rate_limit(self):
+        # Note: Rate limit is shared by all the connections to the same host
+        self.connection.host = 'rate-limit.example.com'
+        self.connection.set_rate_limit(5, burst=1)
+        self.responses = [self._response(httplib.OK)]
+
+        with patch('libcloud.common.retry.TokenBucket.acquire') as acquire:
+            self.connection.request('/')
+
+        self.assertEqual(acquire.call_count, 1)
+
+        bucket = self.connection._get_rate_limiter()
+        self.assertEqual((bucket.rate, bucket.capacity), (5, 1))
+        self.assertTrue(bucket is Connection(
+            host='rate-limit.example.com')._get_rate_limiter(
+                retry_policy=RetryPolicy()))
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -16,6 +16,8 @@
 import sys
 import os
 
+from mock import patch
+
 from libcloud.utils.py3 import httplib
 from libcloud.utils.py3 import urlparse
 from libcloud.utils.py3 import parse_qsl
@@ -25,6 +27,7 @@ try:
 except ImportError:
     import json
 
+from libcloud.utils.concurrency import wait
 from libcloud.compute.base import NodeLocation
 from libcloud.common.types import ProviderError
 from libcloud.compute.drivers.cloudstack import CloudStackNodeDriver, \
@@ -620,6 +623,46 @@ class CloudStackCommonTestCase(TestCaseMixin):
         self.assertEqual('bc7ea3ee-a2c3-4b86-a53f-01bdaa1b2e32',
                          nodes[0].extra['port_forwarding_rules'][0].id)
 
+    def test_list_nodes_sequential(self):
+        nodes = self.driver.list_nodes()
+
+        self.driver.list_nodes_max_workers = 1
+        with patch.object(self.driver.connection, 'clone') as clone:
+            sequential = self.driver.list_nodes()
+            self.assertFalse(clone.called)
+
+        def summary(node):
+            return (node.id, node.public_ips,
+                    [rule.id for rule in node.extra['ip_forwarding_rules']],
+                    [rule.id for rule in node.extra['port_forwarding_rules']])
+
+        self.assertEqual([summary(node) for node in sequential],
+                         [summary(node) for node in nodes])
+
+    def test_list_nodes_pagination(self):
+        pages = []
+
+        def list_nodes_mock(self, page, pagesize, **kwargs):
+            pages.append((page, pagesize))
+
+            body, obj = self._load_fixture('listVirtualMachines_default.json')
+            response = obj['listvirtualmachinesresponse']
+            vms = response['virtualmachine']
+            response['count'] = len(vms)
+            response['virtualmachine'] = vms[int(page) - 1:int(page)]
+            return (httplib.OK, json.dumps(obj), obj,
+                    httplib.responses[httplib.OK])
+
+        self.driver.list_page_size = 1
+        CloudStackMockHttp._cmd_listVirtualMachines = list_nodes_mock
+        try:
+            nodes = self.driver.list_nodes()
+        finally:
+            del CloudStackMockHttp._cmd_listVirtualMachines
+
+        self.assertEqual([node.id for node in nodes], ['2600', '2601'])
+        self.assertEqual(pages, [('1', '1'), ('2', '1')])
+
     def test_list_nodes_location_filter(self):
         def list_nodes_mock(self, **kwargs):
             self.assertTrue('zoneid' in kwargs)
@@ -673,6 +716,19 @@ class CloudStackCommonTestCase(TestCaseMixin):
         res = node.ex_stop()
         self.assertEqual('Stopped', res)
 
+    def test_ex_submit_async_request(self):
+        node = self.driver.list_nodes()[0]
+        futures = [self.driver.ex_submit_async_request(
+            command='stopVirtualMachine', params={'id': node.id})
+            for _ in range(2)]
+
+        done, not_done = wait(futures, timeout=10)
+        self.assertEqual(not_done, [])
+
+        for future in futures:
+            self.assertEqual(future.result()['virtualmachine']['state'],
+                             'Stopped')
+
     def test_destroy_node(self):
         node = self.driver.list_nodes()[0]
         res = node.destroy()
@@ -1293,6 +1349,11 @@ class CloudStackMockHttp(MockHttpTestCase):
             body, obj = self._load_fixture(fixture)
             return (httplib.OK, body, obj, httplib.responses[httplib.OK])
 
+    def _cmd_listAsyncJobs(self):
+        obj = {'listasyncjobsresponse': {}}
+        return (httplib.OK, json.dumps(obj), obj,
+                httplib.responses[httplib.OK])
+
     def _cmd_queryAsyncJobResult(self, jobid):
         fixture = 'queryAsyncJobResult' + '_' + str(jobid) + '.json'
         body, obj = self._load_fixture(fixture)
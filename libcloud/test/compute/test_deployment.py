@@ -19,11 +19,17 @@ from __future__ import with_statement
 import os
 import sys
 import time
+import shutil
+import hashlib
+import tarfile
+import tempfile
 import unittest
+from io import BytesIO
 
 from libcloud.utils.py3 import httplib
 from libcloud.utils.py3 import u
 from libcloud.utils.py3 import PY3
+from libcloud.utils.py3 import b
 
 from libcloud.compute.deployment import MultiStepDeployment, Deployment
 from libcloud.compute.deployment import SSHKeyDeployment, ScriptDeployment
@@ -103,6 +109,90 @@ class DeploymentTests(unittest.TestCase):
         self.assertEqual(self.node, fd.run(
             node=self.node, client=MockClient(hostname='localhost')))
 
+    def _create_directory_tree(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        os.mkdir(os.path.join(directory, 'sub'))
+
+        for name, content in [('a.txt', 'aaa'), ('sub/b.txt', 'bbbb')]:
+            with open(os.path.join(directory, name), 'wb') as fp:
+                fp.write(b(content))
+
+        os.chmod(os.path.join(directory, 'a.txt'), int('755', 8))
+        return directory
+
+    def _get_mock_client(self):
+        client = Mock()
+        client.uploaded = {}
+
+        def putfo(path, fo, chmod=None):
+            client.uploaded[path] = (fo.read(), chmod)
+            return path
+
+        client.putfo.side_effect = putfo
+        client.run.return_value = ('', '', 0)
+        return client
+
+    def test_file_deployment_directory(self):
+        directory = self._create_directory_tree()
+        client = self._get_mock_client()
+
+        fd = FileDeployment(directory, '/opt/app/')
+        self.assertEqual(self.node, fd.run(node=self.node, client=client))
+
+        self.assertEqual(client.uploaded, {
+            '/opt/app/a.txt': (b('aaa'), int('755', 8)),
+            '/opt/app/sub/b.txt': (b('bbbb'), int('644', 8))
+        })
+        self.assertEqual(fd.uploaded, ['/opt/app/a.txt', '/opt/app/sub/b.txt'])
+        self.assertFalse(client.run.called)
+
+    def test_file_deployment_skip_unchanged(self):
+        directory = self._create_directory_tree()
+        client = self._get_mock_client()
+        client.run.return_value = (
+            '%s  /opt/app/a.txt\n' % (hashlib.md5(b('aaa')).hexdigest()),
+            '', 0)
+
+        fd = FileDeployment(directory, '/opt/app', skip_unchanged=True)
+        fd.run(node=self.node, client=client)
+
+        # Checksums of all the files are retrieved using a single command
+        self.assertEqual(client.run.call_count, 1)
+        cmd = client.run.call_args[0][0]
+        self.assertTrue('wc -c < /opt/app/a.txt)" -eq 3' in cmd)
+        self.assertTrue('md5sum /opt/app/sub/b.txt' in cmd)
+
+        self.assertEqual(list(client.uploaded.keys()), ['/opt/app/sub/b.txt'])
+        self.assertEqual(fd.skipped, ['/opt/app/a.txt'])
+        self.assertEqual(fd.uploaded, ['/opt/app/sub/b.txt'])
+
+    def test_file_deployment_tarball(self):
+        directory = self._create_directory_tree()
+        client = self._get_mock_client()
+
+        fd = FileDeployment(directory, '/opt/app', tarball=True)
+        fd.run(node=self.node, client=client)
+
+        self.assertEqual(len(client.uploaded), 1)
+        tarball_path, (data, _) = list(client.uploaded.items())[0]
+        self.assertTrue(tarball_path.startswith('/opt/app/.libcloud_'))
+
+        tar = tarfile.open(fileobj=BytesIO(data), mode='r:gz')
+        self.assertEqual(sorted(tar.getnames()), ['a.txt', 'sub/b.txt'])
+        self.assertEqual(tar.getmember('a.txt').mode, int('755', 8))
+        tar.close()
+
+        cmd = client.run.call_args[0][0]
+        self.assertTrue(cmd.startswith('tar -xzf %s -C /opt/app;' %
+                                       (tarball_path)))
+        self.assertTrue('rm -f %s' % (tarball_path) in cmd)
+
+        client.run.return_value = ('', 'tar: error', 2)
+        self.assertRaises(LibcloudError, fd.run, node=self.node,
+                          client=client)
+
     def test_script_deployment(self):
         sd1 = ScriptDeployment(script='foobar', delete=True)
         sd2 = ScriptDeployment(script='foobar', delete=False)
@@ -455,6 +545,90 @@ class DeploymentTests(unittest.TestCase):
         node = self.driver.deploy_node(deploy=Mock())
         self.assertEqual(self.node.id, node.id)
 
+    @patch('libcloud.compute.base.SSHClient')
+    @patch('libcloud.compute.ssh')
+    def test_deploy_nodes_success(self, mock_ssh_module, ssh_client_cls):
+        RackspaceMockHttp.type = 'MULTIPLE_NODES'
+        mock_ssh_module.have_paramiko = True
+
+        client = ssh_client_cls.return_value
+        client.put.return_value = '/root/script.sh'
+        client.run.return_value = ('output', '', 0)
+
+        deploy = MultiStepDeployment([ScriptDeployment(script='echo 1'),
+                                      ScriptDeployment(script='echo 2')])
+        results = self.driver.deploy_nodes(nodes=[self.node, self.node2],
+                                           deploy=deploy, max_workers=2)
+
+        self.assertEqual([result.node.id for result in results],
+                         [self.node.id, self.node2.id])
+
+        for result in results:
+            self.assertTrue(result.success)
+            self.assertEqual(result.username, 'root')
+            self.assertEqual(len(result.steps), 2)
+            self.assertEqual(result.steps[0].stdout, 'output')
+            self.assertEqual(result.steps[0].exit_status, 0)
+            self.assertEqual(result.steps[0].attempts, 1)
+            self.assertTrue(result.timings['total'] is not None)
+
+        # A single connection is used for all the steps on a node
+        self.assertEqual(ssh_client_cls.call_count, 2)
+        self.assertEqual(client.run.call_count, 4)
+
+        # Provided deployment is not modified
+        self.assertEqual(deploy.steps[0].stdout, None)
+
+    @patch('libcloud.compute.base.SSHClient')
+    @patch('libcloud.compute.ssh')
+    def test_deploy_nodes_step_is_retried(self, mock_ssh_module,
+                                          ssh_client_cls):
+        mock_ssh_module.have_paramiko = True
+
+        client = ssh_client_cls.return_value
+        client.run.side_effect = [IOError('connection dropped'),
+                                  ('output', '', 0)]
+
+        result = self.driver.deploy_nodes(
+            nodes=[self.node], deploy=ScriptDeployment(script='echo 1'))[0]
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.steps[0].attempts, 2)
+
+    @patch('libcloud.compute.base.SSHClient')
+    @patch('libcloud.compute.ssh')
+    def test_deploy_nodes_failures(self, mock_ssh_module, ssh_client_cls):
+        RackspaceMockHttp.type = 'MULTIPLE_NODES'
+        mock_ssh_module.have_paramiko = True
+
+        client = ssh_client_cls.return_value
+        client.run.return_value = ('', 'error', 1)
+
+        def connect(ssh_client, timeout):
+            if ssh_client_cls.call_count == 1:
+                raise LibcloudError('Could not connect')
+
+            return ssh_client
+
+        self.driver._ssh_client_connect = Mock(side_effect=connect)
+
+        deploy = MultiStepDeployment([ScriptDeployment(script='exit 1'),
+                                      ScriptDeployment(script='echo 2')])
+        results = self.driver.deploy_nodes(nodes=[self.node, self.node2],
+                                           deploy=deploy, max_workers=1)
+
+        # Connecting to the first node failed
+        self.assertFalse(results[0].success)
+        self.assertTrue(isinstance(results[0].error, LibcloudError))
+        self.assertEqual(results[0].steps, [])
+
+        # First step failed on the second node, second step hasn't been run
+        self.assertFalse(results[1].success)
+        self.assertEqual(results[1].error, None)
+        self.assertEqual(len(results[1].steps), 1)
+        self.assertEqual(results[1].steps[0].stderr, 'error')
+        self.assertEqual(results[1].steps[0].attempts, 1)
+
 
 class RackspaceMockHttp(MockHttp):
     fixtures = ComputeFileFixtures('openstack')
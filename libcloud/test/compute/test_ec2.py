@@ -17,7 +17,12 @@ from __future__ import with_statement
 
 import os
 import sys
+import time
+import threading
 from datetime import datetime
+
+from mock import Mock
+
 from libcloud.utils.iso8601 import UTC
 
 from libcloud.utils.py3 import httplib
@@ -30,10 +35,12 @@ from libcloud.compute.drivers.ec2 import IdempotentParamError
 from libcloud.compute.drivers.ec2 import REGION_DETAILS
 from libcloud.compute.drivers.ec2 import ExEC2AvailabilityZone
 from libcloud.compute.drivers.ec2 import EC2NetworkSubnet
+from libcloud.compute.drivers.ec2 import ElasticIP, _ElasticIPCache
 from libcloud.compute.base import Node, NodeImage, NodeSize, NodeLocation
 from libcloud.compute.base import StorageVolume, VolumeSnapshot
 from libcloud.compute.types import KeyPairDoesNotExistError, StorageVolumeState, \
     VolumeSnapshotState
+from libcloud.common.types import InvalidCredsError
 
 from libcloud.test import MockHttpTestCase, LibcloudTestCase
 from libcloud.test.compute import TestCaseMixin
@@ -247,6 +254,120 @@ class EC2Tests(LibcloudTestCase, TestCaseMixin):
         self.assertIn('instance_type', ret_node1.extra)
         self.assertIn('instance_type', ret_node2.extra)
 
+    def test_list_nodes_for_waiter_only_describes_provided_nodes(self):
+        nodes = [Node('i-4382922a', None, None, None, None, self.driver),
+                 Node('i-8474834a', None, None, None, None, self.driver)]
+        self.driver.list_nodes = Mock(wraps=self.driver.list_nodes)
+
+        result = self.driver._list_nodes_for_waiter(nodes=nodes)
+        self.assertEqual([node.id for node in result],
+                         ['i-4382922a', 'i-8474834a'])
+        self.driver.list_nodes.assert_called_once_with(
+            ex_node_ids=['i-4382922a', 'i-8474834a'], ex_elastic_ips=False)
+
+    def test_list_nodes_for_waiter_instance_not_found(self):
+        nodes = [Node('i-4382922a', None, None, None, None, self.driver)]
+        error = Exception('InvalidInstanceID.NotFound: The instance ID '
+                          'i-4382922a does not exist')
+        self.driver.list_nodes = Mock(side_effect=[error, []])
+
+        self.assertEqual(self.driver._list_nodes_for_waiter(nodes=nodes), [])
+        self.assertEqual(self.driver.list_nodes.call_count, 2)
+        self.assertEqual(self.driver.list_nodes.call_args,
+                         ((), {'ex_elastic_ips': False}))
+
+    def test_list_nodes_for_waiter_defers_elastic_ips(self):
+        nodes = [Node('i-4382922a', None, None, None, None, self.driver)]
+        self.driver.ex_describe_addresses = \
+            Mock(wraps=self.driver.ex_describe_addresses)
+
+        # Nodes are not running yet
+        result = self.driver._list_nodes_for_waiter(nodes=nodes)
+        self.assertEqual(len(result[0].public_ips), 1)
+        self.assertEqual(self.driver.ex_describe_addresses.call_count, 0)
+
+        EC2MockHttp.type = 'running'
+        result = self.driver._list_nodes_for_waiter(nodes=nodes)
+        expected = self.driver.list_nodes(ex_node_ids=['i-4382922a'])
+        self.assertEqual(result[0].public_ips, expected[0].public_ips)
+        self.assertEqual(self.driver.ex_describe_addresses.call_count, 2)
+
+    def test_list_nodes_without_elastic_ips(self):
+        self.driver.ex_describe_addresses = Mock()
+
+        node = self.driver.list_nodes(ex_elastic_ips=False)[0]
+        self.assertEqual(node.public_ips, ['1.2.3.4'])
+        self.assertFalse(self.driver.ex_describe_addresses.called)
+
+        nodes = list(self.driver.iterate_nodes(ex_elastic_ips=False))
+        self.assertEqual(nodes[0].public_ips, ['1.2.3.4'])
+
+    def test_list_nodes_elastic_ips_cache(self):
+        expected = [node.public_ips for node in self.driver.list_nodes()]
+
+        self.driver.elastic_ips_cache_ttl = 60
+        self.driver._get_elastic_ips_map = \
+            Mock(wraps=self.driver._get_elastic_ips_map)
+
+        for _ in range(3):
+            nodes = self.driver.list_nodes()
+            self.assertEqual([node.public_ips for node in nodes], expected)
+
+        self.assertEqual(self.driver._get_elastic_ips_map.call_count, 1)
+
+        # Cache is invalidated when the addresses change
+        elastic_ip = ElasticIP('1.2.3.4', 'standard', 'i-4382922a')
+        self.driver.ex_disassociate_address(elastic_ip)
+        self.driver.list_nodes()
+        self.assertEqual(self.driver._get_elastic_ips_map.call_count, 2)
+
+    def test_iterate_nodes(self):
+        nodes = self.driver.list_nodes()
+        iterated = list(self.driver.iterate_nodes())
+
+        self.assertEqual([node.id for node in iterated],
+                         [node.id for node in nodes])
+        self.assertEqual([sorted(node.public_ips) for node in iterated],
+                         [sorted(node.public_ips) for node in nodes])
+        self.assertEqual(iterated[1].extra['tags'], nodes[1].extra['tags'])
+
+    def test_iterate_nodes_node_ids_elastic_ips_filter(self):
+        # Only the addresses of the requested nodes are retrieved, even if
+        # the addresses of all the nodes are cached
+        expected = self.driver.list_nodes(ex_node_ids=['i-4382922a'])
+
+        self.driver.elastic_ips_cache_ttl = 60
+        self.driver._get_all_elastic_ips_map = Mock()
+        self.driver.connection.request = \
+            Mock(wraps=self.driver.connection.request)
+
+        nodes = list(self.driver.iterate_nodes(ex_node_ids=['i-4382922a']))
+
+        self.assertEqual(nodes[0].public_ips, expected[0].public_ips)
+        self.assertFalse(self.driver._get_all_elastic_ips_map.called)
+
+        params = [call[1]['params'] for call in
+                  self.driver.connection.request.call_args_list]
+        params = [item for item in params
+                  if item['Action'] == 'DescribeAddresses']
+
+        for item in params:
+            self.assertEqual(item['Filter.1.Name'], 'instance-id')
+            self.assertEqual(item['Filter.1.Value.1'], 'i-4382922a')
+
+    def test_iterate_nodes_pagination(self):
+        EC2MockHttp.type = 'paginated'
+        nodes = list(self.driver.iterate_nodes(ex_page_size=5))
+
+        self.assertEqual([node.id for node in nodes],
+                         ['i-4382922a', 'i-8474834a'] * 2)
+
+    def test_iterate_nodes_error(self):
+        EC2MockHttp.type = 'forbidden'
+        nodes = self.driver.iterate_nodes()
+
+        self.assertRaises(InvalidCredsError, list, nodes)
+
     def test_ex_list_reserved_nodes(self):
         node = self.driver.ex_list_reserved_nodes()[0]
         self.assertEqual(node.id, '93bbbca2-c500-49d0-9ede-9d8737400498')
@@ -489,6 +610,17 @@ class EC2Tests(LibcloudTestCase, TestCaseMixin):
 
         self.assertEqual(len(images), 2)
 
+    def test_iterate_images(self):
+        images = list(self.driver.iterate_images(ex_owner='self'))
+
+        self.assertEqual([image.id for image in images],
+                         [image.id for image in self.driver.list_images()])
+        self.assertEqual(images[0].extra['architecture'], 'x86_64')
+
+        EC2MockHttp.type = 'paginated'
+        images = list(self.driver.iterate_images(ex_page_size=5))
+        self.assertEqual(len(images), 4)
+
     def test_get_image(self):
         image = self.driver.get_image('ami-57ba933a')
         self.assertEqual(image.id, 'ami-57ba933a')
@@ -1184,13 +1316,97 @@ class EC2SAEastTests(EC2Tests):
     region = 'sa-east-1'
 
 
+class ElasticIPCacheTests(unittest.TestCase):
+    def test_concurrent_callers_share_lookup(self):
+        cache = _ElasticIPCache()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return {'i-1': ['1.2.3.4']}
+
+        def get():
+            results.append(cache.get(fetch=fetch, ttl=60))
+
+        threads = [threading.Thread(target=get) for _ in range(5)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'i-1': ['1.2.3.4']}] * 5)
+
+        cache.clear()
+        cache.get(fetch=fetch, ttl=60)
+        self.assertEqual(len(calls), 2)
+
+    def test_expired_value_and_failed_lookup(self):
+        cache = _ElasticIPCache()
+        cache.get(fetch=lambda: {'i-1': []}, ttl=0)
+
+        def fetch():
+            raise ValueError('lookup failed')
+
+        self.assertRaises(ValueError, cache.get, fetch=fetch, ttl=60)
+        self.assertEqual(cache.get(fetch=lambda: {}, ttl=60), {})
+
+
 class EC2MockHttp(MockHttpTestCase):
     fixtures = ComputeFileFixtures('ec2')
 
+    def putrequest(self, method, url, skip_host=0, skip_accept_encoding=0):
+        self._raw_request = (method, url)
+
+    def putheader(self, key, value):
+        pass
+
+    def endheaders(self):
+        method, url = self._raw_request
+        self.request(method, url)
+
     def _DescribeInstances(self, method, url, body, headers):
         body = self.fixtures.load('describe_instances.xml')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
 
+    def _paginated_DescribeInstances(self, method, url, body, headers):
+        return self._paginate(url, 'describe_instances.xml')
+
+    def _paginated_DescribeImages(self, method, url, body, headers):
+        return self._paginate(url, 'describe_images.xml')
+
+    def _paginated_DescribeAddresses(self, method, url, body, headers):
+        return self._DescribeAddresses(method, url, body, headers)
+
+    def _paginate(self, url, fixture):
+        body = self.fixtures.load(fixture)
+        self.assertUrlContainsQueryParams(url, {'MaxResults': '5'})
+
+        if 'NextToken' not in url:
+            # First page also includes the token of the second one
+            end = body.rindex('</')
+            body = body[:end] + '<nextToken>page-2</nextToken>' + body[end:]
+        else:
+            self.assertUrlContainsQueryParams(url, {'NextToken': 'page-2'})
+
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
+    def _forbidden_DescribeInstances(self, method, url, body, headers):
+        return (httplib.FORBIDDEN, 'Failure: 403 Forbidden', {},
+                httplib.responses[httplib.FORBIDDEN])
+
+    def _running_DescribeInstances(self, method, url, body, headers):
+        body = self.fixtures.load('describe_instances.xml')
+        body = body.replace('<name>stopped</name>', '<name>running</name>')
+        return (httplib.OK, body, {}, httplib.responses[httplib.OK])
+
+    def _running_DescribeAddresses(self, method, url, body, headers):
+        return self._DescribeAddresses(method, url, body, headers)
+
     def _DescribeReservedInstances(self, method, url, body, headers):
         body = self.fixtures.load('describe_reserved_instances.xml')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
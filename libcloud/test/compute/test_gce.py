@@ -16,10 +16,16 @@
 Tests for Google Compute Engine Driver
 """
 import sys
+import shutil
+import tempfile
 import unittest
 import datetime
 
+from mock import Mock, patch
+
 from libcloud.utils.py3 import httplib
+from libcloud.common.cache import ResponseCache, FileCacheBackend
+from libcloud.common.jobs import AsyncJob
 from libcloud.compute.drivers.gce import (GCENodeDriver, API_VERSION,
                                           timestamp_to_datetime,
                                           GCEAddress, GCEBackendService,
@@ -27,7 +33,8 @@ from libcloud.compute.drivers.gce import (GCENodeDriver, API_VERSION,
                                           GCEHealthCheck, GCENetwork,
                                           GCENodeImage, GCERoute, GCERegion,
                                           GCETargetHttpProxy, GCEUrlMap,
-                                          GCEZone, GCESubnetwork)
+                                          GCEZone, GCESubnetwork,
+                                          GCEConnection)
 from libcloud.common.google import (GoogleBaseAuthConnection,
                                     ResourceNotFoundError, ResourceExistsError,
                                     InvalidRequestError, GoogleBaseError)
@@ -93,6 +100,97 @@ class GCENodeDriverTest(GoogleTestCase, TestCaseMixin):
         region2 = self.driver._get_region_from_zone(zone2)
         self.assertEqual(region2.name, expected_region2)
 
+    def _create_driver(self, **kwargs):
+        driver_kwargs = GCE_KEYWORD_PARAMS.copy()
+        driver_kwargs['auth_type'] = 'IA'
+        driver_kwargs['datacenter'] = self.datacenter
+        driver_kwargs.update(kwargs)
+        return GCENodeDriver(*GCE_PARAMS, **driver_kwargs)
+
+    def test_catalogs_are_loaded_lazily(self):
+        with patch.object(GCEConnection, 'request') as request:
+            driver = self._create_driver()
+            self.assertFalse(request.called)
+
+        with patch.object(driver.connection, 'request',
+                          wraps=driver.connection.request) as request:
+            self.assertEqual(driver.zone.name, self.datacenter)
+            self.assertEqual(driver.region.name, 'us-central1')
+            self.assertEqual(driver.zone_dict[self.datacenter], driver.zone)
+
+            # Catalogs are only retrieved once
+            driver.ex_get_zone('us-central1-b')
+            driver.ex_get_region('europe-west1')
+
+        actions = [call[0][0] for call in request.call_args_list]
+        self.assertEqual(actions, ['/zones', '/regions'])
+
+    def test_catalog_cache(self):
+        cache = ResponseCache(ttl=3600)
+        driver1 = self._create_driver(ex_catalog_cache=cache)
+        self.assertEqual(len(driver1.zone_list), 6)
+        self.assertEqual(driver1.region.name, 'us-central1')
+
+        driver2 = self._create_driver(ex_catalog_cache=cache)
+        with patch.object(driver2.connection, 'request') as request:
+            self.assertEqual(driver2.zone.name, self.datacenter)
+            self.assertEqual(driver2.region.name, 'us-central1')
+            self.assertFalse(request.called)
+
+        # Catalogs of different projects are cached separately
+        driver3 = self._create_driver(ex_catalog_cache=cache,
+                                      project='other-project')
+        with patch.object(driver3, 'ex_list_zones',
+                          return_value=[]) as ex_list_zones:
+            self.assertEqual(driver3.zone_list, [])
+            self.assertTrue(ex_list_zones.called)
+
+    def test_catalog_file_cache(self):
+        directory = tempfile.mkdtemp()
+
+        try:
+            cache = ResponseCache(backend=FileCacheBackend(directory),
+                                  ttl=3600)
+            driver1 = self._create_driver(ex_catalog_cache=cache)
+            self.assertEqual(driver1.region.name, 'us-central1')
+
+            driver2 = self._create_driver(
+                ex_catalog_cache=ResponseCache(
+                    backend=FileCacheBackend(directory), ttl=3600))
+            with patch.object(driver2.connection, 'request') as request:
+                self.assertEqual(driver2.zone.name, self.datacenter)
+                self.assertEqual(driver2.region.name, 'us-central1')
+                self.assertTrue(isinstance(driver2.zone, GCEZone))
+                self.assertTrue(driver2.zone.driver is driver2)
+                self.assertEqual(len(driver2.zone_list),
+                                 len(driver1.zone_list))
+                self.assertFalse(request.called)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def test_get_completed_jobs(self):
+        jobs = [AsyncJob(response=Mock(object={'name': 'op-%s' % (i),
+                                               'selfLink': 'link-%s' % (i)}),
+                         poll_kwargs={'action': 'link-%s' % (i)})
+                for i in range(3)]
+        items = {
+            'zones/us-central1-a': {'operations': [
+                {'selfLink': 'link-0', 'status': 'DONE'},
+                {'selfLink': 'link-1', 'status': 'RUNNING'}]},
+            'global': {'warning': {'code': 'NO_RESULTS_ON_PAGE'}}
+        }
+
+        with patch.object(self.driver.connection, 'request',
+                          return_value=Mock(object={'items': items})) \
+                as request:
+            completed = self.driver.connection.get_completed_jobs(jobs)
+
+        # Operations missing from the listing are polled individually
+        self.assertEqual(completed, [jobs[0], jobs[2]])
+        self.assertEqual(request.call_args[0][0], '/aggregated/operations')
+        self.assertEqual(request.call_args[1]['params'],
+                         {'filter': 'name eq (op-0|op-1|op-2)'})
+
     def test_find_zone_or_region(self):
         zone1 = self.driver._find_zone_or_region('libcloud-demo-np-node',
                                                  'instances')
@@ -313,6 +411,43 @@ class GCENodeDriverTest(GoogleTestCase, TestCaseMixin):
         names = [n.name for n in nodes_all]
         self.assertTrue('node-name' in names)
 
+    def test_list_nodes_disk_cache(self):
+        def list_nodes(**kwargs):
+            requests = []
+            request = self.driver.connection.request
+
+            def record_request(action, *args, **kwargs):
+                requests.append(action)
+                return request(action, *args, **kwargs)
+
+            with patch.object(self.driver.connection, 'request',
+                              side_effect=record_request):
+                nodes = self.driver.list_nodes(ex_zone='all', **kwargs)
+
+            disk_requests = [r for r in requests if '/disks/' in r]
+            return nodes, requests, disk_requests
+
+        nodes, requests, disk_requests = list_nodes()
+        lazy_nodes, _, lazy_disk_requests = list_nodes(
+            ex_use_disk_cache=False)
+
+        # Boot disks are resolved using a single aggregated request, only the
+        # disk which isn't included in it is retrieved separately
+        self.assertTrue('/aggregated/disks' in requests)
+        self.assertEqual(disk_requests,
+                         ['/zones/us-central1-a/disks/node-name'])
+        self.assertEqual(len(lazy_disk_requests), 8)
+
+        self.assertEqual(len(nodes), 8)
+        self.assertEqual(len(lazy_nodes), 8)
+        for node in nodes:
+            if node.name == 'node-name':
+                continue
+            source = [d['source'] for d in node.extra['disks']
+                      if d.get('boot')][0]
+            self.assertEqual(node.extra['boot_disk'].name,
+                             source.split('/')[-1])
+
     def test_ex_list_regions(self):
         regions = self.driver.ex_list_regions()
         self.assertEqual(len(regions), 3)
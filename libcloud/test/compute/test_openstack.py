@@ -31,6 +31,7 @@ from mock import Mock, patch
 from libcloud.utils.py3 import httplib
 from libcloud.utils.py3 import method_type
 from libcloud.utils.py3 import u
+from libcloud.utils.py3 import urlparse, parse_qsl
 
 from libcloud.common.types import InvalidCredsError, MalformedResponseError, \
     LibcloudError
@@ -811,6 +812,71 @@ class OpenStack_1_1_Tests(unittest.TestCase, TestCaseMixin):
         nodes = self.driver.list_nodes()
         self.assertEqual(nodes[0].extra['imageId'], None)
 
+    def test_iterate_nodes_follows_next_links(self):
+        self.driver_klass.connectionCls.conn_classes[0].type = 'PAGINATED'
+        self.driver_klass.connectionCls.conn_classes[1].type = 'PAGINATED'
+        OpenStack_1_1_MockHttp.page_requests = []
+
+        nodes = list(self.driver.iterate_nodes(ex_page_size=1))
+        self.assertEqual([node.id for node in nodes], ['12065', '12064'])
+        self.assertEqual(OpenStack_1_1_MockHttp.page_requests,
+                         [{'limit': '1'},
+                          {'limit': '1', 'marker': '12065'}])
+
+    def test_iterate_nodes_prefetch(self):
+        self.driver_klass.connectionCls.conn_classes[0].type = 'PAGINATED'
+        self.driver_klass.connectionCls.conn_classes[1].type = 'PAGINATED'
+        OpenStack_1_1_MockHttp.page_requests = []
+
+        nodes = list(self.driver.iterate_nodes(ex_page_size=1,
+                                               ex_prefetch=True))
+        self.assertEqual([node.id for node in nodes], ['12065', '12064'])
+        self.assertEqual(len(OpenStack_1_1_MockHttp.page_requests), 2)
+
+    def test_iterate_nodes_changes_since(self):
+        self.driver_klass.connectionCls.conn_classes[0].type = 'CHANGES_SINCE'
+        self.driver_klass.connectionCls.conn_classes[1].type = 'CHANGES_SINCE'
+
+        since = datetime.datetime(2016, 1, 1)
+        nodes = list(self.driver.iterate_nodes(ex_changes_since=since))
+        self.assertEqual(len(nodes), 2)
+
+    def test_iterate_volumes_uses_last_id_as_marker(self):
+        self.driver_klass.connectionCls.conn_classes[0].type = 'PAGINATED'
+        self.driver_klass.connectionCls.conn_classes[1].type = 'PAGINATED'
+        OpenStack_1_1_MockHttp.page_requests = []
+
+        volumes = list(self.driver.iterate_volumes(ex_page_size=1))
+        self.assertEqual(len(volumes), 2)
+
+        # Page without "next" link is followed while it's full
+        self.assertEqual(len(OpenStack_1_1_MockHttp.page_requests), 3)
+        self.assertEqual(OpenStack_1_1_MockHttp.page_requests[1]['marker'],
+                         volumes[0].id)
+
+    def test_get_next_page_params(self):
+        get_next = self.driver._get_next_page_params
+        links = [{'rel': 'next',
+                  'href': 'https://api.example.com/v1.1/slug/servers/detail'
+                          '?limit=2&marker=b'}]
+
+        obj = {'servers': [{'id': 'a'}, {'id': 'b'}], 'servers_links': links}
+        self.assertEqual(get_next(obj, 'servers', {'all_tenants': 1}),
+                         {'all_tenants': 1, 'limit': '2', 'marker': 'b'})
+
+        # Server returned the same page again
+        self.assertEqual(get_next(obj, 'servers', {'marker': 'b'}), None)
+
+        obj = {'servers': [{'id': 'a'}, {'id': 'b'}]}
+        self.assertEqual(get_next(obj, 'servers', {}), None)
+        self.assertEqual(get_next(obj, 'servers', {'limit': 2}),
+                         {'limit': 2, 'marker': 'b'})
+        self.assertEqual(get_next(obj, 'servers', {'limit': 3}), None)
+        self.assertEqual(get_next(obj, 'servers', {'limit': 2},
+                                  use_marker=False), None)
+        self.assertEqual(get_next({'servers': []}, 'servers', {'limit': 1}),
+                         None)
+
     def test_list_volumes(self):
         volumes = self.driver.list_volumes()
         self.assertEqual(len(volumes), 2)
@@ -1518,6 +1584,7 @@ class OpenStack_1_1_MockHttp(MockHttpTestCase):
     fixtures = ComputeFileFixtures('openstack_v1.1')
     auth_fixtures = OpenStackFixtures()
     json_content_headers = {'content-type': 'application/json; charset=UTF-8'}
+    page_requests = []
 
     def _v2_0_tokens(self, method, url, body, headers):
         body = self.auth_fixtures.load('_v2_0__auth.json')
@@ -1534,6 +1601,39 @@ class OpenStack_1_1_MockHttp(MockHttpTestCase):
         body = self.fixtures.load('_servers_detail.json')
         return (httplib.OK, body, self.json_content_headers, httplib.responses[httplib.OK])
 
+    def _v1_1_slug_servers_detail_PAGINATED(self, method, url, body, headers):
+        body = self._paginate(url, 'servers', '_servers_detail.json',
+                              links=True)
+        return (httplib.OK, body, self.json_content_headers, httplib.responses[httplib.OK])
+
+    def _v1_1_slug_servers_detail_CHANGES_SINCE(self, method, url, body, headers):
+        self.assertUrlContainsQueryParams(
+            url, {'changes-since': '2016-01-01T00:00:00Z'})
+        body = self.fixtures.load('_servers_detail.json')
+        return (httplib.OK, body, self.json_content_headers, httplib.responses[httplib.OK])
+
+    def _v1_1_slug_os_volumes_PAGINATED(self, method, url, body, headers):
+        body = self._paginate(url, 'volumes', '_os_volumes.json',
+                              links=False)
+        return (httplib.OK, body, self.json_content_headers, httplib.responses[httplib.OK])
+
+    def _paginate(self, url, key, fixture, links):
+        params = dict(parse_qsl(urlparse.urlparse(url).query))
+        OpenStack_1_1_MockHttp.page_requests.append(params)
+
+        items = json.loads(self.fixtures.load(fixture))[key]
+        ids = [str(item['id']) for item in items]
+        start = ids.index(params['marker']) + 1 if 'marker' in params else 0
+        end = start + int(params.get('limit', len(items)))
+        page = {key: items[start:end]}
+
+        if links and end < len(items):
+            href = 'https://api.example.com/v1.1/slug/%s?limit=%s&marker=%s' % \
+                (key, params.get('limit', len(items)), ids[end - 1])
+            page['%s_links' % (key)] = [{'rel': 'next', 'href': href}]
+
+        return json.dumps(page)
+
     def _v1_1_slug_servers_detail_ERROR_STATE_NO_IMAGE_ID(self, method, url, body, headers):
         body = self.fixtures.load('_servers_detail_ERROR_STATE.json')
         return (httplib.OK, body, self.json_content_headers, httplib.responses[httplib.OK])
@@ -19,6 +19,8 @@ from __future__ import with_statement
 
 import os
 import sys
+import time
+import socket
 import tempfile
 
 from libcloud import _init_once
@@ -30,6 +32,7 @@ from libcloud.compute.ssh import have_paramiko
 
 from libcloud.utils.py3 import StringIO
 from libcloud.utils.py3 import u
+from libcloud.utils.py3 import b
 
 from mock import patch, Mock, MagicMock
 
@@ -340,6 +343,33 @@ class ParamikoSSHClientTests(LibcloudTestCase):
         self.assertEqual('\xf0\x90\x8d\x88', stderr.encode('utf-8'))
         self.assertTrue(len(stderr) in [1, 2])
 
+    def test_wait_for_channel(self):
+        conn_params = {'hostname': 'dummy.host.org',
+                       'username': 'ubuntu'}
+        client = ParamikoSSHClient(**conn_params)
+        sock1, sock2 = socket.socketpair()
+
+        chan = Mock()
+        chan.recv_ready.return_value = False
+        chan.recv_stderr_ready.return_value = False
+        chan.eof_received = False
+        chan.fileno.return_value = sock1.fileno()
+
+        try:
+            # Returns as soon as the channel becomes readable
+            sock2.send(b('x'))
+            start = time.time()
+            client._wait_for_channel(chan=chan, timeout=10)
+            self.assertTrue(time.time() - start < 5)
+
+            # Waits for the exit status once EOF has been received
+            chan.eof_received = True
+            client._wait_for_channel(chan=chan, timeout=10)
+            chan.status_event.wait.assert_called_once_with(10)
+        finally:
+            sock1.close()
+            sock2.close()
+
 
 class ShellOutSSHClientTests(LibcloudTestCase):
 
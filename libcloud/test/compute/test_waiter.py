@@ -0,0 +1,199 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import with_statement
+
+import sys
+import time
+import threading
+
+from mock import Mock
+
+from libcloud.test import unittest
+from libcloud.common.types import LibcloudError
+from libcloud.compute.waiter import NodePoller, get_node_poller
+from libcloud.compute.waiter import _Waiter
+
+
+class FakeDriver(object):
+    """
+    Driver which reports the nodes as running after ``ready_after`` lookups.
+    """
+
+    def __init__(self, ready_after=1, delay=0, error=None):
+        self.ready_after = ready_after
+        self.delay = delay
+        self.error = error
+        self.lookups = []
+        self.lock = threading.Lock()
+
+    def _list_nodes_for_waiter(self, nodes, **kwargs):
+        with self.lock:
+            self.lookups.append([node.id for node in nodes])
+            count = len(self.lookups)
+
+        time.sleep(self.delay)
+
+        if self.error:
+            raise self.error
+
+        state = 'running' if count >= self.ready_after else 'pending'
+        return [Mock(id=node.id, state=state) for node in nodes]
+
+
+def check_running(node_ids):
+    def check(nodes):
+        found = [node for node in nodes
+                 if node.id in node_ids and node.state == 'running']
+
+        if len(found) == len(node_ids):
+            return found
+
+        return None
+
+    return check
+
+
+class NodePollerTestCase(unittest.TestCase):
+    def test_wait(self):
+        driver = FakeDriver(ready_after=3)
+        poller = NodePoller(driver=driver)
+
+        result = poller.wait(nodes=[Mock(id='1')], check=check_running(['1']),
+                             wait_period=0.01, timeout=5, jitter=0)
+        self.assertEqual([node.id for node in result], ['1'])
+        self.assertEqual(len(driver.lookups), 3)
+        self.assertEqual(poller.get_stats(),
+                         {'polls': 3, 'errors': 0, 'waiters': 0})
+
+    def test_wait_timeout(self):
+        driver = FakeDriver(ready_after=100)
+        poller = NodePoller(driver=driver)
+
+        try:
+            poller.wait(nodes=[Mock(id='1')], check=check_running(['1']),
+                        wait_period=0.05, timeout=0.2)
+        except LibcloudError:
+            e = sys.exc_info()[1]
+            self.assertTrue('Timed out after 0.2 seconds' in e.value)
+        else:
+            self.fail('Exception was not thrown')
+
+        self.assertTrue(len(driver.lookups) >= 2)
+
+    def test_wait_lookup_error_is_propagated(self):
+        driver = FakeDriver(error=ValueError('lookup failed'))
+        poller = NodePoller(driver=driver)
+
+        self.assertRaises(ValueError, poller.wait, nodes=[Mock(id='1')],
+                          check=check_running(['1']), timeout=5)
+        self.assertEqual(poller.get_stats()['errors'], 1)
+
+    def test_lookup_error_only_fails_affected_waiters(self):
+        driver = FakeDriver()
+        poller = NodePoller(driver=driver)
+        lookup = driver._list_nodes_for_waiter
+
+        def list_nodes(nodes, **kwargs):
+            if 'bad' in [node.id for node in nodes]:
+                driver.lookups.append([node.id for node in nodes])
+                raise ValueError('lookup failed')
+
+            return lookup(nodes=nodes, **kwargs)
+
+        driver._list_nodes_for_waiter = list_nodes
+
+        waiters = [_Waiter(nodes=[Mock(id=node_id)],
+                           check=check_running([node_id]), wait_period=1,
+                           max_wait_period=1, backoff_factor=1, jitter=0)
+                   for node_id in ['1', 'bad', '2']]
+        poller._polling = True
+        poller._poll(waiters=waiters)
+
+        # Nodes of each waiter are looked up separately after the batched
+        # lookup has failed
+        self.assertEqual(driver.lookups, [['1', 'bad', '2'], ['1'], ['bad'],
+                                          ['2']])
+        self.assertEqual([waiter.done for waiter in waiters],
+                         [True, True, True])
+        self.assertEqual([node.id for node in waiters[0].result], ['1'])
+        self.assertTrue(isinstance(waiters[1].error, ValueError))
+        self.assertEqual([node.id for node in waiters[2].result], ['2'])
+        self.assertEqual(poller.get_stats(),
+                         {'polls': 4, 'errors': 2, 'waiters': 0})
+
+    def test_concurrent_waiters_share_lookups(self):
+        driver = FakeDriver(ready_after=3, delay=0.02)
+        poller = NodePoller(driver=driver)
+        results = {}
+
+        def wait(node_id):
+            result = poller.wait(nodes=[Mock(id=node_id)],
+                                 check=check_running([node_id]),
+                                 wait_period=0.2, timeout=10, jitter=0)
+            results[node_id] = [node.id for node in result]
+
+        node_ids = [str(index) for index in range(10)]
+        threads = [threading.Thread(target=wait, args=(node_id, ))
+                   for node_id in node_ids]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        for node_id in node_ids:
+            self.assertEqual(results[node_id], [node_id])
+
+        # Lookups are batched - the last lookup has served all the waiters
+        # and there are far fewer lookups than waiters
+        self.assertTrue(len(driver.lookups) <= 4)
+        self.assertEqual(sorted(driver.lookups[-1]), sorted(node_ids))
+
+    def test_backoff(self):
+        waiter = _Waiter(nodes=[], check=None, wait_period=1,
+                         max_wait_period=5, backoff_factor=2, jitter=0)
+        delays = []
+
+        for _ in range(5):
+            waiter.schedule(now=100)
+            delays.append(waiter.next_poll - 100)
+
+        self.assertEqual(delays, [1, 2, 4, 5, 5])
+
+    def test_backoff_jitter(self):
+        waiter = _Waiter(nodes=[], check=None, wait_period=10,
+                         max_wait_period=10, backoff_factor=1, jitter=0.1)
+
+        for _ in range(20):
+            waiter.schedule(now=0)
+            self.assertTrue(9 <= waiter.next_poll <= 11)
+
+    def test_get_node_poller(self):
+        driver = FakeDriver()
+
+        poller1 = get_node_poller(driver=driver)
+        poller2 = get_node_poller(driver=driver, list_nodes_kwargs={})
+        poller3 = get_node_poller(driver=driver,
+                                  list_nodes_kwargs={'ex_filters': {'a': 1}})
+
+        self.assertTrue(poller1 is poller2)
+        self.assertFalse(poller1 is poller3)
+        self.assertFalse(get_node_poller(driver=FakeDriver()) is poller1)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
@@ -15,16 +15,20 @@
 
 import sys
 
+from mock import Mock
+
 from libcloud.test import unittest
 
-from libcloud.container.base import ContainerImage
+from libcloud.container.base import Container, ContainerImage
 
 from libcloud.container.drivers.docker import DockerContainerDriver
+from libcloud.container.drivers.docker import DockerException
 
 from libcloud.utils.py3 import httplib
+from libcloud.utils.py3 import b
 from libcloud.test.secrets import CONTAINER_PARAMS_DOCKER
 from libcloud.test.file_fixtures import ContainerFileFixtures
-from libcloud.test import MockHttp
+from libcloud.test import MockHttp, MockRawResponse, StorageMockHttp
 
 
 class DockerContainerDriverTestCase(unittest.TestCase):
@@ -32,8 +36,11 @@ class DockerContainerDriverTestCase(unittest.TestCase):
     def setUp(self):
         DockerContainerDriver.connectionCls.conn_classes = (
             DockerMockHttp, DockerMockHttp)
+        DockerContainerDriver.connectionCls.rawResponseCls = \
+            DockerMockRawResponse
         DockerMockHttp.type = None
         DockerMockHttp.use_param = 'a'
+        DockerMockRawResponse.type = None
         self.driver = DockerContainerDriver(*CONTAINER_PARAMS_DOCKER)
 
     def test_list_images(self):
@@ -49,6 +56,66 @@ class DockerContainerDriverTestCase(unittest.TestCase):
         self.assertTrue(image is not None)
         self.assertEqual(image.id, 'cf55d61f5307b7a18a45980971d6cfd40b737dd661879c4a6b3f2aecc3bc37b0')
 
+    def test_install_image_error(self):
+        DockerMockRawResponse.type = 'ERROR'
+        self.assertRaises(DockerException, self.driver.install_image,
+                          'ubuntu:12.04')
+
+    def test_ex_pull_image(self):
+        DockerMockRawResponse.type = 'PROGRESS'
+        events = list(self.driver.ex_pull_image('ubuntu:12.04'))
+        self.assertEqual([event['status'] for event in events],
+                         ['Pulling from library/ubuntu', 'Downloading',
+                          'Download complete'])
+        self.assertEqual(events[-1]['id'], 'cf55d61f5307')
+
+    def test_json_stream_split_across_reads(self):
+        data = u'{"status": "Downloading \u2713"}\r\n{"status": "Do'.encode('utf-8')
+        data += b('wnload complete", "id": "1"}')
+        http_response = Mock()
+        http_response.read1.side_effect = [data[i:i + 3] for i in
+                                           range(0, len(data), 3)] + [b('')]
+
+        events = list(self.driver._iterate_json_stream(
+            Mock(response=http_response)))
+        self.assertEqual(events, [{'status': u'Downloading \u2713'},
+                                  {'status': 'Download complete', 'id': '1'}])
+
+    def test_ex_stream_logs(self):
+        container = self._get_container(id='multiplexed')
+        logs = list(self.driver.ex_stream_logs(container))
+        self.assertEqual(logs, [('stdout', b('hello\n')),
+                                ('stderr', b('oops!\n')),
+                                ('stdout', b('world\n'))])
+
+    def test_ex_stream_logs_tty(self):
+        container = self._get_container(id='tty')
+        logs = list(self.driver.ex_stream_logs(container))
+        self.assertEqual(b('').join([data for _, data in logs]),
+                         b('hello\nworld\n'))
+        self.assertEqual(set([stream for stream, _ in logs]),
+                         set(['stdout']))
+
+    def test_ex_stream_logs_close(self):
+        container = self._get_container(id='multiplexed')
+        logs = self.driver.ex_stream_logs(container)
+        self.assertEqual(next(logs), ('stdout', b('hello\n')))
+
+        # Stream which hasn't been fully read can't be reused
+        self.driver._close_stream = Mock()
+        logs.close()
+        self.assertTrue(self.driver._close_stream.called)
+
+    def test_ex_get_logs_stream(self):
+        container = self._get_container(id='multiplexed')
+        logs = self.driver.ex_get_logs(container, stream=True)
+        self.assertEqual(list(logs), [b('hello\n'), b('oops!\n'),
+                                      b('world\n')])
+
+    def _get_container(self, id):
+        return Container(id=id, name='test', image=None, state=None,
+                         ip_addresses=[], driver=self.driver)
+
     def test_list_containers(self):
         containers = self.driver.list_containers(all=True)
         self.assertEqual(len(containers), 6)
@@ -99,7 +166,7 @@ class DockerContainerDriverTestCase(unittest.TestCase):
         self.assertEqual(images[0].name, 'mysql')
 
 
-class DockerMockHttp(MockHttp):
+class DockerMockHttp(StorageMockHttp, MockHttp):
     fixtures = ContainerFileFixtures('docker')
 
     def _version(
@@ -126,15 +193,6 @@ class DockerMockHttp(MockHttp):
             raise AssertionError('Unsupported method')
         return (httplib.OK, body, {}, httplib.responses[httplib.OK])
 
-    def _images_create(
-            self, method, url, body, headers):
-        if method == 'POST':
-            body = self.fixtures.load('create_image.json')
-        else:
-            raise AssertionError('Unsupported method')
-        return (httplib.OK, body, {'Content-Type': 'application/json'},
-                httplib.responses[httplib.OK])
-
     def _containers_json(
             self, method, url, body, headers):
         if method == 'GET':
@@ -208,5 +266,42 @@ class DockerMockHttp(MockHttp):
         return (httplib.OK, body, {'content-type': 'text/plain'}, httplib.responses[httplib.OK])
 
 
+class DockerMockRawResponse(MockRawResponse):
+    fixtures = ContainerFileFixtures('docker')
+
+    def _images_create(self, method, url, body, headers):
+        body = self.fixtures.load('create_image.json')
+        return (httplib.OK, body, {'Content-Type': 'application/json'},
+                httplib.responses[httplib.OK])
+
+    def _images_create_ERROR(self, method, url, body, headers):
+        body = ('{"status":"Pulling repository ubuntu"}\r\n'
+                '{"errorDetail":{"message":"Error: image not found"},'
+                '"error":"Error: image not found"}\r\n')
+        return (httplib.OK, body, {'Content-Type': 'application/json'},
+                httplib.responses[httplib.OK])
+
+    def _images_create_PROGRESS(self, method, url, body, headers):
+        body = ('{"status":"Pulling from library/ubuntu","id":"12.04"}\r\n'
+                '{"status":"Downloading","progressDetail":{"current":1,'
+                '"total":2},"id":"cf55d61f5307"}\r\n'
+                '{"status":"Download complete","progressDetail":{},'
+                '"id":"cf55d61f5307"}\r\n')
+        return (httplib.OK, body, {'Content-Type': 'application/json'},
+                httplib.responses[httplib.OK])
+
+    def _containers_multiplexed_logs(self, method, url, body, headers):
+        body = ('\x01\x00\x00\x00\x00\x00\x00\x06hello\n'
+                '\x02\x00\x00\x00\x00\x00\x00\x06oops!\n'
+                '\x01\x00\x00\x00\x00\x00\x00\x06world\n')
+        return (httplib.OK, body, {'content-type': 'text/plain'},
+                httplib.responses[httplib.OK])
+
+    def _containers_tty_logs(self, method, url, body, headers):
+        body = 'hello\nworld\n'
+        return (httplib.OK, body, {'content-type': 'text/plain'},
+                httplib.responses[httplib.OK])
+
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -103,6 +103,60 @@ class BaseTestCase(unittest.TestCase):
             self.assertRegexpMatches(lines[10], r'example.com\.\s+900\s+IN\s+MX\s+10\s+mx.example.com')
             self.assertRegexpMatches(lines[11], r'example.com\.\s+900\s+IN\s+SRV\s+20\s+10 3333 example.com')
 
+    def test_sync_records(self):
+        zone = Zone(id=1, domain='example.com', type='master', ttl=900,
+                    driver=self.driver)
+
+        def make_record(name, type, data, extra=None):
+            return Record(id=None, name=name, type=type, data=data, zone=zone,
+                          driver=self.driver, extra=extra)
+
+        www = make_record('www', RecordType.A, '127.0.0.1', {'ttl': 300})
+        old = make_record('old', RecordType.A, '127.0.0.2')
+        mail = make_record('', RecordType.MX, 'mx.example.com',
+                           {'priority': 10})
+        ns = make_record('', RecordType.NS, 'ns1.example.com')
+
+        self.driver.list_records = Mock(return_value=[www, old, mail, ns])
+        self.driver.create_record = Mock(
+            side_effect=lambda name, zone, type, data, extra=None:
+            make_record(name, type, data, extra))
+        self.driver.update_record = Mock(
+            side_effect=lambda record, name, type, data, extra=None:
+            make_record(name, type, data, extra))
+        self.driver.delete_record = Mock(return_value=True)
+
+        result = self.driver.sync_records(zone=zone, records=[
+            {'name': 'www', 'type': RecordType.A, 'data': '127.0.0.1',
+             'extra': {'ttl': 600}},
+            {'name': '', 'type': RecordType.MX, 'data': 'mx.example.com',
+             'extra': {'priority': 10}},
+            {'name': 'api', 'type': RecordType.A, 'data': '127.0.0.3'}
+        ])
+
+        self.assertEqual([r.name for r in result['created']], ['api'])
+        self.assertEqual([r.name for r in result['updated']], ['www'])
+        self.assertEqual(result['deleted'], [old])
+
+        # Apex NS record is left alone
+        self.driver.delete_record.assert_called_once_with(record=old)
+        self.driver.update_record.assert_called_once_with(
+            record=www, name='www', type=RecordType.A, data='127.0.0.1',
+            extra={'ttl': 600})
+        self.driver.create_record.assert_called_once_with(
+            name='api', zone=zone, type=RecordType.A, data='127.0.0.3',
+            extra=None)
+
+        for record in result['created'] + result['updated']:
+            self.assertTrue(record.driver is self.driver)
+
+        # Nothing to do
+        self.driver.list_records.return_value = [www]
+        result = self.driver.sync_records(zone=zone, delete=False, records=[
+            {'name': 'www', 'type': RecordType.A, 'data': '127.0.0.1'}])
+        self.assertEqual(result, {'created': [], 'updated': [],
+                                  'deleted': []})
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -16,8 +16,11 @@
 import sys
 import unittest
 
+from mock import patch
+
 from libcloud.utils.py3 import httplib
 
+from libcloud.common.types import LibcloudError
 from libcloud.dns.types import RecordType, ZoneDoesNotExistError
 from libcloud.dns.types import RecordDoesNotExistError
 from libcloud.dns.drivers.route53 import Route53DNSDriver
@@ -245,6 +248,138 @@ class Route53Tests(unittest.TestCase):
         else:
             self.fail('Exception was not thrown')
 
+    def test_get_record_uses_cached_zone(self):
+        zone = self.driver.list_zones()[0]
+
+        with patch.object(self.driver, 'get_zone') as get_zone:
+            record = self.driver.get_record(zone_id=zone.id,
+                                            record_id='CNAME:wibble')
+
+        self.assertFalse(get_zone.called)
+        self.assertEqual(record.zone, zone)
+
+    def _sync_records(self, records, **kwargs):
+        zone = self.driver.list_zones()[0]
+
+        with patch.object(self.driver, '_post_rrset_changeset',
+                          return_value=True) as post:
+            result = self.driver.sync_records(zone=zone, records=records,
+                                              **kwargs)
+
+        batches = [call[0][1] for call in post.call_args_list]
+        return result, batches
+
+    def test_sync_records(self):
+        zone = self.driver.list_zones()[0]
+        current = self.driver.list_records(zone=zone)
+
+        records = []
+        for record in current:
+            if record.name == 'blahblah' or \
+                    record.data == 'ASPMX3.GOOGLEMAIL.COM.':
+                continue
+
+            extra = dict([(k, v) for k, v in record.extra.items()
+                          if not k.startswith('_')])
+            if record.name == 'www':
+                extra['ttl'] = 300
+
+            records.append({'name': record.name, 'type': record.type,
+                            'data': record.data, 'extra': extra})
+
+        records.append({'name': 'api', 'type': RecordType.A,
+                        'data': '127.0.0.1', 'extra': {'ttl': 60}})
+
+        result, batches = self._sync_records(records)
+
+        self.assertEqual([r.name for r in result['created']], ['api'])
+        self.assertEqual([r.name for r in result['updated']], ['www'])
+        self.assertEqual(sorted([r.data for r in result['deleted']]),
+                         ['208.111.35.173', 'ASPMX3.GOOGLEMAIL.COM.'])
+
+        # All the changes are submitted in a single batch, unchanged record
+        # sets are not touched
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batches[0], [
+            ('CREATE', 'api', RecordType.A, ['127.0.0.1'], 60),
+            ('DELETE', 'blahblah', RecordType.A, ['208.111.35.173'], 86400),
+            ('DELETE', 'testdoma', RecordType.MX,
+             ['1 ASPMX.L.GOOGLE.COM.', '5 ALT1.ASPMX.L.GOOGLE.COM.',
+              '5 ALT2.ASPMX.L.GOOGLE.COM.', '10 ASPMX2.GOOGLEMAIL.COM.',
+              '10 ASPMX3.GOOGLEMAIL.COM.'], 3600),
+            ('CREATE', 'testdoma', RecordType.MX,
+             ['1 ASPMX.L.GOOGLE.COM.', '5 ALT1.ASPMX.L.GOOGLE.COM.',
+              '5 ALT2.ASPMX.L.GOOGLE.COM.', '10 ASPMX2.GOOGLEMAIL.COM.'],
+             3600),
+            ('DELETE', 'www', RecordType.A, ['208.111.35.173'], 86400),
+            ('CREATE', 'www', RecordType.A, ['208.111.35.173'], 300),
+        ])
+
+    def test_sync_records_replace_cname_with_a_record(self):
+        zone = self.driver.list_zones()[0]
+        current = self.driver.list_records(zone=zone)
+
+        records = [{'name': record.name, 'type': record.type,
+                    'data': record.data} for record in current
+                   if record.name != 'wibble']
+        records.append({'name': 'wibble', 'type': RecordType.A,
+                        'data': '127.0.0.1', 'extra': {'ttl': 60}})
+
+        # Record sets with the same name are never split between batches,
+        # even if a batch only fits a single change
+        with patch('libcloud.dns.drivers.route53.MAX_BATCH_CHANGES', 1):
+            result, batches = self._sync_records(records, delete=True,
+                                                 max_workers=3)
+
+        self.assertEqual([r.name for r in result['created']], ['wibble'])
+        self.assertEqual([r.name for r in result['deleted']], ['wibble'])
+        self.assertEqual(batches, [[
+            ('DELETE', 'wibble', RecordType.CNAME, ['t.com'], 86400),
+            ('CREATE', 'wibble', RecordType.A, ['127.0.0.1'], 60)
+        ]])
+
+    def test_sync_records_batches(self):
+        records = [{'name': 'host%s' % (index), 'type': RecordType.A,
+                    'data': '127.0.0.1'} for index in range(250)]
+
+        result, batches = self._sync_records(records, delete=False,
+                                             max_workers=3)
+
+        self.assertEqual(len(result['created']), 250)
+        self.assertEqual([len(batch) for batch in batches], [100, 100, 50])
+
+        names = sorted([change[1] for batch in batches for change in batch])
+        self.assertEqual(names, sorted([r['name'] for r in records]))
+
+    def test_sync_records_batch_failure(self):
+        zone = self.driver.list_zones()[0]
+        records = [{'name': 'host%s' % (index), 'type': RecordType.A,
+                    'data': '127.0.0.1'} for index in range(250)]
+
+        # Batches are posted one by one and the sync stops on a failed one
+        with patch.object(self.driver, '_post_rrset_changeset',
+                          return_value=False) as post:
+            self.assertRaises(LibcloudError, self.driver.sync_records,
+                              zone=zone, records=records, delete=False)
+
+        self.assertEqual(post.call_count, 1)
+
+    def test_get_change_batches_limits(self):
+        value = 'a' * 255
+        unit = [('DELETE', 'txt', RecordType.TXT, [value] * 100, 0),
+                ('CREATE', 'txt', RecordType.TXT, [value] * 101, 0)]
+
+        # Value characters limit is reached first and changes of a single
+        # record set are never split
+        batches = self.driver._get_change_batches([unit] * 3)
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 2])
+
+        unit = [('CREATE', 'a%s' % (index), RecordType.A, ['127.0.0.1'] * 30,
+                 0) for index in range(40)]
+        batches = self.driver._get_change_batches([[change]
+                                                   for change in unit])
+        self.assertEqual([len(batch) for batch in batches], [33, 7])
+
 
 class Route53MockHttp(MockHttp):
     fixtures = DNSFileFixtures('route53')
@@ -17,12 +17,18 @@ from __future__ import with_statement
 
 import os
 import sys
+import time
+import base64
+import hashlib
 import unittest
 import tempfile
 
+from mock import patch
+
 from libcloud.utils.py3 import httplib
 from libcloud.utils.py3 import urlparse
 from libcloud.utils.py3 import parse_qs
+from libcloud.utils.py3 import b
 
 from libcloud.common.types import InvalidCredsError
 from libcloud.common.types import LibcloudError
@@ -34,6 +40,7 @@ from libcloud.storage.types import InvalidContainerNameError
 from libcloud.storage.types import ObjectDoesNotExistError
 from libcloud.storage.types import ObjectHashMismatchError
 from libcloud.storage.drivers.azure_blobs import AzureBlobsStorageDriver
+from libcloud.storage.drivers.azure_blobs import AzureBlobLease
 from libcloud.storage.drivers.azure_blobs import AZURE_BLOCK_MAX_SIZE
 from libcloud.storage.drivers.azure_blobs import AZURE_PAGE_CHUNK_SIZE
 from libcloud.storage.drivers.dummy import DummyIterator
@@ -316,6 +323,29 @@ class AzureBlobsMockHttp(StorageMockHttp, MockHttpTestCase):
                     headers,
                     httplib.responses[httplib.CREATED])
 
+    def _foo_bar_container_foo_test_upload_PARALLEL_block(self, method, url,
+                                                          body, headers):
+        # test_upload_block_object_in_parallel
+        query = urlparse.urlparse(url).query
+        block_id = parse_qs(query)['blockid'][0]
+        self.uploaded_blocks[block_id] = (body, headers['Content-MD5'])
+
+        return (httplib.CREATED,
+                '',
+                {},
+                httplib.responses[httplib.CREATED])
+
+    def _foo_bar_container_foo_test_upload_PARALLEL_blocklist(self, method,
+                                                              url, body,
+                                                              headers):
+        # test_upload_block_object_in_parallel
+        self.committed_block_lists.append((body, headers))
+
+        return (httplib.CREATED,
+                '',
+                {'etag': '0x8CFB877BB56A6FB'},
+                httplib.responses[httplib.CREATED])
+
 
 class AzureBlobsMockRawResponse(MockRawResponse):
 
@@ -353,6 +383,15 @@ class AzureBlobsMockRawResponse(MockRawResponse):
                 headers,
                 httplib.responses[httplib.OK])
 
+    def _foo_bar_container_foo_bar_object_RANGE(self, method, url, body,
+                                                headers):
+        # test_download_object_range_as_stream_success
+        body = '0123456789'
+        return (httplib.PARTIAL_CONTENT,
+                body,
+                headers,
+                httplib.responses[httplib.PARTIAL_CONTENT])
+
     def _foo_bar_container_foo_bar_object_INVALID_SIZE(self, method, url,
                                                        body, headers):
         # test_upload_object_invalid_file_size
@@ -379,6 +418,8 @@ class AzureBlobsTests(unittest.TestCase):
         self.driver_type.connectionCls.rawResponseCls = \
             self.mock_raw_response_klass
         self.mock_response_klass.type = None
+        self.mock_response_klass.uploaded_blocks = {}
+        self.mock_response_klass.committed_block_lists = []
         self.mock_raw_response_klass.type = None
         self.driver = self.create_driver()
 
@@ -629,6 +670,19 @@ class AzureBlobsTests(unittest.TestCase):
                                                        chunk_size=None)
         self.assertTrue(hasattr(stream, '__iter__'))
 
+    def test_download_object_range_as_stream_success(self):
+        self.mock_raw_response_klass.type = 'RANGE'
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+
+        obj = Object(name='foo_bar_object', size=1000, hash=None, extra={},
+                     container=container, meta_data=None,
+                     driver=self.driver_type)
+
+        stream = self.driver.download_object_range_as_stream(
+            obj=obj, start_bytes=10, end_bytes=20, chunk_size=None)
+        self.assertEqual(b('').join(stream), b('0123456789'))
+
     def test_upload_object_invalid_ex_blob_type(self):
         # Invalid hash is detected on the amazon side and BAD_REQUEST is
         # returned
@@ -911,6 +965,137 @@ class AzureBlobsTests(unittest.TestCase):
         self.assertEqual(obj.name, object_name)
         self.assertEqual(obj.size, blob_size)
 
+    def _assert_uploaded_blocks(self, data, block_size):
+        uploaded_blocks = self.mock_response_klass.uploaded_blocks
+        committed_block_lists = self.mock_response_klass.committed_block_lists
+
+        # Block list is committed once after all the blocks are uploaded
+        self.assertEqual(len(committed_block_lists), 1)
+        body, headers = committed_block_lists[0]
+
+        block_ids = [base64.b64encode(b('%10d' % (index + 1))).decode('utf-8')
+                     for index in range(len(uploaded_blocks))]
+        self.assertEqual(sorted(uploaded_blocks.keys()), sorted(block_ids))
+
+        for index, block_id in enumerate(block_ids):
+            self.assertTrue(block_id in body)
+
+            block = data[index * block_size:(index + 1) * block_size]
+            self.assertEqual(uploaded_blocks[block_id][0], block)
+
+            block_hash = base64.b64encode(hashlib.md5(block).digest())
+            self.assertEqual(uploaded_blocks[block_id][1],
+                             block_hash.decode('utf-8'))
+
+        return headers
+
+    def test_upload_block_object_in_parallel(self):
+        self.mock_response_klass.use_param = 'comp'
+        self.mock_response_klass.type = 'PARALLEL'
+        file_path = tempfile.mktemp(suffix='.jpg')
+        data = b('').join([b(str(index % 10)) * 1000
+                           for index in range(10)]) + b('x')
+
+        with open(file_path, 'wb') as file_hdl:
+            file_hdl.write(data)
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        extra = {'meta_data': {'some-value': 'foobar'}}
+
+        try:
+            with patch.object(AzureBlobLease, 'renew') as renew:
+                obj = self.driver.upload_object(file_path=file_path,
+                                                container=container,
+                                                object_name='foo_test_upload',
+                                                extra=extra,
+                                                ex_block_size=1000,
+                                                ex_concurrency=4)
+        finally:
+            os.remove(file_path)
+            self.mock_response_klass.use_param = None
+
+        self.assertEqual(obj.name, 'foo_test_upload')
+        self.assertEqual(obj.size, len(data))
+        self.assertEqual(obj.hash, '0x8CFB877BB56A6FB')
+        self.assertFalse(renew.called)
+
+        self.assertEqual(len(self.mock_response_klass.uploaded_blocks), 11)
+        headers = self._assert_uploaded_blocks(data=data, block_size=1000)
+
+        # Properties and metadata are set by the block list commit
+        self.assertEqual(headers['x-ms-blob-content-type'], 'image/jpeg')
+        self.assertEqual(headers['x-ms-meta-some-value'], 'foobar')
+
+    def test_upload_block_object_via_stream_in_parallel(self):
+        self.mock_response_klass.use_param = 'comp'
+        self.mock_response_klass.type = 'PARALLEL'
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+
+        data = b('0123456789') * 100
+        iterator = DummyIterator(data=[data[index:index + 7]
+                                       for index in range(0, len(data), 7)])
+
+        try:
+            obj = self.driver.upload_object_via_stream(
+                container=container, object_name='foo_test_upload',
+                iterator=iterator, ex_block_size=256, ex_concurrency=3)
+        finally:
+            self.mock_response_klass.use_param = None
+
+        self.assertEqual(obj.size, len(data))
+        self.assertEqual(len(self.mock_response_klass.uploaded_blocks), 4)
+        self._assert_uploaded_blocks(data=data, block_size=256)
+
+    def test_upload_block_object_invalid_block_size(self):
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+
+        self.assertRaises(ValueError, self.driver.upload_object,
+                          file_path=os.path.abspath(__file__),
+                          container=container, object_name='foo_test_upload',
+                          ex_block_size=AZURE_BLOCK_MAX_SIZE + 1)
+
+    def test_lease_is_renewed_periodically(self):
+        self.mock_response_klass.use_param = 'comp'
+        lease = AzureBlobLease(driver=self.driver,
+                               object_path='/foo_bar_container/foo_test_upload',
+                               use_lease=True, renewal_period=0.01)
+
+        try:
+            with patch.object(lease, 'renew') as renew:
+                with lease:
+                    time.sleep(0.1)
+
+                count = renew.call_count
+                time.sleep(0.05)
+        finally:
+            self.mock_response_klass.use_param = None
+
+        self.assertTrue(count >= 2)
+
+        # Renewal stops once the lease is released
+        self.assertEqual(renew.call_count, count)
+
+    def test_lease_renewal_failure_is_raised(self):
+        self.mock_response_klass.use_param = 'comp'
+        lease = AzureBlobLease(driver=self.driver,
+                               object_path='/foo_bar_container/foo_test_upload',
+                               use_lease=True, renewal_period=0.01)
+
+        def enter_lease():
+            with patch.object(lease, 'renew') as renew:
+                renew.side_effect = LibcloudError('Unable to obtain lease')
+
+                with lease:
+                    time.sleep(0.05)
+
+        try:
+            self.assertRaises(LibcloudError, enter_lease)
+        finally:
+            self.mock_response_klass.use_param = None
+
     def test_delete_object_not_found(self):
         self.mock_response_klass.type = 'NOT_FOUND'
         container = Container(name='foo_bar_container', extra={},
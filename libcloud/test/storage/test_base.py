@@ -16,6 +16,8 @@
 import sys
 import hashlib
 
+from io import BytesIO
+
 from mock import Mock
 
 from libcloud.utils.py3 import StringIO
@@ -25,7 +27,7 @@ from libcloud.utils.py3 import b
 if PY3:
     from io import FileIO as file
 
-from libcloud.storage.base import StorageDriver
+from libcloud.storage.base import Object, StorageDriver
 from libcloud.storage.base import DEFAULT_CONTENT_TYPE
 
 from libcloud.test import unittest
@@ -138,6 +140,124 @@ class BaseStorageTests(unittest.TestCase):
         self.assertEqual(bytes_transferred, (len(data)))
         self.assertEqual(self.send_called, 1)
 
+    def test__upload_data_file_like_object(self):
+        sent = []
+
+        response = Mock()
+        response.connection.connection.send = sent.append
+
+        data = b('1234567890' * 2000)
+        success, data_hash, bytes_transferred = \
+            self.driver1._upload_data(response=response, data=BytesIO(data),
+                                      calculate_hash=True)
+
+        self.assertTrue(success)
+        self.assertEqual(data_hash, hashlib.md5(data).hexdigest())
+        self.assertEqual(bytes_transferred, len(data))
+        self.assertEqual(b('').join(sent), data)
+
+    def test__upload_data_read_only_file_like_object(self):
+        # Object which only implements read() and not the iterator protocol
+        # (e.g. SpooledTemporaryFile before Python 3.11)
+        class ReadOnlyFile(object):
+            def __init__(self, data):
+                self._data = BytesIO(data)
+
+            def read(self, size=-1):
+                return self._data.read(size)
+
+        sent = []
+
+        response = Mock()
+        response.connection.connection.send = sent.append
+
+        data = b('1234567890' * 2000)
+        success, data_hash, bytes_transferred = \
+            self.driver1._upload_data(response=response,
+                                      data=ReadOnlyFile(data),
+                                      calculate_hash=True)
+
+        self.assertTrue(success)
+        self.assertEqual(data_hash, hashlib.md5(data).hexdigest())
+        self.assertEqual(bytes_transferred, len(data))
+        self.assertEqual(b('').join(sent), data)
+
+    def test__upload_data_precalculated_hash(self):
+        sent = []
+
+        response = Mock()
+        response.connection.connection.send = sent.append
+        self.driver1._get_hash_function = Mock()
+
+        data = b('1234567890' * 20)
+        success, data_hash, bytes_transferred = \
+            self.driver1._upload_data(response=response, data=BytesIO(data),
+                                      data_hash='abc')
+
+        self.assertTrue(success)
+        self.assertEqual(data_hash, 'abc')
+        self.assertEqual(bytes_transferred, len(data))
+        self.assertEqual(b('').join(sent), data)
+        self.assertFalse(self.driver1._get_hash_function.called)
+
+    def test__spool_iterator_calculate_hash(self):
+        data = ['0123456789' * 100] * 5
+        spool, size, data_hash = self.driver2._spool_iterator(
+            iterator=iter(data), calculate_hash=True)
+
+        expected = b(''.join(data))
+        self.assertEqual(size, len(expected))
+        self.assertEqual(data_hash, hashlib.md5(expected).hexdigest())
+        self.assertEqual(spool.read(), expected)
+        spool.close()
+
+        spool, size, data_hash = self.driver2._spool_iterator(
+            iterator=iter(data))
+        self.assertEqual(data_hash, None)
+        spool.close()
+
+    def test__upload_object_stream_is_spooled(self):
+        sent = []
+        spools = []
+
+        response = Mock()
+        response.connection.connection.send = sent.append
+        self.driver2.connection = Mock()
+        self.driver2.connection.request.return_value = response
+        self.driver2.upload_spool_max_memory_size = 1000
+
+        original_spool_iterator = self.driver2._spool_iterator
+
+        def spool_iterator(iterator, calculate_hash=False):
+            result = original_spool_iterator(iterator=iterator,
+                                             calculate_hash=calculate_hash)
+            spools.append(result)
+            return result
+
+        self.driver2._spool_iterator = spool_iterator
+
+        data = ['0123456789' * 100] * 50
+        result = self.driver2._upload_object(
+            object_name='test', content_type='foo/bar',
+            upload_func=self.driver2._upload_data, upload_func_kwargs={},
+            request_path='/', iterator=iter(data))
+
+        expected = b(''.join(data))
+        headers = self.driver2.connection.request.call_args[-1]['headers']
+        self.assertEqual(headers['Content-Length'], len(expected))
+        self.assertEqual(b('').join(sent), expected)
+        self.assertEqual(result['bytes_transferred'], len(expected))
+        self.assertEqual(result['data_hash'],
+                         hashlib.md5(expected).hexdigest())
+
+        # Data has been spooled to disk and the spool has been closed
+        self.assertEqual(len(spools), 1)
+        self.assertTrue(spools[0][0]._rolled)
+        self.assertTrue(spools[0][0].closed)
+
+        # Hash has been calculated while spooling
+        self.assertEqual(spools[0][2], result['data_hash'])
+
     def test__get_hash_function(self):
         self.driver1.hash_type = 'md5'
         func = self.driver1._get_hash_function()
@@ -188,6 +308,20 @@ class BaseStorageTests(unittest.TestCase):
                                 request_path='/',
                                 iterator=iterator)
 
+    def test_download_object_in_parallel_unknown_size(self):
+        obj = Object(name='test', size=None, hash=None, extra={},
+                     container=None, meta_data=None, driver=self.driver1)
+
+        # Objects of an unknown size are downloaded with a single request
+        self.driver1.download_object = Mock(return_value=True)
+        result = self.driver1.download_object_in_parallel(
+            obj=obj, destination_path='/tmp/test', range_size=10)
+
+        self.assertTrue(result)
+        self.driver1.download_object.assert_called_once_with(
+            obj=obj, destination_path='/tmp/test', overwrite_existing=False,
+            delete_on_failure=True)
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
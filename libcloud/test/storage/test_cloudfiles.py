@@ -13,8 +13,9 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from hashlib import sha1
+from hashlib import sha1, md5
 import hmac
+import json
 import os
 import os.path                          # pylint: disable-msg=W0404
 import math
@@ -58,6 +59,7 @@ class CloudFilesTests(unittest.TestCase):
         self.driver_klass.connectionCls.rawResponseCls = \
             CloudFilesMockRawResponse
         CloudFilesMockHttp.type = None
+        CloudFilesMockHttp.slo_manifests = []
         CloudFilesMockRawResponse.type = None
 
         driver_kwargs = self.driver_kwargs.copy()
@@ -366,6 +368,17 @@ class CloudFilesTests(unittest.TestCase):
             obj=obj, chunk_size=None)
         self.assertTrue(hasattr(stream, '__iter__'))
 
+    def test_download_object_range_as_stream(self):
+        CloudFilesMockRawResponse.type = 'RANGE'
+        container = Container(name='foo_bar_container', extra={}, driver=self)
+        obj = Object(name='foo_bar_object', size=1000, hash=None, extra={},
+                     container=container, meta_data=None,
+                     driver=CloudFilesStorageDriver)
+
+        stream = self.driver.download_object_range_as_stream(
+            obj=obj, start_bytes=10, end_bytes=20, chunk_size=None)
+        self.assertEqual(b('').join(stream), b('0123456789'))
+
     def test_upload_object_success(self):
         def upload_file(self, response, file_path, chunked=False,
                         calculate_hash=True):
@@ -595,7 +608,8 @@ class CloudFilesTests(unittest.TestCase):
         _upload_object_part = CloudFilesStorageDriver._upload_object_part
         _upload_object_manifest = CloudFilesStorageDriver._upload_object_manifest
 
-        mocked__upload_object_part = mock.Mock(return_value="test_part")
+        mocked__upload_object_part = mock.Mock(
+            return_value=mock.Mock(hash="test_part"))
         mocked__upload_object_manifest = mock.Mock(
             return_value="test_manifest")
 
@@ -785,6 +799,134 @@ class CloudFilesTests(unittest.TestCase):
         finally:
             self.driver.connection.request = _request
 
+    def _get_upload_object_part_mock(self):
+        """
+        Return a replacement for ``_upload_object_part`` which records the
+        data of the uploaded segments.
+        """
+        uploaded = {}
+
+        def upload_object_part(container, object_name, part_number, iterator,
+                               verify_hash=True):
+            data = b('').join([b(chunk) for chunk in iterator])
+            uploaded[part_number] = data
+            return Object(name='%s/%08d' % (object_name, part_number),
+                          size=len(data), hash=md5(data).hexdigest(),
+                          extra=None, meta_data=None, container=container,
+                          driver=self.driver)
+
+        return uploaded, mock.patch.object(CloudFilesStorageDriver,
+                                           '_upload_object_part',
+                                           side_effect=upload_object_part)
+
+    def _assert_slo_manifest(self, uploaded, expected_etags=None):
+        self.assertEqual(len(CloudFilesMockHttp.slo_manifests), 1)
+        manifest, headers = CloudFilesMockHttp.slo_manifests[0]
+
+        paths = ['/foo_bar_container/foo_test_upload/%08d' % (index)
+                 for index in range(len(manifest))]
+        self.assertEqual([segment['path'] for segment in manifest], paths)
+
+        if expected_etags is None:
+            expected_etags = [md5(uploaded[index]).hexdigest()
+                              for index in range(len(manifest))]
+
+        self.assertEqual([segment['etag'] for segment in manifest],
+                         expected_etags)
+        return manifest, headers
+
+    def test_ex_multipart_upload_object_parallel_slo(self):
+        CloudFilesMockHttp.type = 'SLO'
+        file_path = os.path.abspath(__file__)
+
+        with open(file_path, 'rb') as fp:
+            data = fp.read()
+
+        chunk_size = int(math.ceil(float(len(data)) / 5))
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        uploaded, upload_object_part = self._get_upload_object_part_mock()
+
+        with upload_object_part:
+            obj = self.driver.ex_multipart_upload_object(
+                file_path=file_path, container=container,
+                object_name='foo_test_upload', chunk_size=chunk_size,
+                extra={'meta_data': {'foo': 'bar'}}, concurrency=3,
+                use_slo=True)
+
+        self.assertEqual(sorted(uploaded.keys()), list(range(5)))
+        self.assertEqual(b('').join([uploaded[index] for index in range(5)]),
+                         data)
+
+        manifest, headers = self._assert_slo_manifest(uploaded=uploaded)
+        self.assertEqual([segment['size_bytes'] for segment in manifest],
+                         [len(uploaded[index]) for index in range(5)])
+        self.assertEqual(headers['X-Object-Meta-foo'], 'bar')
+
+        self.assertEqual(obj.name, 'foo_test_upload')
+        self.assertEqual(obj.size, len(data))
+        self.assertEqual(obj.meta_data, {'foo': 'bar'})
+
+    def test_ex_multipart_upload_object_resume(self):
+        CloudFilesMockHttp.type = 'SLO'
+        file_path = os.path.abspath(__file__)
+
+        with open(file_path, 'rb') as fp:
+            data = fp.read()
+
+        chunk_size = int(math.ceil(float(len(data)) / 5))
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        etag = md5(data[:chunk_size]).hexdigest()
+
+        # First segment has already been uploaded, second one is corrupted
+        existing = [Object(name='foo_test_upload/00000000', size=chunk_size,
+                           hash=etag, extra=None, meta_data=None,
+                           container=container, driver=self.driver),
+                    Object(name='foo_test_upload/00000001', size=chunk_size,
+                           hash='0000', extra=None, meta_data=None,
+                           container=container, driver=self.driver)]
+
+        uploaded, upload_object_part = self._get_upload_object_part_mock()
+
+        with upload_object_part:
+            with mock.patch.object(self.driver, 'iterate_container_objects',
+                                   return_value=iter(existing)) as iterate:
+                self.driver.ex_multipart_upload_object(
+                    file_path=file_path, container=container,
+                    object_name='foo_test_upload', chunk_size=chunk_size,
+                    concurrency=2, use_slo=True, resume=True)
+
+        iterate.assert_called_once_with(container,
+                                        ex_prefix='foo_test_upload/')
+        self.assertEqual(sorted(uploaded.keys()), [1, 2, 3, 4])
+
+        uploaded[0] = data[:chunk_size]
+        self._assert_slo_manifest(uploaded=uploaded)
+
+    def test_upload_object_via_stream_segments(self):
+        CloudFilesMockHttp.type = 'SLO'
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+
+        data = b('0123456789') * 35
+        iterator = DummyIterator(data=[data[index:index + 7]
+                                       for index in range(0, len(data), 7)])
+        uploaded, upload_object_part = self._get_upload_object_part_mock()
+
+        with upload_object_part:
+            obj = self.driver.upload_object_via_stream(
+                iterator=iterator, container=container,
+                object_name='foo_test_upload', ex_segment_size=100,
+                ex_concurrency=2, ex_use_slo=True)
+
+        self.assertEqual([len(uploaded[index]) for index in range(4)],
+                         [100, 100, 100, 50])
+        self.assertEqual(b('').join([uploaded[index] for index in range(4)]),
+                         data)
+        self._assert_slo_manifest(uploaded=uploaded)
+        self.assertEqual(obj.size, len(data))
+
     def test_create_container_put_object_name_encoding(self):
         def upload_file(self, response, file_path, chunked=False,
                         calculate_hash=True):
@@ -1136,6 +1278,21 @@ class CloudFilesMockHttp(StorageMockHttp, MockHttpTestCase):
 
         return (status_code, body, headers, httplib.responses[httplib.OK])
 
+    def _v1_MossoCloudFS_foo_bar_container_foo_test_upload_SLO(
+            self, method, url, body, headers):
+        # test_ex_multipart_upload_object_parallel_slo
+        self.assertUrlContainsQueryParams(url, {'multipart-manifest': 'put'})
+
+        manifest = json.loads(body)
+        self.slo_manifests.append((manifest, headers))
+
+        etags = ''.join([segment['etag'] for segment in manifest])
+        headers = copy.deepcopy(self.base_headers)
+        headers['etag'] = '"%s"' % (md5(b(etags)).hexdigest())
+
+        return (httplib.CREATED, '', headers,
+                httplib.responses[httplib.CREATED])
+
 
 class CloudFilesMockRawResponse(MockRawResponse):
 
@@ -1198,6 +1355,15 @@ class CloudFilesMockRawResponse(MockRawResponse):
                 self.base_headers,
                 httplib.responses[httplib.OK])
 
+    def _v1_MossoCloudFS_foo_bar_container_foo_bar_object_RANGE(
+            self, method, url, body, headers):
+        # test_download_object_range_as_stream
+        body = '0123456789'
+        return (httplib.PARTIAL_CONTENT,
+                body,
+                self.base_headers,
+                httplib.responses[httplib.PARTIAL_CONTENT])
+
     def _v1_MossoCloudFS_foo_bar_container_foo_bar_object_INVALID_SIZE(
             self, method, url, body, headers):
         # test_download_object_invalid_file_size
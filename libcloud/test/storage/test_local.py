@@ -17,6 +17,7 @@ from __future__ import with_statement
 
 import os
 import sys
+import time
 import shutil
 import unittest
 import tempfile
@@ -31,6 +32,7 @@ from libcloud.storage.types import ContainerIsNotEmptyError
 from libcloud.storage.types import InvalidContainerNameError
 
 try:
+    from libcloud.storage.drivers import local
     from libcloud.storage.drivers.local import LocalStorageDriver
     from libcloud.storage.drivers.local import LockLocalStorage
     from lockfile import LockTimeout
@@ -127,6 +129,126 @@ class LocalTests(unittest.TestCase):
         container.delete()
         self.remove_tmp_file(tmppath)
 
+    def test_list_container_objects_prefix(self):
+        tmppath = self.make_tmp_file()
+
+        container = self.driver.create_container('test3')
+        for name in ['object1', 'path/object2', 'path/to/object3',
+                     'pathology/object4', 'other/object5']:
+            container.upload_object(tmppath, name.replace('/', os.sep))
+
+        def get_names(prefix):
+            objects = self.driver.list_container_objects(container=container,
+                                                         ex_prefix=prefix)
+            return sorted([obj.name.replace(os.sep, '/') for obj in objects])
+
+        self.assertEqual(get_names('path/'), ['path/object2',
+                                              'path/to/object3'])
+        self.assertEqual(get_names('path'), ['path/object2',
+                                             'path/to/object3',
+                                             'pathology/object4'])
+        self.assertEqual(get_names('obj'), ['object1'])
+        self.assertEqual(len(get_names(None)), 5)
+
+        # Unrelated subtrees are not walked
+        with mock.patch('libcloud.storage.drivers.local._scandir',
+                        side_effect=local._scandir) as scandir:
+            get_names('path/to/')
+
+        walked = sorted([call[0][0] for call in scandir.call_args_list])
+        cpath = container.get_cdn_url()
+        self.assertEqual(walked, [os.path.join(cpath, ''),
+                                  os.path.join(cpath, 'path', ''),
+                                  os.path.join(cpath, 'path', 'to', '')])
+
+        self.remove_tmp_file(tmppath)
+
+    def test_list_container_objects_index(self):
+        tmppath = self.make_tmp_file()
+
+        driver = self.driver_type(self.key, None, ex_use_index=True)
+        container = driver.create_container('test4')
+        container.upload_object(tmppath, 'object1')
+        container.upload_object(tmppath, os.path.join('path', 'object2'))
+
+        objects = container.list_objects()
+        self.assertEqual(sorted([obj.name for obj in objects]),
+                         ['object1', os.path.join('path', 'object2')])
+        self.assertTrue(os.path.exists(os.path.join(
+            container.get_cdn_url(), local.INDEX_FOLDER, local.INDEX_FILE)))
+
+        # Directories which haven't changed are not scanned again
+        with mock.patch('libcloud.storage.drivers.local.time.time',
+                        return_value=time.time() + 10):
+            container.list_objects()
+
+            with mock.patch('libcloud.storage.drivers.local._scandir',
+                            side_effect=local._scandir) as scandir:
+                objects = container.list_objects()
+
+        self.assertEqual(scandir.call_count, 0)
+        self.assertEqual(len(objects), 2)
+        self.assertEqual(objects[0].size, 4096)
+
+        # Files overwritten in place are picked up even though the directory
+        # mtime doesn't change
+        obj_path = os.path.join(container.get_cdn_url(), 'path', 'object2')
+        dir_mtime = os.stat(os.path.dirname(obj_path)).st_mtime
+
+        with open(obj_path, 'wb') as fp:
+            fp.write(b'blahblah')
+
+        os.utime(obj_path, (time.time() + 5, time.time() + 5))
+        self.assertEqual(os.stat(os.path.dirname(obj_path)).st_mtime,
+                         dir_mtime)
+
+        with mock.patch('libcloud.storage.drivers.local.time.time',
+                        return_value=time.time() + 10):
+            objects = container.list_objects()
+
+        self.assertEqual(sorted([(obj.name, obj.size) for obj in objects]),
+                         [('object1', 4096),
+                          (os.path.join('path', 'object2'), 8)])
+
+        # Changes made by the driver are picked up
+        with open(tmppath, 'wb') as fp:
+            fp.write(b'blah')
+
+        container.upload_object(tmppath, 'object1')
+        container.upload_object(tmppath, os.path.join('path', 'object3'))
+        driver.get_object('test4', os.path.join('path', 'object2')).delete()
+
+        objects = container.list_objects()
+        self.assertEqual(sorted([(obj.name, obj.size) for obj in objects]),
+                         [('object1', 4), (os.path.join('path', 'object3'), 4)])
+
+        # Index isn't treated as an object
+        self.assertRaises(ContainerIsNotEmptyError, container.delete)
+
+        for obj in objects:
+            obj.delete()
+
+        self.assertTrue(container.delete())
+        self.remove_tmp_file(tmppath)
+
+    def test_list_container_objects_index_folder_name(self):
+        tmppath = self.make_tmp_file()
+
+        container = self.driver.create_container('test5')
+        container.upload_object(tmppath, os.path.join('.index', 'object1'))
+        container.upload_object(tmppath, os.path.join('path',
+                                                      local.INDEX_FOLDER,
+                                                      'object2'))
+
+        # Only the index folder in the container root is skipped
+        objects = container.list_objects()
+        self.assertEqual(sorted([obj.name for obj in objects]),
+                         [os.path.join('.index', 'object1'),
+                          os.path.join('path', local.INDEX_FOLDER,
+                                       'object2')])
+
+        self.remove_tmp_file(tmppath)
+
     def test_get_container_doesnt_exist(self):
         try:
             self.driver.get_container(container_name='container1')
@@ -310,6 +432,68 @@ class LocalTests(unittest.TestCase):
         container.delete()
         self.remove_tmp_file(tmppath)
 
+    def test_download_object_range_success(self):
+        tmppath = self.make_tmp_file()
+        container = self.driver.create_container('test6')
+        obj = container.upload_object(tmppath, 'test')
+
+        destination_path = tmppath + '.temp'
+        result = self.driver.download_object_range(
+            obj=obj, destination_path=destination_path, start_bytes=4,
+            end_bytes=10, overwrite_existing=False, delete_on_failure=True)
+
+        self.assertTrue(result)
+
+        with open(destination_path, 'rb') as fp:
+            self.assertEqual(fp.read(), b'blahbl')
+
+        obj.delete()
+        container.delete()
+        self.remove_tmp_file(tmppath)
+        os.unlink(destination_path)
+
+    def test_download_object_range_as_stream_success(self):
+        tmppath = self.make_tmp_file()
+        container = self.driver.create_container('test6')
+        obj = container.upload_object(tmppath, 'test')
+
+        stream = self.driver.download_object_range_as_stream(
+            obj=obj, start_bytes=2, end_bytes=3000, chunk_size=1024)
+        data = b''.join(stream)
+        self.assertEqual(data, (b'blah' * 1024)[2:3000])
+
+        stream = obj.range_as_stream(start_bytes=4090)
+        self.assertEqual(b''.join(stream), b'ahblah')
+
+        self.assertRaises(ValueError,
+                          self.driver.download_object_range_as_stream,
+                          obj=obj, start_bytes=10, end_bytes=5)
+
+        obj.delete()
+        container.delete()
+        self.remove_tmp_file(tmppath)
+
+    def test_download_object_in_parallel_success(self):
+        tmppath = self.make_tmp_file()
+        container = self.driver.create_container('test6')
+        obj = container.upload_object(tmppath, 'test')
+
+        destination_path = tmppath + '.temp'
+        result = self.driver.download_object_in_parallel(
+            obj=obj, destination_path=destination_path,
+            overwrite_existing=False, delete_on_failure=True,
+            range_size=1000, concurrency=3)
+
+        self.assertTrue(result)
+
+        with open(destination_path, 'rb') as fp:
+            self.assertEqual(fp.read(), b'blah' * 1024)
+
+        obj.delete()
+        container.delete()
+        self.remove_tmp_file(tmppath)
+        os.unlink(destination_path)
+
     @mock.patch("lockfile.mkdirlockfile.MkdirLockFile.acquire",
                 mock.MagicMock(side_effect=LockTimeout))
     def test_proper_lockfile_imports(self):
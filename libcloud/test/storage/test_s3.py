@@ -59,6 +59,16 @@ class S3MockHttp(StorageMockHttp, MockHttpTestCase):
     fixtures = StorageFileFixtures('s3')
     base_headers = {}
 
+    # Part numbers of the uploaded multipart upload parts
+    uploaded_parts = []
+    failed_parts = []
+
+    def putrequest(self, method, action, skip_host=0, skip_accept_encoding=0):
+        self.request_headers = {}
+
+    def putheader(self, key, value):
+        self.request_headers[key] = value
+
     def _UNAUTHORIZED(self, method, url, body, headers):
         return (httplib.UNAUTHORIZED,
                 '',
@@ -249,6 +259,15 @@ class S3MockHttp(StorageMockHttp, MockHttpTestCase):
         query_string = urlparse.urlsplit(url).query
         query = parse_qs(query_string)
 
+        if method == 'POST' and 'uploads' in parse_qs(query_string,
+                                                      keep_blank_values=True):
+            # POST is done for initiating multipart upload
+            body = self.fixtures.load('initiate_multipart.xml')
+            return (httplib.OK,
+                    body,
+                    {},
+                    httplib.responses[httplib.OK])
+
         if not query.get('uploadId', False):
             self.fail('Request doesnt contain uploadId query parameter')
 
@@ -261,12 +280,25 @@ class S3MockHttp(StorageMockHttp, MockHttpTestCase):
             if not query.get('partNumber', False):
                 self.fail('Request is missing partNumber query parameter')
 
+            S3MockHttp.uploaded_parts.append(int(query['partNumber'][0]))
             body = ''
             return (httplib.OK,
                     body,
                     headers,
                     httplib.responses[httplib.OK])
 
+        elif method == 'GET':
+            # GET is done for listing the parts which have been uploaded
+            if 'part-number-marker' not in query:
+                body = self.fixtures.load('list_multipart_parts_1.xml')
+            else:
+                body = self.fixtures.load('list_multipart_parts_2.xml')
+
+            return (httplib.OK,
+                    body,
+                    {},
+                    httplib.responses[httplib.OK])
+
         elif method == 'DELETE':
             # DELETE is done for aborting the upload
             body = ''
@@ -287,7 +319,13 @@ class S3MockHttp(StorageMockHttp, MockHttpTestCase):
                 etag = part.find('ETag').text
 
                 self.assertEqual(part_no, str(count))
-                self.assertEqual(etag, headers['etag'])
+
+                if count in S3MockHttp.uploaded_parts:
+                    self.assertEqual(etag, headers['etag'])
+                else:
+                    # Part has been uploaded before the upload was resumed
+                    self.assertEqual(etag,
+                                     '"267c038cc2ec32ffd0ee2512ff5da5a5"')
 
             # Make sure that manifest contains at least one part
             self.assertTrue(count >= 1)
@@ -298,6 +336,23 @@ class S3MockHttp(StorageMockHttp, MockHttpTestCase):
                     headers,
                     httplib.responses[httplib.OK])
 
+    def _foo_bar_container_foo_test_stream_data_MULTIPART_RETRY(self, method,
+                                                                url, body,
+                                                                headers):
+        query = parse_qs(urlparse.urlsplit(url).query)
+
+        if method == 'PUT' and \
+                query['partNumber'][0] not in S3MockHttp.failed_parts:
+            # Fail the first attempt of every part
+            S3MockHttp.failed_parts.append(query['partNumber'][0])
+            return (httplib.INTERNAL_SERVER_ERROR,
+                    '',
+                    {},
+                    httplib.responses[httplib.INTERNAL_SERVER_ERROR])
+
+        return self._foo_bar_container_foo_test_stream_data_MULTIPART(
+            method, url, body, headers)
+
     def _foo_bar_container_LIST_MULTIPART(self, method, url, body, headers):
         query_string = urlparse.urlsplit(url).query
         query = parse_qs(query_string)
@@ -332,6 +387,7 @@ class S3MockHttp(StorageMockHttp, MockHttpTestCase):
 class S3MockRawResponse(MockRawResponse):
 
     fixtures = StorageFileFixtures('s3')
+    requested_ranges = []
 
     def parse_body(self):
         if len(self.body) == 0 and not self.parse_zero_length_body:
@@ -357,6 +413,41 @@ class S3MockRawResponse(MockRawResponse):
                 headers,
                 httplib.responses[httplib.OK])
 
+    def _foo_bar_container_foo_bar_object_range(self, method, url, body,
+                                                headers):
+        # test_download_object_range_success
+        body = '0123456789' * 100
+        request_headers = self.connection.connection.request_headers
+
+        if 'Range' not in request_headers:
+            return (httplib.OK,
+                    body,
+                    headers,
+                    httplib.responses[httplib.OK])
+
+        start_bytes, end_bytes = \
+            request_headers['Range'].split('=')[1].split('-')
+        end_bytes = int(end_bytes) + 1 if end_bytes else len(body)
+        S3MockRawResponse.requested_ranges.append(
+            request_headers['Range'])
+        return (httplib.PARTIAL_CONTENT,
+                body[int(start_bytes):end_bytes],
+                headers,
+                httplib.responses[httplib.PARTIAL_CONTENT])
+
+    def _foo_bar_container_foo_bar_object_range_INCOMPLETE(self, method, url,
+                                                           body, headers):
+        # Every first attempt to download a range returns only a part of
+        # the data
+        result = self._foo_bar_container_foo_bar_object_range(
+            method, url, body, headers)
+        requested_range = self.connection.connection.request_headers['Range']
+
+        if int(requested_range.split('=')[1].split('-')[0]) % 100 == 0:
+            result = (result[0], result[1][:5], result[2], result[3])
+
+        return result
+
     def _foo_bar_container_foo_test_upload_INVALID_HASH1(self, method, url,
                                                          body, headers):
         body = ''
@@ -441,6 +532,9 @@ class S3Tests(unittest.TestCase):
             self.mock_raw_response_klass
         self.mock_response_klass.type = None
         self.mock_raw_response_klass.type = None
+        S3MockHttp.uploaded_parts = []
+        S3MockHttp.failed_parts = []
+        S3MockRawResponse.requested_ranges = []
         self.driver = self.create_driver()
 
     def tearDown(self):
@@ -730,6 +824,99 @@ class S3Tests(unittest.TestCase):
                                                        chunk_size=None)
         self.assertTrue(hasattr(stream, '__iter__'))
 
+    def test_download_object_range_success(self):
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        obj = Object(name='foo_bar_object_range', size=1000, hash=None,
+                     extra={}, container=container, meta_data=None,
+                     driver=self.driver_type)
+        destination_path = os.path.abspath(__file__) + '.temp'
+        result = self.driver.download_object_range(
+            obj=obj, destination_path=destination_path, start_bytes=5,
+            end_bytes=7, overwrite_existing=False, delete_on_failure=True)
+        self.assertTrue(result)
+
+        with open(destination_path, 'r') as fp:
+            self.assertEqual(fp.read(), '56')
+
+        self.assertEqual(S3MockRawResponse.requested_ranges, ['bytes=5-6'])
+
+    def test_download_object_range_as_stream_success(self):
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        obj = Object(name='foo_bar_object_range', size=1000, hash=None,
+                     extra={}, container=container, meta_data=None,
+                     driver=self.driver_type)
+
+        stream = self.driver.download_object_range_as_stream(
+            obj=obj, start_bytes=995, chunk_size=None)
+        self.assertEqual(b('').join(stream), b('56789'))
+        self.assertEqual(S3MockRawResponse.requested_ranges, ['bytes=995-'])
+
+        self.assertRaises(ValueError,
+                          self.driver.download_object_range_as_stream,
+                          obj=obj, start_bytes=5, end_bytes=5)
+
+    def test_download_object_in_parallel_success(self):
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        obj = Object(name='foo_bar_object_range', size=1000, hash=None,
+                     extra={}, container=container, meta_data=None,
+                     driver=self.driver_type)
+        destination_path = os.path.abspath(__file__) + '.temp'
+        result = self.driver.download_object_in_parallel(
+            obj=obj, destination_path=destination_path,
+            overwrite_existing=False, delete_on_failure=True,
+            range_size=300, concurrency=2)
+        self.assertTrue(result)
+
+        with open(destination_path, 'r') as fp:
+            self.assertEqual(fp.read(), '0123456789' * 100)
+
+        self.assertEqual(sorted(S3MockRawResponse.requested_ranges),
+                         ['bytes=0-299', 'bytes=300-599', 'bytes=600-899',
+                          'bytes=900-999'])
+
+    def test_download_object_in_parallel_incomplete_range_is_retried(self):
+        self.mock_raw_response_klass.type = 'INCOMPLETE'
+        self.driver.range_download_retry_delay = 0
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        obj = Object(name='foo_bar_object_range', size=1000, hash=None,
+                     extra={}, container=container, meta_data=None,
+                     driver=self.driver_type)
+        destination_path = os.path.abspath(__file__) + '.temp'
+        result = self.driver.download_object_in_parallel(
+            obj=obj, destination_path=destination_path,
+            overwrite_existing=False, delete_on_failure=True,
+            range_size=500, concurrency=2)
+        self.assertTrue(result)
+
+        with open(destination_path, 'r') as fp:
+            self.assertEqual(fp.read(), '0123456789' * 100)
+
+        # Retries continue from the last received byte
+        self.assertEqual(sorted(S3MockRawResponse.requested_ranges),
+                         ['bytes=0-499', 'bytes=5-499', 'bytes=500-999',
+                          'bytes=505-999'])
+
+    def test_download_object_in_parallel_failure(self):
+        self.mock_raw_response_klass.type = 'INCOMPLETE'
+        self.driver.range_download_retries = 0
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        obj = Object(name='foo_bar_object_range', size=1000, hash=None,
+                     extra={}, container=container, meta_data=None,
+                     driver=self.driver_type)
+        destination_path = os.path.abspath(__file__) + '.temp'
+        self.assertRaises(LibcloudError,
+                          self.driver.download_object_in_parallel,
+                          obj=obj, destination_path=destination_path,
+                          range_size=500)
+        self.assertFalse(os.path.exists(destination_path))
+
     def test_upload_object_invalid_ex_storage_class(self):
         # Invalid hash is detected on the amazon side and BAD_REQUEST is
         # returned
@@ -938,6 +1125,131 @@ class S3Tests(unittest.TestCase):
 
         return
 
+    def test_upload_big_object_via_stream_in_parallel(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        self.mock_response_klass.type = 'MULTIPART'
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        object_name = 'foo_test_stream_data'
+        iterator = DummyIterator(
+            data=['2' * CHUNK_SIZE, '3' * CHUNK_SIZE, '4' * CHUNK_SIZE, '5'])
+        extra = {'content_type': 'text/plain'}
+        obj = self.driver.upload_object_via_stream(container=container,
+                                                   object_name=object_name,
+                                                   iterator=iterator,
+                                                   extra=extra,
+                                                   ex_concurrency=3)
+
+        self.assertEqual(obj.name, object_name)
+        self.assertEqual(obj.size, CHUNK_SIZE * 3 + 1)
+        self.assertEqual(sorted(S3MockHttp.uploaded_parts), [1, 2, 3, 4])
+
+    def test_upload_object_in_parallel(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        self.mock_response_klass.type = 'MULTIPART'
+
+        file_path = os.path.abspath(__file__) + '.temp'
+
+        with open(file_path, 'wb') as fp:
+            fp.write(b('1' * (CHUNK_SIZE * 2 + 10)))
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        obj = self.driver.upload_object(file_path=file_path,
+                                        container=container,
+                                        object_name='foo_test_stream_data',
+                                        ex_part_size=CHUNK_SIZE,
+                                        ex_concurrency=2)
+
+        self.assertEqual(obj.size, CHUNK_SIZE * 2 + 10)
+        self.assertEqual(sorted(S3MockHttp.uploaded_parts), [1, 2, 3])
+
+    def test_upload_object_via_stream_invalid_part_size(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        self.assertRaises(ValueError, self.driver.upload_object_via_stream,
+                          container=container,
+                          object_name='foo_test_stream_data',
+                          iterator=DummyIterator(data=['2']),
+                          ex_part_size=1024)
+
+    def test_upload_object_via_stream_resume(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        self.mock_response_klass.type = 'MULTIPART'
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        object_name = 'foo_test_stream_data'
+        upload_id = self.driver.ex_initiate_multipart_upload(
+            container=container, object_name=object_name)
+        self.assertEqual(
+            upload_id,
+            'VXBsb2FkIElEIGZvciA2aWWpbmcncyBteS1tb3ZpZS5tMnRzIHVwbG9hZA')
+
+        parts = self.driver.ex_list_multipart_upload_parts(
+            container=container, object_name=object_name,
+            upload_id=upload_id)
+        self.assertEqual(sorted(parts.keys()), [1, 2])
+        self.assertEqual(parts[1], ('"267c038cc2ec32ffd0ee2512ff5da5a5"',
+                                    CHUNK_SIZE))
+
+        # Part 1 matches the data and is skipped, part 2 doesn't match
+        # and is uploaded again
+        iterator = DummyIterator(
+            data=['2' * CHUNK_SIZE, '3' * CHUNK_SIZE, '5'])
+        obj = self.driver.upload_object_via_stream(container=container,
+                                                   object_name=object_name,
+                                                   iterator=iterator,
+                                                   ex_upload_id=upload_id)
+
+        self.assertEqual(obj.size, CHUNK_SIZE * 2 + 1)
+        self.assertEqual(S3MockHttp.uploaded_parts, [2, 3])
+
+    def test_upload_part_is_retried(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        self.mock_response_klass.type = 'MULTIPART_RETRY'
+        self.driver.multipart_retry_delay = 0
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        iterator = DummyIterator(data=['2' * CHUNK_SIZE, '3'])
+        obj = self.driver.upload_object_via_stream(
+            container=container, object_name='foo_test_stream_data',
+            iterator=iterator)
+
+        self.assertEqual(obj.size, CHUNK_SIZE + 1)
+        self.assertEqual(sorted(S3MockHttp.failed_parts), ['1', '2'])
+        self.assertEqual(S3MockHttp.uploaded_parts, [1, 2])
+
+    def test_upload_part_retries_exhausted(self):
+        if not self.driver.supports_s3_multipart_upload:
+            return
+
+        self.mock_response_klass.type = 'MULTIPART_RETRY'
+        self.driver.multipart_retry_delay = 0
+        self.driver.multipart_part_retries = 0
+
+        container = Container(name='foo_bar_container', extra={},
+                              driver=self.driver)
+        iterator = DummyIterator(data=['2' * CHUNK_SIZE, '3'])
+        self.assertRaises(Exception, self.driver.upload_object_via_stream,
+                          container=container,
+                          object_name='foo_test_stream_data',
+                          iterator=iterator)
+        self.assertEqual(S3MockHttp.uploaded_parts, [])
+
     def test_s3_list_multipart_uploads(self):
         if not self.driver.supports_s3_multipart_upload:
             return
@@ -25,6 +25,8 @@ import libcloud.security
 
 from libcloud.utils.py3 import reload
 from libcloud.httplib_ssl import LibcloudHTTPSConnection
+from libcloud.httplib_ssl import get_ssl_context
+from libcloud.httplib_ssl import get_ssl_stats, reset_ssl_stats
 
 from libcloud.test import unittest
 
@@ -109,11 +111,12 @@ class TestHttpLibSSLTests(unittest.TestCase):
 
     @mock.patch('socket.create_connection', mock.MagicMock())
     @mock.patch('socket.socket', mock.MagicMock())
-    @mock.patch('ssl.wrap_socket')
-    def test_connect_throws_friendly_error_message_on_ssl_wrap_connection_reset_by_peer(self, mock_wrap_socket):
+    @mock.patch('libcloud.httplib_ssl.get_ssl_context')
+    def test_connect_throws_friendly_error_message_on_ssl_wrap_connection_reset_by_peer(self, mock_get_ssl_context):
         # Test that we re-throw a more friendly error message in case
         # "connection reset by peer" error occurs when trying to establish a
         # SSL connection
+        mock_wrap_socket = mock_get_ssl_context.return_value.wrap_socket
         libcloud.security.VERIFY_SSL_CERT = True
         self.httplib_object.verify = True
         self.httplib_object.http_proxy_used = False
@@ -152,6 +155,53 @@ class TestHttpLibSSLTests(unittest.TestCase):
         self.assertEqual(e.errno, 105)
         self.assertTrue('Some random error' in str(e))
 
+    @patch.dict('libcloud.httplib_ssl._ssl_contexts', {})
+    @patch('ssl.SSLContext')
+    def test_get_ssl_context_is_cached(self, mock_ssl_context):
+        context1 = get_ssl_context(ca_cert='/ca.crt', ssl_version=2)
+        context2 = get_ssl_context(ca_cert='/ca.crt', ssl_version=2)
+        self.assertTrue(context1 is context2)
+
+        # Trust roots are only loaded once
+        self.assertEqual(mock_ssl_context.call_count, 1)
+        context1.load_verify_locations.assert_called_once_with('/ca.crt')
+
+        get_ssl_context(ca_cert='/ca.crt', cert_file='/client.crt',
+                        key_file='/client.key', ssl_version=2)
+        self.assertEqual(mock_ssl_context.call_count, 2)
+        self.assertEqual(get_ssl_stats()['contexts'], 2)
+
+    @patch.dict('libcloud.httplib_ssl._ssl_sessions', {})
+    @patch('libcloud.httplib_ssl.match_hostname', mock.Mock())
+    @patch('socket.create_connection', mock.MagicMock())
+    @patch('libcloud.httplib_ssl.get_ssl_context')
+    def test_connect_resumes_tls_session(self, mock_get_ssl_context):
+        libcloud.security.VERIFY_SSL_CERT = True
+        reset_ssl_stats()
+
+        wrap_socket = mock_get_ssl_context.return_value.wrap_socket
+        wrap_socket.side_effect = [
+            mock.Mock(session='session1', session_reused=False),
+            mock.Mock(session='session2', session_reused=True),
+        ]
+
+        for _ in range(2):
+            connection = LibcloudHTTPSConnection('foo.bar', proxy_url=None)
+            connection.connect()
+            connection.close()
+
+        self.assertEqual(wrap_socket.call_args_list[0][1],
+                         {'server_hostname': 'foo.bar'})
+        self.assertEqual(wrap_socket.call_args_list[1][1],
+                         {'server_hostname': 'foo.bar',
+                          'session': 'session1'})
+
+        stats = get_ssl_stats()
+        self.assertEqual(stats['handshakes'], 2)
+        self.assertEqual(stats['resumed_handshakes'], 1)
+        self.assertEqual(stats['sessions'], 1)
+        self.assertTrue(stats['handshake_time'] >= 0)
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
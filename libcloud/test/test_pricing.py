@@ -13,11 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import os.path
 import sys
+import json
+import shutil
+import tempfile
 import unittest
 
+from mock import patch
+
 import libcloud.pricing
+from libcloud.compute.base import NodeSize
+from libcloud.pricing import PricingIndex, get_pricing_index
 
 PRICING_FILE_PATH = os.path.join(os.path.dirname(__file__), 'pricing_test.json')
 
@@ -102,5 +110,124 @@ class PricingTestCase(unittest.TestCase):
                                      pricing={'foo': 1})
         self.assertTrue('foo' in libcloud.pricing.PRICING_DATA['compute'])
 
+
+class PricingIndexTestCase(unittest.TestCase):
+    pricing_data = {
+        'compute': {
+            'ec2_us_east': {'m1.small': 0.044, 'm1.large': '0.175',
+                            'unknown': 'n/a'},
+            'ec2_eu_west': {'m1.small': 0.047, 'm1.large': 0.19},
+            'foo': {'1': 0.5}
+        }
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pricing_file_path = os.path.join(self.tmp_dir, 'pricing.json')
+        self._write_pricing_file(self.pricing_data)
+
+        patcher = patch('libcloud.pricing.CUSTOM_PRICING_FILE_PATH',
+                        self.pricing_file_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch('libcloud.pricing.PRICING_FILE_CHECK_INTERVAL', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        libcloud.pricing.invalidate_pricing_cache()
+
+    def tearDown(self):
+        libcloud.pricing.invalidate_pricing_cache()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_pricing_file(self, data):
+        with open(self.pricing_file_path, 'w') as fp:
+            fp.write(json.dumps(data))
+
+    def test_build_and_query(self):
+        sizes = {'foo': [NodeSize(id='1', name='1', ram=512, disk=20,
+                                  bandwidth=None, price=None, driver=None,
+                                  extra={'cpu': 1}),
+                         NodeSize(id='2', name='2', ram=4096, disk=80,
+                                  bandwidth=None, price=2.0, driver=None)]}
+        index = PricingIndex.build(pricing_data=self.pricing_data,
+                                   sizes=sizes)
+
+        # Sizes without a valid price are skipped
+        self.assertEqual(len(index), 6)
+        self.assertEqual(index.get_price('ec2_us_east', 'm1.large'), 0.175)
+        self.assertEqual(index.get_price('ec2_us_east', 'unknown'), None)
+        self.assertEqual(index.get_price('foo', '2'), 2.0)
+
+        result = index.query(min_ram=1024)
+        self.assertEqual([(size.driver_name, size.size_id) for size in result],
+                         [('ec2_us_east', 'm1.small'),
+                          ('ec2_eu_west', 'm1.small'),
+                          ('ec2_us_east', 'm1.large'),
+                          ('ec2_eu_west', 'm1.large'),
+                          ('foo', '2')])
+        self.assertEqual(result[0].ram, 1740)
+        self.assertEqual(result[-1].vcpus, None)
+
+        # Sizes with an unknown number of CPUs (m1.small) don't match
+        result = index.query(min_vcpus=1, max_price=0.5)
+        self.assertEqual([(size.driver_name, size.size_id) for size in result],
+                         [('ec2_us_east', 'm1.large'),
+                          ('ec2_eu_west', 'm1.large'),
+                          ('foo', '1')])
+
+        result = index.query(min_disk=100, drivers=['ec2_eu_west', 'bar'],
+                             limit=1)
+        self.assertEqual([(size.driver_name, size.size_id) for size in result],
+                         [('ec2_eu_west', 'm1.small')])
+
+    def test_save_and_load(self):
+        index = PricingIndex.build(pricing_data=self.pricing_data,
+                                   stamp=['pricing.json', 1, 2])
+        index_path = os.path.join(self.tmp_dir, 'pricing.index')
+        index.save(index_path)
+
+        loaded = PricingIndex.load(index_path)
+        self.assertEqual(loaded.stamp, ['pricing.json', 1, 2])
+        self.assertEqual(list(loaded.prices), list(index.prices))
+        self.assertEqual(repr(loaded.query(min_ram=1)),
+                         repr(index.query(min_ram=1)))
+        loaded.close()
+
+        with open(self.pricing_file_path, 'rb') as fp:
+            data = fp.read()
+
+        with open(index_path, 'wb') as fp:
+            fp.write(data)
+
+        self.assertRaises(ValueError, PricingIndex.load, index_path)
+
+    def test_hot_reload(self):
+        pricing = libcloud.pricing.get_pricing(driver_type='compute',
+                                               driver_name='foo')
+        self.assertEqual(pricing, {'1': 0.5})
+
+        index_path = os.path.join(self.tmp_dir, 'pricing.index')
+        index = get_pricing_index(index_path=index_path)
+        self.assertEqual(index.get_price('foo', '1'), 0.5)
+        self.assertTrue(get_pricing_index(index_path=index_path) is index)
+
+        # Existing up to date index file is reused
+        libcloud.pricing.invalidate_pricing_cache()
+        mtime = os.path.getmtime(index_path)
+        index = get_pricing_index(index_path=index_path)
+        self.assertEqual(os.path.getmtime(index_path), mtime)
+
+        self._write_pricing_file({'compute': {'foo': {'1': 0.75}}})
+        pricing = libcloud.pricing.get_pricing(driver_type='compute',
+                                               driver_name='foo')
+        self.assertEqual(pricing, {'1': 0.75})
+
+        index = get_pricing_index(index_path=index_path)
+        self.assertEqual(index.get_price('foo', '1'), 0.75)
+        self.assertEqual(get_pricing_index().get_price('foo', '1'), 0.75)
+
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
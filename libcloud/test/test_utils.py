@@ -14,13 +14,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from __future__ import with_statement
+
 import sys
+import time
 import socket
+import threading
+import zlib
 import codecs
 import unittest
 import warnings
 import os.path
 
+from io import BytesIO
 from itertools import chain
 
 # In Python > 2.7 DeprecationWarnings are disabled by default
@@ -44,6 +50,10 @@ from libcloud.utils.networking import is_private_subnet
 from libcloud.utils.networking import is_valid_ip_address
 from libcloud.utils.networking import join_ipv4_segments
 from libcloud.utils.networking import increment_ipv4_segments
+from libcloud.utils.concurrency import Future, ThreadPool, wait
+from libcloud.utils.concurrency import map_with_workers
+from libcloud.utils.xml import iterparse_items
+from libcloud.utils.compression import DecompressingReader
 from libcloud.storage.drivers.dummy import DummyIterator
 
 
@@ -218,6 +228,78 @@ class TestUtils(unittest.TestCase):
 
             self.assertEqual(index, 548)
 
+    def test_read_in_chunks_readinto(self):
+        data = b('abcdefghij' * 100)
+
+        chunks = list(libcloud.utils.files.read_in_chunks(
+            BytesIO(data), chunk_size=300, fill_size=True))
+        self.assertEqual([len(chunk) for chunk in chunks],
+                         [300, 300, 300, 100])
+        self.assertEqual(b('').join(chunks), data)
+
+        class SlowStream(object):
+            # Returns at most 7 bytes per call
+            def __init__(self, data):
+                self.stream = BytesIO(data)
+
+            def readinto(self, buf):
+                chunk = self.stream.read(min(7, len(buf)))
+                buf[:len(chunk)] = chunk
+                return len(chunk)
+
+        chunks = list(libcloud.utils.files.read_in_chunks(
+            SlowStream(data), chunk_size=300, fill_size=True))
+        self.assertEqual([len(chunk) for chunk in chunks],
+                         [300, 300, 300, 100])
+        self.assertEqual(b('').join(chunks), data)
+
+        chunks = list(libcloud.utils.files.read_in_chunks(
+            SlowStream(data), chunk_size=300, fill_size=False))
+        self.assertTrue(all([len(chunk) <= 7 for chunk in chunks]))
+        self.assertEqual(b('').join(chunks), data)
+
+    def test_read_in_chunks_socket(self):
+        sock1, sock2 = socket.socketpair()
+
+        try:
+            sock1.sendall(b('a' * 1000))
+            sock1.close()
+
+            chunks = list(libcloud.utils.files.read_in_chunks(
+                sock2, chunk_size=400, fill_size=True))
+            self.assertEqual([len(chunk) for chunk in chunks],
+                             [400, 400, 200])
+        finally:
+            sock2.close()
+
+    def test_read_in_chunks_fill_size_uneven_pieces(self):
+        def iterator():
+            for size in [1, 9, 25, 3, 0]:
+                yield 'x' * size
+
+        chunks = list(libcloud.utils.files.read_in_chunks(
+            iterator(), chunk_size=10, fill_size=True))
+        self.assertEqual(chunks, [b('x' * 10), b('x' * 10), b('x' * 10),
+                                  b('x' * 8)])
+
+    def test_read_in_chunks_buffer(self):
+        buf = bytearray(10)
+        data = b('0123456789' * 3 + '01')
+
+        for iterator in [BytesIO(data), iter([data[:15], data[15:]])]:
+            chunks = []
+
+            for chunk in libcloud.utils.files.read_in_chunks(
+                    iterator, fill_size=True, buffer=buf):
+                self.assertTrue(isinstance(chunk, memoryview))
+                chunks.append(chunk.tobytes())
+
+            self.assertEqual(chunks, [b('0123456789')] * 3 + [b('01')])
+
+        self.assertRaises(ValueError, list,
+                          libcloud.utils.files.read_in_chunks(
+                              BytesIO(data), chunk_size=20, buffer=buf))
+
     def test_exhaust_iterator(self):
         def iterator_func():
             for x in range(0, 1000):
@@ -381,5 +463,209 @@ class NetworkingUtilsTestCase(unittest.TestCase):
             self.assertEqual(result, incremented_ip)
 
 
+class ConcurrencyUtilsTestCase(unittest.TestCase):
+    def test_future_result(self):
+        future = Future()
+        self.assertFalse(future.done())
+        self.assertRaises(RuntimeError, future.result, timeout=0.01)
+
+        called = []
+        future.add_done_callback(called.append)
+        future.set_result(5)
+
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), 5)
+        self.assertEqual(future.exception(), None)
+        self.assertEqual(called, [future])
+
+        # Callbacks added after completion are called immediately
+        future.add_done_callback(called.append)
+        self.assertEqual(len(called), 2)
+
+    def test_future_exception(self):
+        future = Future()
+        future.set_exception(ValueError('test'))
+
+        self.assertTrue(isinstance(future.exception(), ValueError))
+        self.assertRaises(ValueError, future.result)
+
+    def test_thread_pool_map(self):
+        with ThreadPool(max_workers=3) as pool:
+            result = pool.map(lambda value: value * 2, range(10))
+
+        self.assertEqual(result, [value * 2 for value in range(10)])
+        self.assertTrue(len(pool._workers) <= 3)
+
+    def test_thread_pool_exception(self):
+        def func(value):
+            if value == 3:
+                raise ValueError('invalid value')
+
+            return value
+
+        with ThreadPool(max_workers=2) as pool:
+            self.assertRaises(ValueError, pool.map, func, range(5))
+
+    def test_thread_pool_max_pending(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'max_running': 0}
+
+        def func(value):
+            with lock:
+                state['running'] += 1
+                state['max_running'] = max(state['running'],
+                                           state['max_running'])
+
+            time.sleep(0.01)
+
+            with lock:
+                state['running'] -= 1
+
+        pool = ThreadPool(max_workers=4, max_pending=2)
+        futures = [pool.submit(func, value) for value in range(6)]
+        pool.shutdown(wait=True)
+
+        self.assertTrue(all([future.done() for future in futures]))
+        self.assertTrue(state['max_running'] <= 2)
+        self.assertRaises(RuntimeError, pool.submit, func, 1)
+
+    def test_map_with_workers(self):
+        lock = threading.Lock()
+        used = set()
+        state = {'in_use': set(), 'shared': False}
+
+        def func(worker, value):
+            with lock:
+                # The same worker is never used by two calls at the same time
+                state['shared'] = state['shared'] or \
+                    worker in state['in_use']
+                state['in_use'].add(worker)
+                used.add(worker)
+
+            time.sleep(0.001)
+
+            with lock:
+                state['in_use'].discard(worker)
+
+            return value * 2
+
+        items = (value for value in range(20))
+        result = map_with_workers(func, items, workers=['a', 'b', 'c'])
+
+        self.assertEqual(result, [value * 2 for value in range(20)])
+        self.assertFalse(state['shared'])
+        self.assertTrue(used <= set(['a', 'b', 'c']))
+
+        # Single worker is used in the current thread
+        threads = []
+        result = map_with_workers(
+            lambda worker, value: threads.append(threading.current_thread()),
+            range(3), workers=['a'])
+        self.assertEqual(threads, [threading.current_thread()] * 3)
+
+        self.assertRaises(ValueError, map_with_workers, func, [1], [])
+
+    def test_map_with_workers_error_stops_consuming_items(self):
+        consumed = []
+
+        def items():
+            for value in range(100):
+                consumed.append(value)
+                yield value
+
+        def func(worker, value):
+            if value == 2:
+                raise ValueError('invalid value')
+
+            time.sleep(0.001)
+            return value
+
+        self.assertRaises(ValueError, map_with_workers, func, items(),
+                          workers=[1, 2])
+        self.assertTrue(len(consumed) < 100)
+
+    def test_wait(self):
+        futures = [Future() for _ in range(3)]
+        futures[1].set_result(1)
+
+        done, not_done = wait(futures, count=1)
+        self.assertEqual(done, [futures[1]])
+        self.assertEqual(not_done, [futures[0], futures[2]])
+
+        # Timeout is reached before all the futures complete
+        done, not_done = wait(futures, timeout=0.01)
+        self.assertEqual(len(done), 1)
+
+        timer = threading.Timer(0.01, futures[2].set_result, args=(2, ))
+        timer.start()
+        done, not_done = wait(futures, count=2, timeout=5)
+        self.assertEqual(done, [futures[1], futures[2]])
+
+        futures[0].set_exception(ValueError())
+        done, not_done = wait(futures)
+        self.assertEqual((len(done), not_done), (3, []))
+
+
+class XMLUtilsTestCase(unittest.TestCase):
+    def test_element_tree_import(self):
+        # On Python 2 an implicit relative import in libcloud/utils/xml.py
+        # would resolve "xml.etree" to the module itself
+        from libcloud.utils import xml as xml_utils
+        self.assertTrue(xml_utils.ET.__name__ in ['lxml.etree',
+                                                  'xml.etree.ElementTree'])
+        self.assertTrue(hasattr(xml_utils.ET, 'iterparse'))
+
+        for name in ['libcloud.common.aws', 'libcloud.compute.drivers.ec2',
+                     'libcloud.storage.drivers.s3',
+                     'libcloud.dns.drivers.route53']:
+            __import__(name)
+
+    def test_iterparse_items(self):
+        data = b('<Response xmlns="http://example.com/doc/">'
+                 '<requestId>1</requestId>'
+                 '<itemSet><item><id>a</id><tagSet><item>t</item></tagSet>'
+                 '</item><item><id>b</id></item></itemSet>'
+                 '<nextToken>token</nextToken>'
+                 '</Response>')
+        values = {}
+        items = iterparse_items(BytesIO(data), xpath='itemSet/item',
+                                values=values)
+
+        first = next(items)
+        self.assertEqual(first.find('{http://example.com/doc/}id').text, 'a')
+        self.assertEqual(len(first.findall('.//{http://example.com/doc/}item')),
+                         1)
+        self.assertEqual(values, {'requestId': '1'})
+
+        second = next(items)
+        self.assertEqual(second.find('{http://example.com/doc/}id').text, 'b')
+
+        # Previous element has been discarded
+        self.assertEqual(len(first), 0)
+
+        self.assertEqual(list(items), [])
+        self.assertEqual(values, {'requestId': '1', 'nextToken': 'token'})
+
+
+class CompressionUtilsTestCase(unittest.TestCase):
+    def test_decompressing_reader(self):
+        data = b('libcloud ') * 1000
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        gzipped = compressor.compress(data) + compressor.flush()
+
+        values = [('zlib', zlib.compress(data)), ('gzip', gzipped)]
+
+        for compression_type, compressed in values:
+            reader = DecompressingReader(BytesIO(compressed),
+                                         compression_type=compression_type,
+                                         chunk_size=16)
+            self.assertEqual(reader.read(9), b('libcloud '))
+            self.assertEqual(reader.read(), data[9:])
+            self.assertEqual(reader.read(10), b(''))
+
+        self.assertRaises(Exception, DecompressingReader, BytesIO(),
+                          'bzip2')
+
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -21,9 +21,13 @@ from libcloud.utils.py3 import StringIO
 
 
 __all__ = [
-    'decompress_data'
+    'decompress_data',
+    'DecompressingReader'
 ]
 
+# Number of compressed bytes read from the underlying stream at once
+READ_CHUNK_SIZE = 64 * 1024
+
 
 def decompress_data(compression_type, data):
     if compression_type == 'zlib':
@@ -40,3 +44,50 @@ def decompress_data(compression_type, data):
     else:
         raise Exception('Invalid or onsupported compression type: %s' %
                         (compression_type))
+
+
+class DecompressingReader(object):
+    """
+    File-like object which incrementally decompresses data read from another
+    file-like object (e.g. a HTTP response).
+    """
+
+    def __init__(self, fileobj, compression_type, chunk_size=READ_CHUNK_SIZE):
+        """
+        :param fileobj: File-like object with the compressed data.
+        :type fileobj: ``file``
+
+        :param compression_type: Compression type (``zlib`` or ``gzip``).
+        :type compression_type: ``str``
+        """
+        if compression_type == 'zlib':
+            wbits = zlib.MAX_WBITS
+        elif compression_type == 'gzip':
+            wbits = 16 + zlib.MAX_WBITS
+        else:
+            raise Exception('Invalid or onsupported compression type: %s' %
+                            (compression_type))
+
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self._decompressor = zlib.decompressobj(wbits)
+        self._buffer = b''
+        self._eof = False
+
+    def read(self, size=-1):
+        while not self._eof and (size is None or size < 0 or
+                                 len(self._buffer) < size):
+            chunk = self.fileobj.read(self.chunk_size)
+
+            if chunk:
+                self._buffer += self._decompressor.decompress(chunk)
+            else:
+                self._buffer += self._decompressor.flush()
+                self._eof = True
+
+        if size is None or size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+
+        return data
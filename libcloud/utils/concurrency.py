@@ -0,0 +1,385 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Minimal thread pool and future primitives which work on all the Python
+versions supported by Libcloud.
+"""
+
+from __future__ import with_statement
+
+import sys
+import time
+import threading
+
+from libcloud.utils.py3 import queue
+
+__all__ = [
+    'Future',
+    'ThreadPool',
+
+    'map_with_workers',
+    'wait'
+]
+
+
+class Future(object):
+    """
+    Result of an asynchronous operation.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        """
+        Return True if the operation has completed (successfully or not).
+
+        :rtype: ``bool``
+        """
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """
+        Wait for the operation to complete and return its result. If the
+        operation failed, the original exception is re-raised.
+
+        :param timeout: How many seconds to wait (defaults to no limit).
+        :type timeout: ``float``
+        """
+        self._wait(timeout=timeout)
+
+        if self._exc_info:
+            raise self._exc_info[1]
+
+        return self._result
+
+    def exception(self, timeout=None):
+        """
+        Wait for the operation to complete and return the exception it raised
+        or None if it completed successfully.
+
+        :param timeout: How many seconds to wait (defaults to no limit).
+        :type timeout: ``float``
+        """
+        self._wait(timeout=timeout)
+
+        if self._exc_info:
+            return self._exc_info[1]
+
+        return None
+
+    def add_done_callback(self, callback):
+        """
+        Register a callback which is called with this future as the only
+        argument once the operation completes. If the operation has already
+        completed, the callback is called immediately.
+
+        :param callback: Callable.
+        :type callback: ``callable``
+        """
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+
+        callback(self)
+
+    def set_result(self, result):
+        self._result = result
+        self._complete()
+
+    def set_exception(self, exc, exc_info=None):
+        if exc_info is None:
+            exc_info = (exc.__class__, exc, None)
+
+        self._exc_info = exc_info
+        self._complete()
+
+    def _complete(self):
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                pass
+
+    def _wait(self, timeout=None):
+        if not self._event.wait(timeout):
+            # Note: On Python 2.6 and lower wait() always returns None
+            if not self._event.is_set():
+                raise RuntimeError('Operation did not complete in %s '
+                                   'seconds' % (timeout))
+
+
+class ThreadPool(object):
+    """
+    Fixed size pool of worker threads.
+
+    ``max_pending`` limits the number of submitted tasks which haven't
+    completed yet. Once the limit is reached, :meth:`submit` blocks until one
+    of the tasks completes. This can be used to bound the memory used by the
+    task arguments (e.g. data chunks which are being uploaded).
+    """
+
+    def __init__(self, max_workers, max_pending=None):
+        """
+        :param max_workers: Maximum number of worker threads.
+        :type max_workers: ``int``
+
+        :param max_pending: Maximum number of tasks which have been submitted
+                            but haven't completed yet (defaults to no limit).
+        :type max_pending: ``int``
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be greater than 0')
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+        self._tasks = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+        if max_pending:
+            self._pending = threading.Semaphore(max_pending)
+        else:
+            self._pending = None
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Schedule ``func(*args, **kwargs)`` to run in one of the worker threads.
+
+        :return: Future which holds the function result.
+        :rtype: :class:`Future`
+        """
+        if self._shutdown:
+            raise RuntimeError('Cannot submit tasks after shutdown')
+
+        if self._pending is not None:
+            self._pending.acquire()
+
+        future = Future()
+        self._tasks.put((future, func, args, kwargs))
+        self._start_worker()
+        return future
+
+    def map(self, func, items):
+        """
+        Call ``func`` with every item and return a list of results in the same
+        order as the items. The first exception raised by any of the calls is
+        re-raised.
+
+        :rtype: ``list``
+        """
+        futures = [self.submit(func, item) for item in items]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        """
+        Stop the worker threads once all the submitted tasks have completed.
+
+        :param wait: True to wait for the worker threads to finish.
+        :type wait: ``bool``
+        """
+        with self._lock:
+            self._shutdown = True
+            workers = list(self._workers)
+
+        for _ in workers:
+            self._tasks.put(None)
+
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True)
+        return False
+
+    def _start_worker(self):
+        with self._lock:
+            if len(self._workers) >= self.max_workers:
+                return
+
+            worker = threading.Thread(target=self._worker)
+            worker.daemon = True
+            self._workers.append(worker)
+
+        worker.start()
+
+    def _worker(self):
+        while True:
+            item = self._tasks.get()
+
+            if item is None:
+                break
+
+            future, func, args, kwargs = item
+
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                exc_info = sys.exc_info()
+                future.set_exception(exc_info[1], exc_info=exc_info)
+            else:
+                future.set_result(result)
+            finally:
+                if self._pending is not None:
+                    self._pending.release()
+
+
+def wait(futures, count=None, timeout=None):
+    """
+    Wait until ``count`` of the provided futures have completed.
+
+    :param futures: Futures to wait for.
+    :type futures: ``list`` of :class:`Future`
+
+    :param count: Number of futures to wait for (defaults to all of them).
+                  ``1`` means the function returns as soon as any of the
+                  futures has completed.
+    :type count: ``int``
+
+    :param timeout: How many seconds to wait (defaults to no limit).
+    :type timeout: ``float``
+
+    :return: Tuple of completed and not completed futures (both in the same
+             order as ``futures``). Fewer than ``count`` futures are
+             returned as completed if the timeout has been reached.
+    :rtype: ``tuple`` of (``list``, ``list``)
+    """
+    futures = list(futures)
+
+    if count is None:
+        count = len(futures)
+
+    count = min(count, len(futures))
+    condition = threading.Condition()
+
+    def notify(future):
+        with condition:
+            condition.notify_all()
+
+    for future in futures:
+        future.add_done_callback(notify)
+
+    end = None if timeout is None else time.time() + timeout
+
+    with condition:
+        while True:
+            done = [future for future in futures if future.done()]
+
+            if len(done) >= count:
+                break
+
+            if end is None:
+                delay = None
+            else:
+                delay = end - time.time()
+
+                if delay <= 0:
+                    break
+
+            condition.wait(delay)
+
+    done = [future for future in futures if future.done()]
+    not_done = [future for future in futures if not future.done()]
+    return done, not_done
+
+
+def map_with_workers(func, items, workers):
+    """
+    Call ``func(worker, item)`` for every item and return a list of results
+    in the same order as the items.
+
+    ``workers`` are objects which can't be shared between threads (e.g.
+    copies of a driver or of a connection). A thread is started for each of
+    them and every call gets a worker which isn't used by any other call at
+    the same time. If only a single worker is provided, the calls are made
+    in the current thread.
+
+    Items are consumed lazily and at most ``len(workers)`` of them are being
+    processed at any time, so ``items`` can be a generator which holds a lot
+    of data (e.g. chunks of an upload). Once any of the calls fails, no more
+    items are consumed, the calls which are in progress are waited on and
+    the first exception is re-raised.
+
+    :param func: Function which is called with a worker and an item.
+    :type func: ``callable``
+
+    :param items: Items to process.
+    :type items: ``iterable``
+
+    :param workers: Objects passed to ``func`` (at least one).
+    :type workers: ``list``
+
+    :rtype: ``list``
+    """
+    workers = list(workers)
+
+    if not workers:
+        raise ValueError('At least one worker must be provided')
+
+    if len(workers) == 1:
+        return [func(workers[0], item) for item in items]
+
+    available = queue.Queue()
+    errors = []
+
+    for worker in workers:
+        available.put(worker)
+
+    def call(item):
+        worker = available.get()
+
+        try:
+            return func(worker, item)
+        finally:
+            available.put(worker)
+
+    def on_done(future):
+        if future.exception() is not None:
+            errors.append(future.exception())
+
+    futures = []
+    pool = ThreadPool(max_workers=len(workers), max_pending=len(workers))
+
+    try:
+        for item in items:
+            if errors:
+                break
+
+            future = pool.submit(call, item)
+            future.add_done_callback(on_done)
+            futures.append(future)
+    finally:
+        pool.shutdown(wait=True)
+
+    if errors:
+        raise errors[0]
+
+    return [future.result() for future in futures]
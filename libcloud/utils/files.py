@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import os
 import mimetypes
 
@@ -34,15 +35,22 @@ __all__ = [
 
 
 def read_in_chunks(iterator, chunk_size=None, fill_size=False,
-                   yield_empty=False):
+                   yield_empty=False, buffer=None):
     """
     Return a generator which yields data in chunks.
 
+    File like objects are read using ``read``, sockets using ``recv_into``
+    and iterators using the iterator protocol. If a buffer is provided,
+    data is read directly into it using ``readinto`` where supported. Data is
+    never re-copied when chunks are assembled so the time it takes to read
+    the data is linear regardless of the chunk size.
+
     :param iterator: An object which implements an iterator interface
                      or a File like object with read method.
     :type iterator: :class:`object` which implements iterator interface.
 
-    :param chunk_size: Optional chunk size (defaults to CHUNK_SIZE)
+    :param chunk_size: Optional chunk size (defaults to CHUNK_SIZE or to the
+                       buffer size if a buffer is provided)
     :type chunk_size: ``int``
 
     :param fill_size: If True, make sure chunks are exactly chunk_size in
@@ -50,48 +58,52 @@ def read_in_chunks(iterator, chunk_size=None, fill_size=False,
     :type fill_size: ``bool``
 
     :param yield_empty: If true and iterator returned no data, yield empty
-                        bytes object before raising StopIteration.
+                        bytes object before stopping the iteration.
     :type yield_empty: ``bool``
 
-    TODO: At some point in the future we could use byte arrays here if version
-    >= Python 3. This should speed things up a bit and reduce memory usage.
+    :param buffer: Optional preallocated ``bytearray`` which is reused for
+                   all the chunks. If provided, ``memoryview`` objects which
+                   point into this buffer are yielded instead of bytes. Each
+                   view is only valid until the next chunk is requested.
+    :type buffer: ``bytearray``
     """
-    chunk_size = chunk_size or CHUNK_SIZE
+    if buffer is not None:
+        chunk_size = chunk_size or len(buffer)
 
-    if isinstance(iterator, (file, httplib.HTTPResponse)):
-        get_data = iterator.read
-        args = (chunk_size, )
-    else:
-        get_data = next
-        args = (iterator, )
+        if chunk_size > len(buffer):
+            raise ValueError('chunk_size is larger than the buffer')
 
-    data = b('')
-    empty = False
+    chunk_size = chunk_size or CHUNK_SIZE
 
-    while not empty or len(data) > 0:
-        if not empty:
-            try:
-                chunk = b(get_data(*args))
-                if len(chunk) > 0:
-                    data += chunk
-                else:
-                    empty = True
-            except StopIteration:
-                empty = True
+    readinto = None
 
-        if len(data) == 0:
-            if empty and yield_empty:
-                yield b('')
+    if buffer is not None or not hasattr(iterator, 'read'):
+        # read() on file like objects returns a new bytes object without an
+        # extra copy, readinto() is only beneficial if a buffer is reused
+        readinto = _get_readinto(iterator)
 
-            raise StopIteration
+    if readinto is not None:
+        chunks = _readinto_chunks(readinto=readinto, chunk_size=chunk_size,
+                                  fill_size=fill_size, buffer=buffer)
+    else:
+        pieces = _iter_pieces(iterator=iterator, chunk_size=chunk_size)
 
-        if fill_size:
-            if empty or len(data) >= chunk_size:
-                yield data[:chunk_size]
-                data = data[chunk_size:]
+        if buffer is not None:
+            chunks = _buffer_chunks(pieces=pieces, chunk_size=chunk_size,
+                                    fill_size=fill_size, buffer=buffer)
+        elif fill_size:
+            chunks = _fill_chunks(pieces=pieces, chunk_size=chunk_size)
         else:
-            yield data
-            data = b('')
+            chunks = pieces
+
+    empty = True
+
+    for chunk in chunks:
+        empty = False
+        yield chunk
+
+    if empty and yield_empty:
+        yield b('')
 
 
 def exhaust_iterator(iterator):
@@ -105,22 +117,181 @@ def exhaust_iterator(iterator):
     :rtype ``str``
     :return Data returned by the iterator.
     """
-    data = b('')
+    chunks = []
+
+    for chunk in _iter_pieces(iterator=iterator, chunk_size=CHUNK_SIZE,
+                              use_read=False):
+        chunks.append(chunk)
+
+    return b('').join(chunks)
+
+
+def _get_readinto(iterator):
+    """
+    Return a function which reads data from the provided object into a
+    writable buffer or None if the object doesn't support it.
+    """
+    if hasattr(iterator, 'recv_into'):
+        # Socket
+        return iterator.recv_into
+
+    readinto = getattr(iterator, 'readinto', None)
+
+    if readinto is None:
+        return None
+
+    if not PY3 and not isinstance(iterator, io.IOBase):
+        # Python 2 file objects don't support memoryview
+        return None
+
+    # Subclasses which override read() (e.g. to transform the data) need to
+    # be read using read()
+    read_cls = _get_defining_class(type(iterator), 'read')
+    readinto_cls = _get_defining_class(type(iterator), 'readinto')
+
+    if read_cls is not None and readinto_cls is not None and \
+            read_cls is not readinto_cls and \
+            issubclass(read_cls, readinto_cls):
+        return None
+
+    return readinto
+
+
+def _get_defining_class(cls, name):
+    for klass in getattr(cls, '__mro__', ()):
+        if name in klass.__dict__:
+            return klass
+
+    return None
+
+
+def _iter_pieces(iterator, chunk_size, use_read=True):
+    """
+    Yield non-empty pieces of data as returned by the provided object.
+    """
+    if use_read and isinstance(iterator, (file, io.IOBase,
+                                          httplib.HTTPResponse)):
+        while True:
+            data = b(iterator.read(chunk_size))
 
-    try:
-        chunk = b(next(iterator))
-    except StopIteration:
-        chunk = b('')
+            if not data:
+                return
 
-    while len(chunk) > 0:
-        data += chunk
+            yield data
+    else:
+        while True:
+            try:
+                data = b(next(iterator))
+            except StopIteration:
+                return
 
-        try:
-            chunk = b(next(iterator))
-        except StopIteration:
-            chunk = b('')
+            if not data:
+                return
+
+            yield data
 
-    return data
+
+def _fill_chunks(pieces, chunk_size):
+    """
+    Re-slice pieces of arbitrary length into chunks of exactly chunk_size
+    bytes (except for the last one).
+    """
+    pending = bytearray()
+
+    for data in pieces:
+        view = memoryview(data)
+        offset = 0
+
+        if pending:
+            # Complete the partial chunk left over from the previous pieces
+            offset = chunk_size - len(pending)
+            pending += view[:offset]
+
+            if len(pending) < chunk_size:
+                continue
+
+            yield bytes(pending)
+            pending = bytearray()
+
+        if offset == 0 and len(data) == chunk_size:
+            # Fast path, piece already has the right size
+            yield data
+            continue
+
+        while len(data) - offset >= chunk_size:
+            yield view[offset:offset + chunk_size].tobytes()
+            offset += chunk_size
+
+        if offset < len(data):
+            pending += view[offset:]
+
+    if pending:
+        yield bytes(pending)
+
+
+def _buffer_chunks(pieces, chunk_size, fill_size, buffer):
+    """
+    Copy pieces into the provided buffer and yield views of it.
+    """
+    view = memoryview(buffer)
+    position = 0
+
+    for data in pieces:
+        data = memoryview(data)
+        offset = 0
+
+        while offset < len(data):
+            size = min(chunk_size - position, len(data) - offset)
+            view[position:position + size] = data[offset:offset + size]
+            position += size
+            offset += size
+
+            if position == chunk_size:
+                yield view[:position]
+                position = 0
+
+        if not fill_size and position:
+            yield view[:position]
+            position = 0
+
+    if position:
+        yield view[:position]
+
+
+def _readinto_chunks(readinto, chunk_size, fill_size, buffer=None):
+    """
+    Read data directly into a (reused) buffer.
+    """
+    reuse_buffer = buffer is not None
+
+    if buffer is None:
+        buffer = bytearray(chunk_size)
+
+    view = memoryview(buffer)[:chunk_size]
+    eof = False
+
+    while not eof:
+        position = 0
+
+        while position < chunk_size:
+            size = readinto(view[position:])
+
+            if not size:
+                eof = True
+                break
+
+            position += size
+
+            if not fill_size:
+                break
+
+        if not position:
+            break
+
+        if reuse_buffer:
+            yield view[:position]
+        else:
+            yield view[:position].tobytes()
 
 
 def guess_file_mime_type(file_path):
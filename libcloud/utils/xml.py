@@ -13,11 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from __future__ import absolute_import
+
+try:
+    from lxml import etree as ET
+except ImportError:
+    from xml.etree import ElementTree as ET
+
 __all__ = [
     'fixxpath',
     'findtext',
     'findattr',
-    'findall'
+    'findall',
+    'iterparse_items'
 ]
 
 
@@ -48,3 +56,63 @@ def findattr(element, xpath, namespace=None):
 
 def findall(element, xpath, namespace=None):
     return element.findall(fixxpath(xpath=xpath, namespace=namespace))
+
+
+def iterparse_items(source, xpath, values=None):
+    """
+    Incrementally parse an XML document and return a generator of the
+    elements which match the provided path as soon as they are closed.
+
+    Each element is removed from the document once the next element has
+    been requested so the memory usage doesn't depend on the size of the
+    document. Namespaces are ignored when matching the path.
+
+    :param source: File-like object with the XML document.
+    :type source: ``file``
+
+    :param xpath: Path of the elements relative to the root element (tag
+                  names separated by ``/``, e.g. ``imagesSet/item``).
+    :type xpath: ``str``
+
+    :param values: Optional dictionary which is populated with the text of
+                   the direct children of the root element which don't have
+                   any children (e.g. ``nextToken``) as they are parsed.
+    :type values: ``dict``
+
+    :rtype: ``generator`` of ``Element``
+    """
+    target = xpath.split('/')
+    path = []
+    elements = []
+
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            path.append(element.tag.split('}', 1)[-1])
+            elements.append(element)
+            continue
+
+        relative = path[1:]
+
+        if relative == target:
+            yield element
+            discard = True
+        elif len(relative) == 1:
+            # Note: Ancestors of the matching elements are already empty
+            if values is not None and relative != target[:1] and \
+                    len(element) == 0:
+                values[relative[0]] = element.text
+
+            discard = True
+        else:
+            # Ancestors of the matching elements are discarded as well, the
+            # rest is discarded together with the matching element
+            discard = bool(relative) and relative == target[:len(relative)]
+
+        path.pop()
+        elements.pop()
+
+        if discard:
+            element.clear()
+
+            if elements:
+                elements[-1].remove(element)